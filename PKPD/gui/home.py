@@ -6,6 +6,9 @@ from PyQt5 import QtCore, QtWidgets, QtGui
 
 from PKPD.gui import abstractGui, mainWindow
 from PKPD.gui.utils.tableViewModel import PandasModel
+from PKPD.inference.censoring import split_censoring
+from PKPD.model.covariates import split_covariates
+from PKPD.model.modelBuilder import DOSE_ROUTES, ELIMINATIONS, build_model
 
 
 class HomeTab(abstractGui.AbstractHomeTab):
@@ -19,9 +22,9 @@ class HomeTab(abstractGui.AbstractHomeTab):
         self.main_window = main_window
         self.is_model_file_valid = False
         self.is_data_file_valid = False
-        self.library_directory = 'PKPD/modelRepository/'
-        self.model_file = None
+        self.model_file = None  # path to an .mmt file or a generated myokit.Model
         self.data_df = None
+        self.censoring_df = None  # LLOQ and BLQ flag columns of the data
 
         # arrange content
         grid = QtWidgets.QGridLayout()
@@ -128,14 +131,14 @@ class HomeTab(abstractGui.AbstractHomeTab):
         # create dosing options
         dose_options = self._create_dose_options()
 
-        # create transition rate options
-        transition_rate_options = self._create_transition_rate_options()
+        # create elimination options
+        elimination_options = self._create_elimination_options()
 
         # arrange vertically
         v_box = QtWidgets.QVBoxLayout()
         v_box.addLayout(compartment_options)
         v_box.addLayout(dose_options)
-        v_box.addLayout(transition_rate_options)
+        v_box.addLayout(elimination_options)
         v_box.addStretch(1)
         group.setLayout(v_box)
 
@@ -151,7 +154,7 @@ class HomeTab(abstractGui.AbstractHomeTab):
         label = QtWidgets.QLabel('number of compartments:')
 
         # define options
-        valid_numbers = ['1', '2']
+        valid_numbers = ['1', '2', '3', '4', '5']
 
         # create dropdown menu for options
         self.compartment_dropdown_menu = QtWidgets.QComboBox()
@@ -176,7 +179,7 @@ class HomeTab(abstractGui.AbstractHomeTab):
         label = QtWidgets.QLabel('dose type:')
 
         # define options
-        valid_types = ['bolus', 'subcut']
+        valid_types = DOSE_ROUTES
 
         # create dropdown menu for options
         self.dose_type_dropdown_menu = QtWidgets.QComboBox()
@@ -191,28 +194,28 @@ class HomeTab(abstractGui.AbstractHomeTab):
 
         return h_box
 
-    def _create_transition_rate_options(self):
-        """Creates transition rates dropdown menu.
+    def _create_elimination_options(self):
+        """Creates elimination dropdown menu.
 
         Returns:
             {QHBoxLayout} -- Returns dropdown menu with label.
         """
         # create label
-        label = QtWidgets.QLabel('transition rates:')
+        label = QtWidgets.QLabel('elimination:')
 
         # define options
-        valid_rates = ['linear']
+        valid_eliminations = ELIMINATIONS
 
         # create dropdown menu for options
-        self.transition_rate_dropdown_menu = QtWidgets.QComboBox()
-        self.transition_rate_dropdown_menu.setMaximumWidth(self.dropdown_menu_width)
-        for transition_rate in valid_rates:
-            self.transition_rate_dropdown_menu.addItem(transition_rate)
+        self.elimination_dropdown_menu = QtWidgets.QComboBox()
+        self.elimination_dropdown_menu.setMaximumWidth(self.dropdown_menu_width)
+        for elimination in valid_eliminations:
+            self.elimination_dropdown_menu.addItem(elimination)
 
         # arrange label and dropdown menu horizontally
         h_box = QtWidgets.QHBoxLayout()
         h_box.addWidget(label)
-        h_box.addWidget(self.transition_rate_dropdown_menu)
+        h_box.addWidget(self.elimination_dropdown_menu)
 
         return h_box
 
@@ -430,8 +433,8 @@ class HomeTab(abstractGui.AbstractHomeTab):
 
     @QtCore.pyqtSlot()
     def on_model_select_click(self):
-        """Reaction to clicking the 'select model' button in the model selection window. Gets model file, updates the
-        model text field and the model display.
+        """Reaction to clicking the 'select model' button in the model selection window. Generates the model in memory,
+        updates the model text field and the model display.
         """
         # mark selected file as valid
         self.is_model_file_valid = True
@@ -440,17 +443,20 @@ class HomeTab(abstractGui.AbstractHomeTab):
         descriptives = [
             self.compartment_dropdown_menu.currentText(),
             self.dose_type_dropdown_menu.currentText(),
-            self.transition_rate_dropdown_menu.currentText()
+            self.elimination_dropdown_menu.currentText()
         ]
 
-        # reconstruct model file
-        self.model_file = self.library_directory + '_'.join(descriptives) + '.mmt'
+        # generate model, which replaces the model file
+        self.model_file = build_model(number_of_compartments=int(descriptives[0]),
+                                      dose_route=descriptives[1],
+                                      elimination=descriptives[2]
+                                      )
 
         # update QLineEdit in the GUI to selected file
         meta_data = [
             'No. Compartments: ',
             'Dose Type: ',
-            'Transition Rates: '
+            'Elimination: '
         ]
         text = ''
         for desc_id, descriptive in enumerate(descriptives):
@@ -462,9 +468,7 @@ class HomeTab(abstractGui.AbstractHomeTab):
         self.model_check_mark.setPixmap(self.main_window.rescaled_cm)
 
         # update model display
-        with open(self.model_file, 'r') as model_file:
-            contents = model_file.read()
-            self.model_display_text_field.setText(contents)
+        self.model_display_text_field.setText(self.model_file.code())
 
         # close select model window
         self.model_selection_window.close()
@@ -615,10 +619,12 @@ class HomeTab(abstractGui.AbstractHomeTab):
         return is_path_valid
 
     def _load_data(self, file_path):
-        """Load csv file as pandas dataframe and remove trailing empty columns.
+        """Load csv file as pandas dataframe, separate covariate and censoring columns and remove trailing empty
+        columns. Covariates are not supported by the GUI, so their columns are discarded.
         """
-        # load data
-        self.data_df = pd.read_csv(file_path, na_values=['.'])
+        # load data and separate covariates and censoring, such that the remaining columns are ID, time, states and dose
+        self.data_df, _ = split_covariates(pd.read_csv(file_path, na_values=['.']))
+        self.data_df, self.censoring_df = split_censoring(self.data_df)
 
         # get the last non-empty column
         is_last_column_empty = True
@@ -6,6 +6,8 @@ from typing import List
 from PyQt5 import QtCore, QtGui, QtWidgets
 
 from PKPD.inference import inference as inf
+from PKPD.inference.archive import EvaluationArchive
+from PKPD.inference.store import ResultsStore
 from PKPD.gui import abstractGui, home, simulation
 from PKPD.model import model as m
 
@@ -178,9 +180,8 @@ class MainWindow(abstractGui.AbstractMainWindow):
                 # plot data in simulation tab
                 self.simulation.add_data_to_data_model_plot()
 
-                # disable live plotting and line removal for the simulation
+                # disable live plotting for the simulation
                 self.simulation.enable_live_plotting = False
-                self.simulation.enable_line_removal = False
 
                 # instantiate model
                 if self.simulation.is_single_output_model:  # single output
@@ -272,6 +273,21 @@ class MainWindow(abstractGui.AbstractMainWindow):
                                                          values=self.simulation.state_data_container
                                                          )
 
+        # censor observations below their limit of quantification, if provided
+        if self.simulation.lloq_data_container is not None:
+            self.problem.set_censoring(lloq=self.simulation.lloq_data_container,
+                                       blq=self.simulation.blq_data_container
+                                       )
+
+        # reuse fits from previous sessions
+        self.problem.set_results_store(ResultsStore())
+
+        # share evaluations across restarts and optimisers selected in the inference options
+        evaluation_archive = EvaluationArchive(number_of_parameters=self.model.n_parameters(),
+                                               number_of_patients=number_of_patients
+                                               )
+        self.problem.set_evaluation_archive(evaluation_archive, seed=True)
+
     def _show_animated_logo(self):
         self.setWindowTitle(self.window_title)
         animation = self._create_PKPD_animation()
@@ -1,4 +1,5 @@
-from typing import List
+import os
+from typing import Dict, List
 
 import numpy as np
 import myokit
@@ -12,10 +13,21 @@ from PyQt5 import QtCore, QtWidgets
 from PyQt5.QtGui import QDoubleValidator
 
 from PKPD.gui.utils import slider as sl
+from PKPD.gui.utils.plotting import BlittedFigure, decimate, get_patient_colours
 from PKPD.inference import inference as inf
+from PKPD.inference.censoring import get_censored_observations
+from PKPD.inference.errorModels import ErrorModel
+from PKPD.inference.individualFits import IndividualFits
+from PKPD.inference.predictiveCheck import VisualPredictiveCheck
+from PKPD.inference.surrogate import SurrogateCMAES
 from PKPD.model import model as m
 
 
+# maximal number of displayed data points per subplot, which is split across patients
+MAX_DISPLAYED_POINTS = 20000
+MIN_DISPLAYED_POINTS_PER_PATIENT = 20
+
+
 class CollapsibleBox(QtWidgets.QWidget):
     """
     Class to provide custom collapsible menu boxes in PyQt5
@@ -95,6 +107,48 @@ class CollapsibleBox(QtWidgets.QWidget):
         content_animation.setEndValue(content_height)
 
 
+class PredictiveCheckWorker(QtCore.QObject):
+    """Worker that simulates the replicates of a visual predictive check, such that it can be moved to a separate
+    thread and the GUI remains responsive.
+    """
+    finished = QtCore.pyqtSignal()
+
+    def __init__(self, predictive_check: VisualPredictiveCheck, number_of_replicates: int):
+        super().__init__()
+        self.predictive_check = predictive_check
+        self.number_of_replicates = number_of_replicates
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        """Simulates the replicates and emits the finished signal.
+        """
+        self.predictive_check.run(number_of_replicates=self.number_of_replicates)
+        self.finished.emit()
+
+
+class IndividualFitsWorker(QtCore.QObject):
+    """Worker that fits the patients individually, such that it can be moved to a separate thread and the GUI remains
+    responsive.
+    """
+    finished = QtCore.pyqtSignal()
+
+    def __init__(self, individual_fits: IndividualFits, settings: Dict):
+        super().__init__()
+        self.individual_fits = individual_fits
+        self.settings = settings
+        self.error_message = None
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        """Fits the patients and emits the finished signal.
+        """
+        try:
+            self.individual_fits.run(**self.settings)
+        except Exception as e:
+            self.error_message = str(e)
+        self.finished.emit()
+
+
 class SimulationTab(QtWidgets.QDialog):
     """Simulation tab class that is responsible for plotting the data and the model, as well as providing the ability to
     infer an optimal set model parameters for the data set.
@@ -104,12 +158,22 @@ class SimulationTab(QtWidgets.QDialog):
         self.name = 'Simulation'
         self.main_window = main_window
         self.enable_live_plotting = False
-        self.enable_line_removal = False
         self.is_single_output_model = True
         self.parameter_values = None
         self.patient_ids = [1]  # default: just a single patient
         self.dose_schedule = None
+        self.lloq_data = None
+        self.blq_data = None
+        self.lloq_data_container = None
+        self.blq_data_container = None
         self.boundaries_are_on = True
+        self.is_initial_estimate_automatic = False
+        self.predictive_check = None
+        self.predictive_check_artists = []
+        self.individual_fits = None
+        self.model_lines = []
+        self.inferred_model_lines = []
+        self.blitted_figure = None
 
         # initialising the figure
         self.data_model_figure = Figure()
@@ -148,6 +212,15 @@ class SimulationTab(QtWidgets.QDialog):
             # reduce to unique IDs
             self.patient_ids = [1]
 
+        # get limits of quantification and below-limit flags, if available
+        censoring_df = self.main_window.home.censoring_df
+        if censoring_df is not None:
+            self.lloq_data = censoring_df['lloq'].to_numpy()
+            self.blq_data = censoring_df['blq'].to_numpy() if 'blq' in censoring_df else None
+        else:
+            self.lloq_data = None
+            self.blq_data = None
+
         # get dose schedule, if available
         if dose_schedule_label is not None:
             self.raw_dose_schedule = self.main_window.home.data_df[dose_schedule_label].to_numpy()
@@ -241,15 +314,25 @@ class SimulationTab(QtWidgets.QDialog):
                     self.dose_schedule.append([time_data, dose_data, duration_data])
 
     def filter_data(self):
-        """Filter time and state data from rows for which the state only contains NaNs.
+        """Filter time and state data from rows for which the state only contains NaNs. Observations censored below
+        their limit of quantification are kept, see PKPD.inference.censoring.get_censored_observations.
         """
         # initialise container for time and state data
         self.time_data_container = []
         self.state_data_container = []
+        self.lloq_data_container = None
+        self.blq_data_container = None
+
+        # flag censored observations, which are not missing
+        if self.lloq_data is not None:
+            is_censored = get_censored_observations(self.state_data, self.lloq_data, self.blq_data)
+        else:
+            is_censored = np.zeros(self.state_data.shape, dtype=bool)
+
         # if single output problem, remove all entries where state is NaN
         if self.is_single_output_model:
             # create NaN mask
-            mask = ~np.isnan(self.state_data)
+            mask = ~np.isnan(self.state_data) | is_censored
 
             # time and state data for non-NaN values
             self.time_data = self.time_data[mask]
@@ -262,7 +345,7 @@ class SimulationTab(QtWidgets.QDialog):
         # if multi output problem, remove only those rows where all state entries are NaN
         else:
             # create NaN mask
-            mask2d = ~np.isnan(self.state_data)
+            mask2d = ~np.isnan(self.state_data) | is_censored
             mask = np.all(mask2d, axis=1)
 
             # mask patient_id_mask, time and state data for non-NaN values
@@ -273,6 +356,14 @@ class SimulationTab(QtWidgets.QDialog):
             self.patient_ids_mask = self.patient_ids_mask[mask]
             self.patient_ids = np.unique(self.patient_ids_mask)
 
+        # keep limits of quantification and flags of the remaining rows
+        if self.lloq_data is not None:
+            self.lloq_data = self.lloq_data[mask]
+            self.lloq_data_container = []
+            if self.blq_data is not None:
+                self.blq_data = self.blq_data[mask]
+                self.blq_data_container = []
+
         # split time and date data into patients
         for patient_id in self.patient_ids:
             # create patient mask
@@ -281,6 +372,10 @@ class SimulationTab(QtWidgets.QDialog):
             # add patient specific data to container
             self.time_data_container.append(self.time_data[mask])
             self.state_data_container.append(self.state_data[mask])
+            if self.lloq_data is not None:
+                self.lloq_data_container.append(self.lloq_data[mask])
+            if self.blq_data is not None:
+                self.blq_data_container.append(self.blq_data[mask])
 
     def update_dose_schedule(self, schedule: List) -> None:
         """Update dose schedule.
@@ -292,102 +387,103 @@ class SimulationTab(QtWidgets.QDialog):
         if schedule is None:
             pass
 
-        # if dose schedule exist, create protocol and add dosing events to it
+        # if dose schedule exist, update protocol
         else:
-            # get time and dose data
-            time_data, dose_data, duration_data = schedule
+            self.main_window.model.simulation.set_protocol(self._get_protocol(schedule))
+
+    def _get_protocol(self, schedule: List) -> myokit.Protocol:
+        """Returns the dosing protocol of a dose schedule.
+
+        Arguments:
+            schedule {List} -- Schedule of all dose events [dose amount, time, duration] of a patient.
+
+        Returns:
+            myokit.Protocol -- Protocol with the dose events, or None if no schedule is provided.
+        """
+        if schedule is None:
+            return None
+
+        # get time and dose data
+        time_data, dose_data, duration_data = schedule
 
-            # create protocol object
-            protocol = myokit.Protocol()
+        # create protocol object
+        protocol = myokit.Protocol()
 
-            # add dose events to protocol
-            for dose_id, dose_amount in enumerate(dose_data):
-                # compute dosing level
-                level = dose_amount / duration_data[dose_id]
+        # add dose events to protocol
+        for dose_id, dose_amount in enumerate(dose_data):
+            # compute dosing level
+            level = dose_amount / duration_data[dose_id]
 
-                # schedule dosing event
-                protocol.schedule(level=level, start=time_data[dose_id], duration=duration_data[dose_id])
+            # schedule dosing event
+            protocol.schedule(level=level, start=time_data[dose_id], duration=duration_data[dose_id])
 
-            # update dose schedule
-            self.main_window.model.simulation.set_protocol(protocol)
+        return protocol
 
     def add_data_to_data_model_plot(self):
         """Adds the data from the in the home tab chosen data file to the previously initialised figure. For
-        multi-dimensional data, the figure is split into subplots.
+        multi-dimensional data, the figure is split into subplots. The data of all patients is drawn as one collection
+        per subplot, coloured by patient, and dense series are decimated for display. The model is drawn by lines that
+        are updated in place and blitted on top of the cached data, see PKPD.gui.utils.plotting.BlittedFigure.
         """
-        # get number of patients
-        number_of_patients = len(self.patient_ids)
-
-        if self.is_single_output_model:  # single output
-            # clear figure
-            self.data_model_figure.clf()
+        # stop blitting of previous figure
+        if self.blitted_figure is not None:
+            self.blitted_figure.disconnect()
 
-            # get state label
-            state_label = self.state_labels[0]
+        # clear figure
+        self.data_model_figure.clf()
+        self.predictive_check_artists = []
+        self.inferred_model_lines = []
 
-            # create plot
+        # create subplots for each measured compartment
+        if self.is_single_output_model:  # single output
             self.data_model_ax = self.data_model_figure.subplots()
-            for patient in range(number_of_patients):
-
-                # create scatter plot
-                self.data_model_ax.scatter(x=self.time_data_container[patient],
-                                           y=self.state_data_container[patient],
-                                           marker='o',
-                                           edgecolor='black',
-                                           alpha=0.5
-                                           )
-
-                # add x, y labels
-                self.data_model_ax.set_xlabel(self.time_label)
-                self.data_model_ax.set_ylabel(state_label)
-
-            # add data label to legend (hack)
-            self.data_model_ax.scatter(x=[],
-                                       y=[],
-                                       marker='o',
-                                       color='darkgrey',
-                                       edgecolor='black',
-                                       alpha=0.5,
-                                       label='data'
-                                       )
-            self.data_model_ax.legend()
-
+            axes = [self.data_model_ax]
         else:  # multi output
-            # clear figure
-            self.data_model_figure.clf()
-
-            # create subplots for each compartment
             self.data_model_ax = self.data_model_figure.subplots(nrows=self.data_dimension, sharex=True)
+            axes = list(self.data_model_ax)
 
-            # create subplots for each measured compartment
-            for dim in range(self.data_dimension):
-
-                # color data by patient ID
-                for patient in range(number_of_patients):
-                    # create scatter plot
-                    self.data_model_ax[dim].scatter(x=self.time_data_container[patient],
-                                                    y=self.state_data_container[patient][:, dim],
-                                                    marker='o',
-                                                    edgecolor='black',
-                                                    alpha=0.5
-                                                    )
-
-                    # add ylabel for compartment
-                    self.data_model_ax[dim].set_ylabel(self.state_labels[dim])
-
-                # add legend to compartment subplot (hack)
-                self.data_model_ax[dim].scatter(x=[],
-                                                y=[],
-                                                marker='o',
-                                                color='darkgrey',
-                                                edgecolor='black',
-                                                alpha=0.5,
-                                                label='data'
-                                                )
-                self.data_model_ax[dim].legend()
-
-            # add xlabel to the bottom of the vertically stacked subplots
-            self.data_model_ax[-1].set_xlabel(self.time_label)
+        # split display budget across patients, such that the number of drawn points is bounded
+        number_of_patients = len(self.patient_ids)
+        max_points = max(MIN_DISPLAYED_POINTS_PER_PATIENT, MAX_DISPLAYED_POINTS // max(1, number_of_patients))
+        patient_colours = get_patient_colours(number_of_patients)
+
+        for dim, ax in enumerate(axes):
+            # collect decimated data of all patients
+            times, values, colours = [], [], []
+            for patient in range(number_of_patients):
+                patient_times = np.asarray(self.time_data_container[patient], dtype=float)
+                patient_values = np.asarray(self.state_data_container[patient], dtype=float)
+                if not self.is_single_output_model:
+                    patient_values = patient_values[:, dim]
+                indices = decimate(patient_times, patient_values, max_points)
+                times.append(patient_times[indices])
+                values.append(patient_values[indices])
+                colours.extend([patient_colours[patient]] * len(indices))
+
+            # create one scatter plot for all patients
+            ax.scatter(x=np.concatenate(times) if times else [],
+                       y=np.concatenate(values) if values else [],
+                       c=colours or 'darkgrey',
+                       marker='o',
+                       edgecolor='black',
+                       alpha=0.5,
+                       label='data'
+                       )
+
+            # add ylabel for compartment
+            ax.set_ylabel(self.state_labels[dim])
+            ax.legend()
+
+        # add xlabel to the bottom of the vertically stacked subplots
+        axes[-1].set_xlabel(self.time_label)
+
+        # create model lines, which are hidden until the model is plotted
+        self.model_lines = []
+        for ax in axes:
+            line, = ax.plot([], [], linestyle='dashed', color='grey')
+            line.set_visible(False)
+            self.model_lines.append(line)
+        self.blitted_figure = BlittedFigure(self.data_model_figure_view, self.model_lines)
 
         # refresh canvas
         self.data_model_figure_view.draw()
@@ -467,16 +563,33 @@ class SimulationTab(QtWidgets.QDialog):
         infer_button = QtWidgets.QPushButton('infer model')
         infer_button.clicked.connect(self.on_infer_model_click)
 
+        # create predictive check button
+        self.predictive_check_button = QtWidgets.QPushButton('predictive check')
+        self.predictive_check_button.clicked.connect(self.on_predictive_check_click)
+
+        # create individual fits button
+        self.individual_fits_button = QtWidgets.QPushButton('individual fits')
+        self.individual_fits_button.clicked.connect(self.on_individual_fits_click)
+
+        # create diagnostics button
+        diagnostics_button = QtWidgets.QPushButton('diagnostics')
+        diagnostics_button.clicked.connect(self.on_diagnostics_click)
+
         # create option button
         option_button = QtWidgets.QPushButton('option')
         option_button.clicked.connect(self.on_infer_option_click)
 
-        # create option window
+        # create option and result windows
         self._create_infer_option_window()
+        self._create_individual_fits_window()
+        self._create_diagnostics_window()
 
         # arrange button horizontally
         h_box = QtWidgets.QHBoxLayout()
         h_box.addWidget(infer_button)
+        h_box.addWidget(self.predictive_check_button)
+        h_box.addWidget(self.individual_fits_button)
+        h_box.addWidget(diagnostics_button)
         h_box.addWidget(option_button)
 
         return h_box
@@ -493,8 +606,11 @@ class SimulationTab(QtWidgets.QDialog):
 
         # create inference options
         optimiser_options = self._create_optimiser_options()
+        transformation_options = self._create_transformation_options()
         objective_function_options = self._create_objective_function_options()
         boundary_toggle = self._create_boundary_toggle()
+        tolerance_toggle = self._create_adaptive_tolerance_toggle()
+        initial_estimate_toggle = self._create_initial_estimate_toggle()
 
         # create apply / cancel buttons
         apply_cancel_buttons = self._create_apply_cancel_buttons()
@@ -502,8 +618,11 @@ class SimulationTab(QtWidgets.QDialog):
         # arrange options vertically
         v_box = QtWidgets.QVBoxLayout()
         v_box.addLayout(optimiser_options)
+        v_box.addLayout(transformation_options)
         v_box.addLayout(objective_function_options)
         v_box.addLayout(boundary_toggle)
+        v_box.addLayout(tolerance_toggle)
+        v_box.addLayout(initial_estimate_toggle)
         v_box.addLayout(apply_cancel_buttons)
 
         # add options to window
@@ -519,7 +638,7 @@ class SimulationTab(QtWidgets.QDialog):
         label = QtWidgets.QLabel('selected optimiser:')
 
         # define options
-        valid_optimisers = ['CMA-ES', 'Nelder-Mead', 'SNES', 'xNES']
+        valid_optimisers = ['CMA-ES', 'Surrogate CMA-ES', 'Nelder-Mead', 'SNES', 'xNES']
 
         # create dropdown menu for options
         self.optimiser_dropdown_menu = QtWidgets.QComboBox()
@@ -534,6 +653,31 @@ class SimulationTab(QtWidgets.QDialog):
 
         return h_box
 
+    def _create_transformation_options(self):
+        """Creates a dropdown menu to select the parameter transformation for the inference.
+
+        Returns:
+            h_box {QHBoxLayout} -- Returns label and dropdown menu.
+        """
+        # create label
+        label = QtWidgets.QLabel('parameter transformation:')
+
+        # define options
+        valid_transformations = ['None', 'Log', 'Logit (boundaries)', 'Scaling']
+
+        # create dropdown menu for options
+        self.transformation_dropdown_menu = QtWidgets.QComboBox()
+        self.transformation_dropdown_menu.setMinimumWidth(self.dropdown_menu_width)
+        for transformation in valid_transformations:
+            self.transformation_dropdown_menu.addItem(transformation)
+
+        # arrange label and dropdown menu horizontally
+        h_box = QtWidgets.QHBoxLayout()
+        h_box.addWidget(label)
+        h_box.addWidget(self.transformation_dropdown_menu)
+
+        return h_box
+
     def _create_objective_function_options(self):
         """Creates a dropdown menu to select an error measure for the inference.
 
@@ -544,7 +688,8 @@ class SimulationTab(QtWidgets.QDialog):
         label = QtWidgets.QLabel('selected error measure:')
 
         # define options
-        valid_error_measures = ['Mean Squared Error', 'Sum of Squares Error']
+        valid_error_measures = ['Mean Squared Error', 'Sum of Squares Error', 'Additive Likelihood',
+                                'Proportional Likelihood', 'Combined Likelihood', 'Log-normal Likelihood']
 
         # create dropdown menu for options
         self.error_measure_dropdown_menu = QtWidgets.QComboBox()
@@ -576,6 +721,42 @@ class SimulationTab(QtWidgets.QDialog):
 
         return h_box
 
+    def _create_adaptive_tolerance_toggle(self):
+        """Creates a checkbox used to loosen the solver tolerances during early optimiser iterations. Defaults to
+        unchecked (False).
+
+        Returns:
+            h_box {QHBoxLayout} -- Layout containing checkbox.
+        """
+
+        label = QtWidgets.QLabel('adaptive solver tolerance:')
+        self.adaptive_tolerance_toggle = QtWidgets.QCheckBox()
+
+        h_box = QtWidgets.QHBoxLayout()
+        h_box.addWidget(label)
+        h_box.addWidget(self.adaptive_tolerance_toggle)
+        self.adaptive_tolerance_toggle.setChecked(False)
+
+        return h_box
+
+    def _create_initial_estimate_toggle(self):
+        """Creates a checkbox used to estimate the starting point of the inference from the data instead of taking it
+        from the sliders. Defaults to unchecked (False).
+
+        Returns:
+            h_box {QHBoxLayout} -- Layout containing checkbox.
+        """
+
+        label = QtWidgets.QLabel('initial estimate from data:')
+        self.initial_estimate_toggle = QtWidgets.QCheckBox()
+
+        h_box = QtWidgets.QHBoxLayout()
+        h_box.addWidget(label)
+        h_box.addWidget(self.initial_estimate_toggle)
+        self.initial_estimate_toggle.setChecked(False)
+
+        return h_box
+
     def _create_apply_cancel_buttons(self):
         """Creates an apply and cancel button to either update the inference settings or closing the option window
         without updating.
@@ -625,6 +806,9 @@ class SimulationTab(QtWidgets.QDialog):
         """
         # update infer options
         self._set_optimiser()
+        self._set_parameter_transformation()
+        self._set_adaptive_tolerance()
+        self._set_initial_estimate()
         self._set_error_measure()
         self._set_boundary_check()
 
@@ -667,6 +851,7 @@ class SimulationTab(QtWidgets.QDialog):
 
         # define dictionary between optimiser names and pints methods
         optimiser_dict = {'CMA-ES': pints.CMAES,
+                          'Surrogate CMA-ES': SurrogateCMAES,
                           'Nelder-Mead': pints.NelderMead,
                           'SNES': pints.SNES,
                           'xNES': pints.XNES
@@ -678,22 +863,56 @@ class SimulationTab(QtWidgets.QDialog):
         # update optimiser
         self.main_window.problem.set_optimiser(method)
 
+    def _set_parameter_transformation(self):
+        """Sets the parameter transformation for inference to the in the dropdown menu selected transformation.
+        """
+        # get selected transformation
+        transformation = self.transformation_dropdown_menu.currentText()
+
+        # define dictionary between transformation names and inverse problem options
+        transformation_dict = {'None': None,
+                               'Log': 'log',
+                               'Logit (boundaries)': 'logit',
+                               'Scaling': 'scaling'
+                               }
+
+        # update transformation
+        self.main_window.problem.set_parameter_transformation(transformation_dict[transformation])
+
+    def _set_adaptive_tolerance(self):
+        """Enables adaptive solver tolerances for inference, if the checkbox is checked when apply is clicked.
+        """
+        self.main_window.problem.set_adaptive_tolerance(self.adaptive_tolerance_toggle.isChecked())
+
+    def _set_initial_estimate(self):
+        """Enables estimation of the starting point from the data, if the checkbox is checked when apply is clicked.
+        """
+        self.is_initial_estimate_automatic = self.initial_estimate_toggle.isChecked()
+
     def _set_error_measure(self):
         """Sets the error measure for inference to the in the dropdown menu selected measure.
         """
         # get selected optimiser
         error_measure = self.error_measure_dropdown_menu.currentText()
 
-        # define dictionary between error measure names and pints methods
+        # define dictionaries between error measure names and pints methods or error models
         error_measure_dict = {'Mean Squared Error': pints.MeanSquaredError,
                               'Sum of Squares Error': pints.SumOfSquaresError,
                               }
-
-        # get corresponding pints measure
-        measure = error_measure_dict[error_measure]
-
-        # update error measure
-        self.main_window.problem.set_objective_function(measure)
+        error_model_dict = {'Additive Likelihood': 'additive',
+                            'Proportional Likelihood': 'proportional',
+                            'Combined Likelihood': 'combined',
+                            'Log-normal Likelihood': 'log-normal'
+                            }
+
+        # update error measure, likelihoods estimate the noise parameters jointly with the model parameters
+        problem = self.main_window.problem
+        if error_measure in error_measure_dict:
+            problem.set_error_model(None)
+            problem.set_error_function(error_measure_dict[error_measure])
+        else:
+            number_of_outputs = problem.problem_container[0].n_outputs()
+            problem.set_error_model(ErrorModel(error_model_dict[error_measure], number_of_outputs))
 
     def _set_boundary_check(self):
         """Sets boundaries_are_on to True if the checkbox is checked when apply is clicked (False if not checked).
@@ -707,6 +926,45 @@ class SimulationTab(QtWidgets.QDialog):
         # close option window
         self.infer_option_window.close()
 
+    def _create_individual_fits_window(self):
+        """Creates a window that lists the estimates of the individual fits of the patients and plots their
+        distribution.
+        """
+        # create result window
+        self.individual_fits_window = QtWidgets.QDialog()
+        self.individual_fits_window.setWindowTitle('Individual fits')
+
+        # create table of estimates
+        self.individual_fits_table = QtWidgets.QTableWidget()
+
+        # create figure of the distribution of the estimates
+        self.individual_fits_figure = Figure()
+        self.individual_fits_figure_view = FigureCanvas(self.individual_fits_figure)
+
+        # arrange table and figure vertically
+        v_box = QtWidgets.QVBoxLayout()
+        v_box.addWidget(self.individual_fits_table)
+        v_box.addWidget(self.individual_fits_figure_view)
+
+        # add content to window
+        self.individual_fits_window.setLayout(v_box)
+
+    def _create_diagnostics_window(self):
+        """Creates a window that plots the goodness-of-fit diagnostics of the inferred model.
+        """
+        # create result window
+        self.diagnostics_window = QtWidgets.QDialog()
+        self.diagnostics_window.setWindowTitle('Diagnostics')
+
+        # create figure of the diagnostics
+        self.diagnostics_figure = Figure()
+        self.diagnostics_figure_view = FigureCanvas(self.diagnostics_figure)
+
+        # add figure to window
+        v_box = QtWidgets.QVBoxLayout()
+        v_box.addWidget(self.diagnostics_figure_view)
+        self.diagnostics_window.setLayout(v_box)
+
     def _create_plot_option_window(self):
         """Creates an option window to set the plotting settings.
         """
@@ -997,9 +1255,6 @@ class SimulationTab(QtWidgets.QDialog):
         else:
             self._plot_multi_output_model()
 
-        # enable removal of plots to prevent flooding of figure
-        self.enable_line_removal = True
-
     def _plot_single_output_model(self):
         """Plots the model in dashed, grey lines.
         """
@@ -1008,15 +1263,8 @@ class SimulationTab(QtWidgets.QDialog):
                                                             times=self.times
                                                             )
 
-        # remove previous graph to avoid flooding the figure
-        if self.enable_line_removal:
-            self.data_model_ax.lines.pop()
-
-        # plot model
-        self.data_model_ax.plot(self.times, self.state_values, linestyle='dashed', color='grey')
-
-        # refresh canvas
-        self.data_model_figure_view.draw()
+        # update model line and redraw it on top of the cached data
+        self._update_model_lines(np.asarray(self.state_values)[:, np.newaxis])
 
     def _plot_multi_output_model(self):
         """Plots the model in dashed, grey lines. Each state dimension is plotted to a separate subplot.
@@ -1026,17 +1274,25 @@ class SimulationTab(QtWidgets.QDialog):
                                                             times=self.times
                                                             )
 
-        # remove previous graphs from subplots to avoid flooding the figure
-        if self.enable_line_removal:
-            for dim in range(self.data_dimension):
-                self.data_model_ax[dim].lines.pop()
+        # update model lines and redraw them on top of the cached data
+        self._update_model_lines(np.asarray(self.state_values))
 
-        # plot model
-        for dim in range(self.data_dimension):
-            self.data_model_ax[dim].plot(self.times, self.state_values[:, dim], linestyle='dashed', color='grey')
+    def _update_model_lines(self, state_values: np.ndarray):
+        """Replaces the data of the model lines and redraws only the model lines, unless the axes need to be rescaled.
 
-        # refresh canvas
-        self.data_model_figure_view.draw()
+        Arguments:
+            state_values {np.ndarray} -- State values of the model at self.times with one column per subplot.
+        """
+        for dim, line in enumerate(self.model_lines):
+            line.set_data(self.times, state_values[:, dim])
+            line.set_visible(True)
+        self.blitted_figure.update()
+
+    def _hide_model_lines(self):
+        """Hides the model lines of live plotting.
+        """
+        for line in self.model_lines:
+            line.set_visible(False)
 
     @QtCore.pyqtSlot()
     def on_plot_option_click(self):
@@ -1085,9 +1341,6 @@ class SimulationTab(QtWidgets.QDialog):
         # disable live plotting
         self.enable_live_plotting = False
 
-        # disable line removal
-        self.enable_line_removal = False
-
         # get initial parameters from slider text fields
         initial_parameters = np.empty(len(self.parameter_values))
         for parameter_id, parameter_text_field in enumerate(self.parameter_text_field_container):
@@ -1101,6 +1354,13 @@ class SimulationTab(QtWidgets.QDialog):
         # if initial parameters lie within provided boundaries, start inference
         if self.correct_initial_values:
             try:
+                # estimate starting point from the data within the boundaries, if enabled
+                if self.is_initial_estimate_automatic:
+                    initial_parameters = self._estimate_initial_parameters()
+
+                # append noise parameters of the error model, if selected
+                initial_parameters = self._append_noise_parameters(initial_parameters)
+
                 # find parameters
                 self.main_window.problem.find_optimal_parameter(initial_parameter=initial_parameters)
                 self.estimated_parameters = self.main_window.problem.estimated_parameters
@@ -1128,14 +1388,285 @@ class SimulationTab(QtWidgets.QDialog):
                 # Show error message as generated in PINTS
                 error_message = 'Check Boundaries are Suitable: \n' + str(e)
 
-                # Quick Fix to Remove Old Plot:
-                if self.is_single_output_model:  # remove one line
-                    self.data_model_ax.lines.pop()
-                else:
-                    for dim in range(len(self.data_model_ax)):
-                        self.data_model_ax[dim].lines.pop()
+                # remove old model plot
+                self._hide_model_lines()
+                self.data_model_figure_view.draw()
                 QtWidgets.QMessageBox.question(self, 'Value error!', error_message, QtWidgets.QMessageBox.Yes)
 
+    @QtCore.pyqtSlot()
+    def on_predictive_check_click(self):
+        """Reaction to left-clicking the 'predictive check' button. Replicate datasets are simulated at the observed
+        design with the inferred parameters in a separate thread, and the percentile bands of the replicates are
+        overlaid on the data.
+        """
+        estimated_parameters = getattr(self.main_window.problem, 'estimated_parameters', None)
+        if estimated_parameters is None:
+            # generate error message
+            error_message = 'Please infer the model parameters before running a predictive check!'
+            QtWidgets.QMessageBox.question(self, 'No inferred parameters!', error_message, QtWidgets.QMessageBox.Yes)
+            return
+
+        # replicates are sampled from the error model, if selected, and otherwise scatter with the root mean squared
+        # residual. Imputed values of censored observations are excluded
+        problem = self.main_window.problem
+
+        # solve forward problems in the GUI thread, as the model is shared with the plots
+        number_of_model_parameters = self.main_window.model.n_parameters()
+        self.predictive_check = VisualPredictiveCheck(problem_container=problem.problem_container,
+                                                      parameters=estimated_parameters[:number_of_model_parameters],
+                                                      is_censored=problem.is_censored,
+                                                      error_model=problem.error_model,
+                                                      noise_parameters=estimated_parameters[number_of_model_parameters:]
+                                                      )
+
+        # simulate replicates in a separate thread
+        self.predictive_check_button.setEnabled(False)
+        self.predictive_check_thread = QtCore.QThread()
+        self.predictive_check_worker = PredictiveCheckWorker(self.predictive_check, number_of_replicates=500)
+        self.predictive_check_worker.moveToThread(self.predictive_check_thread)
+        self.predictive_check_thread.started.connect(self.predictive_check_worker.run)
+        self.predictive_check_worker.finished.connect(self.predictive_check_thread.quit)
+        self.predictive_check_worker.finished.connect(self._plot_predictive_check)
+        self.predictive_check_thread.start()
+
+    @QtCore.pyqtSlot()
+    def _plot_predictive_check(self):
+        """Overlays the simulated percentile bands and the observed percentiles on the data, replacing the bands of a
+        previous predictive check.
+        """
+        self._remove_predictive_check()
+
+        predictive_check = self.predictive_check
+        bands = predictive_check.simulated_bands
+        axes = [self.data_model_ax] if self.is_single_output_model else self.data_model_ax
+        for dim, ax in enumerate(axes):
+            for percentile_id, percentile in enumerate(predictive_check.percentiles):
+                # plot band of simulated percentile
+                self.predictive_check_artists.append(ax.fill_between(predictive_check.bin_centres,
+                                                                     bands[dim, percentile_id, 0],
+                                                                     bands[dim, percentile_id, 2],
+                                                                     color='grey',
+                                                                     alpha=0.3
+                                                                     ))
+
+                # plot observed percentile
+                self.predictive_check_artists.extend(ax.plot(predictive_check.bin_centres,
+                                                             predictive_check.observed_percentiles[dim, percentile_id],
+                                                             color='red',
+                                                             linestyle='-' if percentile == 50 else '--'
+                                                             ))
+
+        # refresh canvas
+        self.data_model_figure_view.draw()
+        self.predictive_check_button.setEnabled(True)
+
+    def _estimate_initial_parameters(self):
+        """Estimates the starting point and the initial uncertainty of the inference from the data. Doses of the dose
+        schedule inform the clearance and volume estimates.
+
+        Returns:
+            np.ndarray -- Starting point of the inference.
+        """
+        # get total dose of each patient, if dose schedule is provided
+        doses = None
+        if self.dose_schedule is not None and any(schedule is not None for schedule in self.dose_schedule):
+            doses = np.array([np.sum(schedule[1]) if schedule is not None else np.nan
+                              for schedule in self.dose_schedule])
+
+        initial_parameters, uncertainty = self.main_window.problem.estimate_initial_parameter(doses=doses)
+        self.main_window.problem.initial_parameter_uncertainty = uncertainty
+
+        return initial_parameters
+
+    def _append_noise_parameters(self, initial_parameters: np.ndarray) -> np.ndarray:
+        """Appends the noise parameters of the error model to the starting point, unless they have been estimated with
+        it, and extends the parameter boundaries to three orders of magnitude around them.
+
+        Arguments:
+            initial_parameters {np.ndarray} -- Starting point of the inference.
+
+        Returns:
+            np.ndarray -- Starting point including the noise parameters.
+        """
+        problem = self.main_window.problem
+        if problem.error_model is None:
+            return initial_parameters
+
+        # derive noise parameters from the residuals at the slider position
+        number_of_model_parameters = self.main_window.model.n_parameters()
+        if len(initial_parameters) == number_of_model_parameters:
+            noise, noise_uncertainty = problem.estimate_initial_noise_parameters(initial_parameters)
+            initial_parameters = np.concatenate([initial_parameters, noise])
+            uncertainty = problem.initial_parameter_uncertainty
+            if uncertainty is not None and len(uncertainty) == number_of_model_parameters:
+                problem.initial_parameter_uncertainty = np.concatenate([uncertainty, noise_uncertainty])
+
+        # noise parameters are searched within three orders of magnitude of their start
+        if problem.parameter_boundaries is not None:
+            noise = initial_parameters[number_of_model_parameters:]
+            lower = np.asarray(problem.parameter_boundaries.lower())[:number_of_model_parameters]
+            upper = np.asarray(problem.parameter_boundaries.upper())[:number_of_model_parameters]
+            problem.set_parameter_boundaries([np.concatenate([lower, 1e-3 * noise]),
+                                              np.concatenate([upper, 1e3 * noise])])
+
+        return initial_parameters
+
+    def _remove_predictive_check(self):
+        """Removes the bands and percentiles of a previous predictive check from the figure.
+        """
+        for artist in self.predictive_check_artists:
+            artist.remove()
+        self.predictive_check_artists = []
+
+    @QtCore.pyqtSlot()
+    def on_individual_fits_click(self):
+        """Reaction to left-clicking the 'individual fits' button. The model is fitted to the data of each patient
+        separately in a pool of worker processes, with the optimiser, transformation and boundaries of the inference
+        settings, and the estimates are listed and plotted in the individual fits window.
+        """
+        problem = self.main_window.problem
+
+        # start from the slider position, unless the starting point is estimated from the data of each patient
+        initial_parameter = None
+        if not self.is_initial_estimate_automatic:
+            initial_parameter = np.array([float(text_field.text())
+                                          for text_field in self.parameter_text_field_container])
+
+        # get total dose of each patient, if dose schedule is provided
+        doses = None
+        if self.dose_schedule is not None and any(schedule is not None for schedule in self.dose_schedule):
+            doses = np.array([np.sum(schedule[1]) if schedule is not None else np.nan
+                              for schedule in self.dose_schedule])
+
+        # dose patients by their schedules, or by the protocol of the model file
+        protocols = None
+        if self.dose_schedule is not None:
+            protocols = [self._get_protocol(schedule) for schedule in self.dose_schedule]
+
+        # noise parameters of the error model are not fitted per patient
+        boundaries = None
+        if self.boundaries_are_on and problem.parameter_boundaries is not None:
+            number_of_model_parameters = self.main_window.model.n_parameters()
+            boundaries = [problem.parameter_boundaries.lower()[:number_of_model_parameters],
+                          problem.parameter_boundaries.upper()[:number_of_model_parameters]]
+
+        self.individual_fits = IndividualFits(model=self.main_window.home.model_file,
+                                              times=self.time_data_container,
+                                              values=self.state_data_container,
+                                              protocols=protocols,
+                                              patient_ids=self.patient_ids
+                                              )
+        settings = {'number_of_processes': os.cpu_count() or 1,
+                    'optimiser': problem.optimiser,
+                    'initial_parameter': initial_parameter,
+                    'boundaries': boundaries,
+                    'transformation': problem.parameter_transformation,
+                    'doses': doses
+                    }
+
+        # fit patients in a separate thread
+        self.individual_fits_button.setEnabled(False)
+        self.individual_fits_thread = QtCore.QThread()
+        self.individual_fits_worker = IndividualFitsWorker(self.individual_fits, settings)
+        self.individual_fits_worker.moveToThread(self.individual_fits_thread)
+        self.individual_fits_thread.started.connect(self.individual_fits_worker.run)
+        self.individual_fits_worker.finished.connect(self.individual_fits_thread.quit)
+        self.individual_fits_worker.finished.connect(self._show_individual_fits)
+        self.individual_fits_thread.start()
+
+    @QtCore.pyqtSlot()
+    def _show_individual_fits(self):
+        """Lists the estimates of the individual fits in a table and plots their distribution across the patients.
+        """
+        self.individual_fits_button.setEnabled(True)
+        if self.individual_fits_worker.error_message is not None:
+            # generate error message
+            error_message = 'The individual fits failed: \n' + self.individual_fits_worker.error_message
+            QtWidgets.QMessageBox.question(self, 'Individual fits failed!', error_message, QtWidgets.QMessageBox.Yes)
+            return
+
+        # fill table with one row per patient
+        results = self.individual_fits.results
+        self.individual_fits_table.clear()
+        self.individual_fits_table.setRowCount(len(results))
+        self.individual_fits_table.setColumnCount(len(results.columns))
+        self.individual_fits_table.setHorizontalHeaderLabels([str(column) for column in results.columns])
+        for row_id, row in enumerate(results.itertuples(index=False)):
+            for column_id, entry in enumerate(row):
+                text = '%.4g' % entry if isinstance(entry, (float, np.floating)) else str(entry)
+                self.individual_fits_table.setItem(row_id, column_id, QtWidgets.QTableWidgetItem(text))
+        self.individual_fits_table.resizeColumnsToContents()
+
+        # plot distribution of the estimates of each parameter with the estimates of the patients on top
+        parameter_names = self.individual_fits.parameter_names
+        estimates = results.loc[results['error'] == '', parameter_names].to_numpy()
+        self.individual_fits_figure.clf()
+        axes = np.atleast_1d(self.individual_fits_figure.subplots(ncols=len(parameter_names)))
+        jitter = np.random.default_rng(0).uniform(-0.1, 0.1, size=len(estimates))
+        for parameter_id, ax in enumerate(axes):
+            ax.boxplot(estimates[:, parameter_id], widths=0.5, showfliers=False)
+            ax.scatter(1 + jitter, estimates[:, parameter_id], color='darkgrey', edgecolor='black', alpha=0.5)
+            ax.set_xticks([])
+            ax.set_title(parameter_names[parameter_id].split('.')[-1])
+        self.individual_fits_figure.tight_layout()
+        self.individual_fits_figure_view.draw()
+
+        self.individual_fits_window.open()
+
+    @QtCore.pyqtSlot()
+    def on_diagnostics_click(self):
+        """Reaction to left-clicking the 'diagnostics' button. Plots observed against predicted values, and weighted
+        residuals against time and predictions for all patients. Diagnostics are cached by the inverse problem, such
+        that only patients that changed since the last plot are simulated again.
+        """
+        if self.main_window.problem.estimated_parameters is None:
+            # generate error message
+            error_message = 'Please infer the model parameters before plotting diagnostics!'
+            QtWidgets.QMessageBox.question(self, 'No inferred parameters!', error_message, QtWidgets.QMessageBox.Yes)
+            return
+
+        # collect diagnostics of all patients and outputs
+        dataframe = self.main_window.problem.get_diagnostics().to_dataframe()
+
+        self.diagnostics_figure.clf()
+        axes = self.diagnostics_figure.subplots(nrows=2, ncols=2)
+        for output_id, state_label in enumerate(self.state_labels):
+            output = dataframe[dataframe['output'] == output_id]
+
+            # plot observed against predicted values
+            axes[0, 0].scatter(output['prediction'], output['observation'], edgecolor='black', alpha=0.5,
+                               label=state_label)
+
+            # plot weighted residuals against time and predictions
+            axes[0, 1].scatter(output['time'], output['weighted_residual'], edgecolor='black', alpha=0.5)
+            axes[1, 0].scatter(output['prediction'], output['weighted_residual'], edgecolor='black', alpha=0.5)
+
+            # plot distribution of weighted residuals
+            weighted_residuals = output['weighted_residual'].to_numpy()
+            axes[1, 1].hist(weighted_residuals[np.isfinite(weighted_residuals)], bins=20, alpha=0.5)
+
+        # add line of identity and zero lines
+        limits = [np.nanmin(dataframe[['prediction', 'observation']].to_numpy()),
+                  np.nanmax(dataframe[['prediction', 'observation']].to_numpy())]
+        axes[0, 0].plot(limits, limits, color='black', linestyle='dashed')
+        axes[0, 1].axhline(0, color='black', linestyle='dashed')
+        axes[1, 0].axhline(0, color='black', linestyle='dashed')
+
+        # add labels
+        axes[0, 0].set_xlabel('prediction')
+        axes[0, 0].set_ylabel('observation')
+        axes[0, 0].legend()
+        axes[0, 1].set_xlabel(self.time_label)
+        axes[0, 1].set_ylabel('weighted residual')
+        axes[1, 0].set_xlabel('prediction')
+        axes[1, 0].set_ylabel('weighted residual')
+        axes[1, 1].set_xlabel('weighted residual')
+        axes[1, 1].set_ylabel('count')
+        self.diagnostics_figure.tight_layout()
+        self.diagnostics_figure_view.draw()
+
+        self.diagnostics_window.open()
+
     def _set_parameter_boundaries(self, initial_parameters:np.ndarray):
         """Gets slider boundaries and restricts the parameter search to those intervals. If initial parameters lie
         outside the domain of support, an error message is returned.
@@ -1188,38 +1719,41 @@ class SimulationTab(QtWidgets.QDialog):
                 self.main_window.problem.set_parameter_boundaries([min_values, max_values])
 
     def _plot_inferred_model(self):
-        """Plots inferred model in a solid, black line and removes all other lines from figure.
+        """Plots inferred model in a solid, black line and hides the model lines of live plotting.
         """
+        # remove outdated predictive check
+        self._remove_predictive_check()
+
         # define time points for model evaluation
         times = np.linspace(start=self.time_data[0],
                             stop=self.time_data[-1],
                             num=100
                             )
 
-        # solve forward problem
-        state_values = self.main_window.model.simulate(parameters=self.main_window.problem.estimated_parameters,
-                                                       times=times
-                                                       )
-        if self.is_single_output_model: # single-output problem
-            # remove all lines from figure
-            lines = self.data_model_ax.lines
-            while lines:
-                lines.pop()
-
-            # plot model
-            self.data_model_ax.plot(times, state_values, color='black', label='model')
-            self.data_model_ax.legend()
-        else:  # multi-output problem
-            # remove all lines from figure
-            for dim in range(self.data_dimension):
-                lines = self.data_model_ax[dim].lines
-                while lines:
-                    lines.pop()
-
-            # plot model
-            for dim in range(self.data_dimension):
-                self.data_model_ax[dim].plot(times, state_values[:, dim], color='black', label='model')
-                self.data_model_ax[dim].legend()
+        # solve forward problem, noise parameters of the error model are not part of the model
+        number_of_model_parameters = self.main_window.model.n_parameters()
+        state_values = self.main_window.model.simulate(
+            parameters=self.main_window.problem.estimated_parameters[:number_of_model_parameters],
+            times=times
+        )
+        state_values = np.asarray(state_values)
+        if self.is_single_output_model:  # single-output problem
+            state_values = state_values[:, np.newaxis]
+        axes = [self.data_model_ax] if self.is_single_output_model else self.data_model_ax
+
+        # hide model of live plotting
+        self._hide_model_lines()
+
+        # plot model, reusing the lines of a previous inference
+        if not self.inferred_model_lines:
+            for ax in axes:
+                line, = ax.plot([], [], color='black', label='model')
+                self.inferred_model_lines.append(line)
+                ax.legend()
+        for dim, ax in enumerate(axes):
+            self.inferred_model_lines[dim].set_data(times, state_values[:, dim])
+            ax.update_datalim(np.column_stack([times, state_values[:, dim]]))
+            ax.autoscale_view()
 
         # refresh canvas
         self.data_model_figure_view.draw()
@@ -1227,7 +1761,7 @@ class SimulationTab(QtWidgets.QDialog):
     def _update_sliders_to_inferred_params(self):
         """Set slider positions and text fields to inferred parameters.
         """
-        for param_id, param_value in enumerate(self.estimated_parameters):
+        for param_id, param_value in enumerate(self.estimated_parameters[:len(self.slider_container)]):
             # get slider
             slider = self.slider_container[param_id]
 
@@ -1246,7 +1780,7 @@ class SimulationTab(QtWidgets.QDialog):
     def _update_parameter_table(self):
         """Fills parameter table cells with inferred parameter values.
         """
-        for param_id, param_value in enumerate(self.estimated_parameters):
+        for param_id, param_value in enumerate(self.estimated_parameters[:len(self.inferred_boxes)]):
             # round value to 3 digits (arbitrary)
             rounded_value = round(number=param_value, ndigits=3)
 
@@ -0,0 +1,137 @@
+from typing import List
+
+import matplotlib
+import numpy as np
+
+
+def decimate(times: np.ndarray, values: np.ndarray, max_points: int) -> np.ndarray:
+    """Returns the indices of the data points that are displayed of a dense series. The time range is split into bins
+    and within each bin only the points with the minimal and maximal value are kept, such that peaks and troughs remain
+    visible. Points with non-finite values are never displayed and are dropped.
+
+    Arguments:
+        times {np.ndarray} -- Times of the data points.
+        values {np.ndarray} -- Values of the data points.
+        max_points {int} -- Maximal number of displayed points.
+
+    Returns:
+        np.ndarray -- Sorted indices of the displayed data points.
+    """
+    times = np.asarray(times, dtype=float)
+    values = np.asarray(values, dtype=float)
+    indices = np.flatnonzero(np.isfinite(times) & np.isfinite(values))
+    if len(indices) <= max_points:
+        return indices
+
+    # keep the first and last point, and the extremes of each bin in between
+    number_of_bins = max(1, (max_points - 2) // 2)
+    edges = np.linspace(times[indices[0]], times[indices[-1]], number_of_bins + 1)
+    bin_ids = np.clip(np.searchsorted(edges, times[indices], side='right') - 1, 0, number_of_bins - 1)
+
+    # sort points by bin and value, such that the first and last point of each bin are its extremes
+    order = np.lexsort((values[indices], bin_ids))
+    sorted_bin_ids = bin_ids[order]
+    is_first = np.r_[True, sorted_bin_ids[1:] != sorted_bin_ids[:-1]]
+    is_last = np.r_[sorted_bin_ids[1:] != sorted_bin_ids[:-1], True]
+    kept = indices[order[is_first | is_last]]
+
+    return np.unique(np.r_[indices[0], kept, indices[-1]])
+
+
+def get_patient_colours(number_of_patients: int) -> List:
+    """Returns a colour for each patient by cycling through the colours of the matplotlib style, as separate plot calls
+    would.
+
+    Arguments:
+        number_of_patients {int} -- Number of patients.
+
+    Returns:
+        List -- Colour of each patient.
+    """
+    colours = matplotlib.rcParams['axes.prop_cycle'].by_key().get('color', ['C0'])
+
+    return [colours[patient % len(colours)] for patient in range(number_of_patients)]
+
+
+class BlittedFigure(object):
+    """Redraws a small set of frequently changing artists of a figure without redrawing the rest of the figure. The
+    rendered static artists, e.g. the data, are cached as background after each full draw of the canvas, and updates
+    only restore the background and draw the animated artists on top.
+
+    A full redraw is triggered if an animated artist leaves the view limits of its axes, such that the axes rescale
+    as they did before.
+    """
+    def __init__(self, canvas, artists: List) -> None:
+        """Initialises the blitting and marks the artists as animated, such that they are excluded from the background.
+
+        Arguments:
+            canvas {FigureCanvasBase} -- Canvas of the figure.
+            artists {List} -- Artists that are redrawn on updates.
+        """
+        self.canvas = canvas
+        self.artists = list(artists)
+        self.background = None
+        for artist in self.artists:
+            artist.set_animated(True)
+
+        # refresh background, whenever the figure is drawn in full, e.g. on resizing or zooming
+        self._callback_id = canvas.mpl_connect('draw_event', self._on_draw)
+
+    def disconnect(self) -> None:
+        """Stops the caching of the background, e.g. before the figure is cleared.
+        """
+        self.canvas.mpl_disconnect(self._callback_id)
+
+    def update(self) -> None:
+        """Redraws the animated artists on top of the cached background.
+        """
+        if self.background is None or self._rescale_axes():
+            # full redraw, which refreshes the background and draws the animated artists
+            self.canvas.draw()
+            return
+
+        self.canvas.restore_region(self.background)
+        self._draw_artists()
+        self.canvas.blit(self.canvas.figure.bbox)
+        self.canvas.flush_events()
+
+    def _on_draw(self, event) -> None:
+        """Caches the background of a full draw and draws the animated artists on top.
+        """
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self) -> None:
+        """Draws the visible animated artists.
+        """
+        for artist in self.artists:
+            if artist.get_visible():
+                artist.axes.draw_artist(artist)
+
+    def _rescale_axes(self) -> bool:
+        """Extends the view limits of axes with animated lines outside of their limits.
+
+        Returns:
+            bool -- True if the view limits of any axes changed.
+        """
+        is_rescaled = False
+        for artist in self.artists:
+            if not artist.get_visible() or not hasattr(artist, 'get_xydata'):
+                continue
+            data = artist.get_xydata()
+            data = data[np.all(np.isfinite(data), axis=1)]
+            if len(data) == 0:
+                continue
+
+            ax = artist.axes
+            limits = [ax.get_xlim(), ax.get_ylim()]
+            x_min, x_max = sorted(limits[0])
+            y_min, y_max = sorted(limits[1])
+            if (data[:, 0].min() < x_min or data[:, 0].max() > x_max or
+                    data[:, 1].min() < y_min or data[:, 1].max() > y_max):
+                # axes with fixed limits, e.g. after zooming, are not rescaled
+                ax.update_datalim(data)
+                ax.autoscale_view()
+                is_rescaled = is_rescaled or limits != [ax.get_xlim(), ax.get_ylim()]
+
+        return is_rescaled
@@ -1,4 +1,17 @@
-from pints import SingleOutputProblem
+from typing import List
+
+import numpy as np
+import pints
+
+from PKPD.inference.archive import EvaluationArchive
+from PKPD.inference.censoring import broadcast_to_values, get_censored_observations
+from PKPD.inference.diagnostics import Diagnostics
+from PKPD.inference.errorModels import ErrorModel
+from PKPD.inference.initialEstimate import InitialEstimator
+from PKPD.inference.objective import CovariateSumOfErrors, ErrorModelLikelihood, PatientSumOfErrors
+from PKPD.inference.result import OptimisationResult
+from PKPD.inference.store import ResultsStore, hash_problem, hash_settings
+from PKPD.model.covariates import CovariateModel
 
 
 class AbstractInverseProblem(object):
@@ -24,3 +37,683 @@ class AbstractInverseProblem(object):
         Nelder-Mead, PSO, SNES, xNES. For more information see pints documentation https://pints.readthedocs.io/.
         """
         raise NotImplementedError
+
+    def refit(self, number_of_iterations: int=1) -> None:
+        """Refits the parameters after observations or patients have been added with add_observations or
+        add_patients. The optimisation starts from the previous estimate with an initial uncertainty given by the spread
+        of the previous restarts. At the previous estimate only patients with new data are simulated, the errors of all
+        other patients are reused from the previous fit.
+
+        Keyword Arguments:
+            number_of_iterations {int} -- Number of times optimisation is run. (default: {1})
+        """
+        if self.estimated_parameters is None:
+            raise ValueError('Parameters have to be estimated with find_optimal_parameter before refitting.')
+
+        error_measure = self._get_error_measure()
+
+        # errors of patients without new data are known at the previous estimate
+        previous_estimate = np.array(self.estimated_parameters)
+        patient_errors = np.full(len(self.problem_container), np.nan)
+        if self._patient_errors is not None:
+            patient_errors[:len(self._patient_errors)] = self._patient_errors
+        patient_errors[sorted(self._updated_patients)] = np.nan
+        error_measure.set_known_errors(previous_estimate, patient_errors)
+        error_measure(previous_estimate)
+
+        self.result = self._run_optimisation(error_measure,
+                                             previous_estimate,
+                                             number_of_iterations,
+                                             self._get_refit_uncertainty()
+                                             )
+
+        # keep the previous estimate, if the optimiser did not improve on it
+        if error_measure.best_score < self.result.objective_score:
+            self.result.add_restart(error_measure.best_parameters, error_measure.best_score, 1, 0, 0.0)
+
+        # return parameters with minimal score
+        self.estimated_parameters, self.objective_score = [self.result.estimated_parameters,
+                                                           self.result.objective_score
+                                                           ]
+        self._patient_errors = self._get_patient_errors(error_measure)
+        self._updated_patients = set()
+
+    def add_observations(self, patient_id: int, times: np.ndarray, values: np.ndarray) -> None:
+        """Appends observations to the data of a patient. The patient is re-simulated in the next refit.
+
+        Arguments:
+            patient_id {int} -- Index of the patient in the problem container.
+            times {np.ndarray} -- Times of the new data points.
+            values {np.ndarray} -- State values of the new data points.
+        """
+        problem = self.problem_container[patient_id]
+        times = np.concatenate([problem.times(), np.asarray(times, dtype=float)])
+        values = np.concatenate([problem.values(), np.asarray(values, dtype=float)])
+
+        # pints problems require ordered times
+        order = np.argsort(times, kind='stable')
+        self.problem_container[patient_id] = type(problem)(problem.model(), times[order], values[order])
+
+        # new observations are not censored
+        if self.is_censored is not None:
+            number_of_new_observations = len(values) - len(self.lloq[patient_id])
+            self.lloq[patient_id] = np.concatenate([
+                self.lloq[patient_id], np.full((number_of_new_observations,) + values.shape[1:], np.nan)])[order]
+            self.is_censored[patient_id] = np.concatenate([
+                self.is_censored[patient_id], np.zeros((number_of_new_observations,) + values.shape[1:], dtype=bool)
+            ])[order]
+        self.error_function_container[patient_id] = type(self.error_function_container[patient_id])(
+            self.problem_container[patient_id]
+        )
+        self._updated_patients.add(patient_id)
+        self._invalidate_evaluation_archive([patient_id])
+
+    def add_patients(self, models: List, times: List[np.ndarray], values: List[np.ndarray]) -> None:
+        """Appends patients to the inverse problem. The patients are simulated in the next refit and use the same
+        problem type and error function as the existing patients.
+
+        Arguments:
+            models {List} -- Models of the new patients.
+            times {List[np.ndarray]} -- Times of data points for the new patients.
+            values {List[np.ndarray]} -- State values of data points for the new patients.
+        """
+        problem_class = type(self.problem_container[0])
+        error_function = type(self.error_function_container[0])
+        for model_id, model in enumerate(models):
+            problem = problem_class(model, times[model_id], values[model_id])
+            self.problem_container.append(problem)
+            self.error_function_container.append(error_function(problem))
+            self._updated_patients.add(len(self.problem_container) - 1)
+
+            # observations of new patients are not censored
+            if self.is_censored is not None:
+                self.lloq.append(np.full(np.shape(problem.values()), np.nan))
+                self.is_censored.append(np.zeros(np.shape(problem.values()), dtype=bool))
+        self._invalidate_evaluation_archive([])
+
+    def _get_refit_uncertainty(self) -> np.ndarray:
+        """Returns the initial uncertainty of a refit, i.e. the standard deviation of the estimates across the restarts
+        of the previous fit, bounded from below by 1% of the previous estimate to allow the new data to move it.
+
+        Returns:
+            np.ndarray -- Standard deviation around the starting point.
+        """
+        estimate = np.abs(self.estimated_parameters)
+        spread = np.std(self.result.restarts['estimate'], axis=0)
+
+        return np.maximum(spread, np.maximum(0.01 * estimate, 1e-6))
+
+    def _get_patient_errors(self, error_measure: PatientSumOfErrors) -> np.ndarray:
+        """Returns the per-patient errors at the estimated parameters, or None if they were not evaluated, e.g. because
+        the result was returned from the results store.
+
+        Arguments:
+            error_measure {PatientSumOfErrors} -- Objective function of the fit.
+
+        Returns:
+            np.ndarray -- Error of each patient.
+        """
+        if error_measure.best_parameters is None:
+            return None
+        if not np.array_equal(error_measure.best_parameters, self.estimated_parameters):
+            return None
+
+        return error_measure.best_patient_errors
+
+    def _run_optimisation(self, error_measure: pints.ErrorMeasure, initial_parameter: np.ndarray,
+                          number_of_iterations: int, initial_parameter_uncertainty: np.ndarray=None
+                          ) -> OptimisationResult:
+        """Runs the optimisation number_of_iterations times and collects estimates, scores, evaluation counts, timings
+        and the per-iteration best scores of all runs.
+
+        Arguments:
+            error_measure {pints.ErrorMeasure} -- Objective function.
+            initial_parameter {np.ndarray} -- Starting point in parameter space of the optimisation algorithm.
+            number_of_iterations {int} -- Number of times optimisation is run.
+
+        Keyword Arguments:
+            initial_parameter_uncertainty {np.ndarray} -- Standard deviation around the starting point. Defaults to
+                                                          the uncertainty of the inverse problem. (default: {None})
+
+        Returns:
+            OptimisationResult -- Outcome of all runs.
+        """
+        if initial_parameter_uncertainty is None:
+            initial_parameter_uncertainty = self.initial_parameter_uncertainty
+
+        # return stored result, if the identical fit has been run before
+        if self.results_store is not None:
+            problem_key = hash_problem(self.problem_container, self.error_function_container)
+            settings_key = hash_settings(problem_key, self._get_optimisation_settings(initial_parameter,
+                                                                                      initial_parameter_uncertainty,
+                                                                                      number_of_iterations))
+            result = self.results_store.get(settings_key)
+            if result is not None:
+                return result
+
+            # start from the best stored fit of the same problem, if warm starts are enabled
+            if self.is_warm_start_enabled:
+                initial_parameter = self._get_warm_start(problem_key, initial_parameter)
+
+        # logit transformation confines the search to the boundaries by itself
+        transformation = self._get_transformation(initial_parameter)
+        boundaries = self.parameter_boundaries
+        if self.parameter_transformation == 'logit':
+            boundaries = None
+
+        error_function = type(self.error_function_container[0]).__name__
+        if self.error_model is not None:
+            error_function = self.error_model.name
+
+        metadata = {'optimiser': self.optimiser.__name__,
+                    'error_function': error_function,
+                    'number_of_problems': len(self.problem_container),
+                    'transformation': self.parameter_transformation
+                    }
+        result = OptimisationResult(len(initial_parameter), metadata)
+
+        for _ in range(number_of_iterations):
+            # start from the best archived evaluations of previous runs, if seeding is enabled
+            starting_point, uncertainty = initial_parameter, initial_parameter_uncertainty
+            is_archive_used = self.error_model is None and self.covariate_model is None
+            if self.evaluation_archive is not None and self.is_archive_seeding_enabled and is_archive_used:
+                starting_point, uncertainty = self._get_archive_seed(initial_parameter, initial_parameter_uncertainty)
+
+            # controllers are valid for a single run only, so each run gets its own controller. The controller maps
+            # starting point, uncertainty and boundaries to the search space and estimates back to the model space
+            optimisation = pints.OptimisationController(function=error_measure,
+                                                        x0=starting_point,
+                                                        sigma0=uncertainty,
+                                                        boundaries=boundaries,
+                                                        transformation=transformation,
+                                                        method=self.optimiser
+                                                        )
+
+            # evaluate with loosened solver tolerances until the best score stagnates, if enabled
+            tolerance_schedule = None
+            if self.is_adaptive_tolerance_enabled:
+                tolerance_schedule = _ToleranceSchedule(self._get_models(), self.loose_tolerance_factor, error_measure)
+
+            # record best score after each iteration
+            trace = []
+
+            def callback(iteration: int, optimiser: pints.Optimiser) -> None:
+                trace.append(optimiser.f_best())
+                if tolerance_schedule is not None:
+                    tolerance_schedule.update(trace)
+
+            optimisation.set_callback(callback)
+
+            try:
+                estimates, score = optimisation.run()
+            finally:
+                if tolerance_schedule is not None:
+                    tolerance_schedule.finish()
+
+            # score estimate with the tolerances of the models
+            if tolerance_schedule is not None:
+                score = error_measure(estimates)
+
+            result.add_restart(estimates,
+                               score,
+                               optimisation.evaluations(),
+                               optimisation.iterations(),
+                               optimisation.time(),
+                               trace
+                               )
+
+        # persist result
+        if self.results_store is not None:
+            self.results_store.put(settings_key, problem_key, result)
+
+        return result
+
+    def _get_optimisation_settings(self, initial_parameter: np.ndarray, initial_parameter_uncertainty: np.ndarray,
+                                   number_of_iterations: int) -> List:
+        """Returns the settings that determine the outcome of a fit besides models, data and error measure.
+
+        Arguments:
+            initial_parameter {np.ndarray} -- Starting point in parameter space of the optimisation algorithm.
+            initial_parameter_uncertainty {np.ndarray} -- Standard deviation around the starting point.
+            number_of_iterations {int} -- Number of times optimisation is run.
+
+        Returns:
+            List -- Optimisation settings.
+        """
+        if self.parameter_boundaries is None:
+            boundaries = [None, None]
+        else:
+            boundaries = [self.parameter_boundaries.lower(), self.parameter_boundaries.upper()]
+
+        settings = [self.optimiser.__name__,
+                    self.parameter_transformation,
+                    self.is_adaptive_tolerance_enabled,
+                    self.loose_tolerance_factor,
+                    *boundaries,
+                    initial_parameter,
+                    initial_parameter_uncertainty,
+                    number_of_iterations
+                    ]
+
+        # individual parameters depend on the covariates and relations
+        if self.covariate_model is not None:
+            settings += [self.covariate_model.covariates, self.covariate_model.relations]
+
+        # likelihood replaces the error functions of the patients
+        if self.error_model is not None:
+            settings += [self.error_model.name, self.error_model.number_of_outputs]
+
+            # censored observations contribute by their LLOQ
+            if self.is_censored is not None:
+                settings += [*self.lloq, *self.is_censored]
+
+        return settings
+
+    def _get_archive_seed(self, initial_parameter: np.ndarray, initial_parameter_uncertainty: np.ndarray) -> List:
+        """Returns the best archived parameters as starting point and the spread of the best archived parameters as
+        initial uncertainty, bounded from below by 1% of the starting point. If the archive holds no complete
+        evaluations within the parameter boundaries, the initial parameter and uncertainty are returned unchanged.
+
+        Arguments:
+            initial_parameter {np.ndarray} -- Starting point in parameter space of the optimisation algorithm.
+            initial_parameter_uncertainty {np.ndarray} -- Standard deviation around the starting point.
+
+        Returns:
+            List -- Starting point and initial uncertainty.
+        """
+        elite = self.evaluation_archive.best(number=2 * len(initial_parameter))
+        if len(elite) == 0:
+            return [initial_parameter, initial_parameter_uncertainty]
+
+        starting_point = elite[0]
+        if self.parameter_boundaries is not None and not self.parameter_boundaries.check(starting_point):
+            return [initial_parameter, initial_parameter_uncertainty]
+        if len(elite) < 2:
+            return [starting_point, initial_parameter_uncertainty]
+
+        spread = np.std(elite, axis=0)
+
+        return [starting_point, np.maximum(spread, np.maximum(0.01 * np.abs(starting_point), 1e-6))]
+
+    def _invalidate_evaluation_archive(self, patient_ids: List[int]=None) -> None:
+        """Marks the archived errors of patients as unknown after their data or error measures changed, and adds
+        patients that are not yet part of the archive.
+
+        Keyword Arguments:
+            patient_ids {List[int]} -- Indices of the changed patients. Defaults to all patients. (default: {None})
+        """
+        if self.evaluation_archive is None:
+            return
+
+        if patient_ids is None:
+            patient_ids = range(len(self.problem_container))
+
+        number_of_new_patients = len(self.problem_container) - self.evaluation_archive.patient_errors.shape[1]
+        if number_of_new_patients > 0:
+            self.evaluation_archive.add_patients(number_of_new_patients)
+
+        for patient_id in patient_ids:
+            self.evaluation_archive.invalidate_patient(patient_id)
+
+        self.evaluation_archive.problem_key = hash_problem(self.problem_container, self.error_function_container)
+
+    def set_evaluation_archive(self, evaluation_archive: EvaluationArchive, seed: bool=False) -> None:
+        """Sets an archive that records all objective evaluations across restarts and fits. Exact repeats of
+        evaluations are then served from the archive. An archive of a different problem is cleared.
+
+        Arguments:
+            evaluation_archive {EvaluationArchive} -- Archive of evaluations. If None, evaluations are not archived.
+
+        Keyword Arguments:
+            seed {bool} -- Flag whether runs start from the best archived evaluations. (default: {False})
+        """
+        if evaluation_archive is not None:
+            if evaluation_archive.patient_errors.shape[1] != len(self.problem_container):
+                raise ValueError('Number of patients of the archive does not match the inverse problem.')
+
+            problem_key = hash_problem(self.problem_container, self.error_function_container)
+            if evaluation_archive.problem_key is not None and evaluation_archive.problem_key != problem_key:
+                evaluation_archive.clear()
+            evaluation_archive.problem_key = problem_key
+
+        self.evaluation_archive = evaluation_archive
+        self.is_archive_seeding_enabled = seed
+
+    def _get_models(self) -> List:
+        """Returns the distinct models of all patients.
+
+        Returns:
+            List -- Models of the inverse problem.
+        """
+        models = []
+        for problem in self.problem_container:
+            if not any(problem.model() is model for model in models):
+                models.append(problem.model())
+
+        return models
+
+    def set_adaptive_tolerance(self, enabled: bool=True, loose_factor: float=100) -> None:
+        """Enables evaluation with loosened solver tolerances during the early iterations of each run. Runs start
+        with the tolerances of the models multiplied by loose_factor, which are tightened by a factor of 10 whenever
+        the best score improved by less than 1% over 10 iterations, until the tolerances of the models are reached.
+        Estimates are always scored with the tolerances of the models.
+
+        Keyword Arguments:
+            enabled {bool} -- Flag whether tolerances are adapted. (default: {True})
+            loose_factor {float} -- Factor by which the tolerances are loosened initially. (default: {100})
+        """
+        if loose_factor < 1:
+            raise ValueError('Loose factor has to be at least 1.')
+
+        self.is_adaptive_tolerance_enabled = enabled
+        self.loose_tolerance_factor = loose_factor
+
+    def _get_transformation(self, initial_parameter: np.ndarray) -> pints.Transformation:
+        """Returns the pints transformation from model parameters to the search space of the optimiser, or None if
+        parameters are optimised untransformed.
+
+        Arguments:
+            initial_parameter {np.ndarray} -- Starting point in parameter space of the optimisation algorithm.
+
+        Returns:
+            pints.Transformation -- Parameter transformation.
+        """
+        number_parameters = len(initial_parameter)
+
+        if self.parameter_transformation is None:
+            return None
+
+        if self.parameter_transformation == 'log':
+            if np.any(np.asarray(initial_parameter) <= 0):
+                raise ValueError('Log transformation requires strictly positive initial parameters.')
+            return pints.LogTransformation(number_parameters)
+
+        if self.parameter_transformation == 'logit':
+            if self.parameter_boundaries is None:
+                raise ValueError('Logit transformation requires parameter boundaries.')
+            return pints.RectangularBoundariesTransformation(self.parameter_boundaries)
+
+        # scale parameters to order one by the magnitude of the initial parameters
+        magnitude = np.abs(np.asarray(initial_parameter, dtype=float))
+        magnitude[magnitude == 0] = 1.0
+
+        return pints.ScalingTransformation(1.0 / magnitude)
+
+    def set_parameter_transformation(self, transformation: str) -> None:
+        """Sets the transformation between model parameters and the search space of the optimiser. Starting point,
+        uncertainty and boundaries are mapped to the search space, and estimates are mapped back to model parameters.
+
+        Arguments:
+            transformation {str} -- Valid transformations are None (untransformed), 'log' (strictly positive
+                                    parameters), 'logit' (parameters within the parameter boundaries) and 'scaling'
+                                    (parameters scaled by the magnitude of the initial parameters).
+        """
+        valid_transformations = [None, 'log', 'logit', 'scaling']
+
+        if transformation not in valid_transformations:
+            raise ValueError('Transformation is not supported.')
+
+        self.parameter_transformation = transformation
+
+    def _get_warm_start(self, problem_key: str, initial_parameter: np.ndarray) -> np.ndarray:
+        """Returns the estimate of the best stored fit of the problem as starting point, provided it lies within the
+        parameter boundaries. Otherwise the initial parameter is returned unchanged.
+
+        Arguments:
+            problem_key {str} -- Hash of models, protocols, data and error measure.
+            initial_parameter {np.ndarray} -- Starting point in parameter space of the optimisation algorithm.
+
+        Returns:
+            np.ndarray -- Starting point of the optimisation.
+        """
+        best_result = self.results_store.get_best(problem_key)
+        if best_result is None:
+            return initial_parameter
+
+        estimate = best_result.estimated_parameters
+        if len(estimate) != len(initial_parameter):
+            return initial_parameter
+        if self.parameter_boundaries is not None and not self.parameter_boundaries.check(estimate):
+            return initial_parameter
+
+        return estimate
+
+    def estimate_initial_parameter(self, doses: np.ndarray=None, number_of_samples: int=256, seed: int=None) -> List:
+        """Derives a starting point and an initial uncertainty for find_optimal_parameter from the data, by screening
+        the parameters suggested by a non-compartmental analysis and a Sobol sequence over the parameter boundaries,
+        see PKPD.inference.initialEstimate.InitialEstimator.
+
+        Keyword Arguments:
+            doses {np.ndarray} -- Administered dose of each patient. Should be provided if doses are administered
+                                  by protocols rather than by initial conditions. (default: {None})
+            number_of_samples {int} -- Minimal number of screened Sobol points. (default: {256})
+            seed {int} -- Seed of the scrambling of the Sobol sequence. (default: {None})
+
+        Returns:
+            List -- Starting point and initial uncertainty.
+        """
+        estimator = InitialEstimator(self, doses=doses, number_of_samples=number_of_samples, seed=seed)
+        starting_point, uncertainty = estimator.estimate()
+
+        # covariate coefficients start without covariate effects
+        if self.covariate_model is not None:
+            coefficients, coefficient_uncertainty = self.covariate_model.get_initial_coefficients()
+            starting_point = np.concatenate([starting_point, coefficients])
+            uncertainty = np.concatenate([uncertainty, coefficient_uncertainty])
+
+        # noise parameters start from the residuals at the starting point
+        if self.error_model is not None:
+            noise, noise_uncertainty = self.estimate_initial_noise_parameters(starting_point)
+            starting_point = np.concatenate([starting_point, noise])
+            uncertainty = np.concatenate([uncertainty, noise_uncertainty])
+
+        return [starting_point, uncertainty]
+
+    def estimate_initial_noise_parameters(self, parameters: np.ndarray) -> List:
+        """Returns a starting point and an initial uncertainty of the noise parameters, derived from the residuals of
+        the patients at the model parameters.
+
+        Arguments:
+            parameters {np.ndarray} -- Model parameters, or population parameters and covariate coefficients.
+
+        Returns:
+            List -- Starting point and initial uncertainty of the noise parameters.
+        """
+        if self.error_model is None:
+            raise ValueError('Noise parameters require an error model, see set_error_model.')
+
+        error_measure = ErrorModelLikelihood(self.problem_container, self.error_model, self.covariate_model, self.lloq,
+                                             self.is_censored)
+        predictions = error_measure.simulate(parameters)
+
+        return self.error_model.get_initial_parameters(error_measure.observations, predictions,
+                                                       error_measure.output_ids)
+
+    def set_covariate_model(self, covariate_model: CovariateModel) -> None:
+        """Sets a covariate model, which derives the individual parameters of the patients from population parameters
+        and the patients' covariates. Parameters of the inverse problem are then [population parameters, covariate
+        coefficients], and the individual parameters of all patients are computed in one vectorised pass per
+        evaluation. Evaluations are not archived, as the archive is sized for the model parameters.
+
+        Arguments:
+            covariate_model {CovariateModel} -- Relations between parameters and covariates. If None, all patients
+                                                share the parameters.
+        """
+        if covariate_model is not None and len(covariate_model.covariates) != len(self.problem_container):
+            raise ValueError('Number of patients of the covariate model does not match the inverse problem.')
+
+        self.covariate_model = covariate_model
+
+        # archived and previous errors refer to other parameters
+        self._invalidate_evaluation_archive()
+        self._updated_patients.update(range(len(self.problem_container)))
+
+    def set_error_model(self, error_model: ErrorModel) -> None:
+        """Sets an error model, such that the parameters are estimated by maximum likelihood instead of by the error
+        functions of the patients. Parameters of the inverse problem are then [model parameters, noise parameters], or
+        [population parameters, covariate coefficients, noise parameters] if a covariate model is set, and the noise
+        parameters are estimated jointly with the model parameters. Evaluations are not archived, as the archive is
+        sized for the model parameters.
+
+        Arguments:
+            error_model {ErrorModel} -- Error model of the observations, see PKPD.inference.errorModels.ErrorModel. If
+                                        None, the error functions of the patients are minimised.
+        """
+        if error_model is not None and error_model.number_of_outputs != self.problem_container[0].n_outputs():
+            raise ValueError('Number of outputs of the error model does not match the inverse problem.')
+
+        self.error_model = error_model
+
+        # archived and previous errors refer to other parameters
+        self._invalidate_evaluation_archive()
+        self._updated_patients.update(range(len(self.problem_container)))
+
+    def set_censoring(self, lloq: List[np.ndarray], blq: List[np.ndarray]=None) -> None:
+        """Sets the lower limits of quantification (LLOQ) of the observations and censors the observations below
+        them. If below-LLOQ flags are provided, flagged observations that are missing or below the LLOQ are censored,
+        and missing observations without flag remain missing, see PKPD.inference.censoring.get_censored_observations.
+
+        Error models evaluate censored observations by the probability of falling below their LLOQ (M3 method). Error
+        functions and the initial estimate use the values of the problems, in which censored values are imputed by half
+        their LLOQ.
+
+        Arguments:
+            lloq {List[np.ndarray]} -- LLOQ of each patient's rows or observations, NaN if there is no limit. If None,
+                                       no observations are censored, while imputed values remain.
+
+        Keyword Arguments:
+            blq {List[np.ndarray]} -- Flags of each patient's rows or observations, non-zero if the observation is
+                                      below the LLOQ. (default: {None})
+        """
+        if lloq is None:
+            self.lloq, self.is_censored = None, None
+        else:
+            if len(lloq) != len(self.problem_container) or (blq is not None and len(blq) != len(lloq)):
+                raise ValueError('Number of patients of the censoring does not match the inverse problem.')
+
+            self.lloq, self.is_censored = [], []
+            for patient_id, problem in enumerate(self.problem_container):
+                values = np.array(problem.values(), dtype=float)
+                patient_lloq = broadcast_to_values(lloq[patient_id], values)
+                is_censored = get_censored_observations(values, patient_lloq,
+                                                        blq[patient_id] if blq is not None else None)
+                if np.any(patient_lloq[is_censored] <= 0):
+                    raise ValueError('Censored observations require a positive LLOQ.')
+
+                # impute censored values for error functions, which do not account for censoring
+                if np.any(is_censored):
+                    values[is_censored] = 0.5 * patient_lloq[is_censored]
+                    self.problem_container[patient_id] = type(problem)(problem.model(), problem.times(), values)
+                    self.error_function_container[patient_id] = type(self.error_function_container[patient_id])(
+                        self.problem_container[patient_id]
+                    )
+                self.lloq.append(np.array(patient_lloq))
+                self.is_censored.append(is_censored)
+
+        # archived and previous errors refer to other observations
+        self._invalidate_evaluation_archive()
+        self._updated_patients.update(range(len(self.problem_container)))
+
+    def _get_error_measure(self) -> PatientSumOfErrors:
+        """Returns the sum of the patients' errors, which maps the parameters to individual parameters, if a covariate
+        model is set, or the negative log-likelihood of the observations, if an error model is set.
+
+        Returns:
+            PatientSumOfErrors -- Objective function.
+        """
+        if self.error_model is not None:
+            return ErrorModelLikelihood(self.problem_container, self.error_model, self.covariate_model, self.lloq,
+                                        self.is_censored)
+        if self.covariate_model is None:
+            return PatientSumOfErrors(self.error_function_container, self.evaluation_archive)
+
+        # archive is sized for the model parameters, so fits with covariate coefficients are not archived
+        return CovariateSumOfErrors(self.error_function_container, self.covariate_model)
+
+    def get_diagnostics(self) -> Diagnostics:
+        """Returns the goodness-of-fit diagnostics at the estimated parameters. The diagnostics are cached, and only
+        patients whose data or parameters changed since the last call are simulated again.
+
+        Returns:
+            Diagnostics -- Predictions, residuals and weighted residuals of all patients.
+        """
+        if self.diagnostics is None:
+            self.diagnostics = Diagnostics(self)
+        self.diagnostics.update()
+
+        return self.diagnostics
+
+    def set_results_store(self, results_store: ResultsStore, warm_start: bool=False) -> None:
+        """Sets a persistent store for results. Fits with identical models, data and settings are then returned from
+        the store instead of being recomputed.
+
+        Arguments:
+            results_store {ResultsStore} -- Store for results. If None, results are not persisted.
+
+        Keyword Arguments:
+            warm_start {bool} -- Flag whether new fits start from the best stored fit of the same problem.
+                                 (default: {False})
+        """
+        self.results_store = results_store
+        self.is_warm_start_enabled = warm_start
+
+
+class _ToleranceSchedule(object):
+    """Loosens the solver tolerances of models at the start of an optimisation run and tightens them step by step, as
+    the best score stagnates. While the tolerances are loosened, evaluations of the objective are marked approximate.
+    """
+    def __init__(self, models: List, loose_factor: float, error_measure: PatientSumOfErrors) -> None:
+        """Loosens the tolerances of the models.
+
+        Arguments:
+            models {List} -- Models whose tolerances are adapted.
+            loose_factor {float} -- Initial factor by which the tolerances are loosened.
+            error_measure {PatientSumOfErrors} -- Objective function of the run.
+        """
+        self.models = models
+        self.error_measure = error_measure
+
+        # tighten by factors of 10 towards the tolerances of the models
+        number_of_stages = int(np.ceil(np.log10(loose_factor))) + 1
+        self.factors = np.append(loose_factor / 10.0 ** np.arange(number_of_stages - 1), 1.0)
+
+        # iterations without improvement of more than 1% before tightening
+        self.window = 10
+
+        self.stage = -1
+        self._tighten(start=0)
+
+    def update(self, trace: List) -> None:
+        """Tightens the tolerances, if the best score improved by less than 1% over the last iterations of the current
+        stage.
+
+        Arguments:
+            trace {List} -- Best score after each iteration.
+        """
+        if self.stage == len(self.factors) - 1 or len(trace) - self._stage_start <= self.window:
+            return
+
+        if trace[-self.window - 1] - trace[-1] <= 0.01 * abs(trace[-1]):
+            self._tighten(start=len(trace))
+
+    def finish(self) -> None:
+        """Restores the tolerances of the models.
+        """
+        self.stage = len(self.factors) - 2
+        self._tighten(start=0)
+
+    def _tighten(self, start: int) -> None:
+        """Advances to the next stage and sets the corresponding tolerances.
+
+        Arguments:
+            start {int} -- Iteration at which the stage starts.
+        """
+        self.stage += 1
+        self._stage_start = start
+        factor = self.factors[self.stage]
+
+        for model in self.models:
+            abs_tol, rel_tol = model.tolerance
+            model.simulation.set_tolerance(abs_tol * factor, min(rel_tol * factor, max(rel_tol, 0.01)))
+
+        self.error_measure.is_approximate = factor > 1
@@ -0,0 +1,177 @@
+import numpy as np
+
+
+class EvaluationArchive(object):
+    """Bounded in-memory archive of objective evaluations. Each record holds a parameter set and the errors of all
+    patients for these parameters, such that exact repeats of an evaluation can be served without simulating, and the
+    best evaluations can seed later optimisation runs.
+
+    Records are indexed by the bytes of their parameters. When the capacity is reached, the worse half of the records
+    is dropped. Errors of a patient whose data changed are marked unknown (NaN), and only those are re-evaluated.
+    """
+    def __init__(self, number_of_parameters: int, number_of_patients: int, capacity: int=10000) -> None:
+        """Initialises an empty archive.
+
+        Arguments:
+            number_of_parameters {int} -- Number of parameters of the optimisation problem.
+            number_of_patients {int} -- Number of patients of the inverse problem.
+
+        Keyword Arguments:
+            capacity {int} -- Maximal number of records. (default: {10000})
+        """
+        if capacity < 2:
+            raise ValueError('Capacity of the archive has to be at least 2.')
+
+        self.capacity = capacity
+        self.parameters = np.empty(shape=(capacity, number_of_parameters))
+        self.patient_errors = np.empty(shape=(capacity, number_of_patients))
+        self.number_of_records = 0
+
+        # hash of the problem the errors belong to, see PKPD.inference.store.hash_problem
+        self.problem_key = None
+
+        self._index = {}
+
+    def __len__(self) -> int:
+        """Returns the number of records.
+        """
+        return self.number_of_records
+
+    @property
+    def scores(self) -> np.ndarray:
+        """Objective scores of the records, i.e. the sum of the patient errors. NaN if any patient error is unknown.
+        """
+        return np.sum(self.patient_errors[:self.number_of_records], axis=1)
+
+    def lookup(self, parameters: np.ndarray) -> np.ndarray:
+        """Returns the archived patient errors of the parameters, or None if the parameters have not been evaluated.
+
+        Arguments:
+            parameters {np.ndarray} -- Parameters of the model.
+
+        Returns:
+            np.ndarray -- Error of each patient, NaN if unknown.
+        """
+        record_id = self._index.get(_get_key(parameters))
+        if record_id is None:
+            return None
+
+        return np.array(self.patient_errors[record_id])
+
+    def add(self, parameters: np.ndarray, patient_errors: np.ndarray) -> None:
+        """Records the patient errors of the parameters. An existing record of the parameters is replaced.
+
+        Arguments:
+            parameters {np.ndarray} -- Parameters of the model.
+            patient_errors {np.ndarray} -- Error of each patient.
+        """
+        key = _get_key(parameters)
+        record_id = self._index.get(key)
+
+        if record_id is None:
+            if self.number_of_records == self.capacity:
+                self._drop_worse_half()
+            record_id = self.number_of_records
+            self.number_of_records += 1
+            self._index[key] = record_id
+
+        self.parameters[record_id] = parameters
+        self.patient_errors[record_id] = patient_errors
+
+    def best(self, number: int=1) -> np.ndarray:
+        """Returns the parameters of the records with minimal score, ordered by score. Records with unknown patient
+        errors are ignored.
+
+        Keyword Arguments:
+            number {int} -- Maximal number of returned parameter sets. (default: {1})
+
+        Returns:
+            np.ndarray -- Parameters of shape (number of parameter sets, number of parameters).
+        """
+        scores = self.scores
+        record_ids = np.flatnonzero(np.isfinite(scores))
+        record_ids = record_ids[np.argsort(scores[record_ids], kind='stable')[:number]]
+
+        return np.array(self.parameters[record_ids])
+
+    def invalidate_patient(self, patient_id: int) -> None:
+        """Marks the errors of a patient as unknown, e.g. after its data changed.
+
+        Arguments:
+            patient_id {int} -- Index of the patient.
+        """
+        self.patient_errors[:, patient_id] = np.nan
+
+    def add_patients(self, number_of_patients: int) -> None:
+        """Appends patients with unknown errors to all records.
+
+        Arguments:
+            number_of_patients {int} -- Number of new patients.
+        """
+        new_errors = np.full(shape=(self.capacity, number_of_patients), fill_value=np.nan)
+        self.patient_errors = np.concatenate([self.patient_errors, new_errors], axis=1)
+
+    def clear(self) -> None:
+        """Removes all records.
+        """
+        self.number_of_records = 0
+        self.problem_key = None
+        self._index = {}
+
+    def save(self, file_path: str) -> None:
+        """Saves the records to a binary .npz file.
+
+        Arguments:
+            file_path {str} -- Path to the file.
+        """
+        problem_key = self.problem_key if self.problem_key is not None else ''
+        with open(file_path, 'wb') as archive_file:
+            np.savez(archive_file,
+                     parameters=self.parameters[:self.number_of_records],
+                     patient_errors=self.patient_errors[:self.number_of_records],
+                     capacity=self.capacity,
+                     problem_key=np.frombuffer(problem_key.encode('utf-8'), dtype=np.uint8)
+                     )
+
+    @staticmethod
+    def load(file_path: str) -> 'EvaluationArchive':
+        """Loads an archive from a binary .npz file created by EvaluationArchive.save.
+
+        Arguments:
+            file_path {str} -- Path to the file.
+
+        Returns:
+            EvaluationArchive -- Loaded archive.
+        """
+        with np.load(file_path, allow_pickle=False) as arrays:
+            parameters = arrays['parameters']
+            patient_errors = arrays['patient_errors']
+            archive = EvaluationArchive(parameters.shape[1], patient_errors.shape[1], int(arrays['capacity']))
+            problem_key = bytes(arrays['problem_key']).decode('utf-8')
+
+        archive.problem_key = problem_key if problem_key else None
+        for record_id, record in enumerate(parameters):
+            archive.add(record, patient_errors[record_id])
+
+        return archive
+
+    def _drop_worse_half(self) -> None:
+        """Keeps the better half of the records by score. Records with unknown patient errors are dropped first.
+        """
+        scores = self.scores
+        scores[np.isnan(scores)] = np.inf
+        record_ids = np.sort(np.argsort(scores, kind='stable')[:self.capacity // 2])
+
+        number_of_records = len(record_ids)
+        self.parameters[:number_of_records] = self.parameters[record_ids]
+        self.patient_errors[:number_of_records] = self.patient_errors[record_ids]
+        self.number_of_records = number_of_records
+
+        # rebuild index
+        self._index = {_get_key(self.parameters[record_id]): record_id for record_id in range(number_of_records)}
+
+
+def _get_key(parameters: np.ndarray) -> bytes:
+    """Returns the index key of a parameter set.
+    """
+    return np.ascontiguousarray(parameters, dtype=float).tobytes()
@@ -0,0 +1,76 @@
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+
+# data columns with these labels are read as lower limit of quantification (LLOQ) and below-LLOQ flag of each row
+LLOQ_LABEL = 'lloq'
+BLQ_LABEL = 'blq'
+
+
+def split_censoring(data_df: pd.DataFrame) -> List[pd.DataFrame]:
+    """Splits the LLOQ and BLQ flag columns, labelled LLOQ_LABEL and BLQ_LABEL in any case, from a data frame, such that
+    the remaining columns follow the layout ID, time, states and dose.
+
+    Arguments:
+        data_df {pd.DataFrame} -- Data frame of the data file.
+
+    Returns:
+        List[pd.DataFrame] -- Data frame without censoring columns, and data frame with the columns 'lloq' and 'blq', or
+                              None if no LLOQ is provided.
+    """
+    labels = {str(label).lower(): label for label in data_df.keys()}
+    if LLOQ_LABEL not in labels:
+        return [data_df, None]
+
+    censoring_labels = [labels[label] for label in [LLOQ_LABEL, BLQ_LABEL] if label in labels]
+    censoring_df = data_df[censoring_labels].apply(pd.to_numeric, errors='coerce')
+    censoring_df.columns = [str(label).lower() for label in censoring_labels]
+
+    return [data_df.drop(columns=censoring_labels), censoring_df]
+
+
+def get_censored_observations(values: np.ndarray, lloq: np.ndarray, blq: np.ndarray=None) -> np.ndarray:
+    """Returns whether each observation is censored below its LLOQ. If BLQ flags are provided, flagged observations
+    that are missing or below the LLOQ are censored, such that missing observations without flag remain missing.
+    Otherwise observations below the LLOQ are censored. Limits and flags of a row apply to all outputs of the row.
+
+    Arguments:
+        values {np.ndarray} -- Observations of shape (number of times,) or (number of times, number of outputs),
+                               missing observations are marked by NaN.
+        lloq {np.ndarray} -- LLOQ of each row or observation, NaN if there is no limit.
+
+    Keyword Arguments:
+        blq {np.ndarray} -- Flag of each row or observation, non-zero if the observation is below the LLOQ.
+                            (default: {None})
+
+    Returns:
+        np.ndarray -- Boolean array of the shape of the values.
+    """
+    values = np.asarray(values, dtype=float)
+    lloq = broadcast_to_values(lloq, values)
+
+    with np.errstate(invalid='ignore'):
+        is_below_limit = values < lloq
+    if blq is None:
+        return is_below_limit
+
+    is_flagged = np.nan_to_num(broadcast_to_values(blq, values)) != 0
+
+    return is_flagged & ~np.isnan(lloq) & (np.isnan(values) | is_below_limit)
+
+
+def broadcast_to_values(array: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Broadcasts entries of each row, or of each observation, to the shape of the values.
+
+    Arguments:
+        array {np.ndarray} -- Entries of shape (number of times,) or of the shape of the values.
+        values {np.ndarray} -- Observations of shape (number of times,) or (number of times, number of outputs).
+
+    Returns:
+        np.ndarray -- Entries of the shape of the values.
+    """
+    array = np.asarray(array, dtype=float)
+
+    return np.broadcast_to(array.reshape(array.shape + (1,) * (values.ndim - array.ndim)), values.shape)
@@ -0,0 +1,219 @@
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+
+class Diagnostics(object):
+    """Goodness-of-fit diagnostics of an inverse problem, i.e. the predictions at the observation times, residuals,
+    weighted residuals and observed against predicted values of every patient.
+
+    Patients that share a model and their parameters share the simulated trajectory, so each group of such patients is
+    simulated once on the union of their observation times, which for a population with shared parameters amounts to a
+    single simulation. Predictions are cached per patient and update only recomputes patients whose data, model or
+    parameters changed since the last update, e.g. after add_observations or add_patients.
+
+    Weighted residuals are the residuals divided by the residual standard deviation of their output, which is the root
+    mean squared residual across all patients, in line with the additive error of sum of squares objectives. If the
+    problem has an error model, the residuals are instead weighted by the standard deviation of the error model at the
+    estimated noise parameters. Observations censored below their limit of quantification carry no value, so they are
+    excluded from the residuals and flagged in the data frame.
+    """
+    def __init__(self, problem) -> None:
+        """Initialises the diagnostics of an inverse problem.
+
+        Arguments:
+            problem {AbstractInverseProblem} -- Inverse problem, e.g.
+                                                PKPD.inference.inference.SingleOutputInverseProblem.
+        """
+        self.problem = problem
+
+        # cached data and predictions of each patient
+        self.times = []
+        self.observations = []
+        self.predictions = []
+        self.residuals = []
+
+        # keys of the cached predictions, i.e. the pints problem and the parameters of each patient
+        self._patient_problems = []
+        self._patient_parameters = []
+
+        # noise parameters of the error model, if the problem has one
+        self.noise_parameters = None
+
+        # count of forward simulations, which documents the batching
+        self.number_of_simulations = 0
+
+    def update(self, parameters: np.ndarray=None) -> List[int]:
+        """Recomputes the predictions and residuals of patients whose data, model or parameters changed.
+
+        Keyword Arguments:
+            parameters {np.ndarray} -- Parameters of the inverse problem. Defaults to the estimated parameters.
+                                       (default: {None})
+
+        Returns:
+            List[int] -- Indices of the recomputed patients.
+        """
+        if parameters is None:
+            parameters = self.problem.estimated_parameters
+        if parameters is None:
+            raise ValueError('Parameters have to be estimated with find_optimal_parameter before diagnostics are '
+                             'computed.')
+        parameters = np.asarray(parameters, dtype=float)
+
+        # noise parameters do not affect the predictions
+        error_model = getattr(self.problem, 'error_model', None)
+        if error_model is not None:
+            number_of_model_parameters = len(parameters) - error_model.n_parameters()
+            parameters, self.noise_parameters = [parameters[:number_of_model_parameters],
+                                                 parameters[number_of_model_parameters:]]
+        else:
+            self.noise_parameters = None
+        patient_parameters = self._get_patient_parameters(parameters)
+
+        # find patients that are new or changed
+        problem_container = self.problem.problem_container
+        number_of_patients = len(problem_container)
+        del self._patient_problems[number_of_patients:], self._patient_parameters[number_of_patients:]
+        for cache in [self.times, self.observations, self.predictions, self.residuals]:
+            del cache[number_of_patients:]
+            cache.extend([None] * (number_of_patients - len(cache)))
+        changed_patient_ids = []
+        for patient_id, problem in enumerate(problem_container):
+            is_cached = (patient_id < len(self._patient_problems) and
+                         self._patient_problems[patient_id] is problem and
+                         np.array_equal(self._patient_parameters[patient_id], patient_parameters[patient_id]))
+            if not is_cached:
+                changed_patient_ids.append(patient_id)
+
+        # group changed patients by model and parameters, which share the simulated trajectory
+        groups = {}
+        for patient_id in changed_patient_ids:
+            model = problem_container[patient_id].model()
+            key = (id(model), patient_parameters[patient_id].tobytes())
+            groups.setdefault(key, [model, patient_parameters[patient_id], []])[2].append(patient_id)
+
+        # simulate each group once on the union of its observation times
+        for model, group_parameters, patient_ids in groups.values():
+            patient_times = [np.asarray(problem_container[patient_id].times(), dtype=float)
+                             for patient_id in patient_ids]
+            times = np.unique(np.concatenate(patient_times))
+            trajectory = np.array(model.simulate(group_parameters, times), dtype=float).reshape(len(times), -1)
+            self.number_of_simulations += 1
+
+            for patient_id, observation_times in zip(patient_ids, patient_times):
+                problem = problem_container[patient_id]
+                observations = np.array(problem.values(), dtype=float)
+                is_censored = getattr(self.problem, 'is_censored', None)
+                if is_censored is not None:
+                    observations[is_censored[patient_id]] = np.nan
+                predictions = trajectory[np.searchsorted(times, observation_times)].reshape(observations.shape)
+
+                self.times[patient_id] = observation_times
+                self.observations[patient_id] = observations
+                self.predictions[patient_id] = predictions
+                self.residuals[patient_id] = observations - predictions
+
+        # update keys of the cached predictions
+        self._patient_problems = list(problem_container)
+        self._patient_parameters = [np.array(parameter_set) for parameter_set in patient_parameters]
+
+        return changed_patient_ids
+
+    def _get_patient_parameters(self, parameters: np.ndarray) -> np.ndarray:
+        """Returns the parameters of each patient, which are individual parameters if the problem has a covariate model.
+
+        Arguments:
+            parameters {np.ndarray} -- Parameters of the inverse problem.
+
+        Returns:
+            np.ndarray -- Parameters of shape (number of patients, number of model parameters).
+        """
+        covariate_model = getattr(self.problem, 'covariate_model', None)
+        if covariate_model is not None:
+            return covariate_model.compute_individual_parameters(parameters)
+
+        return np.broadcast_to(parameters, (len(self.problem.problem_container), len(parameters)))
+
+    @property
+    def residual_standard_deviation(self) -> np.ndarray:
+        """Root mean squared residual of each output across all patients, ignoring missing observations.
+        """
+        residuals = np.concatenate([residuals.reshape(len(residuals), -1) for residuals in self.residuals])
+
+        return np.sqrt(np.nanmean(residuals ** 2, axis=0))
+
+    @property
+    def standard_deviations(self) -> List[np.ndarray]:
+        """Standard deviation of each observation of each patient, which is the standard deviation of the error model
+        at the noise parameters, or the residual standard deviation of its output.
+        """
+        error_model = getattr(self.problem, 'error_model', None)
+        if error_model is not None and self.noise_parameters is not None:
+            standard_deviations = []
+            for predictions in self.predictions:
+                output_ids = np.tile(np.arange(error_model.number_of_outputs), len(predictions))
+                standard_deviations.append(error_model.compute_standard_deviations(predictions.ravel(),
+                                                                                   self.noise_parameters,
+                                                                                   output_ids
+                                                                                   ).reshape(predictions.shape))
+
+            return standard_deviations
+
+        standard_deviation = self.residual_standard_deviation
+
+        return [np.broadcast_to(standard_deviation, predictions.reshape(len(predictions), -1).shape).reshape(
+            predictions.shape) for predictions in self.predictions]
+
+    @property
+    def weighted_residuals(self) -> List[np.ndarray]:
+        """Residuals of each patient divided by the residual standard deviation of their output, or by the standard
+        deviation of the error model.
+        """
+        error_model = getattr(self.problem, 'error_model', None)
+        if error_model is not None and self.noise_parameters is not None:
+            weighted_residuals = []
+            for observations, predictions in zip(self.observations, self.predictions):
+                output_ids = np.tile(np.arange(error_model.number_of_outputs), len(observations))
+                weighted_residuals.append(error_model.compute_weighted_residuals(observations.ravel(),
+                                                                                 predictions.ravel(),
+                                                                                 self.noise_parameters,
+                                                                                 output_ids
+                                                                                 ).reshape(observations.shape))
+
+            return weighted_residuals
+
+        standard_deviation = self.residual_standard_deviation
+        weighted_residuals = []
+        for residuals in self.residuals:
+            weighted_residuals.append((residuals.reshape(len(residuals), -1) / standard_deviation).reshape(
+                residuals.shape))
+
+        return weighted_residuals
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Returns the diagnostics of all observations in long format.
+
+        Returns:
+            pd.DataFrame -- One row per patient, time and output with observation, prediction, residual, weighted
+                            residual and whether the observation is censored.
+        """
+        is_censored = getattr(self.problem, 'is_censored', None)
+        columns = {'patient': [], 'time': [], 'output': [], 'observation': [], 'prediction': [], 'residual': [],
+                   'weighted_residual': [], 'censored': []}
+        for patient_id, weighted_residuals in enumerate(self.weighted_residuals):
+            observations = self.observations[patient_id].reshape(len(self.times[patient_id]), -1)
+            number_of_outputs = observations.shape[1]
+            columns['patient'].append(np.full(observations.size, patient_id))
+            columns['time'].append(np.repeat(self.times[patient_id], number_of_outputs))
+            columns['output'].append(np.tile(np.arange(number_of_outputs), len(observations)))
+            columns['observation'].append(observations.ravel())
+            columns['prediction'].append(self.predictions[patient_id].ravel())
+            columns['residual'].append(self.residuals[patient_id].ravel())
+            columns['weighted_residual'].append(weighted_residuals.ravel())
+            if is_censored is not None:
+                columns['censored'].append(np.ravel(is_censored[patient_id]))
+            else:
+                columns['censored'].append(np.zeros(observations.size, dtype=bool))
+
+        return pd.DataFrame({name: np.concatenate(values) for name, values in columns.items()})
@@ -0,0 +1,243 @@
+from typing import List
+
+import numpy as np
+from scipy import special
+
+
+# supported error models and the prefixes of their noise parameters
+ERROR_MODELS = {'additive': ['sigma_additive'],
+                'proportional': ['sigma_proportional'],
+                'combined': ['sigma_additive', 'sigma_proportional'],
+                'log-normal': ['sigma_log']
+                }
+
+
+class ErrorModel(object):
+    """Residual error model of the observations, whose noise parameters are estimated jointly with the model
+    parameters by maximum likelihood. Observations y scatter around the predictions f with standard deviation
+
+        additive        sigma = a
+        proportional    sigma = b |f|
+        combined        sigma = sqrt(a^2 + b^2 f^2)
+
+    or, for the log-normal model, log y scatters around log f with standard deviation sigma. Each output has its own
+    noise parameters, which are ordered by kind and then by output, e.g. [a_1, ..., a_n, b_1, ..., b_n] for the combined
+    model.
+
+    All methods operate on flat arrays of the observations of all patients and outputs, where the output of each
+    observation is given by an index array, such that the log-likelihood of a population is evaluated in one pass.
+    Missing observations, i.e. NaN, do not contribute. Observations censored below a lower limit of quantification
+    (LLOQ) contribute the probability of falling below the limit (M3 method).
+    """
+    def __init__(self, name: str='combined', number_of_outputs: int=1) -> None:
+        """Initialises the error model.
+
+        Keyword Arguments:
+            name {str} -- Error model, valid options are 'additive', 'proportional', 'combined' and 'log-normal'.
+                          (default: {'combined'})
+            number_of_outputs {int} -- Number of outputs of the model. (default: {1})
+        """
+        if name not in ERROR_MODELS:
+            raise ValueError('Error model is not supported. Valid error models are ' + str(list(ERROR_MODELS)) + '.')
+        if number_of_outputs < 1:
+            raise ValueError('Error models require at least one output.')
+
+        self.name = name
+        self.number_of_outputs = number_of_outputs
+
+    def n_parameters(self) -> int:
+        """Returns the number of noise parameters.
+
+        Returns:
+            int -- Number of noise parameters.
+        """
+        return len(ERROR_MODELS[self.name]) * self.number_of_outputs
+
+    def get_parameter_names(self, output_names: List[str]=None) -> List[str]:
+        """Returns the names of the noise parameters.
+
+        Keyword Arguments:
+            output_names {List[str]} -- Names of the outputs. Defaults to the output indices. (default: {None})
+
+        Returns:
+            List[str] -- Names of the noise parameters.
+        """
+        if output_names is None:
+            output_names = [str(output_id) for output_id in range(self.number_of_outputs)]
+
+        return ['%s.%s' % (prefix, output_name) for prefix in ERROR_MODELS[self.name] for output_name in output_names]
+
+    def compute_negative_log_likelihoods(self, observations: np.ndarray, predictions: np.ndarray,
+                                         noise_parameters: np.ndarray, output_ids: np.ndarray) -> np.ndarray:
+        """Returns the negative log-likelihood of each observation. Invalid noise parameters or non-positive
+        predictions of the log-normal model give infinite values, missing observations zero.
+
+        Arguments:
+            observations {np.ndarray} -- Flat array of observations.
+            predictions {np.ndarray} -- Flat array of predictions.
+            noise_parameters {np.ndarray} -- Noise parameters.
+            output_ids {np.ndarray} -- Output index of each observation.
+
+        Returns:
+            np.ndarray -- Negative log-likelihood of each observation.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            residuals, standard_deviations = self._get_scaled_residuals(observations, predictions, noise_parameters,
+                                                                        output_ids)
+            negative_log_likelihoods = 0.5 * np.log(2 * np.pi) + np.log(standard_deviations) + 0.5 * residuals ** 2
+
+            # density of the observations rather than of their logarithm
+            if self.name == 'log-normal':
+                negative_log_likelihoods += np.log(observations)
+
+        negative_log_likelihoods = np.where(np.isnan(negative_log_likelihoods), np.inf, negative_log_likelihoods)
+
+        return np.where(np.isnan(observations), 0, negative_log_likelihoods)
+
+    def compute_censored_negative_log_likelihoods(self, lloq: np.ndarray, predictions: np.ndarray,
+                                                  noise_parameters: np.ndarray, output_ids: np.ndarray) -> np.ndarray:
+        """Returns the negative log-likelihood of each censored observation, i.e. the negative log-probability that
+        the observation falls below its LLOQ (M3 method). Probabilities are evaluated with the vectorised logarithm of
+        the normal cumulative distribution function, which remains accurate far into the tails.
+
+        Arguments:
+            lloq {np.ndarray} -- Flat array of the LLOQs of the censored observations.
+            predictions {np.ndarray} -- Flat array of predictions.
+            noise_parameters {np.ndarray} -- Noise parameters.
+            output_ids {np.ndarray} -- Output index of each observation.
+
+        Returns:
+            np.ndarray -- Negative log-likelihood of each censored observation.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scaled_limits, standard_deviations = self._get_scaled_residuals(lloq, predictions, noise_parameters,
+                                                                            output_ids)
+            negative_log_likelihoods = -special.log_ndtr(scaled_limits)
+
+        return np.where(np.isnan(negative_log_likelihoods), np.inf, negative_log_likelihoods)
+
+    def compute_weighted_residuals(self, observations: np.ndarray, predictions: np.ndarray,
+                                   noise_parameters: np.ndarray, output_ids: np.ndarray) -> np.ndarray:
+        """Returns the residuals divided by their standard deviation, on log scale for the log-normal model.
+
+        Arguments:
+            observations {np.ndarray} -- Flat array of observations.
+            predictions {np.ndarray} -- Flat array of predictions.
+            noise_parameters {np.ndarray} -- Noise parameters.
+            output_ids {np.ndarray} -- Output index of each observation.
+
+        Returns:
+            np.ndarray -- Weighted residual of each observation.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            residuals, standard_deviations = self._get_scaled_residuals(observations, predictions, noise_parameters,
+                                                                        output_ids)
+
+        return residuals
+
+    def compute_standard_deviations(self, predictions: np.ndarray, noise_parameters: np.ndarray,
+                                    output_ids: np.ndarray) -> np.ndarray:
+        """Returns the standard deviation of each observation around its prediction. For the log-normal model this is
+        the standard deviation of the log-normal distribution with median f, f sqrt(exp(sigma^2) (exp(sigma^2) - 1)).
+
+        Arguments:
+            predictions {np.ndarray} -- Flat array of predictions.
+            noise_parameters {np.ndarray} -- Noise parameters.
+            output_ids {np.ndarray} -- Output index of each observation.
+
+        Returns:
+            np.ndarray -- Standard deviation of each observation.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            _, standard_deviations = self._get_scaled_residuals(predictions, predictions, noise_parameters, output_ids)
+
+        if self.name == 'log-normal':
+            variances = standard_deviations ** 2
+            return np.abs(predictions) * np.sqrt(np.exp(variances) * (np.exp(variances) - 1))
+
+        return standard_deviations
+
+    def sample_observations(self, predictions: np.ndarray, noise_parameters: np.ndarray, output_ids: np.ndarray,
+                            standard_normal: np.ndarray) -> np.ndarray:
+        """Returns observations scattered around the predictions by the error model, f + sigma z, or f exp(sigma z)
+        for the log-normal model, such that log-normal observations are positive with median f.
+
+        Arguments:
+            predictions {np.ndarray} -- Flat array of predictions.
+            noise_parameters {np.ndarray} -- Noise parameters.
+            output_ids {np.ndarray} -- Output index of each observation.
+            standard_normal {np.ndarray} -- Standard normal samples z, whose last axis matches the predictions.
+
+        Returns:
+            np.ndarray -- Sampled observations of the shape of the standard normal samples.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            _, standard_deviations = self._get_scaled_residuals(predictions, predictions, noise_parameters, output_ids)
+
+        if self.name == 'log-normal':
+            return predictions * np.exp(standard_deviations * standard_normal)
+
+        return predictions + standard_deviations * standard_normal
+
+    def get_initial_parameters(self, observations: np.ndarray, predictions: np.ndarray,
+                               output_ids: np.ndarray) -> List:
+        """Returns noise parameters matching the residuals of the predictions as starting point, and an initial
+        uncertainty of half their magnitude.
+
+        Arguments:
+            observations {np.ndarray} -- Flat array of observations.
+            predictions {np.ndarray} -- Flat array of predictions.
+            output_ids {np.ndarray} -- Output index of each observation.
+
+        Returns:
+            List -- Starting point and initial uncertainty of the noise parameters.
+        """
+        is_observed = ~np.isnan(observations)
+        starting_point = []
+        for prefix in ERROR_MODELS[self.name]:
+            for output_id in range(self.number_of_outputs):
+                mask = is_observed & (output_ids == output_id)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    if prefix == 'sigma_additive':
+                        residuals = observations[mask] - predictions[mask]
+                    elif prefix == 'sigma_proportional':
+                        residuals = (observations[mask] - predictions[mask]) / np.abs(predictions[mask])
+                    else:
+                        residuals = np.log(observations[mask]) - np.log(predictions[mask])
+                residuals = residuals[np.isfinite(residuals)]
+                root_mean_square = np.sqrt(np.mean(residuals ** 2)) if len(residuals) > 0 else 1.0
+
+                # both terms of the combined model explain the residuals in part
+                if self.name == 'combined':
+                    root_mean_square /= np.sqrt(2)
+                starting_point.append(max(root_mean_square, 1e-6))
+        starting_point = np.array(starting_point)
+
+        return [starting_point, 0.5 * starting_point]
+
+    def _get_scaled_residuals(self, observations: np.ndarray, predictions: np.ndarray, noise_parameters: np.ndarray,
+                              output_ids: np.ndarray) -> List:
+        """Returns the residuals divided by their standard deviation and the standard deviations. Non-positive noise
+        parameters give NaN.
+        """
+        noise_parameters = np.asarray(noise_parameters, dtype=float)
+        if len(noise_parameters) != self.n_parameters():
+            raise ValueError('Number of noise parameters does not match. Expected %d parameters.' % self.n_parameters())
+        noise_parameters = np.where(noise_parameters > 0, noise_parameters, np.nan)
+
+        # noise parameters of each observation, of shape (kinds, observations)
+        noise = noise_parameters.reshape(-1, self.number_of_outputs)[:, output_ids]
+
+        if self.name == 'log-normal':
+            standard_deviations = noise[0]
+            residuals = np.log(observations) - np.log(predictions)
+        else:
+            if self.name == 'additive':
+                standard_deviations = noise[0]
+            elif self.name == 'proportional':
+                standard_deviations = noise[0] * np.abs(predictions)
+            else:
+                standard_deviations = np.sqrt(noise[0] ** 2 + (noise[1] * predictions) ** 2)
+            residuals = observations - predictions
+
+        return [residuals / standard_deviations, standard_deviations]
@@ -0,0 +1,214 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Union
+
+import myokit
+import numpy as np
+import pandas as pd
+import pints
+
+from PKPD.inference import inference
+from PKPD.model import model as m
+from PKPD.model.modelBuilder import build_model
+
+
+class IndividualFits(object):
+    """Fits a model to the data of each patient separately, as first stage of a two-stage population analysis. The
+    distribution of the individual estimates summarises the variability between patients, and complements the pooled
+    estimate of the inverse problems.
+
+    Patients are fitted in parallel by a pool of worker processes. Each worker compiles the model once, when it is
+    started, and reuses the compiled simulation for all patients it fits, such that only the data and the dosing
+    protocol of a patient are sent with each job.
+    """
+    def __init__(self, model: Union[str, Dict, myokit.Model], times: List[np.ndarray], values: List[np.ndarray],
+                 protocols: List[myokit.Protocol]=None, output_names: List[str]=None, patient_ids: List=None) -> None:
+        """Initialises the individual fits.
+
+        Arguments:
+            model {Union[str, Dict, myokit.Model]} -- Path to an .mmt file, keyword arguments of
+                                                      PKPD.model.modelBuilder.build_model or a myokit model.
+            times {List[np.ndarray]} -- Times of data points of each patient.
+            values {List[np.ndarray]} -- State values of data points of each patient. 2d arrays define multi-output
+                                         problems.
+
+        Keyword Arguments:
+            protocols {List[myokit.Protocol]} -- Dosing protocol of each patient. Patients without protocol, or all
+                                                 patients if None, are dosed by the protocol of the .mmt file.
+                                                 (default: {None})
+            output_names {List[str]} -- Model variables matching the columns of multi-output data. If None, the default
+                                        outputs of the model are used. (default: {None})
+            patient_ids {List} -- IDs of the patients. Defaults to the indices of the patients. (default: {None})
+        """
+        if len(times) != len(values):
+            raise ValueError('Number of time and value arrays does not match.')
+        if protocols is not None and len(protocols) != len(times):
+            raise ValueError('Number of protocols does not match the number of patients.')
+        if patient_ids is not None and len(patient_ids) != len(times):
+            raise ValueError('Number of patient IDs does not match the number of patients.')
+
+        self.model = model
+        self.times = [np.asarray(patient_times, dtype=float) for patient_times in times]
+        self.values = [np.asarray(patient_values, dtype=float) for patient_values in values]
+        self.protocols = list(protocols) if protocols is not None else [None] * len(times)
+        self.output_names = output_names
+        self.patient_ids = list(patient_ids) if patient_ids is not None else list(range(len(times)))
+        self.is_single_output = self.values[0].ndim == 1
+        self.number_of_outputs = 1 if self.is_single_output else self.values[0].shape[1]
+
+        # initialise outputs
+        self.parameter_names = None
+        self.results = None
+
+    def run(self, number_of_processes: int=1, number_of_iterations: int=1, optimiser: pints.Optimiser=None,
+            initial_parameter: np.ndarray=None, boundaries: List[np.ndarray]=None, transformation: str=None,
+            doses: np.ndarray=None, seed: int=None) -> pd.DataFrame:
+        """Fits the model to the data of each patient.
+
+        Keyword Arguments:
+            number_of_processes {int} -- Number of worker processes. If 1, patients are fitted in this process.
+                                         (default: {1})
+            number_of_iterations {int} -- Number of optimisation runs per patient. (default: {1})
+            optimiser {pints.Optimiser} -- Optimiser of the fits. If None, the default optimiser of the inverse
+                                           problems is used. (default: {None})
+            initial_parameter {np.ndarray} -- Starting point of all fits. If None, the starting point is estimated from
+                                              the data of each patient, and parameters are optimised on log scale if
+                                              it is positive. (default: {None})
+            boundaries {List[np.ndarray]} -- Lower and upper parameter boundaries. (default: {None})
+            transformation {str} -- Parameter transformation of the fits, see
+                                    PKPD.inference.abstractInference.set_parameter_transformation. Overrides the log
+                                    scale of estimated starting points. (default: {None})
+            doses {np.ndarray} -- Administered dose of each patient, which informs the estimated starting points.
+                                  (default: {None})
+            seed {int} -- Seed of the fits. (default: {None})
+
+        Returns:
+            pd.DataFrame -- One row per patient with patient ID, number of observations, objective score, estimated
+                            parameters and error message of failed fits.
+        """
+        number_of_patients = len(self.times)
+        if doses is not None and len(doses) != number_of_patients:
+            raise ValueError('Number of doses does not match the number of patients.')
+
+        # derive independent seeds for the fits
+        if seed is not None:
+            seeds = np.random.SeedSequence(seed).generate_state(number_of_patients)
+        else:
+            seeds = [None] * number_of_patients
+        settings = [number_of_iterations, optimiser, initial_parameter, boundaries, transformation]
+        tasks = [[self.times[patient], self.values[patient], self.protocols[patient],
+                  None if doses is None else doses[patient], settings, seeds[patient]]
+                 for patient in range(number_of_patients)]
+        worker_settings = (self.model, self.output_names, self.is_single_output, self.number_of_outputs)
+
+        if number_of_processes == 1:
+            # seeded fits reseed the global random state, which is restored for the caller
+            random_state = np.random.get_state()
+            try:
+                _initialise_worker(*worker_settings)
+                fits = [_fit_patient(task) for task in tasks]
+            finally:
+                np.random.set_state(random_state)
+        else:
+            # send patients in chunks, such that short fits are not dominated by communication
+            chunk_size = max(1, number_of_patients // (4 * number_of_processes))
+            with ProcessPoolExecutor(max_workers=number_of_processes,
+                                     initializer=_initialise_worker,
+                                     initargs=worker_settings
+                                     ) as executor:
+                fits = list(executor.map(_fit_patient, tasks, chunksize=chunk_size))
+
+        # collect estimates in table
+        self.parameter_names = list(fits[0][3]) if fits else []
+        rows = []
+        for patient, (score, parameters, error, _) in enumerate(fits):
+            row = {'patient_id': self.patient_ids[patient],
+                   'number_of_observations': len(self.times[patient]),
+                   'objective_score': score
+                   }
+            row.update(zip(self.parameter_names, parameters))
+            row['error'] = error
+            rows.append(row)
+        self.results = pd.DataFrame(rows)
+
+        return self.results
+
+    def get_summary(self) -> pd.DataFrame:
+        """Returns the distribution of the individual estimates across the successfully fitted patients.
+
+        Returns:
+            pd.DataFrame -- One row per parameter with number of fitted patients, mean, standard deviation, coefficient
+                            of variation and the 2.5th, 50th and 97.5th percentiles of the estimates.
+        """
+        if self.results is None:
+            raise ValueError('Patients have to be fitted before the estimates can be summarised.')
+
+        estimates = self.results.loc[self.results['error'] == '', self.parameter_names]
+        summary = pd.DataFrame({'number_of_patients': estimates.count(),
+                                'mean': estimates.mean(),
+                                'standard_deviation': estimates.std(),
+                                '2.5%': estimates.quantile(0.025),
+                                'median': estimates.median(),
+                                '97.5%': estimates.quantile(0.975)
+                                })
+        summary.insert(3, 'coefficient_of_variation', summary['standard_deviation'] / summary['mean'].abs())
+        summary.index.name = 'parameter'
+
+        return summary
+
+
+# compiled model of the current process, set by _initialise_worker
+_WORKER = {}
+
+
+def _initialise_worker(model_source: Union[str, Dict, myokit.Model], output_names: List[str], is_single_output: bool,
+                       number_of_outputs: int) -> None:
+    """Compiles the model of the fits once per process.
+
+    Arguments:
+        model_source {Union[str, Dict, myokit.Model]} -- Model file, build_model specification or myokit model.
+        output_names {List[str]} -- Model variables matching the columns of the data, or None.
+        is_single_output {bool} -- Flag whether the data has a single output.
+        number_of_outputs {int} -- Number of columns of the data.
+    """
+    if isinstance(model_source, dict):
+        model_source = build_model(**model_source)
+
+    if is_single_output:
+        model = m.SingleOutputModel(model_source)
+        if output_names is not None:
+            model.set_output(output_names[0])
+    else:
+        model = m.MultiOutputModel(model_source)
+        if output_names is None:
+            model.set_output_dimension(number_of_outputs)
+        else:
+            model.set_output(list(output_names))
+
+    _WORKER['model'] = model
+    _WORKER['protocol'] = m._load_model(model_source)[1]
+
+
+def _fit_patient(task: List) -> List:
+    """Fits the model of the current process to the data of a patient.
+
+    Arguments:
+        task {List} -- Times, values, protocol and dose of the patient, settings of the fit and seed.
+
+    Returns:
+        List -- Objective score, estimated parameters, error message, which is empty for successful fits, and names of
+                the parameters including initial conditions.
+    """
+    times, values, protocol, dose, settings, seed = task
+    number_of_iterations, optimiser, initial_parameter, boundaries, transformation = settings
+
+    # dose the patient, or restore the protocol of the model file
+    model = _WORKER['model']
+    model.simulation.set_protocol(protocol if protocol is not None else _WORKER['protocol'])
+    parameter_names = model.state_names + model.parameter_names  # parameters including initial conditions
+
+    score, parameters, error = inference.fit_model(model, [times], [values], number_of_iterations=number_of_iterations,
+                                                   optimiser=optimiser, initial_parameter=initial_parameter,
+                                                   boundaries=boundaries, transformation=transformation,
+                                                   doses=None if dose is None else np.array([dose]), seed=seed)
+
+    return [score, parameters, error, parameter_names]
@@ -1,10 +1,12 @@
-from typing import List, Dict
+from typing import List, Dict, Union
 
+import myokit
 import numpy as np
 import pints
 
 from PKPD.model import model as m
 from PKPD.inference.abstractInference import AbstractInverseProblem
+from PKPD.inference.surrogate import SurrogateCMAES
 
 
 class SingleOutputInverseProblem(AbstractInverseProblem):
@@ -43,51 +45,84 @@ class SingleOutputInverseProblem(AbstractInverseProblem):
         # initialise parameter constraints
         self.parameter_boundaries = None
 
+        # parameters are optimised untransformed by default
+        self.parameter_transformation = None
+
+        # results are not persisted by default
+        self.results_store = None
+        self.is_warm_start_enabled = False
+
+        # solver tolerances of the models are used throughout by default
+        self.is_adaptive_tolerance_enabled = False
+        self.loose_tolerance_factor = 100
+
+        # patients share the parameters by default
+        self.covariate_model = None
+
+        # error functions of the patients are minimised by default
+        self.error_model = None
+
+        # observations are not censored by default
+        self.lloq = None
+        self.is_censored = None
+
+        # evaluations are not archived by default
+        self.evaluation_archive = None
+        self.is_archive_seeding_enabled = False
+
+        # initialise bookkeeping for incremental refits
+        self._patient_errors = None
+        self._updated_patients = set()
+
+        # diagnostics are computed on request
+        self.diagnostics = None
+
         # initialise outputs
+        self.result = None
         self.estimated_parameters = None
         self.objective_score = None
 
-    def find_optimal_parameter(self, initial_parameter:np.ndarray, number_of_iterations:int=5) -> None:
+    def find_optimal_parameter(self, initial_parameter:np.ndarray=None, number_of_iterations:int=5) -> None:
         """Find point in parameter space that optimises the objective function, i.e. find the set of parameters that
         minimises the distance of the model to the data with respect to the objective function. Optimisation is run
         number_of_iterations times and result with minimal score is returned.
 
         Arguments:
-            initial_parameter {np.ndarray} -- Starting point in parameter space of the optimisation algorithm.
+            initial_parameter {np.ndarray} -- Starting point in parameter space of the optimisation algorithm. If None,
+                                              the starting point and uncertainty are estimated from the data, see
+                                              estimate_initial_parameter, which requires parameter boundaries.
             number_of_iterations {int} -- Number of times optimisation is run. Default: 5 (arbitrary).
 
         Return:
             None
         """
+        # derive starting point from the data, if not specified. Unbounded optimisers may propose parameters, e.g.
+        # negative clearances, whose simulations diverge, so the estimate is only used within boundaries
+        if initial_parameter is None:
+            if self.parameter_boundaries is None:
+                raise ValueError('Initial parameters can only be estimated within parameter boundaries. Please set '
+                                 'parameter boundaries or provide an initial parameter!')
+            initial_parameter, uncertainty = self.estimate_initial_parameter()
+            if self.initial_parameter_uncertainty is None:
+                self.initial_parameter_uncertainty = uncertainty
+
         # set default randomness in initial parameter values, if not specified in GUI
         if self.initial_parameter_uncertainty is None:
             # TODO: evaluate how to choose uncertainty best, to obtain most stable results
             self.initial_parameter_uncertainty = initial_parameter + 0.1  # arbitrary
 
         # create sum of errors measure
-        error_measure = pints.SumOfErrors(self.error_function_container)
-
-        # initialise optimisation
-        optimisation = pints.OptimisationController(function=error_measure,
-                                                    x0=initial_parameter,
-                                                    sigma0=self.initial_parameter_uncertainty,
-                                                    boundaries=self.parameter_boundaries,
-                                                    method=self.optimiser
-                                                    )
+        error_measure = self._get_error_measure()
 
         # run optimisation 'number_of_iterations' times
-        estimate_container = []
-        score_container = []
-        for _ in range(number_of_iterations):
-            estimates, score = optimisation.run()
-            estimate_container.append(estimates)
-            score_container.append(score)
+        self.result = self._run_optimisation(error_measure, initial_parameter, number_of_iterations)
 
         # return parameters with minimal score
-        min_score_id = np.argmin(score_container)
-        self.estimated_parameters, self.objective_score = [estimate_container[min_score_id],
-                                                           score_container[min_score_id]
+        self.estimated_parameters, self.objective_score = [self.result.estimated_parameters,
+                                                           self.result.objective_score
                                                            ]
+        self._patient_errors = self._get_patient_errors(error_measure)
+        self._updated_patients = set()
 
     def set_error_function(self, error_function: pints.ErrorMeasure) -> None:
         """Sets the objective function which is minimised to find the optimal parameter set. For multiple problems, all
@@ -108,13 +143,18 @@ class SingleOutputInverseProblem(AbstractInverseProblem):
         for problem_id, problem in enumerate(self.problem_container):
             self.error_function_container[problem_id] = error_function(problem)
 
+        # archived and previous errors refer to the previous error function
+        self._invalidate_evaluation_archive()
+        self._updated_patients.update(range(len(self.problem_container)))
+
     def set_optimiser(self, optimiser: pints.Optimiser) -> None:
         """Sets the optimiser to find the "global" minimum of the objective function.
 
         Arguments:
-            optimiser {pints.Optimiser} -- Valid optimisers are [CMAES, NelderMead, PSO, SNES, XNES] in pints.
+            optimiser {pints.Optimiser} -- Valid optimisers are [CMAES, NelderMead, PSO, SNES, XNES] in pints and the
+                                           SurrogateCMAES for models with expensive simulations.
         """
-        valid_optimisers = [pints.CMAES, pints.NelderMead, pints.PSO, pints.SNES, pints.XNES]
+        valid_optimisers = [pints.CMAES, pints.NelderMead, pints.PSO, pints.SNES, pints.XNES, SurrogateCMAES]
 
         if optimiser not in valid_optimisers:
             raise ValueError('Method is not supported.')
@@ -171,49 +211,82 @@ class MultiOutputInverseProblem(AbstractInverseProblem):
         # initialise parameter constraints
         self.parameter_boundaries = None
 
+        # parameters are optimised untransformed by default
+        self.parameter_transformation = None
+
+        # results are not persisted by default
+        self.results_store = None
+        self.is_warm_start_enabled = False
+
+        # solver tolerances of the models are used throughout by default
+        self.is_adaptive_tolerance_enabled = False
+        self.loose_tolerance_factor = 100
+
+        # patients share the parameters by default
+        self.covariate_model = None
+
+        # error functions of the patients are minimised by default
+        self.error_model = None
+
+        # observations are not censored by default
+        self.lloq = None
+        self.is_censored = None
+
+        # evaluations are not archived by default
+        self.evaluation_archive = None
+        self.is_archive_seeding_enabled = False
+
+        # initialise bookkeeping for incremental refits
+        self._patient_errors = None
+        self._updated_patients = set()
+
+        # diagnostics are computed on request
+        self.diagnostics = None
+
         # initialise outputs
+        self.result = None
         self.estimated_parameters = None
         self.objective_score = None
 
-    def find_optimal_parameter(self, initial_parameter:np.ndarray, number_of_iterations:int=5) -> None:
+    def find_optimal_parameter(self, initial_parameter:np.ndarray=None, number_of_iterations:int=5) -> None:
         """Find point in parameter space that optimises the objective function, i.e. find the set of parameters that
         minimises the distance of the model to the data with respect to the objective function.
 
         Arguments:
-            initial_parameter {np.ndarray} -- Starting point in parameter space of the optimisation algorithm.
+            initial_parameter {np.ndarray} -- Starting point in parameter space of the optimisation algorithm. If None,
+                                              the starting point and uncertainty are estimated from the data, see
+                                              estimate_initial_parameter, which requires parameter boundaries.
 
         Return:
             None
         """
+        # derive starting point from the data, if not specified. Unbounded optimisers may propose parameters, e.g.
+        # negative clearances, whose simulations diverge, so the estimate is only used within boundaries
+        if initial_parameter is None:
+            if self.parameter_boundaries is None:
+                raise ValueError('Initial parameters can only be estimated within parameter boundaries. Please set '
+                                 'parameter boundaries or provide an initial parameter!')
+            initial_parameter, uncertainty = self.estimate_initial_parameter()
+            if self.initial_parameter_uncertainty is None:
+                self.initial_parameter_uncertainty = uncertainty
+
         # set default randomness in initial parameter values, if not specified in GUI
         if self.initial_parameter_uncertainty is None:
             # TODO: evaluate how to choose uncertainty best, to obtain most stable results
             self.initial_parameter_uncertainty = initial_parameter + 0.1 # arbitrary
 
         # create sum of errors measure
-        error_measure = pints.SumOfErrors(self.error_function_container)
-
-        # initialise optimisation
-        optimisation = pints.OptimisationController(function=error_measure,
-                                                    x0=initial_parameter,
-                                                    sigma0=self.initial_parameter_uncertainty,
-                                                    boundaries=self.parameter_boundaries,
-                                                    method=self.optimiser
-                                                    )
+        error_measure = self._get_error_measure()
 
         # run optimisation 'number_of_iterations' times
-        estimate_container = []
-        score_container = []
-        for _ in range(number_of_iterations):
-            estimates, score = optimisation.run()
-            estimate_container.append(estimates)
-            score_container.append(score)
+        self.result = self._run_optimisation(error_measure, initial_parameter, number_of_iterations)
 
         # return parameters with minimal score
-        min_score_id = np.argmin(score_container)
-        self.estimated_parameters, self.objective_score = [estimate_container[min_score_id],
-                                                           score_container[min_score_id]
+        self.estimated_parameters, self.objective_score = [self.result.estimated_parameters,
+                                                           self.result.objective_score
                                                            ]
+        self._patient_errors = self._get_patient_errors(error_measure)
+        self._updated_patients = set()
 
     def set_error_function(self, error_function: pints.ErrorMeasure) -> None:
         """Sets the objective function which is minimised to find the optimal parameter set. For multiple problems, all
@@ -234,13 +307,18 @@ class MultiOutputInverseProblem(AbstractInverseProblem):
         for problem_id, problem in enumerate(self.problem_container):
             self.error_function_container[problem_id] = error_function(problem)
 
+        # archived and previous errors refer to the previous error function
+        self._invalidate_evaluation_archive()
+        self._updated_patients.update(range(len(self.problem_container)))
+
     def set_optimiser(self, optimiser: pints.Optimiser) -> None:
         """Sets the optimiser to find the "global" minimum of the objective function.
 
         Arguments:
-            optimiser {pints.Optimiser} -- Valid optimisers are [CMAES, NelderMead, PSO, SNES, XNES] in pints.
+            optimiser {pints.Optimiser} -- Valid optimisers are [CMAES, NelderMead, PSO, SNES, XNES] in pints and the
+                                           SurrogateCMAES for models with expensive simulations.
         """
-        valid_optimisers = [pints.CMAES, pints.NelderMead, pints.PSO, pints.SNES, pints.XNES]
+        valid_optimisers = [pints.CMAES, pints.NelderMead, pints.PSO, pints.SNES, pints.XNES, SurrogateCMAES]
 
         if optimiser not in valid_optimisers:
             raise ValueError('Method is not supported.')
@@ -255,3 +333,61 @@ class MultiOutputInverseProblem(AbstractInverseProblem):
         """
         min_values, max_values = boundaries[0], boundaries[1]
         self.parameter_boundaries = pints.RectangularBoundaries(min_values, max_values)
+
+
+def fit_model(model: Union[m.SingleOutputModel, m.MultiOutputModel], times: List[np.ndarray], values: List[np.ndarray],
+              number_of_iterations: int=1, optimiser: pints.Optimiser=None, initial_parameter: np.ndarray=None,
+              boundaries: List[np.ndarray]=None, transformation: str=None, doses: np.ndarray=None,
+              seed: int=None) -> List:
+    """Fits a model to the data of one or more patients for batch fits, which report failed fits instead of raising
+    their errors. If no starting point is provided, it is estimated from the data and, if it is positive, parameters are
+    optimised on log scale.
+
+    Arguments:
+        model {Union[m.SingleOutputModel, m.MultiOutputModel]} -- Model shared by the patients.
+        times {List[np.ndarray]} -- Times of data points of each patient.
+        values {List[np.ndarray]} -- State values of data points of each patient. 2d arrays define multi-output
+                                     problems.
+
+    Keyword Arguments:
+        number_of_iterations {int} -- Number of optimisation runs. (default: {1})
+        optimiser {pints.Optimiser} -- Optimiser of the fit. If None, the default optimiser is used. (default: {None})
+        initial_parameter {np.ndarray} -- Starting point of the fit. If None, it is estimated from the data.
+                                          (default: {None})
+        boundaries {List[np.ndarray]} -- Lower and upper parameter boundaries. (default: {None})
+        transformation {str} -- Parameter transformation, see AbstractInverseProblem.set_parameter_transformation.
+                                Overrides the log scale of estimated starting points. (default: {None})
+        doses {np.ndarray} -- Administered dose of each patient, which informs the estimated starting point.
+                              (default: {None})
+        seed {int} -- Seed of the global random state and of the estimate. (default: {None})
+
+    Returns:
+        List -- Objective score, estimated parameters and error message, which is empty for successful fits. Failed fits
+                have NaN score and estimates.
+    """
+    if seed is not None:
+        np.random.seed(seed)
+
+    try:
+        if values[0].ndim == 1:
+            problem = SingleOutputInverseProblem(models=[model] * len(times), times=times, values=values)
+        else:
+            problem = MultiOutputInverseProblem(models=[model] * len(times), times=times, values=values)
+        if optimiser is not None:
+            problem.set_optimiser(optimiser)
+        if boundaries is not None:
+            problem.set_parameter_boundaries(boundaries)
+
+        if initial_parameter is None:
+            initial_parameter, problem.initial_parameter_uncertainty = problem.estimate_initial_parameter(doses=doses,
+                                                                                                          seed=seed)
+
+            # PK parameters are positive, so the search is confined to positive parameters where possible
+            if transformation is None and np.all(initial_parameter > 0):
+                transformation = 'log'
+        problem.set_parameter_transformation(transformation)
+        problem.find_optimal_parameter(initial_parameter=initial_parameter, number_of_iterations=number_of_iterations)
+    except (ArithmeticError, myokit.SimulationError, ValueError) as e:
+        return [np.nan, np.full(model.n_parameters(), np.nan), str(e)]
+
+    return [problem.objective_score, np.asarray(problem.estimated_parameters, dtype=float), '']
@@ -0,0 +1,139 @@
+from typing import List
+
+import myokit
+import numpy as np
+from scipy.stats import qmc
+
+from PKPD.inference.nonCompartmental import NonCompartmentalAnalysis
+from PKPD.inference.objective import PatientSumOfErrors
+
+
+class InitialEstimator(object):
+    """Derives a starting point and an initial uncertainty for the optimisation from the data. Candidates are the
+    parameters suggested by a non-compartmental analysis (NCA) of the data, and a scrambled Sobol sequence covering the
+    parameter boundaries, or, without boundaries, a box around the NCA suggestion. Each candidate is scored by one
+    evaluation of the objective of the inverse problem. The best candidate is the starting point, and the spread of
+    the best candidates is the initial uncertainty.
+    """
+    def __init__(self, problem, doses: np.ndarray=None, number_of_samples: int=256, box_factor: float=10,
+                 seed: int=None) -> None:
+        """Initialises the estimator.
+
+        Arguments:
+            problem {AbstractInverseProblem} -- Inverse problem with models, data and error measures.
+
+        Keyword Arguments:
+            doses {np.ndarray} -- Administered dose of each patient. Should be provided if doses are administered
+                                  by protocols rather than by initial conditions. (default: {None})
+            number_of_samples {int} -- Minimal number of Sobol points, rounded up to a power of 2. (default: {256})
+            box_factor {float} -- Without boundaries, positive parameters are screened within [x / box_factor,
+                                  x * box_factor] around the NCA suggestion x, and zero parameters within [0, 1].
+                                  (default: {10})
+            seed {int} -- Seed of the scrambling of the Sobol sequence. (default: {None})
+        """
+        if box_factor <= 1:
+            raise ValueError('Box factor has to be greater than 1.')
+
+        self.problem = problem
+        self.doses = doses
+        self.number_of_samples = number_of_samples
+        self.box_factor = box_factor
+        self.seed = seed
+
+        # initialise outputs
+        self.nca = None
+        self.candidates = None
+        self.scores = None
+
+    def estimate(self, default_parameters: np.ndarray=None) -> List:
+        """Screens the candidates and returns the starting point and the initial uncertainty.
+
+        Keyword Arguments:
+            default_parameters {np.ndarray} -- Parameters not informed by the NCA. If None, the values of the .mmt file
+                                               are used. (default: {None})
+
+        Returns:
+            List -- Starting point and initial uncertainty.
+        """
+        model = self.problem.problem_container[0].model()
+        suggestion = self._get_nca_suggestion(model, default_parameters)
+        lower, upper = self._get_box(suggestion)
+
+        # NCA suggestion is only screened if it lies within the boundaries
+        sobol_points = self._sample(lower, upper)
+        if np.all(lower <= suggestion) and np.all(suggestion <= upper):
+            self.candidates = np.vstack([suggestion, sobol_points])
+        else:
+            self.candidates = sobol_points
+
+        # score all candidates, failed simulations score infinity. The archive refers to the parameters of the
+        # covariate and error models, if present, so it is only used without them
+        archive = self.problem.evaluation_archive
+        for attribute in ['covariate_model', 'error_model']:
+            if getattr(self.problem, attribute, None) is not None:
+                archive = None
+        error_measure = PatientSumOfErrors(self.problem.error_function_container, archive)
+        self.scores = np.empty(len(self.candidates))
+        for candidate_id, candidate in enumerate(self.candidates):
+            try:
+                self.scores[candidate_id] = error_measure(candidate)
+            except (ArithmeticError, myokit.SimulationError):
+                self.scores[candidate_id] = np.inf
+        self.scores[np.isnan(self.scores)] = np.inf
+
+        if not np.any(np.isfinite(self.scores)):
+            raise ValueError('No initial estimate could be simulated. Please check the parameter boundaries!')
+
+        # best candidates, twice as many as parameters, determine the uncertainty
+        elite_ids = np.argsort(self.scores, kind='stable')[:2 * len(suggestion)]
+        elite_ids = elite_ids[np.isfinite(self.scores[elite_ids])]
+        starting_point = self.candidates[elite_ids[0]]
+        spread = np.std(self.candidates[elite_ids], axis=0)
+
+        return [starting_point, np.maximum(spread, np.maximum(0.01 * np.abs(starting_point), 1e-6))]
+
+    def _get_nca_suggestion(self, model, default_parameters: np.ndarray) -> np.ndarray:
+        """Returns the parameters suggested by the NCA of the central drug concentration, or of the first output if the
+        concentration is not an output.
+        """
+        output_names = getattr(model, 'output_names', None)
+        output_id = 0
+        if output_names is not None and 'central_compartment.drug_concentration' in output_names:
+            output_id = output_names.index('central_compartment.drug_concentration')
+
+        times = [problem.times() for problem in self.problem.problem_container]
+        values = [problem.values().reshape(len(problem.times()), -1)[:, output_id]
+                  for problem in self.problem.problem_container]
+        self.nca = NonCompartmentalAnalysis(times, values, doses=self.doses)
+
+        return self.nca.suggest_parameters(model, default_parameters)
+
+    def _get_box(self, suggestion: np.ndarray) -> List:
+        """Returns lower and upper bounds of the screened parameter box.
+        """
+        if self.problem.parameter_boundaries is not None:
+            # boundaries of covariate coefficients are not screened
+            number_of_parameters = len(suggestion)
+            return [np.asarray(self.problem.parameter_boundaries.lower(), dtype=float)[:number_of_parameters],
+                    np.asarray(self.problem.parameter_boundaries.upper(), dtype=float)[:number_of_parameters]]
+
+        magnitude = np.abs(suggestion)
+        lower = np.where(magnitude > 0, magnitude / self.box_factor, 0)
+        upper = np.where(magnitude > 0, magnitude * self.box_factor, 1)
+
+        return [lower, upper]
+
+    def _sample(self, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+        """Returns scrambled Sobol points within the box. Dimensions with positive lower bound are sampled uniformly in
+        log space, such that all orders of magnitude of the box are covered evenly.
+        """
+        sampler = qmc.Sobol(d=len(lower), scramble=True, seed=self.seed)
+        samples = sampler.random_base2(m=int(np.ceil(np.log2(self.number_of_samples))))
+
+        is_log = lower > 0
+        log_lower = np.log(np.where(is_log, lower, 1))
+        log_upper = np.log(np.where(is_log, upper, 1))
+        linear = lower + samples * (upper - lower)
+        logarithmic = np.exp(log_lower + samples * (log_upper - log_lower))
+
+        return np.where(is_log, logarithmic, linear)
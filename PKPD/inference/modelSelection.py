@@ -0,0 +1,225 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Union
+
+import myokit
+import numpy as np
+import pandas as pd
+import pints
+
+from PKPD.inference import inference
+from PKPD.model import model as m
+from PKPD.model.modelBuilder import build_model
+
+
+class ModelSelection(object):
+    """Fits a set of candidate models to the same data and ranks them by an information criterion or the objective
+    score. Candidates are .mmt files or specifications of PKPD.model.modelBuilder.build_model, and each candidate is
+    fitted by an inverse problem starting from the initial estimate derived from the data. If the initial estimate is
+    positive, parameters are optimised on log scale.
+
+    The data of all patients is held in flat arrays. For parallel fits the arrays are placed in shared memory once, and
+    the worker processes read the patients' data as views into the shared arrays instead of receiving copies with every
+    job.
+
+    Information criteria assume independent Gaussian residuals with unknown variance, such that for n observations,
+    sum of squared residuals SSE and k model parameters AIC = n log(SSE / n) + 2 (k + 1) and
+    BIC = n log(SSE / n) + (k + 1) log(n).
+    """
+    def __init__(self, models: Dict[str, Union[str, Dict]], times: List[np.ndarray], values: List[np.ndarray],
+                 protocol: myokit.Protocol=None, output_names: List[str]=None) -> None:
+        """Initialises the model selection.
+
+        Arguments:
+            models {Dict[str, Union[str, Dict]]} -- Candidate models by name. Each model is a path to an .mmt file or a
+                                                    dictionary of keyword arguments of build_model.
+            times {List[np.ndarray]} -- Times of data points of each patient.
+            values {List[np.ndarray]} -- State values of data points of each patient. 2d arrays define multi-output
+                                         problems.
+
+        Keyword Arguments:
+            protocol {myokit.Protocol} -- Dosing protocol of all patients. If None, the protocols of the .mmt files are
+                                          used, and generated models are not dosed. (default: {None})
+            output_names {List[str]} -- Model variables matching the columns of multi-output data. If None, the default
+                                        outputs of the models are used. (default: {None})
+        """
+        if len(times) != len(values):
+            raise ValueError('Number of time and value arrays does not match.')
+
+        self.models = dict(models)
+        self.protocol = protocol
+        self.output_names = output_names
+
+        # hold data of all patients in flat arrays
+        self.lengths = np.array([len(patient_times) for patient_times in times])
+        self.times = np.concatenate(times).astype(float)
+        self.values = np.concatenate(values).astype(float)
+        self.is_single_output = self.values.ndim == 1
+
+        # initialise outputs
+        self.results = None
+
+    def run(self, criterion: str='AIC', number_of_processes: int=1, number_of_iterations: int=1,
+            optimiser: pints.Optimiser=None, seed: int=None) -> pd.DataFrame:
+        """Fits all candidate models and ranks them.
+
+        Keyword Arguments:
+            criterion {str} -- Ranking criterion, valid options are 'AIC', 'BIC' and 'objective_score'.
+                               (default: {'AIC'})
+            number_of_processes {int} -- Number of worker processes. If 1, models are fitted in this process.
+                                         (default: {1})
+            number_of_iterations {int} -- Number of optimisation runs per model. (default: {1})
+            optimiser {pints.Optimiser} -- Optimiser of the inverse problems. If None, the default optimiser of the
+                                           inverse problems is used. (default: {None})
+            seed {int} -- Seed of the fits. (default: {None})
+
+        Returns:
+            pd.DataFrame -- One row per model with number of parameters, objective score, AIC, BIC, estimated
+                            parameters and error message of failed fits, sorted by the criterion.
+        """
+        valid_criteria = ['AIC', 'BIC', 'objective_score']
+        if criterion not in valid_criteria:
+            raise ValueError('Criterion is not supported. Valid criteria are ' + str(valid_criteria) + '.')
+
+        # derive independent seeds for the fits
+        names = list(self.models.keys())
+        seeds = np.random.SeedSequence(seed).generate_state(len(names)) if seed is not None else [None] * len(names)
+        tasks = [[self.models[name], self.protocol, self.output_names, self.is_single_output, number_of_iterations,
+                  optimiser, seeds[model_id]] for model_id, name in enumerate(names)]
+
+        if number_of_processes == 1:
+            # seeded fits reseed the global random state, which is restored for the caller
+            random_state = np.random.get_state()
+            try:
+                _set_data(self.times, self.values, self.lengths)
+                fits = [_fit_model(task) for task in tasks]
+            finally:
+                np.random.set_state(random_state)
+        else:
+            fits = self._run_parallel(tasks, number_of_processes)
+
+        # rank models
+        number_of_observations = self.values.size
+        rows = []
+        for name, (number_of_parameters, score, parameters, error) in zip(names, fits):
+            penalty = number_of_parameters + 1
+            log_term = number_of_observations * np.log(score / number_of_observations)
+            rows.append({'model': name,
+                         'number_of_parameters': number_of_parameters,
+                         'objective_score': score,
+                         'AIC': log_term + 2 * penalty,
+                         'BIC': log_term + penalty * np.log(number_of_observations),
+                         'estimated_parameters': parameters,
+                         'error': error
+                         })
+        self.results = pd.DataFrame(rows).sort_values(by=criterion, kind='stable').reset_index(drop=True)
+
+        return self.results
+
+    def _run_parallel(self, tasks: List, number_of_processes: int) -> List:
+        """Fits the models in worker processes that read the data from shared memory.
+
+        Arguments:
+            tasks {List} -- Arguments of _fit_model for each model.
+            number_of_processes {int} -- Number of worker processes.
+
+        Returns:
+            List -- Return values of _fit_model.
+        """
+        arrays = [self.times, self.values, self.lengths]
+        blocks = []
+        try:
+            # copy data into shared memory once
+            descriptors = []
+            for array in arrays:
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                blocks.append(block)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+                descriptors.append((block.name, array.shape, array.dtype.str))
+
+            with ProcessPoolExecutor(max_workers=number_of_processes,
+                                     initializer=_attach_data,
+                                     initargs=(descriptors,)
+                                     ) as executor:
+                fits = list(executor.map(_fit_model, tasks))
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+        return fits
+
+
+# data of the patients in the current process, set by _set_data or _attach_data
+_DATA = {}
+
+
+def _set_data(times: np.ndarray, values: np.ndarray, lengths: np.ndarray) -> None:
+    """Sets the flat data arrays of the current process.
+
+    Arguments:
+        times {np.ndarray} -- Times of all patients.
+        values {np.ndarray} -- Values of all patients.
+        lengths {np.ndarray} -- Number of data points of each patient.
+    """
+    _DATA['times'] = times
+    _DATA['values'] = values
+    _DATA['lengths'] = lengths
+
+
+def _attach_data(descriptors: List) -> None:
+    """Initialises a worker process with views into the shared data arrays.
+
+    Arguments:
+        descriptors {List} -- Name, shape and dtype of the shared memory blocks of times, values and lengths.
+    """
+    arrays = []
+    for name, shape, dtype in descriptors:
+        block = shared_memory.SharedMemory(name=name)
+        arrays.append(np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf))
+
+        # keep block open for the lifetime of the worker
+        _DATA.setdefault('blocks', []).append(block)
+    _set_data(*arrays)
+
+
+def _fit_model(task: List) -> List:
+    """Fits a candidate model to the data of the current process.
+
+    Arguments:
+        task {List} -- Model file or build_model specification, protocol, output names, flag whether the problem is
+                       single-output, number of optimisation runs, optimiser and seed.
+
+    Returns:
+        List -- Number of parameters, objective score, estimated parameters and error message, which is empty for
+                successful fits.
+    """
+    model_source, protocol, output_names, is_single_output, number_of_iterations, optimiser, seed = task
+
+    # split flat data into views of the patients
+    offsets = np.cumsum(_DATA['lengths'])[:-1]
+    times = np.split(_DATA['times'], offsets)
+    values = np.split(_DATA['values'], offsets)
+
+    # invalid candidates are reported by their error message, such that the remaining candidates are still ranked
+    try:
+        if isinstance(model_source, dict):
+            model_source = build_model(**model_source)
+
+        if is_single_output:
+            model = m.SingleOutputModel(model_source)
+        else:
+            model = m.MultiOutputModel(model_source)
+            if output_names is None:
+                model.set_output_dimension(values[0].shape[1])
+            else:
+                model.set_output(list(output_names))
+        if protocol is not None:
+            model.simulation.set_protocol(protocol)
+    except (OSError, TypeError, myokit.MyokitError, ValueError) as e:
+        return [0, np.nan, np.array([]), str(e)]
+
+    score, parameters, error = inference.fit_model(model, times, values, number_of_iterations=number_of_iterations,
+                                                   optimiser=optimiser, seed=seed)
+
+    return [model.n_parameters(), score, parameters, error]
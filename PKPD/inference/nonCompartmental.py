@@ -0,0 +1,201 @@
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from PKPD.model.abstractModel import AbstractModel
+
+
+class NonCompartmentalAnalysis(object):
+    """Non-compartmental analysis (NCA) of the concentration-time profiles of all patients. The profiles are
+    concatenated into flat arrays, and all metrics are computed by segmented reductions over the patient segments, such
+    that the cost is dominated by a few numpy calls irrespective of the number of patients.
+
+    Computed metrics per patient are the maximal concentration (cmax) and its time (tmax), the area under the curve up
+    to the last observation (auc_last) by linear-up/log-down trapezoids, the terminal elimination rate (lambda_z) and
+    half-life by log-linear regression, the area extrapolated to infinity (auc_inf), and, if doses are provided, the
+    clearance and the volume of distribution during the terminal phase (volume).
+    """
+    def __init__(self, time_data_container: List[np.ndarray], concentration_container: List[np.ndarray],
+                 doses: np.ndarray=None, number_of_terminal_points: int=3) -> None:
+        """Initialises the analysis and computes the NCA metrics.
+
+        Arguments:
+            time_data_container {List[np.ndarray]} -- Observation times of each patient, e.g. as created by
+                                                      SimulationTab.filter_data.
+            concentration_container {List[np.ndarray]} -- Observed concentrations of each patient.
+
+        Keyword Arguments:
+            doses {np.ndarray} -- Administered dose of each patient. If None, clearance and volume are NaN.
+                                  (default: {None})
+            number_of_terminal_points {int} -- Number of last positive observations after tmax that are used to
+                                               estimate the terminal elimination rate. (default: {3})
+        """
+        if number_of_terminal_points < 2:
+            raise ValueError('At least 2 terminal points are required for the regression.')
+
+        # concatenate patients into flat arrays
+        lengths = np.array([len(times) for times in time_data_container])
+        if np.any(lengths == 0):
+            raise ValueError('Each patient needs at least one observation.')
+        self.number_of_patients = len(lengths)
+        patient_index = np.repeat(np.arange(self.number_of_patients), lengths)
+        times = np.concatenate(time_data_container).astype(float)
+        concentrations = np.concatenate(concentration_container).astype(float)
+        if concentrations.shape != times.shape:
+            raise ValueError('Concentrations have to be 1d arrays of the same length as the times.')
+
+        # sort observations by time within each patient
+        order = np.lexsort((times, patient_index))
+        self._times = times[order]
+        self._concentrations = concentrations[order]
+        self._patient_index = patient_index
+        self._starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        self._ends = self._starts + lengths
+
+        self.doses = np.broadcast_to(np.asarray(doses, dtype=float), self.number_of_patients) \
+            if doses is not None else np.full(self.number_of_patients, np.nan)
+        self.number_of_terminal_points = number_of_terminal_points
+
+        self._compute_peak()
+        self._compute_auc_last()
+        self._compute_terminal_phase()
+
+        # extrapolate to infinity and derive clearance and volume
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.auc_inf = self.auc_last + self.c_last / self.lambda_z
+            self.half_life = np.log(2) / self.lambda_z
+            self.clearance = self.doses / self.auc_inf
+            self.volume = self.clearance / self.lambda_z
+
+    def _compute_peak(self) -> None:
+        """Computes the maximal concentration, its first time of occurrence, and the last observation of each patient.
+        """
+        self.c_max = np.maximum.reduceat(self._concentrations, self._starts)
+
+        # first index of the maximum in each segment
+        index = np.arange(len(self._times))
+        is_max = self._concentrations == self.c_max[self._patient_index]
+        self.t_max = self._times[np.minimum.reduceat(np.where(is_max, index, len(index)), self._starts)]
+
+        self.c_last = self._concentrations[self._ends - 1]
+        self.t_last = self._times[self._ends - 1]
+
+    def _compute_auc_last(self) -> None:
+        """Computes the area under the curve from the first to the last observation by the linear-up/log-down
+        trapezoidal rule.
+        """
+        c1, c2 = self._concentrations[:-1], self._concentrations[1:]
+        time_steps = np.diff(self._times)
+
+        # linear trapezoids for increasing or constant concentrations, logarithmic trapezoids for declines
+        segment_areas = np.empty(len(self._times))
+        segment_areas[:-1] = time_steps * (c1 + c2) / 2
+        log_down = (c2 < c1) & (c2 > 0)
+        segment_areas[:-1][log_down] = time_steps[log_down] * (c1[log_down] - c2[log_down]) / np.log(
+            c1[log_down] / c2[log_down])
+
+        # exclude segments that connect consecutive patients
+        segment_areas[self._ends - 1] = 0
+
+        self.auc_last = np.add.reduceat(segment_areas, self._starts)
+
+    def _compute_terminal_phase(self) -> None:
+        """Estimates the terminal elimination rate and the back-extrapolated concentration at time zero by log-linear
+        regression over the last positive observations after tmax.
+        """
+        # mark last positive observations after tmax
+        is_valid = (self._concentrations > 0) & (self._times > self.t_max[self._patient_index])
+        valid_from_end = np.concatenate([np.cumsum(is_valid[::-1])[::-1], [0]])
+        valid_from_end = valid_from_end[:-1] - valid_from_end[self._ends[self._patient_index]]
+        is_terminal = is_valid & (valid_from_end <= self.number_of_terminal_points)
+
+        # segmented sums of the least squares problem
+        x = np.where(is_terminal, self._times, 0)
+        y = np.log(np.where(is_terminal, self._concentrations, 1))
+        n = np.add.reduceat(is_terminal.astype(float), self._starts)
+        sum_x = np.add.reduceat(x, self._starts)
+        sum_y = np.add.reduceat(y, self._starts)
+        sum_xx = np.add.reduceat(x * x, self._starts)
+        sum_xy = np.add.reduceat(x * y, self._starts)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = (n * sum_xy - sum_x * sum_y) / (n * sum_xx - sum_x ** 2)
+            intercept = (sum_y - slope * sum_x) / n
+
+        # rate is undefined for less than two points or non-declining profiles
+        is_defined = (n >= 2) & (slope < 0)
+        self.number_of_terminal_observations = n.astype(int)
+        self.lambda_z = np.where(is_defined, -slope, np.nan)
+        self.c_zero = np.where(is_defined, np.exp(intercept), np.nan)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Returns the NCA metrics with one row per patient.
+
+        Returns:
+            pd.DataFrame -- NCA metrics.
+        """
+        return pd.DataFrame({
+            'cmax': self.c_max,
+            'tmax': self.t_max,
+            'auc_last': self.auc_last,
+            'auc_inf': self.auc_inf,
+            'lambda_z': self.lambda_z,
+            'half_life': self.half_life,
+            'clearance': self.clearance,
+            'volume': self.volume
+        })
+
+    def suggest_parameters(self, model: AbstractModel, default_parameters: np.ndarray=None) -> np.ndarray:
+        """Suggests initial parameters for the inverse problem from the median NCA metrics. The central volume and
+        clearance are informed by the volume and clearance, if doses are known. Otherwise, the clearance follows from
+        the terminal elimination rate and the default central volume, and the initial drug amount in the central
+        compartment from the back-extrapolated concentration. All other parameters keep their default values.
+
+        Arguments:
+            model {AbstractModel} -- Model of the inverse problem with the PKPD model repository naming convention.
+
+        Keyword Arguments:
+            default_parameters {np.ndarray} -- Parameters in the order [initial conditions, model parameters]. If None,
+                                               the values of the .mmt file are used. (default: {None})
+
+        Returns:
+            np.ndarray -- Suggested initial parameters.
+        """
+        names = model.state_names + model.parameter_names
+        if default_parameters is None:
+            default_parameters = [var.initial_value(as_float=True) for var in model.model.states()] + \
+                [model.model.get(name).eval() for name in model.parameter_names]
+        parameters = np.array(default_parameters, dtype=float)
+
+        volume_name = 'central_compartment.V'
+        volume = _median(self.volume)
+        if volume_name in names and np.isfinite(volume):
+            parameters[names.index(volume_name)] = volume
+        elif volume_name in names:
+            volume = parameters[names.index(volume_name)]
+
+        clearance_name = 'central_compartment.CL'
+        clearance = _median(self.clearance)
+        if not np.isfinite(clearance):
+            clearance = _median(self.lambda_z) * volume
+        if clearance_name in names and np.isfinite(clearance):
+            parameters[names.index(clearance_name)] = clearance
+
+        # without known doses, the dose is assumed to be the initial amount of drug
+        amount_name = 'central_compartment.drug'
+        amount = _median(self.c_zero) * volume
+        if amount_name in names and np.all(np.isnan(self.doses)) and np.isfinite(amount):
+            parameters[names.index(amount_name)] = amount
+
+        return parameters
+
+
+def _median(values: np.ndarray) -> float:
+    """Returns the median of the finite values, or NaN if no value is finite.
+    """
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return np.nan
+
+    return float(np.median(values))
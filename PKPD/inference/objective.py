@@ -0,0 +1,327 @@
+from typing import List
+
+import numpy as np
+import pints
+
+from PKPD.inference.archive import EvaluationArchive
+from PKPD.inference.errorModels import ErrorModel
+from PKPD.model.covariates import CovariateModel
+
+
+class PatientSumOfErrors(pints.ErrorMeasure):
+    """Sum of the error measures of all patients, equivalent to pints.SumOfErrors with unit weights. In addition, the
+    per-patient errors of the best evaluated parameters are remembered, and per-patient errors known for a parameter
+    set can be provided in advance, such that only patients without known errors are simulated for it. If an evaluation
+    archive is attached, all evaluations are recorded in it and exact repeats are served from it.
+    """
+    def __init__(self, error_functions: List[pints.ErrorMeasure], archive: EvaluationArchive=None) -> None:
+        """Initialises the objective function.
+
+        Arguments:
+            error_functions {List[pints.ErrorMeasure]} -- Error measures of the patients.
+
+        Keyword Arguments:
+            archive {EvaluationArchive} -- Archive of evaluations shared across runs. (default: {None})
+        """
+        super(PatientSumOfErrors, self).__init__()
+
+        # check compatibility of error measures
+        number_of_parameters = error_functions[0].n_parameters()
+        for error_function in error_functions:
+            if error_function.n_parameters() != number_of_parameters:
+                raise ValueError('All error measures must have the same number of parameters.')
+
+        self.error_functions = error_functions
+        self.number_of_parameters = number_of_parameters
+        self.archive = archive
+
+        # approximate evaluations, e.g. with loosened solver tolerances, are neither archived nor remembered as best
+        self.is_approximate = False
+
+        # initialise best evaluation
+        self.best_parameters = None
+        self.best_patient_errors = None
+        self.best_score = np.inf
+
+        # initialise known per-patient errors
+        self._known_parameters = None
+        self._known_patient_errors = None
+
+    def __call__(self, parameters: np.ndarray) -> float:
+        """Evaluates the sum of the patients' errors.
+
+        Arguments:
+            parameters {np.ndarray} -- Parameters of the model.
+
+        Returns:
+            float -- Objective score.
+        """
+        patient_errors = self.evaluate_patients(parameters)
+        score = np.sum(patient_errors)
+
+        # remember best evaluation
+        if not self.is_approximate and score < self.best_score:
+            self.best_score = score
+            self.best_parameters = np.array(parameters, dtype=float)
+            self.best_patient_errors = patient_errors
+
+        return score
+
+    def evaluate_patients(self, parameters: np.ndarray) -> np.ndarray:
+        """Returns the errors of all patients. Known or archived errors for these parameters are reused.
+
+        Arguments:
+            parameters {np.ndarray} -- Parameters of the model.
+
+        Returns:
+            np.ndarray -- Error of each patient.
+        """
+        archived_errors = self.archive.lookup(parameters) if self.archive is not None else None
+
+        if self._known_parameters is not None and np.array_equal(parameters, self._known_parameters):
+            patient_errors = np.array(self._known_patient_errors)
+        elif archived_errors is not None:
+            patient_errors = archived_errors
+        else:
+            patient_errors = np.full(len(self.error_functions), np.nan)
+
+        # evaluate patients with unknown errors
+        unknown_patient_ids = np.flatnonzero(np.isnan(patient_errors))
+        if len(unknown_patient_ids) > 0:
+            patient_errors[unknown_patient_ids] = self._evaluate_unknown_patients(parameters, unknown_patient_ids)
+
+        if self.archive is not None and not self.is_approximate and len(unknown_patient_ids) > 0:
+            self.archive.add(parameters, patient_errors)
+
+        return patient_errors
+
+    def _evaluate_unknown_patients(self, parameters: np.ndarray, patient_ids: np.ndarray) -> np.ndarray:
+        """Evaluates the error measures of the patients whose errors are unknown.
+
+        Arguments:
+            parameters {np.ndarray} -- Parameters of the model.
+            patient_ids {np.ndarray} -- Indices of the patients.
+
+        Returns:
+            np.ndarray -- Error of each of the patients.
+        """
+        patient_parameters = self._get_patient_parameters(parameters)
+
+        return np.array([self.error_functions[patient_id](patient_parameters[patient_id])
+                         for patient_id in patient_ids], dtype=float)
+
+    def _get_patient_parameters(self, parameters: np.ndarray) -> np.ndarray:
+        """Returns the parameters of each patient's error measure, which are shared by all patients.
+
+        Arguments:
+            parameters {np.ndarray} -- Parameters of the model.
+
+        Returns:
+            np.ndarray -- Parameters of shape (number of patients, number of parameters).
+        """
+        return np.broadcast_to(parameters, (len(self.error_functions), len(parameters)))
+
+    def set_known_errors(self, parameters: np.ndarray, patient_errors: np.ndarray) -> None:
+        """Provides per-patient errors for a parameter set. Unknown errors are marked by NaN.
+
+        Arguments:
+            parameters {np.ndarray} -- Parameters of the model.
+            patient_errors {np.ndarray} -- Error of each patient, NaN if unknown.
+        """
+        if len(patient_errors) != len(self.error_functions):
+            raise ValueError('Number of patient errors does not match number of error measures.')
+
+        self._known_parameters = np.array(parameters, dtype=float)
+        self._known_patient_errors = np.array(patient_errors, dtype=float)
+
+    def n_parameters(self) -> int:
+        """Returns the dimension of the parameter space.
+
+        Returns:
+            int -- Number of parameters.
+        """
+        return self.number_of_parameters
+
+
+class CovariateSumOfErrors(PatientSumOfErrors):
+    """Sum of the error measures of all patients, where each patient is simulated with individual parameters derived
+    from the population parameters and the patient's covariates. Parameters are by convention [population parameters,
+    covariate coefficients], see PKPD.model.covariates.CovariateModel. Archived and known errors refer to these
+    parameters.
+    """
+    def __init__(self, error_functions: List[pints.ErrorMeasure], covariate_model: CovariateModel,
+                 archive: EvaluationArchive=None) -> None:
+        """Initialises the objective function.
+
+        Arguments:
+            error_functions {List[pints.ErrorMeasure]} -- Error measures of the patients.
+            covariate_model {CovariateModel} -- Relations between parameters and covariates of the patients.
+
+        Keyword Arguments:
+            archive {EvaluationArchive} -- Archive of evaluations shared across runs. (default: {None})
+        """
+        super(CovariateSumOfErrors, self).__init__(error_functions, archive)
+
+        if len(covariate_model.covariates) != len(error_functions):
+            raise ValueError('Number of patients of the covariate model does not match number of error measures.')
+        if len(covariate_model.parameter_names) != self.number_of_parameters:
+            raise ValueError('Parameters of the covariate model do not match the error measures.')
+
+        self.covariate_model = covariate_model
+        self.number_of_parameters = covariate_model.n_parameters()
+
+    def _get_patient_parameters(self, parameters: np.ndarray) -> np.ndarray:
+        """Returns the individual parameters of all patients, computed in one vectorised pass.
+
+        Arguments:
+            parameters {np.ndarray} -- Population parameters and covariate coefficients.
+
+        Returns:
+            np.ndarray -- Parameters of shape (number of patients, number of model parameters).
+        """
+        return self.covariate_model.compute_individual_parameters(parameters)
+
+
+class ErrorModelLikelihood(PatientSumOfErrors):
+    """Negative log-likelihood of the observations of all patients under an error model, see
+    PKPD.inference.errorModels.ErrorModel. Parameters are by convention [model parameters, noise parameters], or
+    [population parameters, covariate coefficients, noise parameters] if a covariate model is set.
+
+    Observations of all patients and outputs are flattened once on initialisation. Each evaluation simulates the
+    patients with unknown errors into a flat buffer of predictions and evaluates the log-likelihood terms of all their
+    observations in one array pass, before summing them per patient. Observations censored below their lower limit of
+    quantification (LLOQ) contribute the probability of falling below the limit instead of the density of their value.
+    """
+    def __init__(self, problems: List, error_model: ErrorModel, covariate_model: CovariateModel=None,
+                 lloq: List[np.ndarray]=None, is_censored: List[np.ndarray]=None,
+                 archive: EvaluationArchive=None) -> None:
+        """Initialises the objective function.
+
+        Arguments:
+            problems {List} -- pints problems of the patients.
+            error_model {ErrorModel} -- Error model of the observations.
+
+        Keyword Arguments:
+            covariate_model {CovariateModel} -- Relations between parameters and covariates of the patients. If None,
+                                                all patients share the parameters. (default: {None})
+            lloq {List[np.ndarray]} -- LLOQ of the observations of each patient, in the shape of the values.
+                                       (default: {None})
+            is_censored {List[np.ndarray]} -- Flags of the observations of each patient censored below their LLOQ.
+                                              If None, no observations are censored. (default: {None})
+            archive {EvaluationArchive} -- Archive of evaluations shared across runs. (default: {None})
+        """
+        # per-patient bookkeeping of the base class only requires the dimension of each patient's parameters
+        super(ErrorModelLikelihood, self).__init__([pints.ProblemErrorMeasure(problem) for problem in problems],
+                                                   archive)
+
+        self.problems = problems
+        for problem in self.problems:
+            if problem.n_outputs() != error_model.number_of_outputs:
+                raise ValueError('Number of outputs of the error model does not match the problems.')
+
+        if covariate_model is not None:
+            if len(covariate_model.covariates) != len(problems):
+                raise ValueError('Number of patients of the covariate model does not match number of problems.')
+            if len(covariate_model.parameter_names) != self.number_of_parameters:
+                raise ValueError('Parameters of the covariate model do not match the problems.')
+            self.number_of_parameters = covariate_model.n_parameters()
+
+        self.error_model = error_model
+        self.covariate_model = covariate_model
+        self.number_of_model_parameters = self.number_of_parameters
+        self.number_of_parameters += error_model.n_parameters()
+
+        # flatten observations, outputs and patients of all observations
+        observations = [np.asarray(problem.values(), dtype=float).ravel() for problem in self.problems]
+        self.number_of_observations = np.array([len(patient_observations) for patient_observations in observations])
+        self.observations = np.concatenate(observations)
+        self.output_ids = np.concatenate([np.tile(np.arange(problem.n_outputs()), len(problem.times()))
+                                          for problem in self.problems])
+        self.patient_ids = np.repeat(np.arange(len(self.problems)), self.number_of_observations)
+        self.offsets = np.concatenate([[0], np.cumsum(self.number_of_observations)])
+
+        # censored observations contribute by their LLOQ rather than their value
+        self.is_censored = None
+        if is_censored is not None:
+            self.is_censored = np.concatenate([np.ravel(patient_is_censored) for patient_is_censored in is_censored])
+            self.lloq = np.concatenate([np.ravel(patient_lloq) for patient_lloq in lloq]).astype(float)
+            if len(self.is_censored) != len(self.observations) or len(self.lloq) != len(self.observations):
+                raise ValueError('Censoring does not match the observations of the problems.')
+            self.observations[self.is_censored] = np.nan
+
+        # buffer of the predictions of the last evaluation
+        self.predictions = np.empty(len(self.observations))
+
+    def _evaluate_unknown_patients(self, parameters: np.ndarray, patient_ids: np.ndarray) -> np.ndarray:
+        """Simulates the patients whose errors are unknown and evaluates the negative log-likelihood of their
+        observations in one array pass.
+
+        Arguments:
+            parameters {np.ndarray} -- Model and noise parameters.
+            patient_ids {np.ndarray} -- Indices of the patients.
+
+        Returns:
+            np.ndarray -- Negative log-likelihood of each of the patients.
+        """
+        parameters = np.asarray(parameters, dtype=float)
+        noise_parameters = parameters[self.number_of_model_parameters:]
+        self.simulate(parameters[:self.number_of_model_parameters], patient_ids)
+
+        # evaluate observations of the patients at once
+        is_selected = np.repeat(np.isin(np.arange(len(self.problems)), patient_ids), self.number_of_observations)
+        negative_log_likelihoods = self.error_model.compute_negative_log_likelihoods(self.observations[is_selected],
+                                                                                     self.predictions[is_selected],
+                                                                                     noise_parameters,
+                                                                                     self.output_ids[is_selected]
+                                                                                     )
+
+        # evaluate censored observations of the patients at once
+        if self.is_censored is not None:
+            is_censored = self.is_censored[is_selected]
+            censored_ids = np.flatnonzero(is_selected)[is_censored]
+            negative_log_likelihoods[is_censored] = self.error_model.compute_censored_negative_log_likelihoods(
+                self.lloq[censored_ids], self.predictions[censored_ids], noise_parameters, self.output_ids[censored_ids]
+            )
+
+        patient_errors = np.bincount(self.patient_ids[is_selected],
+                                     weights=negative_log_likelihoods,
+                                     minlength=len(self.problems)
+                                     )
+
+        return patient_errors[patient_ids]
+
+    def simulate(self, parameters: np.ndarray, patient_ids: np.ndarray=None) -> np.ndarray:
+        """Simulates patients into the flat buffer of predictions, which is ordered like the flat observations.
+
+        Arguments:
+            parameters {np.ndarray} -- Model parameters, or population parameters and covariate coefficients.
+
+        Keyword Arguments:
+            patient_ids {np.ndarray} -- Indices of the simulated patients. Defaults to all patients. (default: {None})
+
+        Returns:
+            np.ndarray -- Flat buffer of predictions.
+        """
+        if patient_ids is None:
+            patient_ids = range(len(self.problems))
+
+        patient_parameters = self._get_patient_parameters(parameters)
+        for patient_id in patient_ids:
+            start, end = self.offsets[patient_id], self.offsets[patient_id + 1]
+            self.predictions[start:end] = np.ravel(self.problems[patient_id].evaluate(patient_parameters[patient_id]))
+
+        return self.predictions
+
+    def _get_patient_parameters(self, parameters: np.ndarray) -> np.ndarray:
+        """Returns the model parameters of all patients, which are individual parameters if a covariate model is set.
+
+        Arguments:
+            parameters {np.ndarray} -- Model parameters, or population parameters and covariate coefficients.
+
+        Returns:
+            np.ndarray -- Parameters of shape (number of patients, number of model parameters).
+        """
+        if self.covariate_model is not None:
+            return self.covariate_model.compute_individual_parameters(parameters)
+
+        return np.broadcast_to(parameters, (len(self.problems), len(parameters)))
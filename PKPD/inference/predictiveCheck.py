@@ -0,0 +1,267 @@
+import warnings
+from typing import Callable, List
+
+import numpy as np
+
+from PKPD.inference.errorModels import ErrorModel
+
+
+class P2Quantile(object):
+    """Streaming quantile estimator based on the P-square algorithm of Jain and Chlamtac (1985). The quantile is tracked
+    by five markers, whose heights are adjusted by piecewise-parabolic interpolation with every observation, such that
+    memory is constant in the number of observations.
+    """
+    def __init__(self, probability: float) -> None:
+        """Initialises the estimator.
+
+        Arguments:
+            probability {float} -- Probability of the quantile in [0, 1].
+        """
+        if not 0 <= probability <= 1:
+            raise ValueError('Probability has to lie in [0, 1].')
+
+        self.probability = probability
+        self.number_of_observations = 0
+
+        # marker heights, actual and desired positions, and increments of the desired positions
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired_positions = [1, 1 + 2 * probability, 1 + 4 * probability, 3 + 2 * probability, 5]
+        self._increments = [0, probability / 2, probability, (1 + probability) / 2, 1]
+
+    @property
+    def value(self) -> float:
+        """Current estimate of the quantile. Exact for less than five observations.
+        """
+        if self.number_of_observations == 0:
+            return np.nan
+        if self.number_of_observations < 5:
+            return float(np.quantile(self._heights, self.probability))
+
+        return self._heights[2]
+
+    def update(self, observation: float) -> None:
+        """Incorporates an observation into the estimate.
+
+        Arguments:
+            observation {float} -- Observed value.
+        """
+        self.number_of_observations += 1
+
+        # collect first five observations as initial markers
+        if self.number_of_observations <= 5:
+            self._heights.append(observation)
+            if self.number_of_observations == 5:
+                self._heights.sort()
+            return
+
+        heights, positions = self._heights, self._positions
+
+        # find cell of the observation and update extreme markers
+        if observation < heights[0]:
+            heights[0] = observation
+            cell = 0
+        elif observation >= heights[4]:
+            heights[4] = observation
+            cell = 3
+        else:
+            cell = 0
+            while observation >= heights[cell + 1]:
+                cell += 1
+
+        # shift positions of markers above the observation
+        for marker in range(cell + 1, 5):
+            positions[marker] += 1
+        for marker in range(5):
+            self._desired_positions[marker] += self._increments[marker]
+
+        # adjust heights of the middle markers
+        for marker in range(1, 4):
+            offset = self._desired_positions[marker] - positions[marker]
+            if (offset >= 1 and positions[marker + 1] - positions[marker] > 1) or \
+                    (offset <= -1 and positions[marker - 1] - positions[marker] < -1):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(marker, step)
+                if not heights[marker - 1] < height < heights[marker + 1]:
+                    height = heights[marker] + step * (heights[marker + step] - heights[marker]) / (
+                        positions[marker + step] - positions[marker])
+                heights[marker] = height
+                positions[marker] += step
+
+    def _parabolic(self, marker: int, step: int) -> float:
+        """Returns the piecewise-parabolic prediction of a marker height after moving the marker by one step.
+        """
+        heights, positions = self._heights, self._positions
+        below = positions[marker] - positions[marker - 1]
+        above = positions[marker + 1] - positions[marker]
+
+        return heights[marker] + step / (positions[marker + 1] - positions[marker - 1]) * (
+            (below + step) * (heights[marker + 1] - heights[marker]) / above +
+            (above - step) * (heights[marker] - heights[marker - 1]) / below
+        )
+
+
+class VisualPredictiveCheck(object):
+    """Visual predictive check of a fitted inverse problem. Replicate datasets are simulated at the observed design,
+    i.e. at the observation times of all patients, by scattering the model predictions at the estimated parameters with
+    residual errors, either additive with the root mean squared residual or sampled from a fitted error model. For each
+    time bin the percentiles of every replicate are computed, and the distribution of these percentiles across
+    replicates is summarised by streaming quantile estimators, such that replicates are never stored.
+
+    The estimated parameters are shared by all patients, so the predictions are solved once per patient on
+    construction, and replicates are generated in vectorised batches without further simulation. Missing observations
+    and observations censored below their limit of quantification are excluded from the observed and the simulated
+    percentiles.
+    """
+    def __init__(self, problem_container: List, parameters: np.ndarray, number_of_bins: int=10,
+                 percentiles: List[float]=(5, 50, 95), confidence: float=90,
+                 residual_standard_deviation: np.ndarray=None, is_censored: List[np.ndarray]=None,
+                 error_model: ErrorModel=None, noise_parameters: np.ndarray=None) -> None:
+        """Initialises the predictive check and solves the forward problem for each patient.
+
+        Arguments:
+            problem_container {List} -- pints problems of the inverse problem.
+            parameters {np.ndarray} -- Estimated parameters.
+
+        Keyword Arguments:
+            number_of_bins {int} -- Maximal number of time bins. Bin edges are quantiles of the observation times.
+                                    (default: {10})
+            percentiles {List[float]} -- Percentiles of the data compared in each bin. (default: {(5, 50, 95)})
+            confidence {float} -- Confidence level in percent of the simulated percentile bands. (default: {90})
+            residual_standard_deviation {np.ndarray} -- Standard deviation of the additive residual error of each
+                                                        output, or of each observation of shape (observations,
+                                                        outputs). If None, the root mean squared residual of each
+                                                        output is used. Ignored if an error model is given.
+                                                        (default: {None})
+            is_censored {List[np.ndarray]} -- Flags of the censored observations of each patient, whose imputed
+                                              values are excluded. (default: {None})
+            error_model {ErrorModel} -- Fitted error model, from which replicates are sampled instead of adding
+                                        residual errors, e.g. log-normally around the predictions. (default: {None})
+            noise_parameters {np.ndarray} -- Estimated noise parameters of the error model. (default: {None})
+        """
+        # collect observed design and data of all patients
+        times, values, predictions = [], [], []
+        for problem in problem_container:
+            times.append(problem.times())
+            values.append(problem.values().reshape(len(problem.times()), -1))
+            predictions.append(problem.evaluate(parameters).reshape(len(problem.times()), -1))
+        self.times = np.concatenate(times)
+        self.values = np.concatenate(values)
+        self.predictions = np.concatenate(predictions)
+
+        # censored observations are treated as missing
+        if is_censored is not None:
+            is_censored = np.concatenate([np.broadcast_to(np.reshape(flags, (len(flags), -1)), patient_values.shape)
+                                          for flags, patient_values in zip(is_censored, values)])
+            self.values[is_censored] = np.nan
+        self._is_missing = np.isnan(self.values)
+
+        # output index of each observation, flattened in the order of the values
+        self.error_model = error_model
+        self.noise_parameters = noise_parameters
+        self._output_ids = np.tile(np.arange(self.values.shape[1]), len(self.values))
+        if error_model is not None:
+            residual_standard_deviation = error_model.compute_standard_deviations(
+                self.predictions.ravel(), noise_parameters, self._output_ids).reshape(self.values.shape)
+        elif residual_standard_deviation is None:
+            residual_standard_deviation = np.sqrt(np.nanmean((self.values - self.predictions) ** 2, axis=0))
+        self.residual_standard_deviation = np.broadcast_to(residual_standard_deviation, self.values.shape)
+
+        # bin observations by quantiles of the observation times
+        self.bin_edges = np.unique(np.quantile(self.times, np.linspace(0, 1, number_of_bins + 1)))
+        self._bin_ids = np.searchsorted(self.bin_edges[1:-1], self.times, side='right')
+        number_of_bins = len(self.bin_edges) - 1
+        self.bin_centres = np.array([np.mean(self.times[self._bin_ids == bin_id]) for bin_id in range(number_of_bins)])
+
+        self.percentiles = np.asarray(percentiles, dtype=float)
+        self.band_probabilities = [(100 - confidence) / 200, 0.5, (100 + confidence) / 200]
+
+        # percentiles of the data, of shape (outputs, percentiles, bins)
+        self.observed_percentiles = self._get_bin_percentiles(self.values[np.newaxis])[:, :, 0, :]
+
+        # streaming estimators of the percentile bands, indexed by output, percentile, band and bin
+        self._estimators = [[[[P2Quantile(probability) for _ in range(number_of_bins)]
+                              for probability in self.band_probabilities]
+                             for _ in self.percentiles]
+                            for _ in range(self.values.shape[1])]
+        self.number_of_replicates = 0
+
+    def run(self, number_of_replicates: int=200, batch_size: int=50, seed: int=None,
+            callback: Callable=None) -> None:
+        """Simulates replicate datasets and updates the percentile bands. Repeated calls add further replicates.
+
+        Keyword Arguments:
+            number_of_replicates {int} -- Number of replicate datasets. (default: {200})
+            batch_size {int} -- Number of replicates generated at once. (default: {50})
+            seed {int} -- Seed of the residual errors. (default: {None})
+            callback {Callable} -- Called with the number of completed replicates after each batch.
+                                   (default: {None})
+        """
+        random_generator = np.random.default_rng(seed)
+
+        completed = 0
+        while completed < number_of_replicates:
+            size = min(batch_size, number_of_replicates - completed)
+            replicates = self._simulate_replicates(random_generator, size)
+
+            # stream percentiles of each replicate into the band estimators
+            bin_percentiles = self._get_bin_percentiles(replicates)
+            for output_id, output_estimators in enumerate(self._estimators):
+                for percentile_id, percentile_estimators in enumerate(output_estimators):
+                    for band_estimators in percentile_estimators:
+                        for bin_id, estimator in enumerate(band_estimators):
+                            for value in bin_percentiles[output_id, percentile_id, :, bin_id]:
+                                if not np.isnan(value):
+                                    estimator.update(value)
+
+            completed += size
+            self.number_of_replicates += size
+            if callback is not None:
+                callback(completed)
+
+    def _simulate_replicates(self, random_generator: np.random.Generator, size: int) -> np.ndarray:
+        """Returns replicate datasets of shape (replicates, observations, outputs), which are missing where the data
+        is missing.
+        """
+        noise = random_generator.standard_normal(size=(size,) + self.values.shape)
+        if self.error_model is None:
+            replicates = self.predictions + self.residual_standard_deviation * noise
+        else:
+            replicates = self.error_model.sample_observations(self.predictions.ravel(), self.noise_parameters,
+                                                              self._output_ids, noise.reshape(size, -1))
+            replicates = replicates.reshape(noise.shape)
+        replicates[:, self._is_missing] = np.nan
+
+        return replicates
+
+    @property
+    def simulated_bands(self) -> np.ndarray:
+        """Lower bound, median and upper bound of the simulated percentiles, of shape (outputs, percentiles, 3, bins).
+        """
+        return np.array([[[[estimator.value for estimator in band_estimators]
+                           for band_estimators in percentile_estimators]
+                          for percentile_estimators in output_estimators]
+                         for output_estimators in self._estimators])
+
+    def _get_bin_percentiles(self, datasets: np.ndarray) -> np.ndarray:
+        """Returns the percentiles of each time bin for a batch of datasets.
+
+        Arguments:
+            datasets {np.ndarray} -- Datasets of shape (datasets, observations, outputs).
+
+        Returns:
+            np.ndarray -- Percentiles of shape (outputs, percentiles, datasets, bins).
+        """
+        number_of_bins = len(self.bin_centres)
+        bin_percentiles = np.empty(shape=(datasets.shape[2], len(self.percentiles), datasets.shape[0], number_of_bins))
+
+        # bins without observations of an output have NaN percentiles
+        percentile = np.nanpercentile if np.any(self._is_missing) else np.percentile
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            for bin_id in range(number_of_bins):
+                bin_values = datasets[:, self._bin_ids == bin_id, :]
+                bin_percentiles[..., bin_id] = np.transpose(percentile(bin_values, self.percentiles, axis=1),
+                                                            (2, 0, 1))
+
+        return bin_percentiles
@@ -0,0 +1,163 @@
+import json
+from typing import Dict
+
+import numpy as np
+
+
+class OptimisationResult(object):
+    """Compact, array-backed container for the outcome of an optimisation with restarts. Each restart is stored as one
+    record of a numpy structured array (estimate, score, number of evaluations, number of iterations and run time),
+    and the per-iteration best scores of all restarts are stored in a second structured array. Metadata, e.g. the
+    optimiser and the error measure, is kept as a flat dictionary.
+
+    Results can be saved to and loaded from a binary .npz file without pickling.
+    """
+    __slots__ = ('restarts', 'traces', 'metadata')
+
+    def __init__(self, number_of_parameters: int, metadata: Dict=None) -> None:
+        """Initialises an empty result.
+
+        Arguments:
+            number_of_parameters {int} -- Number of parameters of the optimisation problem.
+
+        Keyword Arguments:
+            metadata {Dict} -- JSON serialisable information about the optimisation. (default: {None})
+        """
+        self.restarts = np.empty(shape=0, dtype=restart_dtype(number_of_parameters))
+        self.traces = np.empty(shape=0, dtype=TRACE_DTYPE)
+        self.metadata = dict(metadata) if metadata is not None else {}
+
+    def add_restart(self, estimate: np.ndarray, score: float, evaluations: int, iterations: int, time: float,
+                    trace: np.ndarray=None) -> None:
+        """Appends the outcome of one optimisation run.
+
+        Arguments:
+            estimate {np.ndarray} -- Estimated parameters.
+            score {float} -- Objective score of the estimate.
+            evaluations {int} -- Number of objective function evaluations.
+            iterations {int} -- Number of optimiser iterations.
+            time {float} -- Run time in seconds.
+
+        Keyword Arguments:
+            trace {np.ndarray} -- Best score after each iteration. (default: {None})
+        """
+        restart = np.empty(shape=1, dtype=self.restarts.dtype)
+        restart['estimate'] = estimate
+        restart['score'] = score
+        restart['evaluations'] = evaluations
+        restart['iterations'] = iterations
+        restart['time'] = time
+        restart_id = len(self.restarts)
+        self.restarts = np.concatenate([self.restarts, restart])
+
+        if trace is not None:
+            trace_records = np.empty(shape=len(trace), dtype=TRACE_DTYPE)
+            trace_records['restart'] = restart_id
+            trace_records['iteration'] = np.arange(len(trace))
+            trace_records['score'] = trace
+            self.traces = np.concatenate([self.traces, trace_records])
+
+    @property
+    def best_restart(self) -> int:
+        """Index of the restart with minimal score.
+        """
+        if len(self.restarts) == 0:
+            raise ValueError('The result does not contain any restarts.')
+
+        return int(np.argmin(self.restarts['score']))
+
+    @property
+    def estimated_parameters(self) -> np.ndarray:
+        """Estimate of the restart with minimal score.
+        """
+        return self.restarts['estimate'][self.best_restart]
+
+    @property
+    def objective_score(self) -> float:
+        """Minimal score across restarts.
+        """
+        return float(self.restarts['score'][self.best_restart])
+
+    def get_trace(self, restart_id: int) -> np.ndarray:
+        """Returns the best score after each iteration of a restart.
+
+        Arguments:
+            restart_id {int} -- Index of the restart.
+
+        Returns:
+            np.ndarray -- Scores in order of iterations.
+        """
+        return self.traces['score'][self.traces['restart'] == restart_id]
+
+    def save(self, file_path: str) -> None:
+        """Saves the result to a binary .npz file.
+
+        Arguments:
+            file_path {str} -- Path to the file.
+        """
+        with open(file_path, 'wb') as result_file:
+            np.savez(result_file, **self.to_arrays())
+
+    @staticmethod
+    def load(file_path: str) -> 'OptimisationResult':
+        """Loads a result from a binary .npz file created by OptimisationResult.save.
+
+        Arguments:
+            file_path {str} -- Path to the file.
+
+        Returns:
+            OptimisationResult -- Loaded result.
+        """
+        with np.load(file_path, allow_pickle=False) as arrays:
+            return OptimisationResult.from_arrays(arrays)
+
+    def to_arrays(self) -> Dict:
+        """Returns the result as a dictionary of numpy arrays, with the metadata encoded as JSON bytes.
+
+        Returns:
+            Dict -- Arrays of the result.
+        """
+        metadata = np.frombuffer(json.dumps(self.metadata).encode('utf-8'), dtype=np.uint8)
+
+        return {'restarts': self.restarts, 'traces': self.traces, 'metadata': metadata}
+
+    @staticmethod
+    def from_arrays(arrays: Dict) -> 'OptimisationResult':
+        """Reconstructs a result from the arrays returned by OptimisationResult.to_arrays.
+
+        Arguments:
+            arrays {Dict} -- Arrays of the result.
+
+        Returns:
+            OptimisationResult -- Reconstructed result.
+        """
+        restarts = arrays['restarts']
+        number_of_parameters = restarts.dtype['estimate'].shape[0]
+        metadata = json.loads(bytes(arrays['metadata']).decode('utf-8'))
+
+        result = OptimisationResult(number_of_parameters, metadata)
+        result.restarts = np.array(restarts)
+        result.traces = np.array(arrays['traces'])
+
+        return result
+
+
+# record layout of the per-iteration traces
+TRACE_DTYPE = np.dtype([('restart', np.int32), ('iteration', np.int32), ('score', np.float64)])
+
+
+def restart_dtype(number_of_parameters: int) -> np.dtype:
+    """Returns the record layout of an optimisation restart.
+
+    Arguments:
+        number_of_parameters {int} -- Number of parameters of the optimisation problem.
+
+    Returns:
+        np.dtype -- Structured data type of a restart.
+    """
+    return np.dtype([('estimate', np.float64, (number_of_parameters,)),
+                     ('score', np.float64),
+                     ('evaluations', np.int64),
+                     ('iterations', np.int64),
+                     ('time', np.float64)
+                     ])
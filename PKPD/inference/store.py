@@ -0,0 +1,212 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import List
+
+import numpy as np
+
+from PKPD.inference.result import OptimisationResult
+
+
+class ResultsStore(object):
+    """Persistent store for optimisation results in a local SQLite database. Results are addressed by content: the
+    problem key hashes the model definitions, selected outputs, solver settings, dosing protocols, data and error
+    measure, and the settings key additionally hashes the optimiser, boundaries, initial point, initial uncertainty and
+    number of restarts. An identical fit is therefore returned from the store instead of being recomputed, and fits
+    of the same problem with different settings can be used to warm-start new fits.
+    """
+    def __init__(self, directory: str=None) -> None:
+        """Initialises the store and creates the database, if it does not exist.
+
+        Keyword Arguments:
+            directory {str} -- Directory of the database. Defaults to $PKPD_CACHE_DIR or ~/.cache/PKPD.
+                               (default: {None})
+        """
+        if directory is None:
+            directory = os.environ.get('PKPD_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'PKPD'))
+        os.makedirs(directory, exist_ok=True)
+        self.file_path = os.path.join(directory, 'results.sqlite')
+
+        with closing(self._connect()) as connection, connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS results ('
+                               'settings_key TEXT PRIMARY KEY, '
+                               'problem_key TEXT NOT NULL, '
+                               'score REAL NOT NULL, '
+                               'created REAL NOT NULL, '
+                               'result BLOB NOT NULL)'
+                               )
+            connection.execute('CREATE INDEX IF NOT EXISTS problem_index ON results (problem_key, score)')
+
+    def _connect(self) -> sqlite3.Connection:
+        """Opens a connection to the database.
+
+        Returns:
+            sqlite3.Connection -- Database connection.
+        """
+        return sqlite3.connect(self.file_path, timeout=30)
+
+    def get(self, settings_key: str) -> OptimisationResult:
+        """Returns the result stored for the settings key, or None if the fit has not been run before.
+
+        Arguments:
+            settings_key {str} -- Hash of problem and optimisation settings.
+
+        Returns:
+            OptimisationResult -- Stored result.
+        """
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute('SELECT result FROM results WHERE settings_key = ?', (settings_key,)).fetchone()
+
+        if row is None:
+            return None
+
+        return _deserialise(row[0])
+
+    def get_best(self, problem_key: str) -> OptimisationResult:
+        """Returns the result with minimal score among all fits of the problem, or None if the problem has not been
+        fitted before.
+
+        Arguments:
+            problem_key {str} -- Hash of models, protocols, data and error measure.
+
+        Returns:
+            OptimisationResult -- Stored result with minimal score.
+        """
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute('SELECT result FROM results WHERE problem_key = ? ORDER BY score LIMIT 1',
+                                     (problem_key,)
+                                     ).fetchone()
+
+        if row is None:
+            return None
+
+        return _deserialise(row[0])
+
+    def put(self, settings_key: str, problem_key: str, result: OptimisationResult) -> None:
+        """Stores a result. An existing result for the same settings key is replaced.
+
+        Arguments:
+            settings_key {str} -- Hash of problem and optimisation settings.
+            problem_key {str} -- Hash of models, protocols, data and error measure.
+            result {OptimisationResult} -- Result of the fit.
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                               (settings_key, problem_key, result.objective_score, time.time(), _serialise(result))
+                               )
+
+    def clear(self) -> None:
+        """Removes all stored results.
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.execute('DELETE FROM results')
+
+
+def hash_problem(problem_container: List, error_function_container: List) -> str:
+    """Returns a hash of the models, selected outputs, solver and steady state settings, dosing protocols, data and
+    error measures of an inverse problem.
+
+    Arguments:
+        problem_container {List} -- pints problems of the inverse problem.
+        error_function_container {List} -- pints error measures of the inverse problem.
+
+    Returns:
+        str -- Hex digest.
+    """
+    digest = hashlib.sha256()
+    for problem_id, problem in enumerate(problem_container):
+        model = problem.model()
+        digest.update(model.model.code().encode('utf-8'))
+        digest.update(str(_get_output_names(model)).encode('utf-8'))
+        digest.update(str((model.tolerance, model.max_step_size)).encode('utf-8'))
+
+        # periodic steady state replaces the initial conditions
+        solver = model.steady_state_solver
+        if solver is not None:
+            digest.update(str((solver.dosing_interval, solver.is_linear, solver.tolerance,
+                               solver.max_iterations)).encode('utf-8'))
+
+        for protocol in _get_protocols(model.simulation):
+            digest.update(str(_serialise_protocol(protocol)).encode('utf-8'))
+
+        digest.update(np.ascontiguousarray(problem.times(), dtype=float).tobytes())
+        digest.update(np.ascontiguousarray(problem.values(), dtype=float).tobytes())
+        digest.update(type(error_function_container[problem_id]).__name__.encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+def hash_settings(problem_key: str, settings: List) -> str:
+    """Returns a hash of the problem key and the optimisation settings.
+
+    Arguments:
+        problem_key {str} -- Hash of models, protocols, data and error measure.
+        settings {List} -- Optimisation settings. Numeric arrays are hashed by value, lists of mixed type, e.g.
+                           covariate relations, by value of their JSON representation, and all other settings by
+                           their string representation.
+
+    Returns:
+        str -- Hex digest.
+    """
+    digest = hashlib.sha256(problem_key.encode('utf-8'))
+    for setting in settings:
+        if isinstance(setting, (np.ndarray, list, tuple)):
+            try:
+                digest.update(np.ascontiguousarray(setting, dtype=float).tobytes())
+            except (TypeError, ValueError):
+                digest.update(json.dumps(setting, sort_keys=True, default=str).encode('utf-8'))
+        else:
+            digest.update(str(setting).encode('utf-8'))
+        digest.update(b'|')
+
+    return digest.hexdigest()
+
+
+def _serialise(result: OptimisationResult) -> bytes:
+    """Serialises a result to binary .npz content.
+    """
+    buffer = io.BytesIO()
+    np.savez(buffer, **result.to_arrays())
+
+    return buffer.getvalue()
+
+
+def _deserialise(blob: bytes) -> OptimisationResult:
+    """Deserialises a result from binary .npz content.
+    """
+    with np.load(io.BytesIO(blob), allow_pickle=False) as arrays:
+        return OptimisationResult.from_arrays(arrays)
+
+
+def _get_output_names(model) -> List[str]:
+    """Returns the names of the outputs of a single or multi-output model.
+    """
+    output_names = getattr(model, 'output_names', None)
+    if output_names is None:
+        return [model.output_name]
+
+    return list(output_names)
+
+
+def _get_protocols(simulation) -> List:
+    """Returns the dosing protocols of a myokit simulation. myokit does not expose the protocols publicly, and stores a
+    single protocol in older versions and a protocol per pacing label in newer versions.
+    """
+    if hasattr(simulation, '_protocols'):
+        return list(simulation._protocols)
+
+    return [getattr(simulation, '_protocol', None)]
+
+
+def _serialise_protocol(protocol) -> List:
+    """Returns the events of a myokit protocol as [level, start, duration, period, multiplier] rows.
+    """
+    if protocol is None:
+        return []
+
+    return [[event.level(), event.start(), event.duration(), event.period(), event.multiplier()]
+            for event in protocol.events()]
@@ -0,0 +1,207 @@
+import numpy as np
+import pints
+from scipy.interpolate import RBFInterpolator
+
+
+class SurrogateCMAES(pints.PopulationBasedOptimiser):
+    """Surrogate-assisted CMA-ES for objective functions with expensive simulations. The candidates proposed by
+    pints.CMAES in each iteration are pre-screened by a radial basis function surrogate of the objective, fitted to an
+    archive of the most recent true evaluations. Only the most promising fraction of the candidates is simulated, the
+    remaining candidates are ranked by the surrogate, but never ahead of a simulated candidate.
+
+    The surrogate is fitted to the ranks of the archived scores in standardised parameter coordinates, such that
+    screening is invariant to the scale of both, the objective and the parameters. Until the archive holds enough
+    evaluations to fit a surrogate, all candidates are simulated.
+
+    Extends pints.PopulationBasedOptimiser, and can therefore be used like any pints optimiser, see pints documentation
+    https://pints.readthedocs.io/.
+    """
+    def __init__(self, x0: np.ndarray, sigma0: np.ndarray=None, boundaries: pints.Boundaries=None) -> None:
+        """Initialises the optimiser.
+
+        Arguments:
+            x0 {np.ndarray} -- Starting point of the optimisation.
+
+        Keyword Arguments:
+            sigma0 {np.ndarray} -- Standard deviation around the starting point. (default: {None})
+            boundaries {pints.Boundaries} -- Domain of the search. (default: {None})
+        """
+        super(SurrogateCMAES, self).__init__(x0, sigma0, boundaries)
+
+        # candidates are proposed by CMA-ES
+        self._optimiser = pints.CMAES(x0, sigma0, boundaries)
+
+        # set initial state
+        self._running = False
+        self._ready_for_tell = False
+        self._candidates = None
+        self._evaluated_ids = None
+        self._predictions = None
+
+        # initialise best true evaluation
+        self._x_best = np.array(self._x0)
+        self._f_best = np.inf
+        self._f_guessed = np.inf
+
+        # initialise archive of true evaluations
+        self._archive_parameters = np.empty(shape=(0, self._n_parameters))
+        self._archive_scores = np.empty(shape=0)
+        self._archive_size = max(50, 10 * (self._n_parameters + 1))
+
+        # fraction of candidates that is simulated once the surrogate is available
+        self._screening_fraction = 0.2
+
+    def ask(self) -> np.ndarray:
+        """See pints.Optimiser.ask(). Returns the candidates that are to be simulated.
+        """
+        # initialise on first call
+        if not self._running:
+            self._optimiser.set_population_size(self._population_size)
+            self._running = True
+
+        self._ready_for_tell = True
+
+        # propose candidates
+        self._candidates = np.array(self._optimiser.ask())
+        number_candidates = len(self._candidates)
+
+        # screen candidates with the surrogate, if it can be fitted
+        self._predictions = self._predict(self._candidates)
+        if self._predictions is None:
+            self._evaluated_ids = np.arange(number_candidates)
+        else:
+            number_evaluations = max(1, int(np.ceil(self._screening_fraction * number_candidates)))
+            self._evaluated_ids = np.argsort(self._predictions, kind='stable')[:number_evaluations]
+
+        candidates = self._candidates[self._evaluated_ids]
+        candidates.setflags(write=False)
+
+        return candidates
+
+    def tell(self, fx: np.ndarray) -> None:
+        """See pints.Optimiser.tell(). Receives the scores of the simulated candidates.
+        """
+        if not self._ready_for_tell:
+            raise Exception('ask() not called before tell()')
+        self._ready_for_tell = False
+
+        fx = np.asarray(fx, dtype=float)
+        evaluated_candidates = self._candidates[self._evaluated_ids]
+        self._add_to_archive(evaluated_candidates, fx)
+
+        # update best true evaluation
+        best_id = np.argmin(fx)
+        if fx[best_id] < self._f_best:
+            self._f_best = fx[best_id]
+            self._x_best = np.array(evaluated_candidates[best_id])
+        self._f_guessed = np.min(fx)
+
+        # rank unevaluated candidates by the surrogate behind all simulated candidates
+        if self._predictions is None:
+            scores = fx
+        else:
+            finite_scores = fx[np.isfinite(fx)]
+            worst_score = np.max(finite_scores) if len(finite_scores) > 0 else np.inf
+            scores = worst_score + 1 + self._predictions
+            scores[self._evaluated_ids] = fx
+
+        self._optimiser.tell(scores)
+
+    def _add_to_archive(self, parameters: np.ndarray, scores: np.ndarray) -> None:
+        """Appends finite true evaluations to the archive and keeps only the most recent evaluations.
+
+        Arguments:
+            parameters {np.ndarray} -- Evaluated parameters of shape (number of evaluations, number of parameters).
+            scores {np.ndarray} -- Objective scores of the parameters.
+        """
+        mask = np.isfinite(scores)
+        self._archive_parameters = np.concatenate([self._archive_parameters, parameters[mask]])[-self._archive_size:]
+        self._archive_scores = np.concatenate([self._archive_scores, scores[mask]])[-self._archive_size:]
+
+    def _predict(self, candidates: np.ndarray) -> np.ndarray:
+        """Returns the surrogate predictions of the score ranks of the candidates, or None if the archive is too small
+        or degenerate to fit a surrogate.
+
+        Arguments:
+            candidates {np.ndarray} -- Candidates of shape (number of candidates, number of parameters).
+
+        Returns:
+            np.ndarray -- Predicted ranks of the candidates.
+        """
+        if len(self._archive_scores) < max(2 * (self._n_parameters + 1), self._population_size):
+            return None
+
+        # standardise parameters to make the surrogate independent of parameter scales
+        mean = np.mean(self._archive_parameters, axis=0)
+        scale = np.std(self._archive_parameters, axis=0)
+        if np.any(scale == 0):
+            return None
+
+        ranks = np.argsort(np.argsort(self._archive_scores, kind='stable'), kind='stable').astype(float)
+        try:
+            surrogate = RBFInterpolator((self._archive_parameters - mean) / scale,
+                                        ranks,
+                                        kernel='thin_plate_spline',
+                                        smoothing=1e-8
+                                        )
+        except np.linalg.LinAlgError:
+            return None
+
+        return surrogate((candidates - mean) / scale)
+
+    def f_best(self) -> float:
+        """See pints.Optimiser.f_best(). Only true evaluations are considered.
+        """
+        return self._f_best
+
+    def f_guessed(self) -> float:
+        """See pints.Optimiser.f_guessed().
+        """
+        return self._f_guessed
+
+    def x_best(self) -> np.ndarray:
+        """See pints.Optimiser.x_best(). Only true evaluations are considered.
+        """
+        return np.array(self._x_best)
+
+    def x_guessed(self) -> np.ndarray:
+        """See pints.Optimiser.x_guessed().
+        """
+        return self._optimiser.x_guessed()
+
+    @classmethod
+    def name(self) -> str:
+        """See pints.Optimiser.name().
+        """
+        return 'Surrogate-assisted Covariance Matrix Adaptation Evolution Strategy (CMA-ES)'
+
+    def needs_sensitivities(self) -> bool:
+        """See pints.Optimiser.needs_sensitivities().
+        """
+        return False
+
+    def running(self) -> bool:
+        """See pints.Optimiser.running().
+        """
+        return self._running
+
+    def stop(self):
+        """See pints.Optimiser.stop().
+        """
+        return self._optimiser.stop()
+
+    def set_screening_fraction(self, screening_fraction: float) -> None:
+        """Sets the fraction of the candidates of each iteration that is simulated, once the surrogate is available.
+
+        Arguments:
+            screening_fraction {float} -- Fraction in (0, 1].
+        """
+        if not 0 < screening_fraction <= 1:
+            raise ValueError('Screening fraction has to lie in (0, 1].')
+
+        self._screening_fraction = screening_fraction
+
+    def _suggested_population_size(self) -> int:
+        """See pints.PopulationBasedOptimiser._suggested_population_size(). Same heuristic as for CMA-ES.
+        """
+        return 4 + int(3 * np.log(self._n_parameters))
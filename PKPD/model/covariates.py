@@ -0,0 +1,191 @@
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+
+# valid covariate-parameter relations
+RELATIONS = ['allometric', 'power', 'exponential']
+
+# data columns with this prefix are read as covariates, e.g. 'cov_weight'
+COVARIATE_PREFIX = 'cov_'
+
+
+class CovariateModel(object):
+    """Relates the parameters of the patients to their covariates, e.g. weight, age or creatinine clearance. Each
+    individual parameter is the population parameter multiplied by the factors of its relations,
+
+        allometric:  (cov / reference) ** exponent, with fixed exponent,
+        power:       (cov / reference) ** theta,
+        exponential: exp(theta * (cov - reference)),
+
+    where the coefficients theta are estimated together with the population parameters. Parameters are by convention
+    [population parameters, covariate coefficients].
+
+    The transformed covariates of all relations are precomputed as a design matrix, such that the individual parameters
+    of all patients are computed in one vectorised expression per evaluation.
+    """
+    def __init__(self, parameter_names: List[str], covariates: np.ndarray, covariate_names: List[str]) -> None:
+        """Initialises the covariate model without relations, i.e. all patients share the population parameters.
+
+        Arguments:
+            parameter_names {List[str]} -- Parameter names of the model, i.e. initial conditions and model parameters.
+            covariates {np.ndarray} -- Covariates of shape (number of patients, number of covariates). Missing
+                                       covariates are marked by NaN.
+            covariate_names {List[str]} -- Names of the covariates.
+        """
+        covariates = np.array(covariates, dtype=float, ndmin=2)
+        if covariates.shape[1] != len(covariate_names):
+            raise ValueError('Number of covariate columns does not match number of covariate names.')
+
+        self.parameter_names = list(parameter_names)
+        self.covariates = covariates
+        self.covariate_names = list(covariate_names)
+        self.relations = []
+
+        # log factors of fixed relations, design matrix and target parameters of estimated relations
+        self._offsets = np.zeros(shape=(len(covariates), len(self.parameter_names)))
+        self._design = np.empty(shape=(len(covariates), 0))
+        self._assignment = np.empty(shape=(0, len(self.parameter_names)))
+
+    def add_relation(self, parameter_name: str, covariate_name: str, relation: str='power', reference: float=None,
+                     exponent: float=None) -> None:
+        """Adds a relation between a parameter and a covariate. Patients with missing covariate are assigned the
+        reference value, i.e. the relation has no effect on them.
+
+        Arguments:
+            parameter_name {str} -- Name of the related parameter.
+            covariate_name {str} -- Name of the covariate.
+
+        Keyword Arguments:
+            relation {str} -- Valid relations are 'allometric', 'power' and 'exponential'. (default: {'power'})
+            reference {float} -- Reference value of the covariate. If None, the median of the patients is used.
+                                 (default: {None})
+            exponent {float} -- Fixed exponent of allometric relations. If None, volumes V scale with 1 and all other
+                                parameters with 0.75. (default: {None})
+        """
+        if relation not in RELATIONS:
+            raise ValueError('Relation is not supported. Valid relations are ' + str(RELATIONS) + '.')
+        if parameter_name not in self.parameter_names:
+            raise ValueError('Parameter %s does not exist.' % parameter_name)
+        if covariate_name not in self.covariate_names:
+            raise ValueError('Covariate %s does not exist.' % covariate_name)
+
+        covariate = self.covariates[:, self.covariate_names.index(covariate_name)]
+        if reference is None:
+            reference = np.nanmedian(covariate)
+        covariate = np.where(np.isnan(covariate), reference, covariate)
+
+        # transform covariate, such that the relation is linear on log scale of the parameter
+        if relation == 'exponential':
+            transformed = covariate - reference
+        else:
+            if reference <= 0 or np.any(covariate <= 0):
+                raise ValueError('Allometric and power relations require positive covariates.')
+            transformed = np.log(covariate / reference)
+
+        parameter_id = self.parameter_names.index(parameter_name)
+        if relation == 'allometric':
+            if exponent is None:
+                exponent = 1.0 if parameter_name.split('.')[-1] == 'V' else 0.75
+            self._offsets[:, parameter_id] += exponent * transformed
+        else:
+            assignment = np.zeros(shape=(1, len(self.parameter_names)))
+            assignment[0, parameter_id] = 1
+            self._design = np.hstack([self._design, transformed[:, np.newaxis]])
+            self._assignment = np.vstack([self._assignment, assignment])
+
+        self.relations.append([parameter_name, covariate_name, relation, float(reference), exponent])
+
+    def n_parameters(self) -> int:
+        """Returns the number of population parameters and covariate coefficients.
+
+        Returns:
+            int -- Number of parameters.
+        """
+        return len(self.parameter_names) + self._design.shape[1]
+
+    def get_parameter_names(self) -> List[str]:
+        """Returns the names of the population parameters and covariate coefficients.
+
+        Returns:
+            List[str] -- Parameter names.
+        """
+        coefficient_names = ['%s.%s_%s' % (parameter_name, covariate_name,
+                                           'exponent' if relation == 'power' else 'coefficient')
+                             for parameter_name, covariate_name, relation, _, _ in self.relations
+                             if relation != 'allometric']
+
+        return self.parameter_names + coefficient_names
+
+    def compute_individual_parameters(self, parameters: np.ndarray) -> np.ndarray:
+        """Returns the individual parameters of all patients.
+
+        Arguments:
+            parameters {np.ndarray} -- Population parameters and covariate coefficients.
+
+        Returns:
+            np.ndarray -- Individual parameters of shape (number of patients, number of model parameters).
+        """
+        parameters = np.asarray(parameters, dtype=float)
+        if len(parameters) != self.n_parameters():
+            raise ValueError('Number of parameters does not match. Expected %d parameters.' % self.n_parameters())
+
+        number_of_model_parameters = len(self.parameter_names)
+        population_parameters = parameters[:number_of_model_parameters]
+        coefficients = parameters[number_of_model_parameters:]
+
+        # sum log factors of all relations of each parameter at once
+        log_factors = self._offsets + (self._design * coefficients) @ self._assignment
+
+        return population_parameters * np.exp(log_factors)
+
+    def get_initial_coefficients(self) -> List:
+        """Returns the coefficients without covariate effects as starting point and an initial uncertainty, which
+        corresponds to a change of the parameter by about 10% over one standard deviation of the transformed
+        covariate.
+
+        Returns:
+            List -- Starting point and initial uncertainty of the covariate coefficients.
+        """
+        spread = np.std(self._design, axis=0)
+        spread[spread == 0] = 1
+
+        return [np.zeros(self._design.shape[1]), 0.1 / spread]
+
+
+def split_covariates(data_df: pd.DataFrame) -> List[pd.DataFrame]:
+    """Splits the covariate columns, marked by COVARIATE_PREFIX, from a data frame, such that the remaining columns
+    follow the layout ID, time, states and dose.
+
+    Arguments:
+        data_df {pd.DataFrame} -- Data frame of the data file.
+
+    Returns:
+        List[pd.DataFrame] -- Data frame without covariates, and data frame of the covariates with the prefix removed
+                              from the column labels, or None if no covariates are provided.
+    """
+    covariate_labels = [label for label in data_df.keys() if str(label).lower().startswith(COVARIATE_PREFIX)]
+    if not covariate_labels:
+        return [data_df, None]
+
+    covariate_df = data_df[covariate_labels].rename(columns=lambda label: label[len(COVARIATE_PREFIX):])
+
+    return [data_df.drop(columns=covariate_labels), covariate_df]
+
+
+def get_patient_covariates(covariate_df: pd.DataFrame, patient_ids_mask: np.ndarray,
+                           patient_ids: np.ndarray) -> np.ndarray:
+    """Returns the covariates of each patient, i.e. the first value that is provided in the patient's rows.
+
+    Arguments:
+        covariate_df {pd.DataFrame} -- Covariates of each row of the data.
+        patient_ids_mask {np.ndarray} -- Patient ID of each row of the data.
+        patient_ids {np.ndarray} -- IDs of the patients.
+
+    Returns:
+        np.ndarray -- Covariates of shape (number of patients, number of covariates), NaN if missing.
+    """
+    grouped = covariate_df.apply(pd.to_numeric, errors='coerce').groupby(np.asarray(patient_ids_mask), sort=False)
+
+    return grouped.first().reindex(patient_ids).to_numpy(dtype=float)
@@ -0,0 +1,43 @@
+import numpy as np
+from scipy.interpolate import PchipInterpolator
+
+
+class DenseOutput(object):
+    """Continuous representation of the model outputs of a single simulation. The outputs are sampled on a fine grid of
+    nodes from the solver's own interpolant during one integration, and arbitrary query grids within the simulated
+    time interval are evaluated by shape-preserving piecewise cubic interpolation between the nodes, i.e. without
+    solving the forward problem again.
+    """
+    def __init__(self, times: np.ndarray, values: np.ndarray) -> None:
+        """Initialises the dense output.
+
+        Arguments:
+            times {np.ndarray} -- Strictly increasing times of the nodes.
+            values {np.ndarray} -- Output values at the nodes. Either 1d array for single output models or 2d array of
+                                   shape (number of nodes, number of outputs) for multi output models.
+        """
+        self.times = np.asarray(times, dtype=float)
+        self.values = np.asarray(values, dtype=float)
+        self.start_time = self.times[0]
+        self.end_time = self.times[-1]
+
+        # shape-preserving interpolation avoids overshoots at the kinks caused by dosing events
+        self._interpolant = PchipInterpolator(self.times, self.values, axis=0, extrapolate=False)
+
+    def evaluate(self, times: np.ndarray) -> np.ndarray:
+        """Returns the interpolated outputs at the provided times.
+
+        Arguments:
+            times {np.ndarray} -- Times within the simulated interval at which outputs are evaluated.
+
+        Returns:
+            np.ndarray -- Outputs evaluated at the provided times.
+        """
+        times = np.asarray(times, dtype=float)
+
+        # check that no extrapolation is required
+        if np.any(times < self.start_time) or np.any(times > self.end_time):
+            raise ValueError('Times have to lie within the simulated interval [%g, %g].'
+                             % (self.start_time, self.end_time))
+
+        return self._interpolant(times)
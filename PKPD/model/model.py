@@ -1,10 +1,11 @@
-from array import array
-from typing import List
+from typing import List, Union
 
 import myokit
 import numpy as np
 
 from PKPD.model.abstractModel import AbstractModel
+from PKPD.model.denseOutput import DenseOutput
+from PKPD.model.steadyState import SteadyStateSolver
 
 
 class SingleOutputModel(AbstractModel):
@@ -12,14 +13,16 @@ class SingleOutputModel(AbstractModel):
     employed. The sole difference to the MultiOutputProblem is that the simulate method returns a 1d array instead of a
     2d array.
     """
-    def __init__(self, mmt_file:str) -> None:
+    def __init__(self, mmt_file:Union[str, myokit.Model]) -> None:
         """Initialises the model class.
 
         Arguments:
-            mmt_file {str} -- Path to the mmt_file defining the model and the protocol.
+            mmt_file {Union[str, myokit.Model]} -- Path to the mmt_file defining the model and the protocol, or a
+                                                   myokit.Model without protocol, e.g. generated by
+                                                   PKPD.model.modelBuilder.build_model.
         """
         # load model and protocol
-        model, protocol, _ = myokit.load(mmt_file)
+        model, protocol = _load_model(mmt_file)
 
         # get state, parameter and output names
         self.state_names = [state.qname() for state in model.states()]
@@ -32,6 +35,16 @@ class SingleOutputModel(AbstractModel):
         self.simulation = myokit.Simulation(model, protocol)
         self.model = model
 
+        # resolve parameter names once, so parameters can be set in bulk
+        self._constant_setter = _ConstantSetter(self.simulation, self.parameter_names)
+
+        # steady state dosing is disabled by default
+        self.steady_state_solver = None
+
+        # initialise solver settings with the myokit defaults
+        self.tolerance = (1e-6, 1e-4)
+        self.max_step_size = None
+
     def _get_default_output_name(self, model:myokit.Model):
         """Returns 'central_compartment.drug_concentration' as output_name by default. If variable does not exist in
         model, first state variable name is returned.
@@ -93,23 +106,96 @@ class SingleOutputModel(AbstractModel):
         """
         self.output_name = output_name
 
-    def simulate(self, parameters:np.ndarray, times:np.ndarray) -> array:
+    def simulate(self, parameters:np.ndarray, times:np.ndarray, out:np.ndarray=None) -> np.ndarray:
         """Solves the forward problem and returns the state values evaluated at the times provided.
 
         Arguments:
             parameters {np.ndarray} -- Parameters of the model. By convention [initial conditions, model parameters].
             times {np.ndarray} -- Times at which states will be evaluated.
 
+        Keyword Arguments:
+            out {np.ndarray} -- Optional 1d array of length len(times) into which the result is written, to avoid
+                                allocating a new array for every call. (default: {None})
+
         Returns:
-            [array] -- State values evaluated at provided times.
+            [np.ndarray] -- State values evaluated at provided times.
         """
         self.simulation.reset()
         self._set_parameters(parameters)
 
-        # duration is the last time point plus an increment to include the last time step.
-        result = self.simulation.run(duration=times[-1]+1, log=[self.output_name], log_times=times)
+        # replace initial conditions by periodic steady state, if enabled
+        if self.steady_state_solver is not None:
+            self.simulation.set_state(self.steady_state_solver.solve())
+
+        # myokit logs half-open intervals, so the simulation stops immediately after the last time point.
+        result = self.simulation.run(duration=_get_duration(times), log=[self.output_name], log_times=times)
+
+        # view the logged values without copying
+        values = np.frombuffer(result[self.output_name], dtype=float)
+        if out is None:
+            return values
+
+        out[:] = values
+
+        return out
+
+    def set_steady_state(self, dosing_interval: float=None, is_linear: bool=True) -> None:
+        """Enables simulation in periodic steady state of a repeated dosing regimen. The initial conditions in the
+        parameters are then replaced by the steady state at the beginning of a dosing interval, and the times passed to
+        simulate are measured from the start of that interval. The dosing protocol is expected to be periodic with the
+        dosing interval and to start with a dose at t=0.
+
+        Keyword Arguments:
+            dosing_interval {float} -- Period of the dosing regimen. If None, steady state simulation is disabled.
+                                       (default: {None})
+            is_linear {bool} -- Flag whether the model is linear in its states. Linear models are solved directly,
+                                nonlinear models by periodic shooting. (default: {True})
+        """
+        if dosing_interval is None:
+            self.steady_state_solver = None
+        else:
+            self.steady_state_solver = SteadyStateSolver(self.simulation, dosing_interval, is_linear)
+
+    def set_tolerance(self, abs_tol: float=1e-6, rel_tol: float=1e-4) -> None:
+        """Sets the absolute and relative tolerance of the CVODES solver, which integrates stiff problems with
+        variable order BDF. Looser tolerances speed up the simulation at the cost of accuracy.
+
+        Keyword Arguments:
+            abs_tol {float} -- Absolute tolerance. (default: {1e-6})
+            rel_tol {float} -- Relative tolerance. (default: {1e-4})
+        """
+        self.simulation.set_tolerance(abs_tol, rel_tol)
+        self.tolerance = (float(abs_tol), float(rel_tol))
+
+    def set_max_step_size(self, max_step_size: float=None) -> None:
+        """Sets the maximal step size of the solver, e.g. to prevent it from stepping over short infusions.
+
+        Keyword Arguments:
+            max_step_size {float} -- Maximal step size. If None, the step size is unrestricted. (default: {None})
+        """
+        if max_step_size is not None and max_step_size <= 0:
+            raise ValueError('Maximal step size has to be positive.')
+
+        self.simulation.set_max_step_size(max_step_size)
+        self.max_step_size = max_step_size
 
-        return result[self.output_name]
+    def simulate_dense(self, parameters: np.ndarray, end_time: float, number_of_nodes: int=1001) -> DenseOutput:
+        """Solves the forward problem once from t=0 to end_time and returns a dense output, from which the output can
+        be evaluated at arbitrary times in that interval without solving the forward problem again.
+
+        Arguments:
+            parameters {np.ndarray} -- Parameters of the model. By convention [initial conditions, model parameters].
+            end_time {float} -- Last time point of the simulation.
+
+        Keyword Arguments:
+            number_of_nodes {int} -- Number of interpolation nodes. (default: {1001})
+
+        Returns:
+            DenseOutput -- Interpolant of the output.
+        """
+        nodes = np.linspace(0, end_time, number_of_nodes)
+
+        return DenseOutput(nodes, self.simulate(parameters, nodes))
 
     def _set_parameters(self, parameters:np.ndarray) -> None:
         """Internal helper method to set the parameters of the forward model.
@@ -118,8 +204,7 @@ class SingleOutputModel(AbstractModel):
             parameters {np.ndarray} -- Parameters of the model. By convention [initial condition, model parameters].
         """
         self.simulation.set_state(parameters[:self.state_dimension])
-        for param_id, value in enumerate(parameters[self.state_dimension:]):
-            self.simulation.set_constant(self.parameter_names[param_id], value)
+        self._constant_setter.set_constants(parameters[self.state_dimension:])
 
 
 class MultiOutputModel(AbstractModel):
@@ -127,14 +212,16 @@ class MultiOutputModel(AbstractModel):
     employed. The sole difference to the SingleOutputProblem is that the simulate method returns a 2d array instead of a
     1d array.
     """
-    def __init__(self, mmt_file: str) -> None:
+    def __init__(self, mmt_file: Union[str, myokit.Model]) -> None:
         """Initialises the model class.
 
         Arguments:
-            mmt_file {str} -- Path to the mmt_file defining the model and the protocol.
+            mmt_file {Union[str, myokit.Model]} -- Path to the mmt_file defining the model and the protocol, or a
+                                                   myokit.Model without protocol, e.g. generated by
+                                                   PKPD.model.modelBuilder.build_model.
         """
         # load model and protocol
-        model, protocol, _ = myokit.load(mmt_file)
+        model, protocol = _load_model(mmt_file)
 
         # get state, parameter and output names
         self.state_names = [state.qname() for state in model.states()]
@@ -148,6 +235,16 @@ class MultiOutputModel(AbstractModel):
         self.simulation = myokit.Simulation(model, protocol)
         self.model = model
 
+        # resolve parameter names once, so parameters can be set in bulk
+        self._constant_setter = _ConstantSetter(self.simulation, self.parameter_names)
+
+        # steady state dosing is disabled by default
+        self.steady_state_solver = None
+
+        # initialise solver settings with the myokit defaults
+        self.tolerance = (1e-6, 1e-4)
+        self.max_step_size = None
+
     def _get_parameter_names(self, model: myokit.Model):
         """Gets parameter names of the ODE model, i.e. initial conditions are excluded.
 
@@ -183,27 +280,95 @@ class MultiOutputModel(AbstractModel):
         """
         return self.output_dimension
 
-    def simulate(self, parameters: np.ndarray, times: np.ndarray) -> np.ndarray:
+    def simulate(self, parameters: np.ndarray, times: np.ndarray, out: np.ndarray=None) -> np.ndarray:
         """Solves the forward problem and returns the state values evaluated at the times provided.
 
         Arguments:
             parameters {np.ndarray} -- Parameters of the model. By convention [initial conditions, model parameters].
             times {np.ndarray} -- Times at which states will be evaluated.
 
+        Keyword Arguments:
+            out {np.ndarray} -- Optional 2d array of shape (len(times), n_outputs) into which the result is written, to
+                                avoid allocating a new array for every call. (default: {None})
+
         Returns:
             [np.ndarray] -- State values evaluated at provided times.
         """
         self.simulation.reset()
         self._set_parameters(parameters)
 
-        # duration is the last time point plus an increment to include the last time step.
-        output = self.simulation.run(duration=times[-1]+1, log=self.output_names, log_times = times)
+        # replace initial conditions by periodic steady state, if enabled
+        if self.steady_state_solver is not None:
+            self.simulation.set_state(self.steady_state_solver.solve())
+
+        # myokit logs half-open intervals, so the simulation stops immediately after the last time point.
+        output = self.simulation.run(duration=_get_duration(times), log=self.output_names, log_times=times)
 
-        result = []
-        for name in self.output_names:
-            result.append(output[name])
+        # write outputs directly into contiguous array of shape (times, outputs) as expected by pints
+        if out is None:
+            out = np.empty(shape=(len(times), len(self.output_names)))
+        for output_id, name in enumerate(self.output_names):
+            out[:, output_id] = np.frombuffer(output[name], dtype=float)
 
-        return np.array(result).transpose()
+        return out
+
+    def set_steady_state(self, dosing_interval: float=None, is_linear: bool=True) -> None:
+        """Enables simulation in periodic steady state of a repeated dosing regimen. The initial conditions in the
+        parameters are then replaced by the steady state at the beginning of a dosing interval, and the times passed to
+        simulate are measured from the start of that interval. The dosing protocol is expected to be periodic with the
+        dosing interval and to start with a dose at t=0.
+
+        Keyword Arguments:
+            dosing_interval {float} -- Period of the dosing regimen. If None, steady state simulation is disabled.
+                                       (default: {None})
+            is_linear {bool} -- Flag whether the model is linear in its states. Linear models are solved directly,
+                                nonlinear models by periodic shooting. (default: {True})
+        """
+        if dosing_interval is None:
+            self.steady_state_solver = None
+        else:
+            self.steady_state_solver = SteadyStateSolver(self.simulation, dosing_interval, is_linear)
+
+    def set_tolerance(self, abs_tol: float=1e-6, rel_tol: float=1e-4) -> None:
+        """Sets the absolute and relative tolerance of the CVODES solver, which integrates stiff problems with
+        variable order BDF. Looser tolerances speed up the simulation at the cost of accuracy.
+
+        Keyword Arguments:
+            abs_tol {float} -- Absolute tolerance. (default: {1e-6})
+            rel_tol {float} -- Relative tolerance. (default: {1e-4})
+        """
+        self.simulation.set_tolerance(abs_tol, rel_tol)
+        self.tolerance = (float(abs_tol), float(rel_tol))
+
+    def set_max_step_size(self, max_step_size: float=None) -> None:
+        """Sets the maximal step size of the solver, e.g. to prevent it from stepping over short infusions.
+
+        Keyword Arguments:
+            max_step_size {float} -- Maximal step size. If None, the step size is unrestricted. (default: {None})
+        """
+        if max_step_size is not None and max_step_size <= 0:
+            raise ValueError('Maximal step size has to be positive.')
+
+        self.simulation.set_max_step_size(max_step_size)
+        self.max_step_size = max_step_size
+
+    def simulate_dense(self, parameters: np.ndarray, end_time: float, number_of_nodes: int=1001) -> DenseOutput:
+        """Solves the forward problem once from t=0 to end_time and returns a dense output, from which the outputs can
+        be evaluated at arbitrary times in that interval without solving the forward problem again.
+
+        Arguments:
+            parameters {np.ndarray} -- Parameters of the model. By convention [initial conditions, model parameters].
+            end_time {float} -- Last time point of the simulation.
+
+        Keyword Arguments:
+            number_of_nodes {int} -- Number of interpolation nodes. (default: {1001})
+
+        Returns:
+            DenseOutput -- Interpolant of the outputs.
+        """
+        nodes = np.linspace(0, end_time, number_of_nodes)
+
+        return DenseOutput(nodes, self.simulate(parameters, nodes))
 
     def _set_parameters(self, parameters: np.ndarray) -> None:
         """Internal helper method to set the parameters of the forward model.
@@ -212,8 +377,7 @@ class MultiOutputModel(AbstractModel):
             parameters {np.ndarray} -- Parameters of the model. By convention [initial condition, model parameters].
         """
         self.simulation.set_state(parameters[:self.state_dimension])
-        for param_id, value in enumerate(parameters[self.state_dimension:]):
-            self.simulation.set_constant(self.parameter_names[param_id], value)
+        self._constant_setter.set_constants(parameters[self.state_dimension:])
 
     def set_output_dimension(self, data_dimension: int):
         """Set output dimension to data dimension, so optimisation/inference can be performed. Output state will be set
@@ -266,6 +430,84 @@ class MultiOutputModel(AbstractModel):
         self.output_names = output_names
 
 
+class _ConstantSetter(object):
+    """Internal helper class that sets the constants of a myokit simulation in bulk. The parameter names are resolved to
+    the simulation's literal entries and the variables of its internal model copy once, such that each update reduces
+    to plain assignments instead of a name lookup per parameter. If the simulation does not expose its literals,
+    myokit.Simulation.set_constant is used instead.
+
+    The fast path mirrors myokit.Simulation.set_constant and therefore depends on its private attributes: the values
+    passed to the solver are kept in _literals, and the internal model copy _model is used to rebuild the simulation
+    when it is pickled, e.g. for process pools, and for diagnostics after a failed simulation. Both are updated.
+    """
+    def __init__(self, simulation: myokit.Simulation, parameter_names: List) -> None:
+        """Initialises the constant setter.
+
+        Arguments:
+            simulation {myokit.Simulation} -- Simulation whose constants are set.
+            parameter_names {List} -- Names of the constants in the order in which values are provided.
+        """
+        self.simulation = simulation
+        self.parameter_names = parameter_names
+
+        # resolve names to the keys of the simulation's literals
+        literals = getattr(simulation, '_literals', None)
+        internal_model = getattr(simulation, '_model', None)
+        self._literals = None
+        if literals is not None and internal_model is not None:
+            variables = [internal_model.get(name) for name in parameter_names]
+            if all(variable in literals for variable in variables):
+                self._literals = literals
+                self._variables = variables
+
+    def set_constants(self, values: np.ndarray) -> None:
+        """Sets the values of all constants.
+
+        Arguments:
+            values {np.ndarray} -- Values of the constants in the order of the parameter names.
+        """
+        if self._literals is None:
+            for param_id, value in enumerate(values):
+                self.simulation.set_constant(self.parameter_names[param_id], value)
+        else:
+            for variable, value in zip(self._variables, values):
+                value = float(value)
+                self._literals[variable] = value
+                variable.set_rhs(value)
+
+
+def _load_model(mmt_file: Union[str, myokit.Model]) -> List:
+    """Returns the model and the protocol of an .mmt file, or the model itself with no protocol.
+
+    Arguments:
+        mmt_file {Union[str, myokit.Model]} -- Path to an .mmt file or a myokit model.
+
+    Returns:
+        List -- Model and protocol.
+    """
+    if isinstance(mmt_file, myokit.Model):
+        return [mmt_file, None]
+
+    model, protocol, _ = myokit.load(mmt_file)
+
+    return [model, protocol]
+
+
+def _get_duration(times: np.ndarray) -> float:
+    """Returns the simulation duration that ends immediately after the last time point. myokit logs the half-open
+    interval [0, duration), so the last time point is only logged if the duration exceeds it.
+
+    Arguments:
+        times {np.ndarray} -- Sorted times at which states will be evaluated.
+
+    Returns:
+        float -- Duration of the simulation.
+    """
+    last_time = float(times[-1])
+
+    return last_time + np.finfo(float).eps * max(1.0, abs(last_time))
+
+
 def set_unit_format():
     """
     Set nicer display format for some commonly used units
@@ -0,0 +1,192 @@
+import functools
+
+import myokit
+
+
+# valid options of the model specification
+DOSE_ROUTES = ['bolus', 'infusion', 'subcut', 'oral']
+ELIMINATIONS = ['linear', 'michaelis-menten']
+
+
+def build_model(number_of_compartments: int=1, dose_route: str='bolus', elimination: str='linear',
+                number_of_transit_compartments: int=3) -> myokit.Model:
+    """Generates a PK model in memory with one central and number_of_compartments - 1 peripheral compartments. Names
+    of compartments and parameters follow the model repository, such that generated models are interchangeable with
+    the .mmt files in PKPD/modelRepository.
+
+    Doses are administered by the protocol through the bound variable dose_rate. Bolus and infusion doses enter the
+    central compartment directly, subcutaneous doses are absorbed from a dose compartment with rate Ka, and oral doses
+    pass a chain of transit compartments with mean transit time MTT before absorption, which models the absorption lag
+    with a smooth delay.
+
+    Models are cached by specification, so repeated builds return the same model object. The returned model must
+    therefore not be modified; use myokit.Model.clone() to obtain a modifiable copy.
+
+    Keyword Arguments:
+        number_of_compartments {int} -- Number of central and peripheral compartments. (default: {1})
+        dose_route {str} -- Valid routes are 'bolus', 'infusion', 'subcut' and 'oral'. (default: {'bolus'})
+        elimination {str} -- Elimination from the central compartment, valid options are 'linear' and
+                             'michaelis-menten'. (default: {'linear'})
+        number_of_transit_compartments {int} -- Number of transit compartments of oral doses. (default: {3})
+
+    Returns:
+        myokit.Model -- Validated PK model.
+    """
+    if number_of_compartments < 1:
+        raise ValueError('Models require at least one compartment.')
+    if dose_route not in DOSE_ROUTES:
+        raise ValueError('Dose route is not supported. Valid routes are ' + str(DOSE_ROUTES) + '.')
+    if elimination not in ELIMINATIONS:
+        raise ValueError('Elimination is not supported. Valid options are ' + str(ELIMINATIONS) + '.')
+    if dose_route == 'oral' and number_of_transit_compartments < 1:
+        raise ValueError('Oral doses require at least one transit compartment.')
+
+    # transit compartments only affect oral doses, which keeps the cache key unique
+    if dose_route != 'oral':
+        number_of_transit_compartments = 0
+
+    return _build_model(int(number_of_compartments), dose_route, elimination, int(number_of_transit_compartments))
+
+
+@functools.lru_cache(maxsize=None)
+def _build_model(number_of_compartments: int, dose_route: str, elimination: str,
+                 number_of_transit_compartments: int) -> myokit.Model:
+    """Generates the model of a specification, see build_model. Arguments are normalised by build_model, such that
+    each specification is cached once.
+    """
+    model = myokit.Model(_get_model_name(number_of_compartments, dose_route, elimination))
+    model.meta['author'] = 'SABS:R3'
+
+    # expressions are parsed after all variables are created, as they may reference variables of later compartments
+    expressions = []
+
+    # doses enter the central compartment directly or through a dose compartment
+    has_dose_compartment = dose_route in ['subcut', 'oral']
+    central = model.add_component('central_compartment')
+    if has_dose_compartment:
+        dose = model.add_component('dose_compartment')
+        _add_bound_variables(dose)
+    else:
+        _add_bound_variables(central)
+    dose_rate = 'dose_compartment.dose_rate' if has_dose_compartment else 'dose_rate'
+
+    # transit chain of oral doses
+    dose_input = dose_rate
+    if dose_route == 'oral':
+        _add_constant(dose, 'MTT', 1, 'h', 'Mean transit time of the absorption.')
+        _add_intermediate(expressions, dose, 'Ktr', '(%d + 1) / MTT' % number_of_transit_compartments, '1/h',
+                          'Transition rate between transit compartments.')
+        for transit_id in range(1, number_of_transit_compartments + 1):
+            transit = model.add_component('transit_compartment_%d' % transit_id)
+            rhs = dose_rate if transit_id == 1 else 'dose_compartment.Ktr * transit_compartment_%d.drug' % (
+                transit_id - 1)
+            _add_state(expressions, transit, rhs + ' - dose_compartment.Ktr * drug',
+                       'Drug in transit compartment in ng.')
+        dose_input = 'Ktr * transit_compartment_%d.drug' % number_of_transit_compartments
+
+    # absorption from the dose compartment
+    central_input = dose_rate
+    if has_dose_compartment:
+        _add_constant(dose, 'Ka', 0, '1/h', 'Absorption rate (transition rate between dose and central compartment).')
+        _add_state(expressions, dose, dose_input + ' - Ka * drug', 'Drug in dose compartment in ng.')
+        central_input = 'dose_compartment.Ka * dose_compartment.drug'
+
+    # elimination from the central compartment
+    if elimination == 'linear':
+        _add_constant(central, 'CL', 2, 'mL/h', 'Clearance/elimination rate from central compartment.')
+        elimination_rate = 'drug * CL / V'
+    else:
+        _add_constant(central, 'Vmax', 1, 'ng/h', 'Maximal elimination rate from central compartment.')
+        _add_constant(central, 'Km', 1, 'ng/mL', 'Concentration of half-maximal elimination rate.')
+        elimination_rate = 'Vmax * drug_concentration / (Km + drug_concentration)'
+    _add_constant(central, 'V', 4, 'mL', 'Volume of central compartment.')
+
+    # distribution between central and peripheral compartments
+    distribution = ''
+    number_of_peripherals = number_of_compartments - 1
+    for peripheral_id in range(1, number_of_peripherals + 1):
+        suffix = '' if number_of_peripherals == 1 else str(peripheral_id)
+        name = 'peripheral_compartment' if number_of_peripherals == 1 else 'peripheral_compartment_%d' % peripheral_id
+        _add_constant(central, 'Kcp' + suffix, 0, '1/h',
+                      'Transition rate from the central compartment to the %s.' % name.replace('_', ' '))
+
+        peripheral = model.add_component(name)
+        _add_constant(peripheral, 'V', 2, 'mL', 'Volume of peripheral compartment.')
+        _add_constant(peripheral, 'Kpc', 0, '1/h',
+                      'Transition rate from the peripheral compartment to the central compartment.')
+        _add_state(expressions, peripheral,
+                   'central_compartment.drug * central_compartment.Kcp%s - drug * Kpc' % suffix,
+                   'Drug in peripheral compartment in ng.')
+        _add_intermediate(expressions, peripheral, 'drug_concentration', 'drug / V', 'ng/mL',
+                          'Drug concentration in peripheral compartment in ng/mL.')
+        distribution += ' - drug * Kcp%s + %s.drug * %s.Kpc' % (suffix, name, name)
+
+    _add_state(expressions, central, central_input + ' - ' + elimination_rate + distribution,
+               'Drug in central compartment in ng.')
+    _add_intermediate(expressions, central, 'drug_concentration', 'drug / V', 'ng/mL',
+                      'Drug concentration in central compartment in ng/mL.')
+
+    for variable, rhs in expressions:
+        variable.set_rhs(rhs)
+
+    # order states alphabetically like the model repository
+    model.reorder_state(sorted(model.states(), key=lambda state: state.qname()))
+    model.validate()
+
+    return model
+
+
+def _get_model_name(number_of_compartments: int, dose_route: str, elimination: str) -> str:
+    """Returns a descriptive name of the model specification.
+    """
+    elimination_name = 'Linear' if elimination == 'linear' else 'Michaelis-Menten'
+
+    return '%s, %d-compartment PK model of drug distribution with %s dosing.' % (
+        elimination_name, number_of_compartments, dose_route)
+
+
+def _add_bound_variables(component: myokit.Component) -> None:
+    """Adds the dose rate bound to the protocol and the time to a component.
+    """
+    dose_rate = component.add_variable('dose_rate')
+    dose_rate.set_unit('ng/h')
+    dose_rate.set_rhs(myokit.Number(0, 'ng/h'))
+    dose_rate.set_binding('pace')
+    dose_rate.meta['desc'] = 'Dose rate in ng/h. Controlled by protocol.'
+
+    time = component.add_variable('time')
+    time.set_unit('h')
+    time.set_rhs(myokit.Number(0, 'h'))
+    time.set_binding('time')
+    time.meta['desc'] = 'independent time variable in h.'
+
+
+def _add_constant(component: myokit.Component, name: str, value: float, unit: str, description: str) -> None:
+    """Adds a parameter to a component.
+    """
+    variable = component.add_variable(name)
+    variable.set_unit(unit)
+    variable.set_rhs(myokit.Number(value, unit))
+    variable.meta['desc'] = description
+
+
+def _add_intermediate(expressions: list, component: myokit.Component, name: str, rhs: str, unit: str,
+                      description: str) -> None:
+    """Adds a variable defined by an expression of other variables to a component. The expression is appended to the
+    expressions that are parsed once all variables exist.
+    """
+    variable = component.add_variable(name)
+    variable.set_unit(unit)
+    variable.meta['desc'] = description
+    expressions.append((variable, rhs))
+
+
+def _add_state(expressions: list, component: myokit.Component, rhs: str, description: str) -> None:
+    """Adds the drug amount in ng as state with zero initial value to a component. The expression of the derivative is
+    appended to the expressions that are parsed once all variables exist.
+    """
+    variable = component.add_variable('drug')
+    variable.set_unit('ng')
+    variable.promote(0)
+    variable.meta['desc'] = description
+    expressions.append((variable, rhs))
@@ -0,0 +1,398 @@
+from typing import List
+
+import numpy as np
+import pints
+
+
+# valid mechanisms of indirect response models
+INDIRECT_RESPONSE_MECHANISMS = ['inhibit-production', 'inhibit-loss', 'stimulate-production', 'stimulate-loss']
+
+
+class PKTrajectory(object):
+    """Drug concentration of a single PK simulation on a fine time grid. The grid contains the requested output times,
+    such that PD models can integrate the concentration over the grid and read off the effect at the output times
+    without interpolation. Between grid points the concentration is treated as piecewise linear.
+    """
+    def __init__(self, times: np.ndarray, concentrations: np.ndarray) -> None:
+        """Initialises the trajectory.
+
+        Arguments:
+            times {np.ndarray} -- Strictly increasing times of the grid.
+            concentrations {np.ndarray} -- Drug concentration at the grid times. Concentrations of several
+                                           trajectories on the same grid are passed as rows of a 2d array.
+        """
+        self.times = np.asarray(times, dtype=float)
+        self.concentrations = np.asarray(concentrations, dtype=float)
+
+        if self.concentrations.shape[-1] != len(self.times):
+            raise ValueError('Times and concentrations of the trajectory have to be of the same length.')
+
+    def get_indices(self, times: np.ndarray) -> np.ndarray:
+        """Returns the indices of the grid points at the provided times.
+
+        Arguments:
+            times {np.ndarray} -- Times on the grid.
+
+        Returns:
+            np.ndarray -- Indices of the times in the grid.
+        """
+        times = np.asarray(times, dtype=float)
+        indices = np.minimum(np.searchsorted(self.times, times), len(self.times) - 1)
+        if not np.array_equal(self.times[indices], times):
+            raise ValueError('Times have to be part of the grid of the PK trajectory.')
+
+        return indices
+
+
+class AbstractPDModel(object):
+    """Base class of PD models, which map the drug concentration of a PK trajectory to an effect. Parameters are
+    either a 1d array of one parameter set, or a 2d array of shape (number of sets, number of parameters), in which
+    case all parameter sets are evaluated on the same trajectory in one vectorised pass.
+    """
+    def __init__(self) -> None:
+        self.parameter_names = []
+
+    def n_parameters(self) -> int:
+        """Returns the number of PD parameters.
+
+        Returns:
+            int -- Number of parameters.
+        """
+        return len(self.parameter_names)
+
+    def simulate(self, parameters: np.ndarray, trajectory: PKTrajectory, times: np.ndarray) -> np.ndarray:
+        """Returns the effect at the provided times.
+
+        Arguments:
+            parameters {np.ndarray} -- PD parameters, 1d for one parameter set or 2d with one set per row.
+            trajectory {PKTrajectory} -- Drug concentration driving the effect.
+            times {np.ndarray} -- Times on the grid of the trajectory at which the effect is evaluated.
+
+        Returns:
+            np.ndarray -- Effect of shape (len(times),) for one parameter set, or (number of sets, len(times)).
+        """
+        parameters = np.asarray(parameters, dtype=float)
+        is_single_set = parameters.ndim == 1
+        parameters = np.atleast_2d(parameters)
+        if parameters.shape[1] != self.n_parameters():
+            raise ValueError('Number of PD parameters does not match. Expected %d parameters.' % self.n_parameters())
+
+        # parameters as columns, such that they broadcast against the time grid
+        effect = self._compute_effect(parameters.T[:, :, np.newaxis], trajectory)
+        effect = np.broadcast_to(effect, (len(parameters), len(trajectory.times)))[:, trajectory.get_indices(times)]
+
+        return effect[0] if is_single_set else effect
+
+    def _compute_effect(self, parameters: np.ndarray, trajectory: PKTrajectory) -> np.ndarray:
+        """Returns the effect on the grid of the trajectory.
+
+        Arguments:
+            parameters {np.ndarray} -- Parameters of shape (number of parameters, number of sets, 1).
+            trajectory {PKTrajectory} -- Drug concentration driving the effect.
+
+        Returns:
+            np.ndarray -- Effect of shape (number of sets, number of grid points).
+        """
+        raise NotImplementedError
+
+
+class DirectEmax(AbstractPDModel):
+    """Direct Emax model, where the effect follows the concentration instantaneously,
+    E = E0 + Emax * C / (EC50 + C).
+    """
+    def __init__(self) -> None:
+        self.parameter_names = ['E0', 'Emax', 'EC50']
+
+    def _compute_effect(self, parameters: np.ndarray, trajectory: PKTrajectory) -> np.ndarray:
+        baseline, maximal_effect, half_maximal_concentration = parameters
+
+        return _emax(trajectory.concentrations, baseline, maximal_effect, half_maximal_concentration)
+
+
+class SigmoidEmax(AbstractPDModel):
+    """Sigmoid Emax (Hill) model, where the effect follows the concentration instantaneously,
+    E = E0 + Emax * C^gamma / (EC50^gamma + C^gamma).
+    """
+    def __init__(self) -> None:
+        self.parameter_names = ['E0', 'Emax', 'EC50', 'gamma']
+
+    def _compute_effect(self, parameters: np.ndarray, trajectory: PKTrajectory) -> np.ndarray:
+        baseline, maximal_effect, half_maximal_concentration, hill_coefficient = parameters
+
+        return _emax(trajectory.concentrations, baseline, maximal_effect, half_maximal_concentration,
+                     hill_coefficient)
+
+
+class EffectCompartment(AbstractPDModel):
+    """Effect compartment model, where the effect is delayed with respect to the concentration. The concentration Ce in
+    the effect compartment follows dCe/dt = ke0 (C - Ce) with Ce(0) = 0, and drives a direct or sigmoid Emax model.
+
+    As the concentration is piecewise linear on the grid, Ce is propagated exactly from grid point to grid point.
+    """
+    def __init__(self, link_model: AbstractPDModel=None) -> None:
+        """Initialises the effect compartment model.
+
+        Keyword Arguments:
+            link_model {AbstractPDModel} -- Model relating Ce to the effect, DirectEmax or SigmoidEmax. If None, the
+                                            direct Emax model is used. (default: {None})
+        """
+        if link_model is None:
+            link_model = DirectEmax()
+        if not isinstance(link_model, (DirectEmax, SigmoidEmax)):
+            raise ValueError('Link model has to be a direct or sigmoid Emax model.')
+
+        self.link_model = link_model
+        self.parameter_names = ['ke0'] + link_model.parameter_names
+
+    def _compute_effect(self, parameters: np.ndarray, trajectory: PKTrajectory) -> np.ndarray:
+        equilibration_rate = parameters[0]
+
+        # exact propagation of dCe/dt = ke0 (C - Ce) for linear C on each interval
+        rate_times_step = equilibration_rate * np.diff(trajectory.times)
+        decay = np.exp(-rate_times_step)
+        mean_decay = _exprel(rate_times_step)
+        concentrations = trajectory.concentrations
+        inflow = concentrations[:-1] * (mean_decay - decay) + concentrations[1:] * (1 - mean_decay)
+        effect_concentrations = _solve_linear_recurrence(np.zeros(parameters.shape[1]), decay, inflow)
+
+        return self.link_model._compute_effect(parameters[1:], PKTrajectory(trajectory.times, effect_concentrations))
+
+
+class IndirectResponse(AbstractPDModel):
+    """Indirect response models, where the drug inhibits or stimulates the production or the loss of a response R,
+    dR/dt = kin * P(C) - kout * L(C) * R, with kin = R0 * kout, such that R starts in its baseline R0. Inhibition is
+    I(C) = 1 - Imax * C / (IC50 + C) and stimulation S(C) = 1 + Emax * C / (EC50 + C).
+
+    Rates are evaluated at the mean concentration of each grid interval, and R is propagated exactly with these rates.
+    """
+    def __init__(self, mechanism: str='inhibit-production') -> None:
+        """Initialises the indirect response model.
+
+        Keyword Arguments:
+            mechanism {str} -- Valid mechanisms are 'inhibit-production', 'inhibit-loss', 'stimulate-production' and
+                               'stimulate-loss'. (default: {'inhibit-production'})
+        """
+        if mechanism not in INDIRECT_RESPONSE_MECHANISMS:
+            raise ValueError('Mechanism is not supported. Valid mechanisms are '
+                             + str(INDIRECT_RESPONSE_MECHANISMS) + '.')
+
+        self.mechanism = mechanism
+        if mechanism.startswith('inhibit'):
+            self.parameter_names = ['R0', 'kout', 'Imax', 'IC50']
+        else:
+            self.parameter_names = ['R0', 'kout', 'Emax', 'EC50']
+
+    def _compute_effect(self, parameters: np.ndarray, trajectory: PKTrajectory) -> np.ndarray:
+        baseline, loss_rate, maximal_effect, half_maximal_concentration = parameters
+
+        # drug effect on mean concentration of each interval
+        concentrations = 0.5 * (trajectory.concentrations[:-1] + trajectory.concentrations[1:])
+        sign = -1 if self.mechanism.startswith('inhibit') else 1
+        drug_effect = _emax(concentrations, 1, sign * maximal_effect, half_maximal_concentration)
+        if self.mechanism.endswith('production'):
+            production = baseline * loss_rate * drug_effect
+            loss = loss_rate * np.ones_like(drug_effect)
+        else:
+            production = baseline * loss_rate * np.ones_like(drug_effect)
+            loss = loss_rate * drug_effect
+
+        # exact propagation of dR/dt = production - loss * R with constant rates on each interval
+        steps = np.diff(trajectory.times)
+        decay = np.exp(-loss * steps)
+        inflow = production * steps * _exprel(loss * steps)
+
+        return _solve_linear_recurrence(baseline[:, 0], decay, inflow)
+
+
+class PKPDModel(pints.ForwardModel):
+    """Forward model of a PD model linked to a PK model. The PK model is solved once per PK parameter set on a fine
+    grid, and the resulting trajectory is cached, so changes of the PD parameters or of the PD model reuse the
+    trajectory instead of solving the PK model again. Parameters are by convention [PK parameters, PD parameters], or
+    only the PD parameters, if the PK parameters are fixed.
+    """
+    def __init__(self, pk_model: pints.ForwardModel, pd_model: AbstractPDModel, number_of_grid_points: int=1001,
+                 cache_size: int=32) -> None:
+        """Initialises the PKPD model.
+
+        Arguments:
+            pk_model {pints.ForwardModel} -- Single output PK model with the drug concentration as output.
+            pd_model {AbstractPDModel} -- PD model driven by the concentration.
+
+        Keyword Arguments:
+            number_of_grid_points {int} -- Number of equidistant grid points from t=0 to the last output time. Output
+                                           times are added to the grid. (default: {1001})
+            cache_size {int} -- Maximal number of cached PK trajectories. (default: {32})
+        """
+        if pk_model.n_outputs() != 1:
+            raise ValueError('PK model has to have a single output.')
+        if number_of_grid_points < 2:
+            raise ValueError('Grid requires at least two points.')
+
+        self.pk_model = pk_model
+        self.pd_model = pd_model
+        self.number_of_grid_points = int(number_of_grid_points)
+        self.cache_size = int(cache_size)
+        self.fixed_pk_parameters = None
+
+        # PK trajectories by PK parameters and output times
+        self._trajectories = {}
+
+    def n_parameters(self) -> int:
+        """Returns the number of parameters of the model, i.e. PK and PD parameters, or only the PD parameters if the
+        PK parameters are fixed.
+
+        Returns:
+            int -- Number of parameters.
+        """
+        number_of_pk_parameters = 0 if self.fixed_pk_parameters is not None else self.pk_model.n_parameters()
+
+        return number_of_pk_parameters + self.pd_model.n_parameters()
+
+    def n_outputs(self) -> int:
+        """Returns the dimension of the output, i.e. the effect.
+
+        Returns:
+            int -- Dimensionality of the output.
+        """
+        return 1
+
+    def set_pd_model(self, pd_model: AbstractPDModel) -> None:
+        """Replaces the PD model. Cached PK trajectories are kept, so different PD models can be compared without
+        solving the PK model again.
+
+        Arguments:
+            pd_model {AbstractPDModel} -- PD model driven by the concentration.
+        """
+        self.pd_model = pd_model
+
+    def fix_pk_parameters(self, pk_parameters: np.ndarray=None) -> None:
+        """Fixes the PK parameters, e.g. to estimates of a preceding PK fit, such that only the PD parameters are
+        passed to simulate.
+
+        Keyword Arguments:
+            pk_parameters {np.ndarray} -- PK parameters. If None, the PK parameters are released. (default: {None})
+        """
+        if pk_parameters is None:
+            self.fixed_pk_parameters = None
+            return
+
+        pk_parameters = np.array(pk_parameters, dtype=float)
+        if len(pk_parameters) != self.pk_model.n_parameters():
+            raise ValueError('Number of PK parameters does not match the PK model.')
+        self.fixed_pk_parameters = pk_parameters
+
+    def get_pk_trajectory(self, pk_parameters: np.ndarray, times: np.ndarray) -> PKTrajectory:
+        """Returns the PK trajectory on the grid of the provided output times. The PK model is only solved, if the
+        trajectory is not cached.
+
+        Arguments:
+            pk_parameters {np.ndarray} -- Parameters of the PK model.
+            times {np.ndarray} -- Output times.
+
+        Returns:
+            PKTrajectory -- Drug concentration on the grid.
+        """
+        pk_parameters = np.asarray(pk_parameters, dtype=float)
+        times = np.asarray(times, dtype=float)
+        key = (pk_parameters.tobytes(), times.tobytes())
+        if key in self._trajectories:
+            return self._trajectories[key]
+
+        # solve PK model once on equidistant grid including the output times
+        grid = np.union1d(np.linspace(0, np.max(times), self.number_of_grid_points), times)
+        trajectory = PKTrajectory(grid, np.array(self.pk_model.simulate(pk_parameters, grid), dtype=float))
+
+        # discard the oldest trajectory, if the cache is full
+        if len(self._trajectories) >= self.cache_size:
+            del self._trajectories[next(iter(self._trajectories))]
+        self._trajectories[key] = trajectory
+
+        return trajectory
+
+    def simulate(self, parameters: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """Returns the effect at the provided times.
+
+        Arguments:
+            parameters {np.ndarray} -- By convention [PK parameters, PD parameters], or PD parameters if the PK
+                                       parameters are fixed.
+            times {np.ndarray} -- Times at which the effect is evaluated.
+
+        Returns:
+            np.ndarray -- Effect evaluated at the provided times.
+        """
+        parameters = np.asarray(parameters, dtype=float)
+        if self.fixed_pk_parameters is not None:
+            return self.simulate_pd(self.fixed_pk_parameters, parameters, times)
+
+        number_of_pk_parameters = self.pk_model.n_parameters()
+
+        return self.simulate_pd(parameters[:number_of_pk_parameters], parameters[number_of_pk_parameters:], times)
+
+    def simulate_pd(self, pk_parameters: np.ndarray, pd_parameters: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """Returns the effect of one or several PD parameter sets, which are all driven by the same PK trajectory.
+
+        Arguments:
+            pk_parameters {np.ndarray} -- Parameters of the PK model.
+            pd_parameters {np.ndarray} -- PD parameters, 1d for one parameter set or 2d with one set per row.
+            times {np.ndarray} -- Times at which the effect is evaluated.
+
+        Returns:
+            np.ndarray -- Effect of shape (len(times),) for one parameter set, or (number of sets, len(times)).
+        """
+        trajectory = self.get_pk_trajectory(pk_parameters, times)
+
+        return self.pd_model.simulate(pd_parameters, trajectory, times)
+
+    def get_parameter_names(self) -> List[str]:
+        """Returns the names of the parameters in the order expected by simulate.
+
+        Returns:
+            List[str] -- Parameter names.
+        """
+        pd_names = ['pharmacodynamics.' + name for name in self.pd_model.parameter_names]
+        if self.fixed_pk_parameters is not None:
+            return pd_names
+
+        return list(self.pk_model.state_names) + list(self.pk_model.parameter_names) + pd_names
+
+
+def _emax(concentrations: np.ndarray, baseline: np.ndarray, maximal_effect: np.ndarray,
+          half_maximal_concentration: np.ndarray, hill_coefficient: np.ndarray=1) -> np.ndarray:
+    """Returns the (sigmoid) Emax relation E0 + Emax * C^gamma / (EC50^gamma + C^gamma).
+    """
+    # negative concentrations from solver noise are clipped
+    powered = np.maximum(concentrations, 0) ** hill_coefficient
+
+    return baseline + maximal_effect * powered / (half_maximal_concentration ** hill_coefficient + powered)
+
+
+def _exprel(exponents: np.ndarray) -> np.ndarray:
+    """Returns (1 - exp(-x)) / x, which tends to 1 for x -> 0.
+    """
+    exponents = np.asarray(exponents, dtype=float)
+    is_zero = exponents == 0
+
+    return np.where(is_zero, 1, -np.expm1(-exponents) / np.where(is_zero, 1, exponents))
+
+
+def _solve_linear_recurrence(initial_values: np.ndarray, decays: np.ndarray, inflows: np.ndarray) -> np.ndarray:
+    """Returns the solution of x_{k+1} = decay_k * x_k + inflow_k on the grid, vectorised over parameter sets.
+
+    Arguments:
+        initial_values {np.ndarray} -- Values at the first grid point, one per parameter set.
+        decays {np.ndarray} -- Decay over each interval, broadcastable to (number of sets, number of intervals).
+        inflows {np.ndarray} -- Inflow over each interval, broadcastable to (number of sets, number of intervals).
+
+    Returns:
+        np.ndarray -- Values of shape (number of sets, number of grid points).
+    """
+    number_of_sets = len(initial_values)
+    decays = np.broadcast_to(decays, (number_of_sets, np.shape(decays)[-1]))
+    inflows = np.broadcast_to(inflows, decays.shape)
+
+    values = np.empty((number_of_sets, decays.shape[1] + 1))
+    values[:, 0] = initial_values
+    for interval_id in range(decays.shape[1]):
+        values[:, interval_id + 1] = decays[:, interval_id] * values[:, interval_id] + inflows[:, interval_id]
+
+    return values
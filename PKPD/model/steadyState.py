@@ -0,0 +1,123 @@
+import myokit
+import numpy as np
+
+
+class SteadyStateSolver(object):
+    """Computes the periodic steady state of a model under a repeated dosing regimen, i.e. the state at the beginning
+    of a dosing interval that is reproduced exactly after one dosing interval. Instead of integrating the model from
+    t=0 through every dosing interval until steady state is reached, the steady state is obtained from the period map
+    x(0) -> x(T) of a single dosing interval.
+
+    For linear models the period map is affine, x(T) = Phi x(0) + c, and is recovered exactly from state dimension + 1
+    single-interval simulations, such that the steady state follows from one linear solve. For nonlinear models the
+    fixed point of the period map is found by a periodic shooting solve (Newton's method with finite difference
+    Jacobians).
+
+    The dosing protocol of the simulation is expected to be periodic with the dosing interval and to start with a dose
+    at t=0.
+    """
+    def __init__(self, simulation: myokit.Simulation, dosing_interval: float, is_linear: bool=True) -> None:
+        """Initialises the steady state solver.
+
+        Arguments:
+            simulation {myokit.Simulation} -- Simulation of the model with a periodic dosing protocol.
+            dosing_interval {float} -- Period of the dosing regimen.
+
+        Keyword Arguments:
+            is_linear {bool} -- Flag whether the model is linear in its states. If False, a periodic shooting solve is
+                                used. (default: {True})
+        """
+        if dosing_interval <= 0:
+            raise ValueError('The dosing interval has to be positive.')
+
+        self.simulation = simulation
+        self.dosing_interval = float(dosing_interval)
+        self.is_linear = is_linear
+
+        # settings of the periodic shooting solve
+        self.tolerance = 1.0E-8  # arbitrary
+        self.max_iterations = 20  # arbitrary
+
+    def solve(self) -> np.ndarray:
+        """Returns the state at the beginning of a dosing interval in periodic steady state for the constants currently
+        set in the simulation. The simulation is reset afterwards.
+
+        Returns:
+            np.ndarray -- Periodic steady state.
+        """
+        if self.is_linear:
+            steady_state = self._solve_linear()
+        else:
+            steady_state = self._solve_shooting()
+
+        # reset simulation to t=0
+        self.simulation.reset()
+
+        return steady_state
+
+    def _solve_linear(self) -> np.ndarray:
+        """Recovers the affine period map x(T) = Phi x(0) + c and solves (1 - Phi) x = c for the steady state.
+
+        Returns:
+            np.ndarray -- Periodic steady state.
+        """
+        state_dimension = len(self.simulation.state())
+
+        # state after one dosing interval from zero state gives the inhomogeneity c
+        inhomogeneity = self._period_map(np.zeros(state_dimension))
+
+        # columns of Phi from unit initial states
+        monodromy_matrix = np.empty(shape=(state_dimension, state_dimension))
+        for state_id, unit_state in enumerate(np.eye(state_dimension)):
+            monodromy_matrix[:, state_id] = self._period_map(unit_state) - inhomogeneity
+
+        return np.linalg.solve(np.eye(state_dimension) - monodromy_matrix, inhomogeneity)
+
+    def _solve_shooting(self) -> np.ndarray:
+        """Finds the fixed point of the period map with Newton's method. The Jacobian of the period map is approximated
+        by forward finite differences.
+
+        Returns:
+            np.ndarray -- Periodic steady state.
+        """
+        state_dimension = len(self.simulation.state())
+
+        # start from the state after one dosing interval
+        state = self._period_map(np.zeros(state_dimension))
+        for _ in range(self.max_iterations):
+            # residual of the fixed point equation
+            mapped_state = self._period_map(state)
+            residual = mapped_state - state
+
+            # check convergence
+            if np.linalg.norm(residual) <= self.tolerance * max(1.0, np.linalg.norm(state)):
+                return mapped_state
+
+            # approximate Jacobian of the residual
+            jacobian = np.empty(shape=(state_dimension, state_dimension))
+            for state_id in range(state_dimension):
+                increment = np.sqrt(np.finfo(float).eps) * max(1.0, abs(state[state_id]))
+                perturbed_state = np.array(state, dtype=float)
+                perturbed_state[state_id] += increment
+                jacobian[:, state_id] = (self._period_map(perturbed_state) - mapped_state) / increment
+            jacobian -= np.eye(state_dimension)
+
+            # Newton update
+            state = state - np.linalg.solve(jacobian, residual)
+
+        raise ArithmeticError('Periodic steady state did not converge within %d iterations.' % self.max_iterations)
+
+    def _period_map(self, state: np.ndarray) -> np.ndarray:
+        """Integrates the model over one dosing interval.
+
+        Arguments:
+            state {np.ndarray} -- State at the beginning of the dosing interval.
+
+        Returns:
+            np.ndarray -- State at the end of the dosing interval.
+        """
+        self.simulation.reset()
+        self.simulation.set_state(state)
+        self.simulation.run(duration=self.dosing_interval, log=myokit.LOG_NONE)
+
+        return np.array(self.simulation.state())
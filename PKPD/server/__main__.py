@@ -0,0 +1,33 @@
+import argparse
+import signal
+import threading
+
+from PKPD.server.jobServer import JobServer
+
+
+def main():
+    # parse settings of the server
+    parser = argparse.ArgumentParser(description='Local PKPD job server for queued fits, simulations and bootstraps.')
+    parser.add_argument('--directory', default=None, help='directory of the job database')
+    parser.add_argument('--host', default='127.0.0.1', help='host name of the server')
+    parser.add_argument('--port', type=int, default=8642, help='port of the server')
+    parser.add_argument('--processes', type=int, default=None, help='number of worker processes')
+    arguments = parser.parse_args()
+
+    # run server until interrupted
+    server = JobServer(arguments.directory, arguments.host, arguments.port, arguments.processes)
+    server.start()
+    print('PKPD job server listening on http://%s:%d' % server.address)
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    try:
+        while not stop_event.wait(timeout=1):
+            pass
+    except KeyboardInterrupt:
+        pass
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
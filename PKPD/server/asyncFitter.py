@@ -0,0 +1,238 @@
+import asyncio
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Dict, List, Union
+
+import numpy as np
+
+from PKPD.server.jobs import check_specification, execute_job
+
+
+class AsyncJob(object):
+    """Handle of a job submitted to an AsyncFitter. The result is obtained by awaiting the job, and progress updates
+    by iterating over progress() with async for.
+    """
+    def __init__(self, kind: str, future: asyncio.Future) -> None:
+        """Initialises the handle.
+
+        Arguments:
+            kind {str} -- Kind of the job.
+            future {asyncio.Future} -- Future of the result.
+        """
+        self.kind = kind
+        self.progress_value = 0.0
+        self._future = future
+        self._updates = asyncio.Queue()
+
+    def __await__(self):
+        return self._future.__await__()
+
+    def done(self) -> bool:
+        """Returns whether the job is completed.
+
+        Returns:
+            bool -- True if the job is completed.
+        """
+        return self._future.done()
+
+    async def progress(self) -> AsyncIterator[float]:
+        """Yields the completed fraction of the job whenever it changes, until the job is completed.
+
+        Returns:
+            AsyncIterator[float] -- Completed fractions of the job.
+        """
+        while not (self._future.done() and self._updates.empty()):
+            update = asyncio.ensure_future(self._updates.get())
+            await asyncio.wait([update, self._future], return_when=asyncio.FIRST_COMPLETED)
+            if update.done():
+                yield update.result()
+            else:
+                update.cancel()
+
+        # completion is reported, even if the job does not report intermediate progress
+        if self.progress_value < 1 and not self._future.cancelled() and self._future.exception() is None:
+            self.progress_value = 1.0
+            yield 1.0
+
+    def _update(self, progress: float) -> None:
+        """Records a progress update of the worker.
+        """
+        self.progress_value = progress
+        self._updates.put_nowait(progress)
+
+
+class AsyncFitter(object):
+    """Asyncio interface to run fits, simulations and bootstraps in a pool of worker processes without blocking the
+    event loop. Workers keep their compiled models across jobs, see PKPD.server.jobs.
+
+    At most max_concurrency jobs are in flight at any time. Further submissions wait until a job completes, which
+    bounds the memory of queued jobs and propagates backpressure to the producers, such that thousands of fits can be
+    awaited concurrently. Progress is reported by the workers through a shared queue, which is drained by the event
+    loop.
+
+    Usage:
+        async with AsyncFitter(number_of_processes=4) as fitter:
+            result = await fitter.fit('model.mmt', times, values, {'seed': 1})
+
+            job = await fitter.submit('bootstrap', specification)
+            async for progress in job.progress():
+                ...
+            result = await job
+    """
+    def __init__(self, number_of_processes: int=None, max_concurrency: int=None) -> None:
+        """Initialises the fitter. Worker processes are started by start() or on entering the async context.
+
+        Keyword Arguments:
+            number_of_processes {int} -- Number of worker processes. Defaults to the number of CPUs.
+                                         (default: {None})
+            max_concurrency {int} -- Maximal number of jobs in flight. Defaults to twice the number of processes,
+                                     such that workers never idle between jobs. (default: {None})
+        """
+        self.number_of_processes = number_of_processes or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or 2 * self.number_of_processes
+        if self.max_concurrency < 1:
+            raise ValueError('Maximal concurrency has to be at least 1.')
+
+        # initialise resources, which are created on start
+        self._executor = None
+        self._manager = None
+        self._progress_queue = None
+        self._progress_task = None
+        self._semaphore = None
+        self._jobs = {}
+        self._job_keys = itertools.count()
+
+    async def __aenter__(self) -> 'AsyncFitter':
+        await self.start()
+
+        return self
+
+    async def __aexit__(self, *exception_info) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Starts the worker processes and the forwarding of progress updates.
+        """
+        context = multiprocessing.get_context('spawn')
+        self._executor = ProcessPoolExecutor(max_workers=self.number_of_processes, mp_context=context)
+        self._manager = context.Manager()
+        self._progress_queue = self._manager.Queue()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._progress_task = asyncio.ensure_future(self._forward_progress())
+
+    async def close(self) -> None:
+        """Waits for the jobs in flight and stops the worker processes.
+        """
+        if self._jobs:
+            await asyncio.wait([job._future for job in self._jobs.values()])
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._executor.shutdown)
+
+        # stop forwarding of progress updates
+        self._progress_queue.put(None)
+        await self._progress_task
+        self._manager.shutdown()
+
+    async def submit(self, kind: str, specification: Dict) -> AsyncJob:
+        """Submits a job, once fewer than max_concurrency jobs are in flight.
+
+        Arguments:
+            kind {str} -- Kind of the job, valid kinds are 'simulate', 'fit' and 'bootstrap'.
+            specification {Dict} -- Specification of the job, see PKPD.server.jobs.check_specification.
+
+        Returns:
+            AsyncJob -- Handle of the job.
+        """
+        if self._executor is None:
+            raise ValueError('Fitter has to be started before jobs are submitted.')
+        check_specification(kind, specification)
+
+        # wait for a free slot, which applies backpressure to the caller
+        await self._semaphore.acquire()
+        try:
+            key = next(self._job_keys)
+            future = self._executor.submit(_run_job, [key, kind, specification, self._progress_queue])
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        job = AsyncJob(kind, asyncio.wrap_future(future))
+        self._jobs[key] = job
+        job._future.add_done_callback(lambda _, key=key: self._release(key))
+
+        return job
+
+    async def fit(self, model: Union[str, Dict], times: List[np.ndarray], values: List[np.ndarray],
+                  settings: Dict=None) -> Dict:
+        """Fits a model to the data of the patients.
+
+        Arguments:
+            model {Union[str, Dict]} -- Path to an .mmt file or keyword arguments of build_model.
+            times {List[np.ndarray]} -- Times of data points of each patient.
+            values {List[np.ndarray]} -- State values of data points of each patient.
+
+        Keyword Arguments:
+            settings {Dict} -- Optional entries of fit specifications, e.g. initial_parameter, boundaries,
+                               transformation, optimiser, number_of_iterations, doses and seed. (default: {None})
+
+        Returns:
+            Dict -- Estimated parameters and objective score.
+        """
+        specification = dict(settings or {}, model=model, times=list(times), values=list(values))
+
+        return await (await self.submit('fit', specification))
+
+    async def simulate(self, model: Union[str, Dict], parameters: np.ndarray, times: np.ndarray,
+                       settings: Dict=None) -> Dict:
+        """Simulates one or several parameter sets.
+
+        Arguments:
+            model {Union[str, Dict]} -- Path to an .mmt file or keyword arguments of build_model.
+            parameters {np.ndarray} -- One parameter set or a 2d array of parameter sets.
+            times {np.ndarray} -- Times at which the outputs are evaluated.
+
+        Keyword Arguments:
+            settings {Dict} -- Optional entries of simulation specifications, e.g. output_names and doses.
+                               (default: {None})
+
+        Returns:
+            Dict -- Times and simulated values.
+        """
+        specification = dict(settings or {}, model=model, parameters=parameters, times=times)
+
+        return await (await self.submit('simulate', specification))
+
+    async def _forward_progress(self) -> None:
+        """Forwards the progress updates of the workers to the jobs until the fitter is closed.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            update = await loop.run_in_executor(None, self._progress_queue.get)
+            if update is None:
+                return
+            key, progress = update
+            if key in self._jobs:
+                self._jobs[key]._update(progress)
+
+    def _release(self, key: int) -> None:
+        """Frees the slot of a completed job.
+        """
+        self._jobs.pop(key, None)
+        self._semaphore.release()
+
+
+def _run_job(job: List) -> Dict:
+    """Runs a job in a worker process and reports its progress to the queue of the fitter.
+
+    Arguments:
+        job {List} -- Key, kind and specification of the job, and progress queue.
+
+    Returns:
+        Dict -- Result of the job.
+    """
+    key, kind, specification, progress_queue = job
+
+    return execute_job(kind, specification, lambda progress: progress_queue.put((key, progress)))
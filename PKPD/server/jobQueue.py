@@ -0,0 +1,204 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Dict, List
+
+
+# states of a job, from submission to completion
+STATUSES = ['queued', 'running', 'done', 'failed', 'cancelled']
+
+
+class JobQueue(object):
+    """Persistent queue of jobs in a local SQLite database. Jobs are stored with their kind, JSON specification,
+    status, progress and result, such that queued jobs and results survive restarts of the server. Jobs are claimed in
+    order of submission.
+    """
+    def __init__(self, directory: str=None) -> None:
+        """Initialises the queue and creates the database, if it does not exist.
+
+        Keyword Arguments:
+            directory {str} -- Directory of the database. Defaults to $PKPD_CACHE_DIR or ~/.cache/PKPD.
+                               (default: {None})
+        """
+        if directory is None:
+            directory = os.environ.get('PKPD_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'PKPD'))
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.file_path = os.path.join(directory, 'jobs.sqlite')
+
+        with closing(self._connect()) as connection, connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS jobs ('
+                               'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                               'kind TEXT NOT NULL, '
+                               'specification TEXT NOT NULL, '
+                               'status TEXT NOT NULL, '
+                               'progress REAL NOT NULL, '
+                               'result TEXT, '
+                               'error TEXT, '
+                               'created REAL NOT NULL, '
+                               'started REAL, '
+                               'finished REAL)'
+                               )
+            connection.execute('CREATE INDEX IF NOT EXISTS status_index ON jobs (status, id)')
+
+    def _connect(self) -> sqlite3.Connection:
+        """Opens a connection to the database.
+
+        Returns:
+            sqlite3.Connection -- Database connection.
+        """
+        return sqlite3.connect(self.file_path, timeout=30)
+
+    def submit(self, kind: str, specification: Dict) -> int:
+        """Appends a job to the queue.
+
+        Arguments:
+            kind {str} -- Kind of the job.
+            specification {Dict} -- JSON serialisable specification of the job.
+
+        Returns:
+            int -- ID of the job.
+        """
+        with closing(self._connect()) as connection, connection:
+            cursor = connection.execute('INSERT INTO jobs (kind, specification, status, progress, created) '
+                                        'VALUES (?, ?, ?, ?, ?)',
+                                        (kind, json.dumps(specification), 'queued', 0.0, time.time())
+                                        )
+
+        return cursor.lastrowid
+
+    def claim(self) -> List:
+        """Marks the oldest queued job as running and returns it.
+
+        Returns:
+            List -- ID, kind and specification of the job, or None if no job is queued.
+        """
+        # write lock is acquired before the selection, such that a job is claimed at most once
+        with closing(self._connect()) as connection, connection:
+            connection.execute('BEGIN IMMEDIATE')
+            row = connection.execute('SELECT id, kind, specification FROM jobs WHERE status = ? ORDER BY id LIMIT 1',
+                                     ('queued',)
+                                     ).fetchone()
+            if row is not None:
+                connection.execute('UPDATE jobs SET status = ?, started = ? WHERE id = ?',
+                                   ('running', time.time(), row[0]))
+
+        if row is None:
+            return None
+
+        return [row[0], row[1], json.loads(row[2])]
+
+    def set_progress(self, job_id: int, progress: float) -> None:
+        """Updates the progress of a running job.
+
+        Arguments:
+            job_id {int} -- ID of the job.
+            progress {float} -- Fraction of the job that is completed.
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.execute('UPDATE jobs SET progress = ? WHERE id = ? AND status = ?',
+                               (float(progress), job_id, 'running'))
+
+    def finish(self, job_id: int, result: Dict) -> None:
+        """Stores the result of a completed job.
+
+        Arguments:
+            job_id {int} -- ID of the job.
+            result {Dict} -- JSON serialisable result of the job.
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.execute('UPDATE jobs SET status = ?, progress = 1, result = ?, finished = ? '
+                               'WHERE id = ? AND status = ?',
+                               ('done', json.dumps(result), time.time(), job_id, 'running'))
+
+    def fail(self, job_id: int, error: str) -> None:
+        """Stores the error message of a failed job.
+
+        Arguments:
+            job_id {int} -- ID of the job.
+            error {str} -- Error message.
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.execute('UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ? AND status = ?',
+                               ('failed', error, time.time(), job_id, 'running'))
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancels a queued job. Running jobs are not interrupted.
+
+        Arguments:
+            job_id {int} -- ID of the job.
+
+        Returns:
+            bool -- True if the job was cancelled, False if it is not queued.
+        """
+        with closing(self._connect()) as connection, connection:
+            cursor = connection.execute('UPDATE jobs SET status = ?, finished = ? WHERE id = ? AND status = ?',
+                                        ('cancelled', time.time(), job_id, 'queued'))
+
+        return cursor.rowcount == 1
+
+    def requeue_running(self) -> int:
+        """Returns jobs that were running when the server stopped to the queue, such that they are run again.
+
+        Returns:
+            int -- Number of requeued jobs.
+        """
+        with closing(self._connect()) as connection, connection:
+            cursor = connection.execute('UPDATE jobs SET status = ?, progress = 0, started = NULL WHERE status = ?',
+                                        ('queued', 'running'))
+
+        return cursor.rowcount
+
+    def get(self, job_id: int) -> Dict:
+        """Returns the job with its specification and result.
+
+        Arguments:
+            job_id {int} -- ID of the job.
+
+        Returns:
+            Dict -- Job, or None if the job does not exist.
+        """
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute('SELECT id, kind, status, progress, created, started, finished, error, '
+                                     'specification, result FROM jobs WHERE id = ?', (job_id,)).fetchone()
+
+        if row is None:
+            return None
+
+        job = _to_summary(row)
+        job['specification'] = json.loads(row[8])
+        job['result'] = None if row[9] is None else json.loads(row[9])
+
+        return job
+
+    def list(self, status: str=None) -> List[Dict]:
+        """Returns summaries of all jobs, i.e. without specifications and results.
+
+        Keyword Arguments:
+            status {str} -- If provided, only jobs with this status are returned. (default: {None})
+
+        Returns:
+            List[Dict] -- Summaries of the jobs in order of submission.
+        """
+        if status is not None and status not in STATUSES:
+            raise ValueError('Status is not supported. Valid statuses are ' + str(STATUSES) + '.')
+
+        query = 'SELECT id, kind, status, progress, created, started, finished, error FROM jobs'
+        arguments = ()
+        if status is not None:
+            query += ' WHERE status = ?'
+            arguments = (status,)
+        with closing(self._connect()) as connection, connection:
+            rows = connection.execute(query + ' ORDER BY id', arguments).fetchall()
+
+        return [_to_summary(row) for row in rows]
+
+
+def _to_summary(row: tuple) -> Dict:
+    """Returns the summary of a job from the leading columns of a database row.
+    """
+    keys = ['id', 'kind', 'status', 'progress', 'created', 'started', 'finished', 'error']
+
+    return dict(zip(keys, row[:len(keys)]))
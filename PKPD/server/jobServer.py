@@ -0,0 +1,202 @@
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from urllib.parse import parse_qs, urlparse
+
+from PKPD.server.jobQueue import JobQueue
+from PKPD.server.jobs import check_specification, run_job
+
+
+class JobServer(object):
+    """Local fitting service. Jobs are submitted as JSON over HTTP, persisted in a JobQueue and scheduled onto a
+    persistent pool of worker processes, which keep their compiled models across jobs. Clients poll the status,
+    progress and result of their jobs. Jobs that were queued or running when the server stopped are run after the next
+    start.
+
+    The HTTP interface is
+        POST   /jobs         submit {"kind": ..., "specification": {...}}, returns {"id": ...}
+        GET    /jobs         summaries of all jobs, optionally filtered by ?status=...
+        GET    /jobs/<id>    status, progress, specification and result of a job
+        DELETE /jobs/<id>    cancel a queued job
+    """
+    def __init__(self, directory: str=None, host: str='127.0.0.1', port: int=8642,
+                 number_of_processes: int=None) -> None:
+        """Initialises the server. The server is bound to the local host by default, such that it is not reachable
+        from other machines.
+
+        Keyword Arguments:
+            directory {str} -- Directory of the job database. Defaults to $PKPD_CACHE_DIR or ~/.cache/PKPD.
+                               (default: {None})
+            host {str} -- Host name of the server. (default: {'127.0.0.1'})
+            port {int} -- Port of the server. If 0, a free port is chosen. (default: {8642})
+            number_of_processes {int} -- Number of worker processes. Defaults to the number of CPUs.
+                                         (default: {None})
+        """
+        self.queue = JobQueue(directory)
+        self.number_of_processes = number_of_processes or os.cpu_count() or 1
+
+        self.http_server = ThreadingHTTPServer((host, port), _RequestHandler)
+        self.http_server.job_server = self
+        self.address = self.http_server.server_address
+
+        # initialise scheduler state
+        self._executor = None
+        self._futures = {}
+        self._wake_up = threading.Event()
+        self._is_running = False
+        self._threads = []
+
+    def start(self) -> None:
+        """Starts the worker pool, the scheduler and the HTTP server in background threads.
+        """
+        # jobs interrupted by the last shutdown are run again
+        self.queue.requeue_running()
+
+        # workers are spawned, as forking a process with running threads is unsafe
+        self._executor = self._create_executor()
+        self._is_running = True
+        self._threads = [threading.Thread(target=self._schedule, daemon=True),
+                         threading.Thread(target=self.http_server.serve_forever, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Stops the HTTP server and the scheduler and waits for running jobs. Queued jobs remain in the queue.
+        """
+        self._is_running = False
+        self._wake_up.set()
+        self.http_server.shutdown()
+        self.http_server.server_close()
+        for thread in self._threads:
+            thread.join()
+        self._executor.shutdown(wait=True)
+
+    def submit(self, kind: str, specification: Dict) -> int:
+        """Checks and queues a job, and notifies the scheduler.
+
+        Arguments:
+            kind {str} -- Kind of the job, valid kinds are 'simulate', 'fit' and 'bootstrap'.
+            specification {Dict} -- Specification of the job, see PKPD.server.jobs.check_specification.
+
+        Returns:
+            int -- ID of the job.
+        """
+        check_specification(kind, specification)
+        job_id = self.queue.submit(kind, specification)
+        self._wake_up.set()
+
+        return job_id
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        """Returns a pool of spawned worker processes.
+        """
+        return ProcessPoolExecutor(max_workers=self.number_of_processes,
+                                   mp_context=multiprocessing.get_context('spawn'))
+
+    def _schedule(self) -> None:
+        """Dispatches queued jobs to free workers until the server stops. The scheduler wakes up on submissions and
+        completions, and at least once per second.
+        """
+        while self._is_running:
+            self._wake_up.clear()
+            while len(self._futures) < self.number_of_processes:
+                job = self.queue.claim()
+                if job is None:
+                    break
+                job_id, kind, specification = job
+                try:
+                    future = self._executor.submit(run_job, [job_id, kind, specification, self.queue.directory])
+                except BrokenProcessPool:
+                    # replace a pool whose worker died, and return the job to the queue
+                    self._executor = self._create_executor()
+                    self.queue.requeue_running()
+                    break
+                self._futures[job_id] = future
+                future.add_done_callback(lambda done, job_id=job_id: self._complete(job_id, done))
+            self._wake_up.wait(timeout=1)
+
+    def _complete(self, job_id: int, future: Future) -> None:
+        """Stores the result or the error of a job and notifies the scheduler.
+        """
+        try:
+            self.queue.finish(job_id, future.result())
+        except Exception as e:
+            self.queue.fail(job_id, '%s: %s' % (type(e).__name__, e))
+        finally:
+            self._futures.pop(job_id, None)
+            self._wake_up.set()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """Handles the HTTP requests of the JobServer.
+    """
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        queue = self.server.job_server.queue
+        job_id = self._get_job_id(url.path)
+
+        if url.path.rstrip('/') == '/jobs':
+            status = parse_qs(url.query).get('status', [None])[0]
+            try:
+                self._respond(200, queue.list(status))
+            except ValueError as e:
+                self._respond(400, {'error': str(e)})
+        elif job_id is not None and queue.get(job_id) is not None:
+            self._respond(200, queue.get(job_id))
+        else:
+            self._respond(404, {'error': 'Job not found.'})
+
+    def do_POST(self) -> None:
+        if urlparse(self.path).path.rstrip('/') != '/jobs':
+            self._respond(404, {'error': 'Resource not found.'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length))
+            job_id = self.server.job_server.submit(request.get('kind'), request.get('specification'))
+        except (ValueError, AttributeError, TypeError) as e:
+            self._respond(400, {'error': str(e)})
+            return
+
+        self._respond(201, {'id': job_id})
+
+    def do_DELETE(self) -> None:
+        queue = self.server.job_server.queue
+        job_id = self._get_job_id(urlparse(self.path).path)
+
+        if job_id is None or queue.get(job_id) is None:
+            self._respond(404, {'error': 'Job not found.'})
+        elif queue.cancel(job_id):
+            self._respond(200, {'id': job_id, 'status': 'cancelled'})
+        else:
+            self._respond(409, {'error': 'Only queued jobs can be cancelled.'})
+
+    def _get_job_id(self, path: str) -> int:
+        """Returns the job ID of a path /jobs/<id>, or None for other paths.
+        """
+        parts = path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'jobs' or not parts[1].isdigit():
+            return None
+
+        return int(parts[1])
+
+    def _respond(self, status: int, content) -> None:
+        """Sends content as JSON response.
+        """
+        body = json.dumps(content).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        """Suppresses the logging of each request.
+        """
+        pass
@@ -0,0 +1,295 @@
+import json
+from typing import Callable, Dict, List
+
+import myokit
+import numpy as np
+import pints
+
+from PKPD.inference import inference
+from PKPD.inference.surrogate import SurrogateCMAES
+from PKPD.model import model as m
+from PKPD.model.modelBuilder import build_model
+from PKPD.server.jobQueue import JobQueue
+
+
+# kinds of jobs and their required specification entries
+JOB_KINDS = {'simulate': ['model', 'parameters', 'times'],
+             'fit': ['model', 'times', 'values'],
+             'bootstrap': ['model', 'times', 'values', 'number_of_samples']
+             }
+
+# optimisers that can be requested by name
+OPTIMISERS = {optimiser.__name__: optimiser
+              for optimiser in [pints.CMAES, pints.NelderMead, pints.PSO, pints.SNES, pints.XNES, SurrogateCMAES]}
+
+
+def check_specification(kind: str, specification: Dict) -> None:
+    """Checks the kind and the specification of a job before it is queued, such that malformed jobs are rejected on
+    submission rather than failing in a worker.
+
+    A specification contains the model, either as path to an .mmt file or as keyword arguments of build_model, and
+    optionally output_names and doses [[time, amount, duration], ...], which replace the protocol of the model for all
+    patients. Simulations require parameters, one set or a list of sets, and times. Fits and bootstraps require times
+    and values as lists with one entry per patient, and optionally initial_parameter, boundaries [lower, upper],
+    transformation, optimiser, number_of_iterations and seed. Bootstraps additionally require number_of_samples.
+
+    Arguments:
+        kind {str} -- Kind of the job, valid kinds are 'simulate', 'fit' and 'bootstrap'.
+        specification {Dict} -- Specification of the job.
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError('Job kind is not supported. Valid kinds are ' + str(list(JOB_KINDS)) + '.')
+    if not isinstance(specification, dict):
+        raise ValueError('Job specification has to be a JSON object.')
+
+    missing_keys = [key for key in JOB_KINDS[kind] if key not in specification]
+    if missing_keys:
+        raise ValueError('Job specification is missing ' + str(missing_keys) + '.')
+
+    if not isinstance(specification['model'], (str, dict)):
+        raise ValueError('Model has to be a path to an .mmt file or a specification of build_model.')
+    malformed_keys = [key for key in ['parameters', 'times', 'values']
+                      if key in JOB_KINDS[kind] and not isinstance(specification[key], (list, tuple, np.ndarray))]
+    if malformed_keys:
+        raise ValueError('Job specification requires arrays for ' + str(malformed_keys) + '.')
+    if kind != 'simulate' and len(specification['times']) != len(specification['values']):
+        raise ValueError('Number of time and value arrays does not match.')
+    if specification.get('optimiser', 'CMAES') not in OPTIMISERS:
+        raise ValueError('Optimiser is not supported. Valid optimisers are ' + str(list(OPTIMISERS)) + '.')
+
+    # doses are scheduled as infusions of rate amount / duration
+    doses = specification.get('doses')
+    if doses is not None:
+        try:
+            doses = np.asarray(doses, dtype=float)
+        except (TypeError, ValueError):
+            raise ValueError('Doses have to be a list of [time, amount, duration].')
+        if doses.size > 0 and (doses.ndim != 2 or doses.shape[1] != 3):
+            raise ValueError('Doses have to be a list of [time, amount, duration].')
+        doses = doses.reshape(-1, 3)
+        if not np.all(np.isfinite(doses)) or np.any(doses[:, 2] <= 0):
+            raise ValueError('Doses require finite values and a positive duration.')
+
+
+def run_job(job: List) -> Dict:
+    """Runs a job in a worker process and returns its JSON serialisable result. Progress is written to the job queue.
+
+    Arguments:
+        job {List} -- ID, kind and specification of the job, and directory of the job queue.
+
+    Returns:
+        Dict -- Result of the job.
+    """
+    job_id, kind, specification, directory = job
+    queue = JobQueue(directory)
+
+    def report_progress(progress: float) -> None:
+        queue.set_progress(job_id, progress)
+
+    return execute_job(kind, specification, report_progress)
+
+
+def execute_job(kind: str, specification: Dict, report_progress: Callable) -> Dict:
+    """Runs a job in the current process and returns its JSON serialisable result.
+
+    Arguments:
+        kind {str} -- Kind of the job, valid kinds are 'simulate', 'fit' and 'bootstrap'.
+        specification {Dict} -- Specification of the job, see check_specification.
+        report_progress {Callable} -- Called with the completed fraction of the job.
+
+    Returns:
+        Dict -- Result of the job.
+    """
+    if kind == 'simulate':
+        return _simulate(specification)
+    if kind == 'fit':
+        return _fit(specification, report_progress)
+
+    return _bootstrap(specification, report_progress)
+
+
+# models are compiled once per worker process and reused by all jobs with the same model
+_MODEL_CACHE = {}
+
+
+def _get_model(specification: Dict, is_single_output: bool, number_of_outputs: int=1):
+    """Returns the model of a job with the dosing protocol of the job, compiling the model only on first use in a
+    process.
+
+    Arguments:
+        specification {Dict} -- Specification of the job.
+        is_single_output {bool} -- Flag whether the model has a single output.
+
+    Keyword Arguments:
+        number_of_outputs {int} -- Number of outputs of multi-output models without output names. (default: {1})
+
+    Returns:
+        SingleOutputModel or MultiOutputModel -- Model of the job.
+    """
+    output_names = specification.get('output_names')
+    key = json.dumps([specification['model'], output_names, is_single_output, number_of_outputs], sort_keys=True)
+    if key not in _MODEL_CACHE:
+        source = specification['model']
+        if isinstance(source, dict):
+            definition, protocol = build_model(**source), None
+        else:
+            definition, protocol, _ = myokit.load(source)
+
+        if is_single_output:
+            model = m.SingleOutputModel(definition)
+            if output_names is not None:
+                model.set_output(output_names[0])
+        else:
+            model = m.MultiOutputModel(definition)
+            if output_names is None:
+                model.set_output_dimension(number_of_outputs)
+            else:
+                model.set_output(list(output_names))
+        _MODEL_CACHE[key] = [model, protocol]
+
+    model, protocol = _MODEL_CACHE[key]
+
+    # doses of the job replace the protocol of the model
+    doses = specification.get('doses')
+    model.simulation.set_protocol(protocol if doses is None else _get_protocol(doses))
+
+    return model
+
+
+def _get_protocol(doses: List) -> myokit.Protocol:
+    """Returns the dosing protocol of doses [[time, amount, duration], ...].
+    """
+    protocol = myokit.Protocol()
+    for dose_time, amount, duration in doses:
+        protocol.schedule(level=amount / duration, start=dose_time, duration=duration)
+
+    return protocol
+
+
+def _simulate(specification: Dict) -> Dict:
+    """Simulates one or several parameter sets.
+    """
+    times = np.asarray(specification['times'], dtype=float)
+    parameters = np.asarray(specification['parameters'], dtype=float)
+    output_names = specification.get('output_names')
+    is_single_output = output_names is None or len(output_names) == 1
+    model = _get_model(specification, is_single_output, 1 if output_names is None else len(output_names))
+
+    values = [np.array(model.simulate(parameter_set, times)).tolist() for parameter_set in np.atleast_2d(parameters)]
+
+    return {'times': times.tolist(), 'values': values[0] if parameters.ndim == 1 else values}
+
+
+def _create_problem(specification: Dict, times: List[np.ndarray], values: List[np.ndarray]):
+    """Returns the inverse problem of a fit with the optimiser, boundaries and transformation of the specification.
+    """
+    is_single_output = values[0].ndim == 1
+    number_of_outputs = 1 if is_single_output else values[0].shape[1]
+    model = _get_model(specification, is_single_output, number_of_outputs)
+    problem_class = inference.SingleOutputInverseProblem if is_single_output else inference.MultiOutputInverseProblem
+
+    problem = problem_class(models=[model] * len(times), times=times, values=values)
+    problem.set_optimiser(OPTIMISERS[specification.get('optimiser', 'CMAES')])
+    if specification.get('boundaries') is not None:
+        problem.set_parameter_boundaries(specification['boundaries'])
+    problem.set_parameter_transformation(specification.get('transformation'))
+
+    return problem
+
+
+def _get_data(specification: Dict) -> List:
+    """Returns the times and values of the patients as arrays.
+    """
+    times = [np.asarray(patient_times, dtype=float) for patient_times in specification['times']]
+    values = [np.asarray(patient_values, dtype=float) for patient_values in specification['values']]
+
+    return [times, values]
+
+
+def _find_optimal_parameter(problem, initial_parameter: np.ndarray, uncertainty: np.ndarray,
+                            number_of_iterations: int, report_progress: Callable) -> List:
+    """Runs the optimisation restarts one by one, such that progress can be reported after each restart, and returns
+    the best estimate and score.
+    """
+    best_parameters, best_score = None, np.inf
+    for iteration in range(number_of_iterations):
+        problem.initial_parameter_uncertainty = uncertainty
+        problem.find_optimal_parameter(initial_parameter=initial_parameter, number_of_iterations=1)
+        if problem.objective_score < best_score:
+            best_parameters, best_score = problem.estimated_parameters, problem.objective_score
+        report_progress((iteration + 1) / number_of_iterations)
+
+    return [np.asarray(best_parameters, dtype=float), float(best_score)]
+
+
+def _get_starting_point(problem, specification: Dict) -> List:
+    """Returns the starting point of the specification, or the estimate from the data, and the initial uncertainty.
+    """
+    if specification.get('initial_parameter') is None:
+        return problem.estimate_initial_parameter(seed=specification.get('seed'))
+
+    initial_parameter = np.asarray(specification['initial_parameter'], dtype=float)
+
+    return [initial_parameter, np.maximum(0.1 * np.abs(initial_parameter), 1e-6)]
+
+
+def _fit(specification: Dict, report_progress: Callable) -> Dict:
+    """Fits the model to the data of all patients.
+    """
+    if specification.get('seed') is not None:
+        np.random.seed(specification['seed'])
+
+    problem = _create_problem(specification, *_get_data(specification))
+    initial_parameter, uncertainty = _get_starting_point(problem, specification)
+    estimate, score = _find_optimal_parameter(problem, initial_parameter, uncertainty,
+                                              int(specification.get('number_of_iterations', 1)), report_progress)
+
+    return {'estimated_parameters': estimate.tolist(), 'objective_score': score}
+
+
+def _bootstrap(specification: Dict, report_progress: Callable) -> Dict:
+    """Fits the model to the data and to bootstrap samples of the data. Patients are resampled with replacement, or,
+    for a single patient, the residuals of the fit are resampled and added to its predictions. Each bootstrap fit
+    starts from the estimate of the data.
+    """
+    seed = specification.get('seed')
+    if seed is not None:
+        np.random.seed(seed)
+    random_generator = np.random.default_rng(seed)
+    number_of_samples = int(specification['number_of_samples'])
+    number_of_iterations = int(specification.get('number_of_iterations', 1))
+
+    # fit the data
+    times, values = _get_data(specification)
+    problem = _create_problem(specification, times, values)
+    initial_parameter, uncertainty = _get_starting_point(problem, specification)
+    estimate, score = _find_optimal_parameter(problem, initial_parameter, uncertainty, number_of_iterations,
+                                              lambda progress: report_progress(progress / (number_of_samples + 1)))
+    if len(times) == 1:
+        predictions = np.array(problem.problem_container[0].model().simulate(estimate, times[0]))
+        residuals = values[0] - predictions
+
+    # fit the bootstrap samples
+    samples = np.empty(shape=(number_of_samples, len(estimate)))
+    spread = np.maximum(0.1 * np.abs(estimate), 1e-6)
+    for sample_id in range(number_of_samples):
+        if len(times) > 1:
+            patient_ids = random_generator.integers(len(times), size=len(times))
+            sample_times = [times[patient_id] for patient_id in patient_ids]
+            sample_values = [values[patient_id] for patient_id in patient_ids]
+        else:
+            sample_times = times
+            sample_ids = random_generator.integers(len(residuals), size=len(residuals))
+            sample_values = [predictions + residuals[sample_ids]]
+
+        sample_problem = _create_problem(specification, sample_times, sample_values)
+        samples[sample_id], _ = _find_optimal_parameter(sample_problem, estimate, spread, number_of_iterations,
+                                                        lambda progress: None)
+        report_progress((sample_id + 2) / (number_of_samples + 1))
+
+    return {'estimated_parameters': estimate.tolist(),
+            'objective_score': score,
+            'samples': samples.tolist(),
+            'percentiles': {str(percentile): np.percentile(samples, percentile, axis=0).tolist()
+                            for percentile in [2.5, 50, 97.5]}
+            }
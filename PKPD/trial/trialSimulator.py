@@ -0,0 +1,316 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+import myokit
+import numpy as np
+import pandas as pd
+
+from PKPD.model import model as m
+
+
+class LogNormalPopulation(object):
+    """Population of virtual subjects with log-normally distributed parameters. The parameters of subject i are
+    theta_i = theta * exp(eta_i), where theta are the typical parameters and eta_i is multivariate normally distributed
+    with zero mean, standard deviations omega and optional correlations. Parameters with zero variability, e.g. initial
+    conditions, are the same for all subjects.
+    """
+    def __init__(self, typical_parameters: np.ndarray, variability: np.ndarray, correlation: np.ndarray=None) -> None:
+        """Initialises the population.
+
+        Arguments:
+            typical_parameters {np.ndarray} -- Typical parameters. By convention [initial conditions, model
+                                                parameters].
+            variability {np.ndarray} -- Standard deviations omega of the log-parameters.
+
+        Keyword Arguments:
+            correlation {np.ndarray} -- Correlation matrix of the log-parameters. If None, log-parameters are
+                                        uncorrelated. (default: {None})
+        """
+        self.typical_parameters = np.asarray(typical_parameters, dtype=float)
+        self.variability = np.asarray(variability, dtype=float)
+        number_parameters = len(self.typical_parameters)
+
+        if self.variability.shape != (number_parameters,) or np.any(self.variability < 0):
+            raise ValueError('Variability has to be a non-negative value for each parameter.')
+
+        if correlation is None:
+            correlation = np.eye(number_parameters)
+        covariance = np.outer(self.variability, self.variability) * np.asarray(correlation, dtype=float)
+
+        # factorise covariance once, so that cohorts are sampled by a single matrix product
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        if np.any(eigenvalues < -1e-12 * max(1.0, np.max(np.abs(eigenvalues)))):
+            raise ValueError('Correlation matrix has to be positive semi-definite.')
+        self._factor = eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+    def sample(self, number_of_subjects: int, random_generator: np.random.Generator) -> np.ndarray:
+        """Returns parameters of virtual subjects.
+
+        Arguments:
+            number_of_subjects {int} -- Number of subjects.
+            random_generator {np.random.Generator} -- Source of randomness.
+
+        Returns:
+            np.ndarray -- Parameters of shape (number of subjects, number of parameters).
+        """
+        standard_normal = random_generator.standard_normal(size=(number_of_subjects, len(self.typical_parameters)))
+
+        return self.typical_parameters * np.exp(standard_normal @ self._factor.T)
+
+
+class TrialArm(object):
+    """Arm of a trial, i.e. a cohort of subjects with a common dosing regimen and sampling schedule.
+    """
+    def __init__(self, name: str, number_of_subjects: int, sampling_times: np.ndarray, dose_times: np.ndarray,
+                 dose_amounts: np.ndarray, dose_durations: np.ndarray=None) -> None:
+        """Initialises the arm.
+
+        Arguments:
+            name {str} -- Name of the arm.
+            number_of_subjects {int} -- Number of subjects in the arm.
+            sampling_times {np.ndarray} -- Times at which outputs are observed.
+            dose_times {np.ndarray} -- Start times of the doses.
+            dose_amounts {np.ndarray} -- Amounts of the doses.
+
+        Keyword Arguments:
+            dose_durations {np.ndarray} -- Durations of the doses. If None, each dose lasts 1 time unit as for dosing
+                                           schedules read from data files. (default: {None})
+        """
+        self.name = name
+        self.number_of_subjects = int(number_of_subjects)
+        self.sampling_times = np.sort(np.asarray(sampling_times, dtype=float))
+        self.dose_times = np.asarray(dose_times, dtype=float)
+        self.dose_amounts = np.asarray(dose_amounts, dtype=float)
+        if dose_durations is None:
+            dose_durations = np.ones(len(self.dose_times))
+        self.dose_durations = np.asarray(dose_durations, dtype=float)
+
+        if not len(self.dose_times) == len(self.dose_amounts) == len(self.dose_durations):
+            raise ValueError('Dose times, amounts and durations have to be of the same length.')
+
+    def get_protocol(self) -> myokit.Protocol:
+        """Returns the dosing regimen as myokit protocol.
+
+        Returns:
+            myokit.Protocol -- Dosing protocol.
+        """
+        protocol = myokit.Protocol()
+        for dose_id, dose_amount in enumerate(self.dose_amounts):
+            # compute dosing level
+            level = dose_amount / self.dose_durations[dose_id]
+
+            # schedule dosing event
+            protocol.schedule(level=level, start=self.dose_times[dose_id], duration=self.dose_durations[dose_id])
+
+        return protocol
+
+
+class TrialSimulator(object):
+    """Simulates clinical trials with virtual populations. Subjects are processed in chunks, optionally across a pool
+    of processes, and each chunk is appended to a .csv file in the data layout of the GUI (ID, time, outputs, dose)
+    as soon as it is simulated, such that memory use does not grow with the number of subjects.
+
+    Each chunk draws its subjects and residual errors from its own random stream derived from the seed, so results
+    are reproducible and independent of the number of processes.
+    """
+    def __init__(self, mmt_file: str, population: LogNormalPopulation, arms: List[TrialArm],
+                 output_names: List[str]=None, additive_error: float=0.0, proportional_error: float=0.0) -> None:
+        """Initialises the trial.
+
+        Arguments:
+            mmt_file {str} -- Path to the mmt_file defining the model.
+            population {LogNormalPopulation} -- Distribution of the subject parameters.
+            arms {List[TrialArm]} -- Arms of the trial.
+
+        Keyword Arguments:
+            output_names {List[str]} -- Observed model variables. If None, the default output of the
+                                        SingleOutputModel is observed. (default: {None})
+            additive_error {float} -- Standard deviation of the additive residual error. (default: {0.0})
+            proportional_error {float} -- Standard deviation of the proportional residual error relative to the
+                                          model output. (default: {0.0})
+        """
+        self.mmt_file = mmt_file
+        self.population = population
+        self.arms = arms
+        self.additive_error = additive_error
+        self.proportional_error = proportional_error
+
+        # check compatibility of population and model
+        model = _get_model(mmt_file, output_names)
+        if model.n_parameters() != len(population.typical_parameters):
+            raise ValueError('Number of population parameters does not match the model.')
+
+        self.output_names = output_names
+        self.observed_names = [model.output_name] if output_names is None else list(output_names)
+        self.parameter_names = model.state_names + model.parameter_names
+
+    def run(self, file_path: str, parameter_file_path: str=None, number_of_processes: int=1, chunk_size: int=1000,
+            seed: int=None) -> None:
+        """Simulates all arms and writes the observations to a .csv file. Missing values are written as '.'.
+
+        Arguments:
+            file_path {str} -- Path to the .csv file of the observations.
+
+        Keyword Arguments:
+            parameter_file_path {str} -- Path to a .csv file of the subject parameters. If None, parameters are not
+                                         written. (default: {None})
+            number_of_processes {int} -- Number of worker processes. If 1, subjects are simulated in this process.
+                                         (default: {1})
+            chunk_size {int} -- Number of subjects per chunk. (default: {1000})
+            seed {int} -- Seed of the random streams. (default: {None})
+        """
+        tasks = self._create_tasks(chunk_size, seed)
+
+        # remove previous results, as chunks are appended
+        for path in [file_path, parameter_file_path]:
+            if path is not None and os.path.exists(path):
+                os.remove(path)
+
+        if number_of_processes == 1:
+            for task in tasks:
+                self._write_chunk(_simulate_chunk(task), file_path, parameter_file_path)
+            return
+
+        # keep a bounded number of chunks in flight, such that finished chunks do not pile up in memory
+        with ProcessPoolExecutor(max_workers=number_of_processes) as executor:
+            futures = []
+            for task in tasks:
+                futures.append(executor.submit(_simulate_chunk, task))
+                if len(futures) == 2 * number_of_processes:
+                    self._write_chunk(futures.pop(0).result(), file_path, parameter_file_path)
+            for future in futures:
+                self._write_chunk(future.result(), file_path, parameter_file_path)
+
+    def _create_tasks(self, chunk_size: int, seed: int) -> List:
+        """Splits the arms into chunks of subjects and assigns each chunk its own random stream.
+
+        Arguments:
+            chunk_size {int} -- Number of subjects per chunk.
+            seed {int} -- Seed of the random streams.
+
+        Returns:
+            List -- Arguments of _simulate_chunk for each chunk.
+        """
+        tasks = []
+        first_subject_id = 1
+        for arm in self.arms:
+            for chunk_start in range(0, arm.number_of_subjects, chunk_size):
+                number_of_subjects = min(chunk_size, arm.number_of_subjects - chunk_start)
+                tasks.append([self.mmt_file, self.output_names, self.population, arm, first_subject_id,
+                              number_of_subjects, self.additive_error, self.proportional_error])
+                first_subject_id += number_of_subjects
+
+        # derive independent random streams for the chunks
+        for task, seed_sequence in zip(tasks, np.random.SeedSequence(seed).spawn(len(tasks))):
+            task.append(seed_sequence)
+
+        return tasks
+
+    def _write_chunk(self, chunk: List, file_path: str, parameter_file_path: str) -> None:
+        """Appends the observations and parameters of a chunk to the .csv files.
+
+        Arguments:
+            chunk {List} -- Return value of _simulate_chunk.
+            file_path {str} -- Path to the .csv file of the observations.
+            parameter_file_path {str} -- Path to the .csv file of the subject parameters, or None.
+        """
+        arm_name, subject_ids, parameters, table = chunk
+
+        # observations in the data layout of the GUI
+        columns = ['ID', 'time'] + self.observed_names + ['dose']
+        data_frame = pd.DataFrame(table, columns=columns)
+        data_frame['ID'] = data_frame['ID'].astype(int)
+        is_first_chunk = not os.path.exists(file_path)
+        data_frame.to_csv(file_path, mode='a', header=is_first_chunk, index=False, na_rep='.')
+
+        if parameter_file_path is not None:
+            parameter_frame = pd.DataFrame(parameters, columns=self.parameter_names)
+            parameter_frame.insert(0, 'arm', arm_name)
+            parameter_frame.insert(0, 'ID', subject_ids)
+            is_first_chunk = not os.path.exists(parameter_file_path)
+            parameter_frame.to_csv(parameter_file_path, mode='a', header=is_first_chunk, index=False)
+
+
+# models are compiled once per process and reused for all chunks
+_MODEL_CACHE = {}
+
+
+def _get_model(mmt_file: str, output_names: List[str]):
+    """Returns the model of the trial, compiling it only on first use in a process.
+
+    Arguments:
+        mmt_file {str} -- Path to the mmt_file defining the model.
+        output_names {List[str]} -- Observed model variables, or None for the default single output.
+
+    Returns:
+        SingleOutputModel or MultiOutputModel -- Model of the trial.
+    """
+    key = (mmt_file, None if output_names is None else tuple(output_names))
+    if key not in _MODEL_CACHE:
+        if output_names is None:
+            model = m.SingleOutputModel(mmt_file)
+        else:
+            model = m.MultiOutputModel(mmt_file)
+            model.set_output(list(output_names))
+        _MODEL_CACHE[key] = model
+
+    return _MODEL_CACHE[key]
+
+
+def _simulate_chunk(task: List) -> List:
+    """Samples and simulates a chunk of subjects of one arm. Subjects whose simulation fails are reported with missing
+    observations.
+
+    Arguments:
+        task {List} -- Model file, output names, population, arm, first subject ID, number of subjects, additive and
+                       proportional error, and seed sequence of the chunk.
+
+    Returns:
+        List -- Arm name, subject IDs, subject parameters and table of rows [ID, time, outputs, dose].
+    """
+    (mmt_file, output_names, population, arm, first_subject_id, number_of_subjects, additive_error,
+     proportional_error, seed_sequence) = task
+    random_generator = np.random.default_rng(seed_sequence)
+
+    model = _get_model(mmt_file, output_names)
+    model.simulation.set_protocol(arm.get_protocol())
+
+    # sample subjects
+    subject_ids = np.arange(first_subject_id, first_subject_id + number_of_subjects)
+    parameters = population.sample(number_of_subjects, random_generator)
+
+    # simulate subjects into one preallocated array
+    number_times = len(arm.sampling_times)
+    number_outputs = 1 if output_names is None else len(output_names)
+    outputs = np.empty(shape=(number_of_subjects, number_times, number_outputs))
+    for subject_id in range(number_of_subjects):
+        try:
+            outputs[subject_id] = model.simulate(parameters[subject_id], arm.sampling_times).reshape(number_times,
+                                                                                                  number_outputs)
+        except myokit.SimulationError:
+            outputs[subject_id] = np.nan
+
+    # add residual error to all observations at once
+    noise = random_generator.standard_normal(size=(2,) + outputs.shape)
+    outputs = outputs * (1 + proportional_error * noise[0]) + additive_error * noise[1]
+
+    # observation rows: [ID, time, outputs, missing dose]
+    observation_rows = np.empty(shape=(number_of_subjects, number_times, number_outputs + 3))
+    observation_rows[:, :, 0] = subject_ids[:, np.newaxis]
+    observation_rows[:, :, 1] = arm.sampling_times
+    observation_rows[:, :, 2:-1] = outputs
+    observation_rows[:, :, -1] = np.nan
+
+    # dose rows: [ID, time, missing outputs, dose]
+    number_doses = len(arm.dose_times)
+    dose_rows = np.full(shape=(number_of_subjects, number_doses, number_outputs + 3), fill_value=np.nan)
+    dose_rows[:, :, 0] = subject_ids[:, np.newaxis]
+    dose_rows[:, :, 1] = arm.dose_times
+    dose_rows[:, :, -1] = arm.dose_amounts
+
+    # order rows by subject and time, with doses ahead of observations at the same time
+    table = np.concatenate([dose_rows, observation_rows], axis=1).reshape(-1, number_outputs + 3)
+    order = np.lexsort((table[:, 1], table[:, 0]))
+
+    return [arm.name, subject_ids, parameters, table[order]]
@@ -25,11 +25,14 @@ setup(
     # Packages to include
     packages=find_packages(include=('PKPD','PKPD.*')),
 
+    # multiprocessing.shared_memory requires Python 3.8
+    python_requires='>=3.8',
+
     # List of dependencies
     install_requires=[
         'cma>=2',
-        'numpy>=1.8',
-        'scipy>=0.14',
+        'numpy>=1.17',
+        'scipy>=1.7',
         'pyqt5==5.9',
         'sympy',
         'matplotlib>=1.5',
@@ -0,0 +1,84 @@
+import unittest
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from PKPD.gui.utils import plotting
+
+
+class TestDecimate(unittest.TestCase):
+    """Tests the decimation of dense data series for display.
+    """
+    def test_sparse_series(self):
+        """Tests whether all finite points of a sparse series are kept.
+        """
+        times = np.arange(10.0)
+        values = np.sin(times)
+        values[3] = np.nan
+
+        indices = plotting.decimate(times, values, max_points=100)
+
+        expected_indices = [0, 1, 2, 4, 5, 6, 7, 8, 9]
+        np.testing.assert_array_equal(indices, expected_indices)
+
+    def test_dense_series(self):
+        """Tests whether a dense series is reduced to at most the maximal number of points, and whether the end points
+        and the extremes of the series are kept.
+        """
+        times = np.linspace(0, 10, 10001)
+        values = np.exp(-times) * np.sin(5 * times)
+        max_points = 102
+
+        indices = plotting.decimate(times, values, max_points)
+
+        self.assertLessEqual(len(indices), max_points)
+        np.testing.assert_array_equal(indices, np.sort(indices))
+        self.assertEqual(indices[0], 0)
+        self.assertEqual(indices[-1], len(times) - 1)
+        self.assertIn(np.argmax(values), indices)
+        self.assertIn(np.argmin(values), indices)
+
+
+class TestBlittedFigure(unittest.TestCase):
+    """Tests the redrawing of animated artists on top of the cached figure.
+    """
+    def setUp(self):
+        self.figure = Figure()
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.subplots()
+        self.ax.scatter(x=[0, 1, 2], y=[0, 1, 2])
+        self.line, = self.ax.plot([], [])
+        self.blitted_figure = plotting.BlittedFigure(self.canvas, [self.line])
+        self.canvas.draw()
+
+    def test_update_within_limits(self):
+        """Tests whether updates within the view limits redraw only the animated artists.
+        """
+        background = self.blitted_figure.background
+        self.assertIsNotNone(background)
+        self.assertTrue(self.line.get_animated())
+
+        self.line.set_data([0.5, 1.5], [0.5, 1.5])
+        self.blitted_figure.update()
+
+        # no full draw, i.e. the background is unchanged
+        self.assertIs(self.blitted_figure.background, background)
+
+    def test_update_outside_limits(self):
+        """Tests whether updates outside of the view limits rescale the axes and redraw the figure.
+        """
+        background = self.blitted_figure.background
+
+        self.line.set_data([0, 10], [0, 20])
+        self.blitted_figure.update()
+
+        self.assertIsNot(self.blitted_figure.background, background)
+        self.assertGreaterEqual(self.ax.get_xlim()[1], 10)
+        self.assertGreaterEqual(self.ax.get_ylim()[1], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
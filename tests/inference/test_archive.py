@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from PKPD.inference.archive import EvaluationArchive
+
+
+class TestEvaluationArchive(unittest.TestCase):
+    """Testing the methods of the EvaluationArchive class.
+    """
+    def test_add_lookup(self):
+        """Test whether recorded evaluations are found and the best records are ordered by score.
+        """
+        archive = EvaluationArchive(number_of_parameters=2, number_of_patients=2)
+        archive.add([1, 2], [3, 4])
+        archive.add([2, 3], [1, 1])
+        archive.add([1, 2], [2, 2])
+
+        assert len(archive) == 2
+        assert np.array_equal(archive.lookup(np.array([1.0, 2.0])), [2, 2])
+        assert archive.lookup([5, 5]) is None
+        assert np.array_equal(archive.best(number=2), [[2, 3], [1, 2]])
+
+    def test_capacity(self):
+        """Test whether the worse half of the records is dropped when the capacity is reached.
+        """
+        archive = EvaluationArchive(number_of_parameters=1, number_of_patients=1, capacity=4)
+        for score in [4, 1, 3, 2, 0]:
+            archive.add([score], [score])
+
+        assert len(archive) == 3
+        assert np.array_equal(archive.best(number=3), [[0], [1], [2]])
+        assert archive.lookup([4]) is None
+        assert np.array_equal(archive.lookup([2]), [2])
+
+    def test_invalidate_patient(self):
+        """Test whether invalidated and new patients are marked unknown and excluded from the best records.
+        """
+        archive = EvaluationArchive(number_of_parameters=1, number_of_patients=2)
+        archive.add([1], [1, 2])
+        archive.invalidate_patient(1)
+        archive.add_patients(1)
+
+        assert np.array_equal(archive.lookup([1]), [1, np.nan, np.nan], equal_nan=True)
+        assert len(archive.best()) == 0
+
+    def test_save_load(self):
+        """Test whether an archive survives the round trip to a binary file.
+        """
+        archive = EvaluationArchive(number_of_parameters=2, number_of_patients=1, capacity=10)
+        archive.add([1, 2], [3])
+        archive.add([2, 3], [1])
+        archive.problem_key = 'abc'
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'archive.npz')
+            archive.save(file_path)
+            loaded_archive = EvaluationArchive.load(file_path)
+
+        assert len(loaded_archive) == 2
+        assert loaded_archive.capacity == 10
+        assert loaded_archive.problem_key == 'abc'
+        assert np.array_equal(loaded_archive.lookup([2, 3]), [1])
@@ -0,0 +1,120 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from PKPD.inference import inference
+from PKPD.inference.censoring import get_censored_observations, split_censoring
+from PKPD.inference.errorModels import ErrorModel
+from PKPD.model import model as m
+from PKPD.model.modelBuilder import build_model
+
+
+class TestCensoring(unittest.TestCase):
+    """Testing the functions of the censoring module.
+    """
+    def test_split_censoring(self):
+        """Test whether LLOQ and BLQ columns are separated from the data in any case.
+        """
+        data_df = pd.DataFrame({'ID': [1, 1], 'time': [1, 2], 'Cp': [2.0, np.nan], 'LLOQ': [0.1, 0.1],
+                                'Blq': [0, 1], 'dose': [np.nan, np.nan]})
+
+        remaining_df, censoring_df = split_censoring(data_df)
+        assert list(remaining_df.keys()) == ['ID', 'time', 'Cp', 'dose']
+        assert list(censoring_df.keys()) == ['lloq', 'blq']
+
+        remaining_df, censoring_df = split_censoring(data_df.drop(columns=['LLOQ', 'Blq']))
+        assert censoring_df is None
+
+    def test_get_censored_observations(self):
+        """Test whether flags distinguish censored from missing observations, and whether values below the LLOQ are
+        censored without flags.
+        """
+        values = np.array([2.0, np.nan, np.nan, 0.05, 0.05])
+        lloq = np.array([0.1, 0.1, 0.1, 0.1, np.nan])
+
+        assert list(get_censored_observations(values, lloq)) == [False, False, False, True, False]
+        assert list(get_censored_observations(values, lloq, blq=[0, 1, 0, 1, 1])) == [False, True, False, True, False]
+
+        # flags of a row apply to the missing and below-limit outputs of the row
+        values = np.array([[2.0, np.nan], [0.05, 3.0]])
+        is_censored = get_censored_observations(values, lloq=[0.1, 0.1], blq=[1, 1])
+        assert np.array_equal(is_censored, [[False, True], [True, False]])
+
+
+class TestCensoredLikelihood(unittest.TestCase):
+    """Testing censored observations of inverse problems with error models.
+    """
+    # Test case: two patients of a 1-compartment model, whose late observations fall below the LLOQ
+    model = m.SingleOutputModel(build_model(number_of_compartments=1))
+    parameters = np.array([100, 2, 4])
+    times = [np.linspace(0.5, 24, 12), np.linspace(1, 30, 10)]
+    lloq = 0.5
+    random_generator = np.random.default_rng(5)
+    values, blq = [], []
+    for patient_times in times:
+        patient_values = np.array(model.simulate(parameters, patient_times))
+        patient_values *= np.exp(random_generator.normal(scale=0.1, size=len(patient_times)))
+
+        # censored values are reported as missing
+        is_below_limit = patient_values < lloq
+        patient_values[is_below_limit] = np.nan
+        values.append(patient_values)
+        blq.append(is_below_limit.astype(int))
+
+    def test_evaluate_patients(self):
+        """Test whether censored observations contribute the probability of falling below the LLOQ, and whether
+        censored values are imputed for error functions.
+        """
+        problem = inference.SingleOutputInverseProblem(models=[self.model] * 2, times=self.times, values=self.values)
+        problem.set_error_model(ErrorModel('log-normal'))
+        problem.set_censoring(lloq=[np.full(len(times), self.lloq) for times in self.times], blq=self.blq)
+
+        assert [np.sum(is_censored) for is_censored in problem.is_censored] == [np.sum(blq) for blq in self.blq]
+        assert np.allclose(problem.problem_container[0].values()[problem.is_censored[0]], 0.5 * self.lloq)
+
+        error_measure = problem._get_error_measure()
+        parameters = np.append(self.parameters, 0.1)
+        patient_errors = error_measure.evaluate_patients(parameters)
+        for patient_id, patient_times in enumerate(self.times):
+            predictions = np.array(self.model.simulate(self.parameters, patient_times))
+            is_censored = problem.is_censored[patient_id]
+            expected_error = -np.sum(stats.lognorm.logpdf(self.values[patient_id][~is_censored], s=0.1,
+                                                          scale=predictions[~is_censored]))
+            expected_error -= np.sum(stats.norm.logcdf((np.log(self.lloq) - np.log(predictions[is_censored])) / 0.1))
+            assert np.isclose(patient_errors[patient_id], expected_error, rtol=1e-4)
+
+        # appended observations are not censored
+        problem.add_observations(patient_id=0, times=[36], values=[0.6])
+        assert len(problem.is_censored[0]) == 13 and not problem.is_censored[0][-1]
+
+        # diagnostics exclude censored observations
+        problem.estimated_parameters = parameters
+        dataframe = problem.get_diagnostics().to_dataframe()
+        assert np.sum(dataframe['censored']) == np.sum(self.blq[0]) + np.sum(self.blq[1])
+        assert np.all(np.isnan(dataframe['observation'][dataframe['censored']]))
+
+        with self.assertRaises(ValueError):
+            problem.set_censoring(lloq=[np.full(len(times), self.lloq) for times in self.times[:1]])
+
+    def test_find_optimal_parameter(self):
+        """Test whether the elimination is recovered from data with censored late observations.
+        """
+        problem = inference.SingleOutputInverseProblem(models=[self.model] * 2, times=self.times, values=self.values)
+        problem.set_error_model(ErrorModel('log-normal'))
+        problem.set_censoring(lloq=[np.full(len(times), self.lloq) for times in self.times], blq=self.blq)
+        problem.set_parameter_boundaries([[90, 0.1, 0.5, 0.001], [110, 10, 20, 1]])
+        problem.set_parameter_transformation('logit')
+
+        starting_point, uncertainty = problem.estimate_initial_parameter(seed=1)
+        problem.initial_parameter_uncertainty = uncertainty
+        problem.find_optimal_parameter(initial_parameter=starting_point, number_of_iterations=1)
+        estimates = problem.estimated_parameters
+
+        # elimination rate CL / V
+        assert np.isclose(estimates[1] / estimates[2], 0.5, rtol=0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+
+import numpy as np
+
+from PKPD.inference import inference
+from PKPD.model import model as m
+from PKPD.model.modelBuilder import build_model
+
+
+class TestDiagnostics(unittest.TestCase):
+    """Testing the methods of the Diagnostics class.
+    """
+    # Test case: three patients with noisy data of a 1-compartment model observed at different times
+    model = m.SingleOutputModel(build_model(number_of_compartments=1))
+    parameters = np.array([100, 2, 4])
+    times = [np.linspace(0.1, 6, 8), np.linspace(0.5, 10, 12), np.array([1, 2, 3, 4])]
+    random_generator = np.random.default_rng(1)
+    values = []
+    for patient_times in times:
+        patient_values = model.simulate(parameters, patient_times)
+        values.append(patient_values + random_generator.normal(scale=0.5, size=len(patient_times)))
+
+    def test_update(self):
+        """Test whether predictions and residuals match separate simulations of the patients, and whether patients
+        sharing the model and parameters are simulated together.
+        """
+        problem = inference.SingleOutputInverseProblem(models=[self.model] * 3, times=self.times, values=self.values)
+
+        with self.assertRaises(ValueError):
+            problem.get_diagnostics()
+
+        problem.estimated_parameters = self.parameters
+        diagnostics = problem.get_diagnostics()
+
+        assert diagnostics.number_of_simulations == 1
+        for patient_id, patient_times in enumerate(self.times):
+            expected_predictions = self.model.simulate(self.parameters, patient_times)
+            assert np.allclose(diagnostics.predictions[patient_id], expected_predictions, rtol=1e-4)
+            assert np.allclose(diagnostics.residuals[patient_id], self.values[patient_id] - expected_predictions,
+                               atol=1e-3)
+
+        # weighted residuals have unit root mean square across patients
+        weighted_residuals = np.concatenate(diagnostics.weighted_residuals)
+        assert np.isclose(np.sqrt(np.mean(weighted_residuals ** 2)), 1)
+
+        dataframe = diagnostics.to_dataframe()
+        assert len(dataframe) == 24
+        assert np.allclose(dataframe['observation'], np.concatenate(self.values))
+        assert np.allclose(dataframe['weighted_residual'], weighted_residuals)
+
+    def test_incremental_update(self):
+        """Test whether only changed patients are simulated again.
+        """
+        problem = inference.SingleOutputInverseProblem(models=[self.model] * 3, times=self.times, values=self.values)
+        problem.estimated_parameters = self.parameters
+        diagnostics = problem.get_diagnostics()
+
+        # unchanged problem is served from the cache
+        assert diagnostics.update() == []
+        assert diagnostics.number_of_simulations == 1
+
+        # appended observations and patients are simulated
+        problem.add_observations(patient_id=1, times=[12], values=[0.5])
+        problem.add_patients(models=[self.model], times=[np.array([3.0])], values=[np.array([1.0])])
+        assert diagnostics.update() == [1, 3]
+        assert diagnostics.number_of_simulations == 2
+        assert len(diagnostics.predictions[1]) == 13
+        assert np.allclose(diagnostics.predictions[3], self.model.simulate(self.parameters, [3.0]), rtol=1e-4)
+
+        # new parameters change all patients
+        assert diagnostics.update(self.parameters * 1.1) == [0, 1, 2, 3]
+        assert diagnostics.number_of_simulations == 3
+
+    def test_multi_output(self):
+        """Test whether the diagnostics of multi-output problems have the shape of the data and ignore missing values.
+        """
+        model = m.MultiOutputModel(build_model(number_of_compartments=2))
+        model.set_output_dimension(2)
+        parameters = np.array([100, 0, 2, 1, 4, 0.3, 8])
+        times = np.linspace(0.1, 12, 10)
+        values = model.simulate(parameters, times) + 0.1
+        values[3, 1] = np.nan
+        problem = inference.MultiOutputInverseProblem(models=[model], times=[times], values=[values])
+        problem.estimated_parameters = parameters
+
+        diagnostics = problem.get_diagnostics()
+
+        assert diagnostics.predictions[0].shape == (10, 2)
+        assert np.allclose(diagnostics.residual_standard_deviation, 0.1, rtol=1e-3)
+        assert diagnostics.standard_deviations[0].shape == (10, 2)
+        assert np.allclose(diagnostics.standard_deviations[0], diagnostics.residual_standard_deviation)
+        assert np.isnan(diagnostics.weighted_residuals[0][3, 1])
+        assert list(diagnostics.to_dataframe()['output'][:4]) == [0, 1, 0, 1]
+
+
+if __name__ == '__main__':
+    unittest.main()
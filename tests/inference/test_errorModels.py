@@ -0,0 +1,142 @@
+import unittest
+
+import numpy as np
+from scipy import stats
+
+from PKPD.inference import inference
+from PKPD.inference.archive import EvaluationArchive
+from PKPD.inference.errorModels import ErrorModel
+from PKPD.inference.objective import ErrorModelLikelihood
+from PKPD.model import model as m
+from PKPD.model.modelBuilder import build_model
+
+
+class TestErrorModel(unittest.TestCase):
+    """Testing the methods of the ErrorModel class.
+    """
+    # Test case: two outputs with observations of both, one of them missing
+    observations = np.array([1.0, 20.0, 1.5, np.nan, 0.5, 8.0])
+    predictions = np.array([1.2, 18.0, 1.4, 10.0, 0.6, 9.0])
+    output_ids = np.array([0, 1, 0, 1, 0, 1])
+
+    def test_compute_negative_log_likelihoods(self):
+        """Test whether the terms match the normal and log-normal densities of the observations.
+        """
+        # combined error model with different noise parameters per output
+        error_model = ErrorModel('combined', number_of_outputs=2)
+        noise = np.array([0.1, 0.5, 0.2, 0.05])
+        terms = error_model.compute_negative_log_likelihoods(self.observations, self.predictions, noise,
+                                                             self.output_ids)
+
+        a, b = noise[[0, 1]][self.output_ids], noise[[2, 3]][self.output_ids]
+        standard_deviations = np.sqrt(a ** 2 + (b * self.predictions) ** 2)
+        expected_terms = -stats.norm.logpdf(self.observations, self.predictions, standard_deviations)
+        assert terms[3] == 0
+        assert np.allclose(np.delete(terms, 3), np.delete(expected_terms, 3))
+
+        # log-normal error model
+        error_model = ErrorModel('log-normal', number_of_outputs=2)
+        terms = error_model.compute_negative_log_likelihoods(self.observations, self.predictions, [0.1, 0.2],
+                                                             self.output_ids)
+        expected_terms = -stats.lognorm.logpdf(self.observations, s=np.array([0.1, 0.2])[self.output_ids],
+                                               scale=self.predictions)
+        assert np.allclose(np.delete(terms, 3), np.delete(expected_terms, 3))
+
+        # invalid noise parameters have zero likelihood
+        terms = error_model.compute_negative_log_likelihoods(self.observations, self.predictions, [0.1, -0.2],
+                                                             self.output_ids)
+        assert np.all(np.isinf(terms[[1, 5]]))
+
+    def test_parameters(self):
+        """Test whether the noise parameters are named and initialised per kind and output.
+        """
+        error_model = ErrorModel('combined', number_of_outputs=2)
+
+        assert error_model.n_parameters() == 4
+        assert error_model.get_parameter_names(['drug', 'effect']) == [
+            'sigma_additive.drug', 'sigma_additive.effect', 'sigma_proportional.drug', 'sigma_proportional.effect']
+
+        starting_point, uncertainty = error_model.get_initial_parameters(self.observations, self.predictions,
+                                                                         self.output_ids)
+        assert len(starting_point) == 4
+        assert np.all(starting_point > 0) and np.all(uncertainty > 0)
+
+        with self.assertRaises(ValueError):
+            ErrorModel('exponential')
+        with self.assertRaises(ValueError):
+            error_model.compute_negative_log_likelihoods(self.observations, self.predictions, [0.1],
+                                                         self.output_ids)
+
+
+class TestErrorModelLikelihood(unittest.TestCase):
+    """Testing the likelihood of inverse problems with error models.
+    """
+    # Test case: three patients with multiplicative noise of a 1-compartment model
+    model = m.SingleOutputModel(build_model(number_of_compartments=1))
+    parameters = np.array([100, 2, 4])
+    times = [np.linspace(0.5, 12, 10), np.linspace(1, 16, 12), np.linspace(0.2, 8, 8)]
+    random_generator = np.random.default_rng(3)
+    values = []
+    for patient_times in times:
+        patient_values = np.array(model.simulate(parameters, patient_times))
+        values.append(patient_values * np.exp(random_generator.normal(scale=0.1, size=len(patient_times))))
+
+    def test_evaluate_patients(self):
+        """Test whether the vectorised per-patient likelihoods match the likelihoods of separate patients, and whether
+        known errors are reused.
+        """
+        problem = inference.SingleOutputInverseProblem(models=[self.model] * 3, times=self.times, values=self.values)
+        error_model = ErrorModel('proportional')
+        error_measure = ErrorModelLikelihood(problem.problem_container, error_model)
+        parameters = np.append(self.parameters, 0.1)
+
+        assert error_measure.n_parameters() == 4
+        patient_errors = error_measure.evaluate_patients(parameters)
+        for patient_id, patient_times in enumerate(self.times):
+            predictions = np.array(self.model.simulate(self.parameters, patient_times))
+            expected_error = -np.sum(stats.norm.logpdf(self.values[patient_id], predictions, 0.1 * predictions))
+            assert np.isclose(patient_errors[patient_id], expected_error, rtol=1e-4)
+
+        error_measure.set_known_errors(parameters, [patient_errors[0], np.nan, patient_errors[2]])
+        assert np.allclose(error_measure.evaluate_patients(parameters), patient_errors)
+
+    def test_find_optimal_parameter(self):
+        """Test whether model and noise parameters are estimated jointly, and whether the diagnostics are weighted by
+        the error model.
+        """
+        problem = inference.SingleOutputInverseProblem(models=[self.model] * 3, times=self.times, values=self.values)
+        problem.set_error_model(ErrorModel('log-normal'))
+        problem.set_parameter_boundaries([[90, 0.1, 0.5, 0.001], [110, 10, 20, 1]])
+        problem.set_parameter_transformation('logit')
+
+        # archive of the model parameters is neither used nor seeded from
+        problem.set_evaluation_archive(EvaluationArchive(number_of_parameters=3, number_of_patients=3), seed=True)
+
+        starting_point, uncertainty = problem.estimate_initial_parameter(seed=1)
+        assert len(starting_point) == 4 and len(uncertainty) == 4
+
+        problem.initial_parameter_uncertainty = uncertainty
+        problem.find_optimal_parameter(initial_parameter=starting_point, number_of_iterations=1)
+        estimates = problem.estimated_parameters
+
+        # dose and volume are only identifiable as ratio from concentrations
+        assert np.isclose(estimates[0] / estimates[2], 25, rtol=0.1)
+        assert np.isclose(estimates[1] / estimates[2], 0.5, rtol=0.1)
+        assert np.isclose(estimates[3], 0.1, rtol=0.5)
+        assert problem.result.metadata['error_function'] == 'log-normal'
+        assert len(problem.evaluation_archive) == 0
+
+        diagnostics = problem.get_diagnostics()
+        assert np.allclose(diagnostics.noise_parameters, estimates[3:])
+        assert np.allclose(diagnostics.weighted_residuals[0],
+                           (np.log(self.values[0]) - np.log(diagnostics.predictions[0])) / estimates[3])
+        variance = estimates[3] ** 2
+        assert np.allclose(diagnostics.standard_deviations[0],
+                           diagnostics.predictions[0] * np.sqrt(np.exp(variance) * (np.exp(variance) - 1)))
+
+        with self.assertRaises(ValueError):
+            problem.set_error_model(ErrorModel('additive', number_of_outputs=2))
+
+
+if __name__ == '__main__':
+    unittest.main()
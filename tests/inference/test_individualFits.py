@@ -0,0 +1,76 @@
+import unittest
+
+import numpy as np
+
+from PKPD.inference.individualFits import IndividualFits
+from PKPD.model import model as m
+from PKPD.model.modelBuilder import build_model
+
+
+class TestIndividualFits(unittest.TestCase):
+    """Testing the methods of the IndividualFits class.
+    """
+    # Test case: three patients with noise-free data of a 1-compartment model dosed by the initial condition
+    specification = {'number_of_compartments': 1}
+    model = m.SingleOutputModel(build_model(**specification))
+    times = np.linspace(0.1, 12, 20)
+    true_parameters = np.array([[100, 2, 4], [100, 3, 5], [100, 1, 8]])
+    values = []
+    for parameters in true_parameters:
+        values.append(model.simulate(parameters, times))
+
+    def test_run(self):
+        """Test whether the estimates of each patient reproduce the data-generating parameters, and whether parallel
+        fits reproduce serial fits.
+        """
+        fits = IndividualFits(self.specification, times=[self.times] * 3, values=self.values, patient_ids=[7, 8, 9])
+        results = fits.run(seed=1)
+
+        assert list(results['patient_id']) == [7, 8, 9]
+        assert list(results['number_of_observations']) == [20, 20, 20]
+        assert np.all(results['error'] == '')
+        assert fits.parameter_names == self.model.state_names + self.model.parameter_names
+
+        # dose and volume are only identifiable as ratio from concentrations
+        estimates = results[fits.parameter_names].to_numpy()
+        assert np.allclose(estimates[:, 0] / estimates[:, 2], self.true_parameters[:, 0] / self.true_parameters[:, 2],
+                           rtol=1e-2)
+        assert np.allclose(estimates[:, 1] / estimates[:, 2], self.true_parameters[:, 1] / self.true_parameters[:, 2],
+                           rtol=1e-2)
+
+        parallel_results = fits.run(number_of_processes=2, seed=1)
+        assert np.allclose(parallel_results['objective_score'], results['objective_score'])
+
+    def test_get_summary(self):
+        """Test whether the summary describes the estimates of the successfully fitted patients.
+        """
+        fits = IndividualFits(self.specification, times=[self.times] * 3, values=self.values)
+
+        with self.assertRaises(ValueError):
+            fits.get_summary()
+
+        fits.run(initial_parameter=np.array([100, 2, 5]), seed=2)
+        fits.results.loc[2, 'error'] = 'failed'
+        summary = fits.get_summary()
+
+        estimates = fits.results.loc[:1, fits.parameter_names]
+        assert list(summary.index) == fits.parameter_names
+        assert np.all(summary['number_of_patients'] == 2)
+        assert np.allclose(summary['mean'], estimates.mean())
+        assert np.allclose(summary['coefficient_of_variation'], estimates.std() / estimates.mean().abs())
+
+    def test_bad_input(self):
+        """Test whether mismatching numbers of patients raise errors.
+        """
+        with self.assertRaises(ValueError):
+            IndividualFits(self.specification, times=[self.times] * 2, values=self.values)
+        with self.assertRaises(ValueError):
+            IndividualFits(self.specification, times=[self.times] * 3, values=self.values, protocols=[None])
+
+        fits = IndividualFits(self.specification, times=[self.times] * 3, values=self.values)
+        with self.assertRaises(ValueError):
+            fits.run(doses=np.array([1, 2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
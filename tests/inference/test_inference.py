@@ -7,6 +7,8 @@ import numpy as np
 
 from PKPD.model import model as m
 from PKPD.inference import inference
+from PKPD.inference.archive import EvaluationArchive
+from PKPD.inference.surrogate import SurrogateCMAES
 
 
 class TestSingleOutputProblem(unittest.TestCase):
@@ -76,7 +78,7 @@ class TestSingleOutputProblem(unittest.TestCase):
                                                        )
 
         # iterate through valid optimisers
-        valid_optimisers = [pints.CMAES, pints.NelderMead, pints.PSO, pints.SNES, pints.XNES]
+        valid_optimisers = [pints.CMAES, pints.NelderMead, pints.PSO, pints.SNES, pints.XNES, SurrogateCMAES]
         for opt in valid_optimisers:
             problem.set_optimiser(optimiser=opt)
 
@@ -162,8 +164,150 @@ class TestMultiOutputProblem(unittest.TestCase):
                                                       )
 
         # iterate through valid optimisers
-        valid_optimisers = [pints.CMAES, pints.NelderMead, pints.PSO, pints.SNES, pints.XNES]
+        valid_optimisers = [pints.CMAES, pints.NelderMead, pints.PSO, pints.SNES, pints.XNES, SurrogateCMAES]
         for opt in valid_optimisers:
             problem.set_optimiser(optimiser=opt)
 
             assert opt == problem.optimiser
+
+    def test_refit(self):
+        """Test whether appended observations and patients are incorporated by the refit method.
+        """
+        problem = inference.MultiOutputInverseProblem(models=[self.two_comp_model],
+                                                      times=[self.times[:50]],
+                                                      values=[self.data_two_comp_model[:50]]
+                                                      )
+
+        # fit the first half of the data
+        initial_parameters = np.array([1, 1, 1, 3, 5, 2, 2])
+        problem.find_optimal_parameter(initial_parameter=initial_parameters, number_of_iterations=1)
+
+        # append second half of the data and a new patient
+        problem.add_observations(0, self.times[50:], self.data_two_comp_model[50:])
+        problem.add_patients([self.two_comp_model], [self.times], [self.data_two_comp_model])
+
+        assert len(problem.problem_container) == 2
+        assert np.array_equal(problem.problem_container[0].times(), self.times)
+
+        # refit from previous estimate
+        problem.refit()
+        estimated_parameters = problem.estimated_parameters
+
+        # assert agreement of estimates with true parameters
+        for parameter_id, true_value in enumerate(self.true_parameters):
+            estimated_value = estimated_parameters[parameter_id]
+
+            assert true_value == pytest.approx(estimated_value, rel=0.5)
+
+        # assert that the per-patient errors at the estimate are known for the next refit
+        assert len(problem._patient_errors) == 2
+        assert np.sum(problem._patient_errors) == pytest.approx(problem.objective_score)
+
+    def test_set_parameter_transformation(self):
+        """Test whether the set_parameter_transformation method works as expected and estimates are returned in the
+        model parameter space.
+        """
+        problem = inference.MultiOutputInverseProblem(models=[self.two_comp_model],
+                                                      times=[self.times],
+                                                      values=[self.data_two_comp_model]
+                                                      )
+        initial_parameters = np.array([1, 1, 1, 3, 5, 2, 2])
+
+        with self.assertRaises(ValueError):
+            problem.set_parameter_transformation('exp')
+
+        # logit transformation requires boundaries
+        problem.set_parameter_transformation('logit')
+        with self.assertRaises(ValueError):
+            problem.find_optimal_parameter(initial_parameter=initial_parameters, number_of_iterations=1)
+
+        # transformations map the initial parameters back and forth
+        problem.set_parameter_boundaries([[0.1] * 7, [10] * 7])
+        for transformation in ['log', 'logit', 'scaling']:
+            problem.set_parameter_transformation(transformation)
+            pints_transformation = problem._get_transformation(initial_parameters)
+            search_parameters = pints_transformation.to_search(initial_parameters)
+
+            assert np.allclose(pints_transformation.to_model(search_parameters), initial_parameters)
+
+        # solve inverse problem in log space
+        problem.set_parameter_transformation('log')
+        problem.find_optimal_parameter(initial_parameter=initial_parameters, number_of_iterations=1)
+        estimated_parameters = problem.estimated_parameters
+
+        # assert agreement of estimates with true parameters
+        for parameter_id, true_value in enumerate(self.true_parameters):
+            estimated_value = estimated_parameters[parameter_id]
+
+            assert true_value == pytest.approx(estimated_value, rel=0.5)
+
+    def test_set_evaluation_archive(self):
+        """Test whether evaluations are archived across fits and later fits start from the best archived evaluation.
+        """
+        problem = inference.MultiOutputInverseProblem(models=[self.two_comp_model],
+                                                      times=[self.times],
+                                                      values=[self.data_two_comp_model]
+                                                      )
+
+        # archive has to match the number of patients
+        with self.assertRaises(ValueError):
+            problem.set_evaluation_archive(EvaluationArchive(number_of_parameters=7, number_of_patients=2))
+
+        archive = EvaluationArchive(number_of_parameters=7, number_of_patients=1)
+        problem.set_evaluation_archive(archive, seed=True)
+
+        # fit with first optimiser
+        initial_parameters = np.array([1, 1, 1, 3, 5, 2, 2])
+        problem.find_optimal_parameter(initial_parameter=initial_parameters, number_of_iterations=1)
+        first_score = problem.objective_score
+
+        assert len(archive) == problem.result.restarts['evaluations'][0]
+        assert np.array_equal(archive.best()[0], problem.estimated_parameters)
+
+        # fit with second optimiser starts from the best archived evaluation
+        starting_point, _ = problem._get_archive_seed(initial_parameters, None)
+
+        assert np.array_equal(starting_point, problem.estimated_parameters)
+
+        problem.set_optimiser(pints.XNES)
+        problem.find_optimal_parameter(initial_parameter=initial_parameters, number_of_iterations=1)
+
+        assert problem.objective_score == pytest.approx(first_score, abs=1e-6)
+
+        # changing the error function invalidates the archive
+        problem.set_error_function(pints.MeanSquaredError)
+
+        assert len(archive.best()) == 0
+
+    def test_set_adaptive_tolerance(self):
+        """Test whether fits with adaptive solver tolerances converge and restore the tolerances of the models.
+        """
+        model = m.MultiOutputModel(self.file_name)
+        model.simulation.set_protocol(self.protocol)
+        model.set_output_dimension(2)
+        model.set_tolerance(abs_tol=1.0E-8, rel_tol=1.0E-8)
+
+        problem = inference.MultiOutputInverseProblem(models=[model],
+                                                      times=[self.times],
+                                                      values=[self.data_two_comp_model]
+                                                      )
+
+        with self.assertRaises(ValueError):
+            problem.set_adaptive_tolerance(loose_factor=0.1)
+        problem.set_adaptive_tolerance(loose_factor=1000)
+
+        # solve inverse problem
+        initial_parameters = np.array([1, 1, 1, 3, 5, 2, 2])
+        problem.find_optimal_parameter(initial_parameter=initial_parameters, number_of_iterations=1)
+        estimated_parameters = problem.estimated_parameters
+
+        # assert agreement of estimates with true parameters
+        for parameter_id, true_value in enumerate(self.true_parameters):
+            estimated_value = estimated_parameters[parameter_id]
+
+            assert true_value == pytest.approx(estimated_value, rel=0.5)
+
+        # assert that score is evaluated with the tolerances of the model
+        assert model.simulation._tolerance == model.tolerance
+        assert problem.objective_score == pytest.approx(pints.SumOfSquaresError(problem.problem_container[0])(
+            estimated_parameters))
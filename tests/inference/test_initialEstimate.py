@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+import pytest
+
+from PKPD.inference import inference
+from PKPD.inference.initialEstimate import InitialEstimator
+from PKPD.model import model as m
+
+
+class TestInitialEstimator(unittest.TestCase):
+    """Testing the methods of the InitialEstimator class.
+    """
+    # Test case: Linear One Compartment Model with the dose as initial amount of drug
+    file_name = 'PKPD/modelRepository/1_bolus_linear.mmt'
+    model = m.SingleOutputModel(file_name)
+    true_parameters = np.array([100, 2, 4])  # [initial drug, CL, V]
+    times = np.linspace(0.0, 24.0, 50)
+    data = np.array(model.simulate(true_parameters, times))
+
+    def test_estimate(self):
+        """Test whether the NCA suggestion is screened and the candidates stay within the boundaries.
+        """
+        problem = inference.SingleOutputInverseProblem(models=[self.model], times=[self.times], values=[self.data])
+        problem.set_parameter_boundaries([[1, 0.1, 0.5], [500, 10, 20]])
+        estimator = InitialEstimator(problem, number_of_samples=60, seed=1)
+        starting_point, uncertainty = estimator.estimate()
+
+        # NCA suggestion with default volume and 64 Sobol points
+        assert estimator.candidates.shape == (65, 3)
+        assert np.all(estimator.candidates >= [1, 0.1, 0.5]) and np.all(estimator.candidates <= [500, 10, 20])
+
+        # concentrations of mono-exponential data are matched by the NCA suggestion
+        assert np.array_equal(starting_point, estimator.candidates[0])
+        assert starting_point[0] / starting_point[2] == pytest.approx(25, rel=1e-2)
+        assert starting_point[1] / starting_point[2] == pytest.approx(0.5, rel=1e-2)
+        assert np.all(uncertainty > 0)
+
+        with self.assertRaises(ValueError):
+            InitialEstimator(problem, box_factor=1)
+
+    def test_find_optimal_parameter(self):
+        """Test whether the inverse problem starts from the estimate, if no initial parameter is provided.
+        """
+        problem = inference.SingleOutputInverseProblem(models=[self.model], times=[self.times], values=[self.data])
+
+        # negative clearances let the simulation diverge, so boundaries are required
+        with self.assertRaises(ValueError):
+            problem.find_optimal_parameter(number_of_iterations=1)
+
+        problem.set_parameter_boundaries([[1, 0.1, 0.5], [500, 10, 20]])
+        problem.find_optimal_parameter(number_of_iterations=1)
+
+        assert problem.initial_parameter_uncertainty is not None
+        assert problem.objective_score < 1e-3
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+
+from PKPD.inference.modelSelection import ModelSelection
+from PKPD.model import model as m
+from PKPD.model.modelBuilder import build_model
+
+
+class TestModelSelection(unittest.TestCase):
+    """Testing the methods of the ModelSelection class.
+    """
+    # Test case: two patients with noisy data of a 2-compartment model dosed by the initial condition
+    model = m.SingleOutputModel(build_model(number_of_compartments=2))
+    times = np.linspace(0.1, 24, 30)
+    true_values = model.simulate([100, 0, 2, 1, 4, 0.3, 8], times)
+    noise = np.random.default_rng(0).standard_normal(size=(2, 30))
+    values = [true_values * (1 + 0.05 * noise[0]), true_values * (1 + 0.05 * noise[1])]
+    models = {'one compartment': {'number_of_compartments': 1},
+              'two compartments': 'PKPD/modelRepository/2_bolus_linear.mmt'
+              }
+
+    def test_run(self):
+        """Test whether the data-generating model is ranked first and parallel fits reproduce serial fits.
+        """
+        selection = ModelSelection(self.models, times=[self.times, self.times], values=self.values)
+        results = selection.run(criterion='BIC', seed=1)
+
+        assert list(results['model']) == ['two compartments', 'one compartment']
+        assert list(results['number_of_parameters']) == [7, 3]
+        assert np.all(results['error'] == '')
+        assert np.all(np.diff(results['BIC']) > 0)
+
+        parallel_results = selection.run(criterion='BIC', number_of_processes=2, seed=1)
+        assert np.allclose(parallel_results['objective_score'], results['objective_score'])
+
+        with self.assertRaises(ValueError):
+            selection.run(criterion='R2')
+
+    def test_invalid_models(self):
+        """Test whether invalid candidates are reported as failed fits, and whether the random state of the caller is
+        restored.
+        """
+        models = {'missing file': 'PKPD/modelRepository/missing.mmt', 'no compartments': {'number_of_compartments': 0}}
+        selection = ModelSelection(models, times=[self.times], values=self.values[:1])
+        random_state = np.random.get_state()
+        results = selection.run(seed=1)
+
+        assert np.all(results['error'] != '')
+        assert np.all(np.isnan(results['objective_score']))
+        assert np.array_equal(np.random.get_state()[1], random_state[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import unittest
+
+import numpy as np
+
+from PKPD.inference.nonCompartmental import NonCompartmentalAnalysis
+from PKPD.model import model as m
+
+
+class TestNonCompartmentalAnalysis(unittest.TestCase):
+    """Testing the methods of the NonCompartmentalAnalysis class.
+    """
+    # Test case: one-compartment bolus profiles, for which the log-down trapezoids are exact
+    times = np.linspace(0, 24, 25)
+    dose = 100
+    volume = 4
+    clearance = 2
+    concentrations = dose / volume * np.exp(-clearance / volume * times)
+
+    # fetch 1-compartment bolus model
+    file_path = os.path.dirname(os.path.abspath(__file__))
+    model = m.SingleOutputModel(file_path + '/../../PKPD/modelRepository/1_bolus_linear.mmt')
+
+    def test_metrics(self):
+        """Test whether the NCA metrics of the analytic profiles are recovered, also for unsorted observations.
+        """
+        analysis = NonCompartmentalAnalysis(time_data_container=[self.times, self.times[::-1]],
+                                            concentration_container=[self.concentrations,
+                                                                     2 * self.concentrations[::-1]],
+                                            doses=[self.dose, 2 * self.dose]
+                                            )
+
+        assert np.array_equal(analysis.c_max, [25, 50])
+        assert np.array_equal(analysis.t_max, [0, 0])
+        assert np.allclose(analysis.lambda_z, self.clearance / self.volume)
+        assert np.allclose(analysis.c_zero, [25, 50])
+        assert np.allclose(analysis.auc_inf, [50, 100])
+        assert np.allclose(analysis.clearance, self.clearance)
+        assert np.allclose(analysis.volume, self.volume)
+        assert np.allclose(analysis.half_life, np.log(2) * self.volume / self.clearance)
+        assert analysis.to_dataframe().shape == (2, 8)
+
+    def test_undefined_terminal_phase(self):
+        """Test whether the terminal phase is undefined for increasing profiles and clearance without doses.
+        """
+        analysis = NonCompartmentalAnalysis(time_data_container=[self.times, np.array([1.0])],
+                                            concentration_container=[self.times, np.array([2.0])]
+                                            )
+
+        assert np.array_equal(analysis.c_max, [24, 2])
+        assert np.array_equal(analysis.auc_last, [24 ** 2 / 2, 0])
+        assert np.all(np.isnan(analysis.lambda_z))
+        assert np.all(np.isnan(analysis.clearance))
+
+        with self.assertRaises(ValueError):
+            NonCompartmentalAnalysis([self.times, np.array([])], [self.times, np.array([])])
+
+    def test_suggest_parameters(self):
+        """Test whether the suggested parameters match the true parameters of the profiles.
+        """
+        # dose known, initial condition keeps default
+        analysis = NonCompartmentalAnalysis([self.times], [self.concentrations], doses=self.dose)
+        assert np.allclose(analysis.suggest_parameters(self.model), [0, self.clearance, self.volume])
+
+        # dose unknown, dose is suggested as initial amount given the default volume
+        analysis = NonCompartmentalAnalysis([self.times], [self.concentrations])
+        parameters = analysis.suggest_parameters(self.model, default_parameters=[0, 1, 8])
+        assert np.allclose(parameters, [25 * 8, self.clearance / self.volume * 8, 8])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+import numpy as np
+import pints
+import pints.toy
+
+from PKPD.inference.archive import EvaluationArchive
+from PKPD.inference.objective import CovariateSumOfErrors, PatientSumOfErrors
+from PKPD.model.covariates import CovariateModel
+
+
+class TestPatientSumOfErrors(unittest.TestCase):
+    """Testing the methods of the PatientSumOfErrors class.
+    """
+    # Test case: two patients with the logistic toy model of pints
+    model = pints.toy.LogisticModel()
+    times = np.linspace(0, 100, 20)
+    parameters = np.array([0.1, 50])
+    problems = [pints.SingleOutputProblem(model, times, model.simulate(parameters, times)),
+                pints.SingleOutputProblem(model, times, model.simulate(parameters, times) + 1)
+                ]
+    error_functions = [pints.SumOfSquaresError(problem) for problem in problems]
+
+    def test_call(self):
+        """Test whether the sum of errors agrees with pints and the best evaluation is remembered.
+        """
+        error_measure = PatientSumOfErrors(self.error_functions)
+        reference = pints.SumOfErrors(self.error_functions)
+
+        for parameters in [np.array([0.2, 40]), self.parameters, np.array([0.05, 60])]:
+            assert error_measure(parameters) == reference(parameters)
+
+        assert np.array_equal(error_measure.best_parameters, self.parameters)
+        assert np.array_equal(error_measure.best_patient_errors, [0, 20])
+
+    def test_set_known_errors(self):
+        """Test whether known errors are reused and only unknown errors are evaluated.
+        """
+        error_measure = PatientSumOfErrors(self.error_functions)
+        error_measure.set_known_errors(self.parameters, [100, np.nan])
+
+        assert np.array_equal(error_measure.evaluate_patients(self.parameters), [100, 20])
+        assert np.array_equal(error_measure.evaluate_patients(self.parameters + 1),
+                              [self.error_functions[0](self.parameters + 1),
+                               self.error_functions[1](self.parameters + 1)])
+
+        with self.assertRaises(ValueError):
+            error_measure.set_known_errors(self.parameters, [1])
+
+    def test_archive(self):
+        """Test whether evaluations are recorded in the archive and exact repeats are served from it.
+        """
+        archive = EvaluationArchive(number_of_parameters=2, number_of_patients=2)
+        error_measure = PatientSumOfErrors(self.error_functions, archive)
+        score = error_measure(self.parameters)
+
+        assert np.array_equal(archive.lookup(self.parameters), [0, 20])
+
+        # manipulate archive to check that repeats are not simulated
+        archive.add(self.parameters, [1, np.nan])
+
+        assert error_measure(self.parameters) == 1 + score
+
+
+class TestCovariateSumOfErrors(unittest.TestCase):
+    """Testing the methods of the CovariateSumOfErrors class.
+    """
+    # Test case: two patients with the logistic toy model of pints, where the carrying capacity scales with weight
+    model = pints.toy.LogisticModel()
+    times = np.linspace(0, 100, 20)
+    weights = np.array([[50], [100]])
+    individual_parameters = np.array([[0.1, 50], [0.1, 100]])
+    problems = [pints.SingleOutputProblem(model, times, model.simulate(individual_parameters[0], times)),
+                pints.SingleOutputProblem(model, times, model.simulate(individual_parameters[1], times))
+                ]
+    error_functions = [pints.SumOfSquaresError(problem) for problem in problems]
+
+    def test_call(self):
+        """Test whether the patients are evaluated with their individual parameters.
+        """
+        covariate_model = CovariateModel(['growth_rate', 'carrying_capacity'], self.weights, ['weight'])
+        covariate_model.add_relation('carrying_capacity', 'weight', relation='power', reference=50)
+        error_measure = CovariateSumOfErrors(self.error_functions, covariate_model)
+
+        assert error_measure.n_parameters() == 3
+        assert error_measure([0.1, 50, 1]) == 0
+        assert np.array_equal(error_measure.evaluate_patients([0.1, 50, 0]),
+                              [0, self.error_functions[1](self.individual_parameters[0])])
+
+        with self.assertRaises(ValueError):
+            CovariateSumOfErrors(self.error_functions[:1], covariate_model)
@@ -0,0 +1,130 @@
+import unittest
+
+import numpy as np
+import pints
+import pints.toy
+
+from PKPD.inference.errorModels import ErrorModel
+from PKPD.inference.predictiveCheck import P2Quantile, VisualPredictiveCheck
+
+
+class TestP2Quantile(unittest.TestCase):
+    """Testing the methods of the P2Quantile class.
+    """
+    def test_update(self):
+        """Test whether the streaming estimates agree with the sample quantiles.
+        """
+        samples = np.random.default_rng(1).standard_normal(5000)
+        for probability in [0.05, 0.5, 0.95]:
+            estimator = P2Quantile(probability)
+            for sample in samples:
+                estimator.update(sample)
+
+            assert estimator.number_of_observations == 5000
+            assert abs(estimator.value - np.quantile(samples, probability)) < 0.05
+
+        # few observations are exact
+        estimator = P2Quantile(0.5)
+        for sample in samples[:3]:
+            estimator.update(sample)
+
+        assert estimator.value == np.median(samples[:3])
+
+        with self.assertRaises(ValueError):
+            P2Quantile(1.5)
+
+
+class TestVisualPredictiveCheck(unittest.TestCase):
+    """Testing the methods of the VisualPredictiveCheck class.
+    """
+    # Test case: three patients with the logistic toy model of pints and unit residual error
+    model = pints.toy.LogisticModel()
+    times = np.linspace(0, 100, 20)
+    parameters = np.array([0.1, 50])
+    noise = np.random.default_rng(2).standard_normal(size=(3, 20))
+    problems = [pints.SingleOutputProblem(model, times, model.simulate(parameters, times) + noise[0]),
+                pints.SingleOutputProblem(model, times, model.simulate(parameters, times) + noise[1]),
+                pints.SingleOutputProblem(model, times, model.simulate(parameters, times) + noise[2])
+                ]
+
+    def test_init(self):
+        """Test whether observations are binned and the observed percentiles are computed.
+        """
+        predictive_check = VisualPredictiveCheck(self.problems, self.parameters, number_of_bins=5)
+
+        assert np.array_equal(predictive_check.bin_edges, np.quantile(np.tile(self.times, 3), np.linspace(0, 1, 6)))
+        assert predictive_check.bin_centres.shape == (5,)
+        assert predictive_check.observed_percentiles.shape == (1, 3, 5)
+        assert np.all(np.isnan(predictive_check.simulated_bands))
+
+        values = np.concatenate([problem.values() for problem in self.problems])
+        predictions = np.tile(self.model.simulate(self.parameters, self.times), 3)
+        assert np.allclose(predictive_check.residual_standard_deviation, np.sqrt(np.mean((values - predictions) ** 2)))
+
+    def test_censoring(self):
+        """Test whether censored observations are excluded from the observed percentiles and the residuals, and
+        whether standard deviations of each observation are accepted.
+        """
+        is_censored = [self.times < 20, np.zeros(20, dtype=bool), np.zeros(20, dtype=bool)]
+        standard_deviations = np.linspace(0.5, 1.5, 60)[:, np.newaxis]
+        predictive_check = VisualPredictiveCheck(self.problems, self.parameters, number_of_bins=5,
+                                                 residual_standard_deviation=standard_deviations,
+                                                 is_censored=is_censored)
+
+        values = np.concatenate([problem.values() for problem in self.problems])
+        is_observed = ~np.concatenate(is_censored)
+        first_bin = is_observed & (np.tile(self.times, 3) <= predictive_check.bin_edges[1])
+        assert np.isclose(predictive_check.observed_percentiles[0, 1, 0], np.median(values[first_bin]))
+        assert np.array_equal(predictive_check.residual_standard_deviation, standard_deviations)
+
+        predictive_check.run(number_of_replicates=20, seed=3)
+        assert not np.any(np.isnan(predictive_check.simulated_bands))
+
+        # residuals of censored observations are ignored
+        predictions = np.tile(self.model.simulate(self.parameters, self.times), 3)
+        predictive_check = VisualPredictiveCheck(self.problems, self.parameters, is_censored=is_censored)
+        assert np.isclose(predictive_check.residual_standard_deviation[0, 0],
+                          np.sqrt(np.mean((values - predictions)[is_observed] ** 2)))
+
+    def test_run(self):
+        """Test whether the simulated bands are ordered and cover the observed median.
+        """
+        predictive_check = VisualPredictiveCheck(self.problems, self.parameters, number_of_bins=5,
+                                                 residual_standard_deviation=1)
+        predictive_check.run(number_of_replicates=200, batch_size=64, seed=3)
+        bands = predictive_check.simulated_bands
+
+        assert predictive_check.number_of_replicates == 200
+        assert bands.shape == (1, 3, 3, 5)
+        assert np.all(bands[:, :, 0] <= bands[:, :, 1]) and np.all(bands[:, :, 1] <= bands[:, :, 2])
+        assert np.all(bands[0, 0, 1] < bands[0, 2, 1])
+
+        # observed percentiles lie within the simulated bands in most bins
+        observed = predictive_check.observed_percentiles
+        assert np.mean((bands[:, :, 0] <= observed) & (observed <= bands[:, :, 2])) > 0.7
+
+    def test_error_model(self):
+        """Test whether replicates are sampled from the error model, i.e. log-normal replicates are positive and
+        scatter around the predictions as their median.
+        """
+        error_model = ErrorModel('log-normal')
+        predictive_check = VisualPredictiveCheck(self.problems, self.parameters, error_model=error_model,
+                                                 noise_parameters=[0.5])
+        replicates = predictive_check._simulate_replicates(np.random.default_rng(3), size=2000)
+
+        assert replicates.shape == (2000, 60, 1)
+        assert np.all(replicates > 0)
+        assert np.allclose(np.median(replicates, axis=0), predictive_check.predictions, rtol=0.1)
+        assert np.allclose(np.std(np.log(replicates), axis=0), 0.5, rtol=0.1)
+
+        # additive error models scatter with their standard deviation
+        predictive_check = VisualPredictiveCheck(self.problems, self.parameters, error_model=ErrorModel('additive'),
+                                                 noise_parameters=[2])
+        replicates = predictive_check._simulate_replicates(np.random.default_rng(3), size=2000)
+
+        assert np.all(predictive_check.residual_standard_deviation == 2)
+        assert np.allclose(np.std(replicates, axis=0), 2, rtol=0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
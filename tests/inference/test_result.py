@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from PKPD.inference.result import OptimisationResult
+
+
+class TestOptimisationResult(unittest.TestCase):
+    """Testing the methods of the OptimisationResult class.
+    """
+    def _create_result(self):
+        """Creates a result with two restarts.
+        """
+        result = OptimisationResult(number_of_parameters=3, metadata={'optimiser': 'CMAES'})
+        result.add_restart(estimate=[1, 2, 3], score=0.5, evaluations=100, iterations=10, time=0.1,
+                           trace=[2.0, 1.0, 0.5])
+        result.add_restart(estimate=[1.1, 2.1, 3.1], score=0.2, evaluations=120, iterations=12, time=0.2,
+                           trace=[1.5, 0.2])
+
+        return result
+
+    def test_add_restart(self):
+        """Test whether restarts are recorded and the best restart is selected.
+        """
+        result = self._create_result()
+
+        assert len(result.restarts) == 2
+        assert result.best_restart == 1
+        assert np.array_equal(result.estimated_parameters, [1.1, 2.1, 3.1])
+        assert result.objective_score == 0.2
+        assert np.array_equal(result.get_trace(0), [2.0, 1.0, 0.5])
+        assert np.array_equal(result.get_trace(1), [1.5, 0.2])
+
+    def test_empty_result(self):
+        """Test whether accessing the estimate of an empty result raises an error.
+        """
+        result = OptimisationResult(number_of_parameters=3)
+
+        with self.assertRaises(ValueError):
+            result.estimated_parameters
+
+    def test_save_load(self):
+        """Test whether a result survives the round trip to a binary file.
+        """
+        result = self._create_result()
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'result.npz')
+            result.save(file_path)
+            loaded_result = OptimisationResult.load(file_path)
+
+        assert np.array_equal(result.restarts, loaded_result.restarts)
+        assert np.array_equal(result.traces, loaded_result.traces)
+        assert result.metadata == loaded_result.metadata
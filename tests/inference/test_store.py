@@ -0,0 +1,110 @@
+import tempfile
+import unittest
+
+import myokit
+import numpy as np
+
+from PKPD.inference import inference
+from PKPD.inference.result import OptimisationResult
+from PKPD.inference.store import ResultsStore, hash_problem, hash_settings
+from PKPD.model import model as m
+
+
+class TestResultsStore(unittest.TestCase):
+    """Testing the methods of the ResultsStore class and its integration into the inverse problems.
+    """
+    # Test case: Linear One Compartment Model with Bolus dosing
+    file_name = 'PKPD/modelRepository/1_bolus_linear.mmt'
+    one_comp_model = m.SingleOutputModel(file_name)
+    true_parameters = [5, 1, 4]  # [initial drug, CL, V]
+    times = np.linspace(0.0, 24.0, 25)
+    values = one_comp_model.simulate(true_parameters, times)
+
+    def _create_result(self, score):
+        """Creates a result with a single restart.
+        """
+        result = OptimisationResult(number_of_parameters=3)
+        result.add_restart(estimate=[score, 1, 4], score=score, evaluations=10, iterations=1, time=0.1)
+
+        return result
+
+    def test_put_get(self):
+        """Test whether results are stored and retrieved by their keys.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            store = ResultsStore(directory)
+            store.put('settings_a', 'problem', self._create_result(score=2.0))
+            store.put('settings_b', 'problem', self._create_result(score=1.0))
+
+            assert store.get('settings_a').objective_score == 2.0
+            assert store.get('unknown') is None
+            assert store.get_best('problem').objective_score == 1.0
+            assert store.get_best('unknown') is None
+
+            store.clear()
+            assert store.get('settings_a') is None
+
+    def test_hash_settings(self):
+        """Test whether settings keys distinguish initial points and covariate relations.
+        """
+        key_a = hash_settings('problem', ['CMAES', None, np.array([1.0, 2.0]), 5])
+        key_b = hash_settings('problem', ['CMAES', None, np.array([1.0, 2.0]), 5])
+        key_c = hash_settings('problem', ['CMAES', None, np.array([1.0, 2.1]), 5])
+
+        assert key_a == key_b
+        assert key_a != key_c
+
+        # covariate relations mix names and values
+        relations = [['central_compartment.CL', 'weight', 'allometric', 70.0, 0.75]]
+        key_a = hash_settings('problem', ['CMAES', relations])
+        key_b = hash_settings('problem', ['CMAES', [['central_compartment.CL', 'weight', 'allometric', 80.0, 0.75]]])
+        assert key_a == hash_settings('problem', ['CMAES', relations])
+        assert key_a != key_b
+
+    def test_find_optimal_parameter(self):
+        """Test whether an identical fit is returned from the store and the problem key depends on the data.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            store = ResultsStore(directory)
+            problem = inference.SingleOutputInverseProblem(models=[self.one_comp_model],
+                                                           times=[self.times],
+                                                           values=[self.values]
+                                                           )
+            problem.set_results_store(store)
+
+            initial_parameters = np.array([5.1, 1.1, 4.1])
+            problem.find_optimal_parameter(initial_parameter=initial_parameters, number_of_iterations=1)
+            first_result = problem.result
+
+            # assert that second fit is returned from store
+            problem.find_optimal_parameter(initial_parameter=initial_parameters, number_of_iterations=1)
+            assert np.array_equal(first_result.restarts, problem.result.restarts)
+
+            # assert that problem key changes with data
+            other_problem = inference.SingleOutputInverseProblem(models=[self.one_comp_model],
+                                                                 times=[self.times],
+                                                                 values=[2 * self.values]
+                                                                 )
+            assert hash_problem(problem.problem_container, problem.error_function_container) != \
+                hash_problem(other_problem.problem_container, other_problem.error_function_container)
+
+    def test_hash_problem(self):
+        """Test whether the problem key depends on the selected output, the dosing protocol and the steady state
+        settings.
+        """
+        model = m.SingleOutputModel(self.file_name)
+        problem = inference.SingleOutputInverseProblem(models=[model], times=[self.times], values=[self.values])
+        keys = [hash_problem(problem.problem_container, problem.error_function_container)]
+
+        model.set_output('central_compartment.drug')
+        keys.append(hash_problem(problem.problem_container, problem.error_function_container))
+
+        protocol = myokit.Protocol()
+        protocol.schedule(level=1.0, start=0, duration=0.5, period=12)
+        model.simulation.set_protocol(protocol)
+        keys.append(hash_problem(problem.problem_container, problem.error_function_container))
+
+        model.set_steady_state(dosing_interval=12)
+        keys.append(hash_problem(problem.problem_container, problem.error_function_container))
+
+        assert len(set(keys)) == 4
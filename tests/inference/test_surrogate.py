@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+import pints
+import pints.toy
+import pytest
+
+from PKPD.inference.surrogate import SurrogateCMAES
+
+
+class TestSurrogateCMAES(unittest.TestCase):
+    """Testing the methods of the SurrogateCMAES class.
+    """
+    # Test case: logistic toy model of pints
+    model = pints.toy.LogisticModel()
+    true_parameters = [0.015, 500]
+    times = np.linspace(0, 1000, 100)
+    problem = pints.SingleOutputProblem(model, times, model.simulate(true_parameters, times))
+    error_measure = pints.SumOfSquaresError(problem)
+
+    def test_run(self):
+        """Test whether the optimiser finds the minimum and only simulates a fraction of the candidates once the
+        surrogate is available.
+        """
+        np.random.seed(1)
+        optimisation = pints.OptimisationController(function=self.error_measure,
+                                                    x0=[0.01, 450],
+                                                    boundaries=pints.RectangularBoundaries([0, 400], [0.03, 600]),
+                                                    method=SurrogateCMAES
+                                                    )
+        optimisation.set_log_to_screen(False)
+        optimisation.set_max_iterations(200)
+        estimates, _ = optimisation.run()
+
+        for parameter_id, true_value in enumerate(self.true_parameters):
+            assert true_value == pytest.approx(estimates[parameter_id], rel=0.01)
+
+        # at most 2 of the 6 candidates per iteration are simulated once the surrogate is available
+        population_size = optimisation.optimiser().population_size()
+        assert optimisation.evaluations() < population_size * optimisation.iterations() / 2
+
+    def test_ask_tell(self):
+        """Test whether the best score only reflects simulated candidates.
+        """
+        optimiser = SurrogateCMAES(x0=[0.01, 450], sigma0=[0.001, 10])
+
+        for _ in range(10):
+            candidates = optimiser.ask()
+            scores = [self.error_measure(candidate) for candidate in candidates]
+            optimiser.tell(scores)
+
+            assert optimiser.f_best() == pytest.approx(self.error_measure(optimiser.x_best()))
+
+        with self.assertRaises(Exception):
+            optimiser.tell(scores)
+
+    def test_set_screening_fraction(self):
+        """Test whether invalid screening fractions are rejected.
+        """
+        optimiser = SurrogateCMAES(x0=[0.01, 450])
+
+        with self.assertRaises(ValueError):
+            optimiser.set_screening_fraction(0)
+        with self.assertRaises(ValueError):
+            optimiser.set_screening_fraction(1.5)
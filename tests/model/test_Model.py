@@ -1,3 +1,4 @@
+import pickle
 import unittest
 
 import myokit
@@ -75,6 +76,72 @@ class TestSingleOutputModel(unittest.TestCase):
 
         assert np.array_equal(expected_result, model_result)
 
+    def test_simulate_into_buffer(self):
+        """Tests whether simulate writes into a provided output array and returns it.
+        """
+        # Test case I: 1-compartment model
+        parameters = [0, 2, 4]
+        times = np.arange(25)
+
+        # expected
+        expected_result = self.one_comp_model.simulate(parameters, times)
+
+        # assert that result is written into buffer
+        buffer = np.empty(len(times))
+        model_result = self.one_comp_model.simulate(parameters, times, out=buffer)
+
+        assert model_result is buffer
+        assert np.array_equal(expected_result, buffer)
+
+    def test_pickle(self):
+        """Tests whether the parameters set by simulate are retained when the simulation is pickled, e.g. for process
+        pools.
+        """
+        model = m.SingleOutputModel(self.file_name)
+        model.simulate([10, 3, 5], np.arange(25))
+
+        simulation = pickle.loads(pickle.dumps(model.simulation))
+        assert simulation._model.get('central_compartment.CL').eval() == 3
+        assert simulation._model.get('central_compartment.V').eval() == 5
+
+    def test_simulate_dense(self):
+        """Tests whether the dense output reproduces the simulated output at arbitrary times.
+        """
+        # Test case I: 1-compartment model
+        parameters = [10, 2, 4]
+        times = np.linspace(0.5, 23.5, 17)
+
+        # expected
+        expected_result = self.one_comp_model.simulate(parameters, times)
+
+        # assert that interpolated dense output coincides with simulation
+        dense_output = self.one_comp_model.simulate_dense(parameters, end_time=24)
+        assert np.allclose(expected_result, dense_output.evaluate(times), rtol=1.0E-3)
+
+        # assert that extrapolation is rejected
+        with self.assertRaises(ValueError):
+            dense_output.evaluate([25])
+
+    def test_set_tolerance(self):
+        """Tests whether tighter solver tolerances and a maximal step size agree with the analytic solution.
+        """
+        model = m.SingleOutputModel(self.file_name)
+        model.set_tolerance(abs_tol=1.0E-10, rel_tol=1.0E-10)
+        model.set_max_step_size(0.1)
+
+        assert model.tolerance == (1.0E-10, 1.0E-10)
+        assert model.max_step_size == 0.1
+
+        # without dosing the 1-compartment model decays exponentially: [initial drug, CL, V]
+        parameters = [10, 2, 4]
+        times = np.linspace(0, 24, 25)
+        expected_result = 10 / 4 * np.exp(-2 / 4 * times)
+
+        assert np.allclose(model.simulate(parameters, times), expected_result, rtol=1.0E-8)
+
+        with self.assertRaises(ValueError):
+            model.set_max_step_size(0)
+
 
 class TestMultiOutputModel(unittest.TestCase):
     """Tests the functionality of all methods of the MultiOutputModel class.
@@ -162,3 +229,51 @@ class TestMultiOutputModel(unittest.TestCase):
         model_result = self.two_comp_model.simulate(parameters, times).transpose()
 
         assert np.allclose(np_expected_result, model_result)
+
+    def test_simulate_into_buffer(self):
+        """Tests whether simulate writes into a provided output array and returns it in the layout expected by pints.
+        """
+        parameters = [0, 0, 1, 3, 5, 2, 2]
+        times = np.arange(100)
+
+        # expected
+        expected_result = self.two_comp_model.simulate(parameters, times)
+
+        # assert that result is written into buffer
+        buffer = np.empty(shape=(len(times), self.output_dimension))
+        model_result = self.two_comp_model.simulate(parameters, times, out=buffer)
+
+        assert model_result is buffer
+        assert model_result.flags['C_CONTIGUOUS']
+        assert np.array_equal(expected_result, buffer)
+
+    def test_simulate_dense(self):
+        """Tests whether the dense output reproduces the simulated outputs at arbitrary times.
+        """
+        parameters = [4, 0, 1, 3, 5, 2, 2]
+        times = np.linspace(0.5, 23.5, 17)
+
+        # expected
+        expected_result = self.two_comp_model.simulate(parameters, times)
+
+        # assert that interpolated dense output coincides with simulation
+        dense_output = self.two_comp_model.simulate_dense(parameters, end_time=24)
+        model_result = dense_output.evaluate(times)
+
+        assert model_result.shape == expected_result.shape
+        assert np.allclose(expected_result, model_result, rtol=1.0E-3, atol=1.0E-6)
+
+    def test_set_tolerance(self):
+        """Tests whether the simulation with tight solver tolerances agrees with the default tolerances.
+        """
+        model = m.MultiOutputModel(self.file_name)
+        model.set_output_dimension(self.output_dimension)
+        parameters = [4, 0, 1, 3, 5, 2, 2]
+        times = np.linspace(0, 24, 25)
+        expected_result = model.simulate(parameters, times)
+
+        model.set_tolerance(abs_tol=1.0E-10, rel_tol=1.0E-10)
+        model.set_max_step_size(0.1)
+
+        assert model.tolerance == (1.0E-10, 1.0E-10)
+        assert np.allclose(model.simulate(parameters, times), expected_result, rtol=1.0E-3, atol=1.0E-5)
@@ -0,0 +1,132 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from PKPD.inference import inference
+from PKPD.inference.archive import EvaluationArchive
+from PKPD.inference.store import ResultsStore
+from PKPD.model import model as m
+from PKPD.model.covariates import CovariateModel, get_patient_covariates, split_covariates
+
+
+class TestCovariateModel(unittest.TestCase):
+    """Testing the methods of the CovariateModel class.
+    """
+    parameter_names = ['central_compartment.drug', 'central_compartment.CL', 'central_compartment.V']
+    covariates = np.array([[35, 40, 90], [70, 60, np.nan], [140, 20, 120]])  # weight, age, creatinine clearance
+    covariate_names = ['weight', 'age', 'creatinine_clearance']
+
+    def test_compute_individual_parameters(self):
+        """Test the relations, their reference values and the handling of missing covariates.
+        """
+        covariate_model = CovariateModel(self.parameter_names, self.covariates, self.covariate_names)
+        covariate_model.add_relation('central_compartment.CL', 'weight', relation='allometric', reference=70)
+        covariate_model.add_relation('central_compartment.V', 'weight', relation='allometric', reference=70)
+        covariate_model.add_relation('central_compartment.CL', 'creatinine_clearance', relation='power')
+        covariate_model.add_relation('central_compartment.V', 'age', relation='exponential')
+
+        assert covariate_model.n_parameters() == 5
+        assert covariate_model.get_parameter_names()[3:] == ['central_compartment.CL.creatinine_clearance_exponent',
+                                                             'central_compartment.V.age_coefficient']
+
+        population_parameters = np.array([100, 2, 4])
+        individual_parameters = covariate_model.compute_individual_parameters([100, 2, 4, 0.5, -0.01])
+
+        # reference of creatinine clearance is the median 105, missing creatinine clearance takes the reference value
+        weight_factors = np.array([0.5, 1, 2])
+        expected_parameters = np.array([
+            population_parameters[0] * np.ones(3),
+            2 * weight_factors ** 0.75 * (np.array([90, 105, 120]) / 105) ** 0.5,
+            4 * weight_factors * np.exp(-0.01 * (np.array([40, 60, 20]) - 40))
+        ]).T
+        assert np.allclose(individual_parameters, expected_parameters)
+
+        coefficients, uncertainty = covariate_model.get_initial_coefficients()
+        assert np.array_equal(coefficients, [0, 0])
+        assert np.all(uncertainty > 0)
+
+        with self.assertRaises(ValueError):
+            covariate_model.add_relation('central_compartment.CL', 'weight', relation='linear')
+        with self.assertRaises(ValueError):
+            covariate_model.add_relation('central_compartment.Q', 'weight')
+        with self.assertRaises(ValueError):
+            covariate_model.add_relation('central_compartment.CL', 'age', reference=-1)
+        with self.assertRaises(ValueError):
+            covariate_model.compute_individual_parameters(population_parameters)
+
+    def test_data(self):
+        """Test whether covariate columns are separated and reduced to one row per patient.
+        """
+        data_df = pd.DataFrame({'ID': [1, 1, 2, 2], 'time': [0, 1, 0, 1], 'cov_weight': [np.nan, 70, 80, 80],
+                                'concentration': [1, 0.5, 2, 1], 'COV_age': [30, 30, 50, 50]})
+        data_df, covariate_df = split_covariates(data_df)
+
+        assert list(data_df.keys()) == ['ID', 'time', 'concentration']
+        assert list(covariate_df.keys()) == ['weight', 'age']
+        assert np.array_equal(get_patient_covariates(covariate_df, data_df['ID'].to_numpy(), np.array([2, 1])),
+                              [[80, 50], [70, 30]])
+        assert split_covariates(data_df)[1] is None
+
+
+class TestCovariateInverseProblem(unittest.TestCase):
+    """Testing the estimation of covariate coefficients with an inverse problem.
+    """
+    # Test case: Linear One Compartment Model, where the clearance scales with creatinine clearance
+    file_name = 'PKPD/modelRepository/1_bolus_linear.mmt'
+    model = m.SingleOutputModel(file_name)
+    times = np.linspace(0.0, 24.0, 25)
+    covariates = np.array([[60], [90], [120], [150]])
+
+    def test_find_optimal_parameter(self):
+        """Test whether the population parameters and the covariate exponent are recovered, and whether the fit is
+        stored.
+        """
+        covariate_model = CovariateModel(['central_compartment.drug', 'central_compartment.CL',
+                                          'central_compartment.V'], self.covariates, ['creatinine_clearance'])
+        covariate_model.add_relation('central_compartment.CL', 'creatinine_clearance', reference=100)
+        true_parameters = np.array([100, 2, 4, 0.8])
+        values = [self.model.simulate(parameters, self.times)
+                  for parameters in covariate_model.compute_individual_parameters(true_parameters)]
+
+        problem = inference.SingleOutputInverseProblem(models=[self.model] * 4, times=[self.times] * 4, values=values)
+        problem.set_covariate_model(covariate_model)
+        with tempfile.TemporaryDirectory() as directory:
+            problem.set_results_store(ResultsStore(directory))
+            np.random.seed(1)
+            problem.find_optimal_parameter(initial_parameter=np.array([80, 1, 5, 0]), number_of_iterations=1)
+
+            # concentrations only identify the initial concentration, the elimination rate and the covariate exponent
+            drug, clearance, volume, exponent = problem.estimated_parameters
+            assert np.allclose([drug / volume, clearance / volume, exponent], [25, 0.5, 0.8], rtol=1e-2)
+
+            # assert that second fit is returned from store
+            first_result = problem.result
+            problem.find_optimal_parameter(initial_parameter=np.array([80, 1, 5, 0]), number_of_iterations=1)
+            assert np.array_equal(first_result.restarts, problem.result.restarts)
+
+        with self.assertRaises(ValueError):
+            problem.set_covariate_model(CovariateModel(covariate_model.parameter_names, [[1]], ['age']))
+
+    def test_evaluation_archive(self):
+        """Test whether covariate fits bypass an archive of the model parameters.
+        """
+        covariate_model = CovariateModel(['central_compartment.drug', 'central_compartment.CL',
+                                          'central_compartment.V'], self.covariates, ['weight'])
+        covariate_model.add_relation('central_compartment.CL', 'weight', relation='power')
+        values = [self.model.simulate(parameters, self.times)
+                  for parameters in covariate_model.compute_individual_parameters([100, 2, 4, 0.75])]
+
+        problem = inference.SingleOutputInverseProblem(models=[self.model] * 4, times=[self.times] * 4, values=values)
+        problem.set_evaluation_archive(EvaluationArchive(number_of_parameters=3, number_of_patients=4), seed=True)
+        problem.set_covariate_model(covariate_model)
+        np.random.seed(1)
+        problem.find_optimal_parameter(initial_parameter=np.array([80, 1, 5, 0]), number_of_iterations=1)
+
+        assert len(problem.estimated_parameters) == 4
+        assert len(problem.evaluation_archive) == 0
+
+
+if __name__ == '__main__':
+    unittest.main()
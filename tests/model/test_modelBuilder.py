@@ -0,0 +1,62 @@
+import unittest
+
+import myokit
+import numpy as np
+
+from PKPD.model import model as m
+from PKPD.model.modelBuilder import build_model
+
+
+class TestBuildModel(unittest.TestCase):
+    """Tests the generation of models by the build_model function.
+    """
+    # reference: 2-compartment model with subcutaneous dosing from the model repository
+    file_name = 'PKPD/modelRepository/2_subcut_linear.mmt'
+
+    def test_repository_equivalence(self):
+        """Tests whether generated models reproduce the models of the repository.
+        """
+        reference_model = m.SingleOutputModel(self.file_name)
+        model = m.SingleOutputModel(build_model(number_of_compartments=2, dose_route='subcut'))
+
+        assert model.state_names == reference_model.state_names
+        assert model.parameter_names == reference_model.parameter_names
+        assert model.output_name == reference_model.output_name
+
+        # simulate one dose with both models
+        protocol = myokit.Protocol()
+        protocol.schedule(level=10, start=1, duration=1)
+        reference_model.simulation.set_protocol(protocol)
+        model.simulation.set_protocol(protocol)
+        parameters = [0, 0, 0, 2, 0.3, 4, 0.5, 0.2, 2]
+        times = np.linspace(0, 10, 20)
+
+        assert np.allclose(model.simulate(parameters, times), reference_model.simulate(parameters, times))
+
+    def test_specifications(self):
+        """Tests the compartments and parameters of the dose routes and eliminations, and the caching of models.
+        """
+        model = build_model(number_of_compartments=3, dose_route='oral', elimination='michaelis-menten',
+                            number_of_transit_compartments=2)
+        state_names = ['central_compartment.drug', 'dose_compartment.drug', 'peripheral_compartment_1.drug',
+                       'peripheral_compartment_2.drug', 'transit_compartment_1.drug', 'transit_compartment_2.drug']
+
+        assert [state.qname() for state in model.states()] == state_names
+        assert model.has_variable('central_compartment.Vmax') and not model.has_variable('central_compartment.CL')
+        assert model.has_variable('dose_compartment.MTT')
+        model.check_units(mode=myokit.UNIT_STRICT)
+
+        # repeated builds are served from the cache
+        assert build_model(3, 'oral', 'michaelis-menten', 2) is model
+        assert build_model(1, 'bolus', number_of_transit_compartments=5) is build_model(1)
+
+        with self.assertRaises(ValueError):
+            build_model(0)
+        with self.assertRaises(ValueError):
+            build_model(1, dose_route='inhaled')
+        with self.assertRaises(ValueError):
+            build_model(1, elimination='saturable')
+
+
+if __name__ == '__main__':
+    unittest.main()
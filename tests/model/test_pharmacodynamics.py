@@ -0,0 +1,143 @@
+import unittest
+
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from PKPD.model import model as m
+from PKPD.model.pharmacodynamics import (DirectEmax, EffectCompartment, IndirectResponse, PKPDModel, PKTrajectory,
+                                         SigmoidEmax)
+
+
+class CountingModel(object):
+    """Wraps a PK model and counts the number of solved forward problems.
+    """
+    def __init__(self, model):
+        self.model = model
+        self.state_names = model.state_names
+        self.parameter_names = model.parameter_names
+        self.number_of_simulations = 0
+
+    def n_parameters(self):
+        return self.model.n_parameters()
+
+    def n_outputs(self):
+        return self.model.n_outputs()
+
+    def simulate(self, parameters, times):
+        self.number_of_simulations += 1
+        return self.model.simulate(parameters, times)
+
+
+class TestPDModels(unittest.TestCase):
+    """Testing the PD models against reference solutions of the mono-exponential concentration C = 25 exp(-0.5 t).
+    """
+    times = np.linspace(0, 24, 13)
+    grid = np.union1d(np.linspace(0, 24, 2001), times)
+    trajectory = PKTrajectory(grid, 25 * np.exp(-0.5 * grid))
+
+    def concentration(self, time):
+        return 25 * np.exp(-0.5 * time)
+
+    def test_direct_models(self):
+        """Test the direct Emax models and the vectorisation over parameter sets.
+        """
+        concentrations = self.concentration(self.times)
+        effect = DirectEmax().simulate([10, 50, 5], self.trajectory, self.times)
+        assert np.allclose(effect, 10 + 50 * concentrations / (5 + concentrations))
+
+        parameter_sets = np.array([[10, 50, 5, 1], [0, 1, 2, 3]])
+        effects = SigmoidEmax().simulate(parameter_sets, self.trajectory, self.times)
+        assert effects.shape == (2, len(self.times))
+        assert np.allclose(effects[0], effect)
+        assert np.allclose(effects[1], concentrations ** 3 / (8 + concentrations ** 3))
+
+        with self.assertRaises(ValueError):
+            DirectEmax().simulate([10, 50], self.trajectory, self.times)
+        with self.assertRaises(ValueError):
+            DirectEmax().simulate([10, 50, 5], self.trajectory, [0.001])
+
+    def test_effect_compartment(self):
+        """Test the effect compartment model against a numerical solution.
+        """
+        ke0 = 0.3
+        effect_concentrations = solve_ivp(lambda t, x: ke0 * (self.concentration(t) - x), (0, 24), [0],
+                                          t_eval=self.times, rtol=1e-10, atol=1e-12).y[0]
+        reference = 10 + 50 * effect_concentrations ** 2 / (25 + effect_concentrations ** 2)
+
+        effect = EffectCompartment(SigmoidEmax()).simulate([ke0, 10, 50, 5, 2], self.trajectory, self.times)
+        assert np.allclose(effect, reference, rtol=1e-4)
+
+        with self.assertRaises(ValueError):
+            EffectCompartment(IndirectResponse())
+
+    def test_indirect_response(self):
+        """Test the four indirect response mechanisms against numerical solutions.
+        """
+        baseline, loss_rate, maximal_effect, half_maximal_concentration = [10, 0.2, 0.8, 5]
+        for mechanism in ['inhibit-production', 'inhibit-loss', 'stimulate-production', 'stimulate-loss']:
+            sign = -1 if mechanism.startswith('inhibit') else 1
+
+            def drug_effect(time):
+                concentration = self.concentration(time)
+                return 1 + sign * maximal_effect * concentration / (half_maximal_concentration + concentration)
+
+            if mechanism.endswith('production'):
+                rhs = lambda t, r: baseline * loss_rate * drug_effect(t) - loss_rate * r
+            else:
+                rhs = lambda t, r: baseline * loss_rate - loss_rate * drug_effect(t) * r
+            reference = solve_ivp(rhs, (0, 24), [baseline], t_eval=self.times, rtol=1e-10, atol=1e-12).y[0]
+
+            model = IndirectResponse(mechanism)
+            effect = model.simulate([baseline, loss_rate, maximal_effect, half_maximal_concentration],
+                                    self.trajectory, self.times)
+            assert np.allclose(effect, reference, rtol=1e-4)
+
+        with self.assertRaises(ValueError):
+            IndirectResponse('inhibit-binding')
+
+
+class TestPKPDModel(unittest.TestCase):
+    """Testing the methods of the PKPDModel class.
+    """
+    # Test case: Linear One Compartment Model with the dose as initial amount of drug
+    file_name = 'PKPD/modelRepository/1_bolus_linear.mmt'
+    pk_parameters = np.array([100, 2, 4])
+    times = np.linspace(0, 24, 13)
+
+    def test_simulate(self):
+        """Test whether the PK model is solved once for changing PD parameters and PD models.
+        """
+        pk_model = CountingModel(m.SingleOutputModel(self.file_name))
+        model = PKPDModel(pk_model, DirectEmax())
+        assert model.n_parameters() == 6
+        assert model.get_parameter_names()[-3:] == ['pharmacodynamics.E0', 'pharmacodynamics.Emax',
+                                                    'pharmacodynamics.EC50']
+
+        effect = model.simulate(np.r_[self.pk_parameters, 10, 50, 5], self.times)
+        concentrations = 25 * np.exp(-0.5 * self.times)
+        assert np.allclose(effect, 10 + 50 * concentrations / (5 + concentrations), rtol=1e-3)
+
+        # PD parameters and models change without solving the PK model again
+        model.simulate(np.r_[self.pk_parameters, 0, 1, 2], self.times)
+        model.set_pd_model(EffectCompartment())
+        effects = model.simulate_pd(self.pk_parameters, [[0.3, 10, 50, 5], [1, 10, 50, 5]], self.times)
+        assert effects.shape == (2, len(self.times))
+        assert pk_model.number_of_simulations == 1
+
+        # fixed PK parameters
+        model.fix_pk_parameters(self.pk_parameters)
+        assert model.n_parameters() == 4
+        assert np.array_equal(model.simulate([0.3, 10, 50, 5], self.times), effects[0])
+        assert pk_model.number_of_simulations == 1
+
+        # new PK parameters require a new solution
+        model.fix_pk_parameters()
+        model.simulate(np.r_[2 * self.pk_parameters, 0.3, 10, 50, 5], self.times)
+        assert pk_model.number_of_simulations == 2
+
+        with self.assertRaises(ValueError):
+            model.fix_pk_parameters([1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
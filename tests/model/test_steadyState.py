@@ -0,0 +1,76 @@
+import unittest
+
+import myokit
+import numpy as np
+
+from PKPD.model import model as m
+from PKPD.model.steadyState import SteadyStateSolver
+
+
+class TestSteadyStateSolver(unittest.TestCase):
+    """Tests the functionality of the SteadyStateSolver class and its integration into the model classes.
+    """
+    # Test case I: 1-compartment model with dose every 12 hours
+    file_name = 'PKPD/modelRepository/1_bolus_linear.mmt'
+    dosing_interval = 12.0
+    protocol = myokit.Protocol()
+    protocol.schedule(level=4, start=0, duration=1, period=dosing_interval)
+
+    parameters = [0, 1, 4]  # [initial drug, CL, V]
+
+    def _brute_force_steady_state(self, model, number_of_doses=50):
+        """Integrates the model from t=0 through many dosing intervals and returns the state at the beginning of the
+        last interval.
+        """
+        model.simulation.reset()
+        model._set_parameters(self.parameters)
+        model.simulation.run(duration=number_of_doses * self.dosing_interval, log=myokit.LOG_NONE)
+
+        return np.array(model.simulation.state())
+
+    def test_solve(self):
+        """Tests whether the linear and the shooting solve reproduce the steady state reached by long integration.
+        """
+        model = m.SingleOutputModel(self.file_name)
+        model.simulation.set_protocol(self.protocol)
+
+        # expected
+        expected_state = self._brute_force_steady_state(model)
+
+        # assert that both solves agree with long integration
+        for is_linear in [True, False]:
+            solver = SteadyStateSolver(model.simulation, self.dosing_interval, is_linear)
+            model.simulation.reset()
+            model._set_parameters(self.parameters)
+
+            assert np.allclose(expected_state, solver.solve(), rtol=1.0E-4)
+
+    def test_invalid_dosing_interval(self):
+        """Tests whether non-positive dosing intervals are rejected.
+        """
+        model = m.SingleOutputModel(self.file_name)
+
+        with self.assertRaises(ValueError):
+            SteadyStateSolver(model.simulation, dosing_interval=0)
+
+    def test_simulate(self):
+        """Tests whether simulate in steady state mode reproduces the last dosing interval of a long integration.
+        """
+        model = m.SingleOutputModel(self.file_name)
+        model.simulation.set_protocol(self.protocol)
+        times = np.linspace(0.0, self.dosing_interval, 13)[:-1]
+
+        # expected
+        number_of_doses = 50
+        offset = (number_of_doses - 1) * self.dosing_interval
+        expected_result = model.simulate(self.parameters, offset + times)
+
+        # assert that steady state simulation coincides
+        model.set_steady_state(self.dosing_interval)
+        model_result = model.simulate(self.parameters, times)
+
+        assert np.allclose(expected_result, model_result, rtol=1.0E-4)
+
+        # assert that steady state mode can be disabled again
+        model.set_steady_state(None)
+        assert model.steady_state_solver is None
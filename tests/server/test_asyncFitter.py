@@ -0,0 +1,58 @@
+import asyncio
+import unittest
+
+import numpy as np
+
+from PKPD.model import model as m
+from PKPD.server.asyncFitter import AsyncFitter
+
+
+class TestAsyncFitter(unittest.TestCase):
+    """Testing the methods of the AsyncFitter class.
+    """
+    # Test case: Linear One Compartment Model with the dose as initial amount of drug
+    file_name = 'PKPD/modelRepository/1_bolus_linear.mmt'
+    model = m.SingleOutputModel(file_name)
+    true_parameters = np.array([100, 2, 4])
+    times = np.linspace(0.0, 24.0, 25)
+    values = np.array(model.simulate(true_parameters, times))
+
+    def test_jobs(self):
+        """Test concurrent simulations, backpressure and progress of fits.
+        """
+        async def run():
+            async with AsyncFitter(number_of_processes=1, max_concurrency=1) as fitter:
+                # further submissions wait while a job is in flight
+                first_job = await fitter.submit('simulate', {'model': self.file_name,
+                                                             'parameters': self.true_parameters,
+                                                             'times': self.times})
+                with self.assertRaises(asyncio.TimeoutError):
+                    await asyncio.wait_for(fitter.submit('simulate', {'model': self.file_name,
+                                                                      'parameters': self.true_parameters,
+                                                                      'times': self.times}), timeout=0.1)
+                simulations = await asyncio.gather(first_job, *[
+                    fitter.simulate(self.file_name, [scale * self.true_parameters], self.times) for scale in [1, 2]])
+
+                # fits report progress after each restart
+                job = await fitter.submit('fit', {'model': self.file_name, 'times': [self.times],
+                                                  'values': [self.values], 'initial_parameter': [80, 1, 5],
+                                                  'transformation': 'log', 'number_of_iterations': 2, 'seed': 1})
+                progress = [update async for update in job.progress()]
+                fit = await job
+
+            return simulations, progress, fit
+
+        simulations, progress, fit = asyncio.run(run())
+
+        assert np.allclose(simulations[0]['values'], self.values)
+        assert np.allclose(simulations[1]['values'][0], self.values)
+        assert np.allclose(simulations[2]['values'][0], self.model.simulate(2 * self.true_parameters, self.times))
+        assert progress == [0.5, 1.0]
+        assert fit['objective_score'] < 1e-3
+
+        with self.assertRaises(ValueError):
+            asyncio.run(AsyncFitter(max_concurrency=1).submit('fit', {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from PKPD.server.jobQueue import JobQueue
+
+
+class TestJobQueue(unittest.TestCase):
+    """Testing the methods of the JobQueue class.
+    """
+    def test_lifecycle(self):
+        """Test whether jobs are claimed in order, finished, failed and cancelled.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            queue = JobQueue(directory)
+            first_id = queue.submit('fit', {'model': 'a.mmt'})
+            second_id = queue.submit('simulate', {'model': 'b.mmt'})
+            third_id = queue.submit('fit', {'model': 'c.mmt'})
+
+            assert queue.claim() == [first_id, 'fit', {'model': 'a.mmt'}]
+            queue.set_progress(first_id, 0.5)
+            assert queue.get(first_id)['progress'] == 0.5
+            queue.finish(first_id, {'objective_score': 1.0})
+
+            assert queue.claim()[0] == second_id
+            queue.fail(second_id, 'ValueError: invalid')
+
+            assert queue.cancel(third_id)
+            assert not queue.cancel(first_id)
+            assert queue.claim() is None
+
+            jobs = queue.list()
+            assert [job['status'] for job in jobs] == ['done', 'failed', 'cancelled']
+            assert queue.get(first_id)['result'] == {'objective_score': 1.0}
+            assert queue.get(second_id)['error'] == 'ValueError: invalid'
+            assert queue.get(4) is None
+            assert [job['id'] for job in queue.list('failed')] == [second_id]
+
+            with self.assertRaises(ValueError):
+                queue.list('paused')
+
+    def test_concurrent_claims(self):
+        """Test whether concurrent workers claim each job at most once.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            queue = JobQueue(directory)
+            job_ids = [queue.submit('fit', {}) for _ in range(8)]
+
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                claims = list(executor.map(lambda _: JobQueue(directory).claim(), range(12)))
+
+            claimed_ids = [claim[0] for claim in claims if claim is not None]
+            assert sorted(claimed_ids) == job_ids
+
+    def test_persistence(self):
+        """Test whether queued and interrupted jobs survive a restart.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            queue = JobQueue(directory)
+            running_id = queue.submit('fit', {})
+            queued_id = queue.submit('fit', {})
+            queue.claim()
+
+            # reopen the queue as after a restart
+            queue = JobQueue(directory)
+            assert queue.requeue_running() == 1
+            assert queue.claim()[0] == running_id
+            assert queue.claim()[0] == queued_id
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import tempfile
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+from PKPD.model import model as m
+from PKPD.server.jobServer import JobServer
+
+
+class TestJobServer(unittest.TestCase):
+    """Testing the JobServer class through its HTTP interface.
+    """
+    # Test case: Linear One Compartment Model with the dose as initial amount of drug
+    file_name = 'PKPD/modelRepository/1_bolus_linear.mmt'
+    true_parameters = [100, 2, 4]
+    times = np.linspace(0.0, 24.0, 25)
+    values = m.SingleOutputModel(file_name).simulate(true_parameters, times)
+
+    def _request(self, server, method, path, content=None):
+        """Sends a request to the server and returns the status and the decoded response.
+        """
+        data = None if content is None else json.dumps(content).encode('utf-8')
+        request = urllib.request.Request('http://%s:%d%s' % (server.address[0], server.address[1], path), data=data,
+                                         method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as error:
+            return error.code, json.loads(error.read())
+
+    def _wait(self, server, job_id, timeout=120):
+        """Polls a job until it is done or failed.
+        """
+        start = time.time()
+        while time.time() - start < timeout:
+            _, job = self._request(server, 'GET', '/jobs/%d' % job_id)
+            if job['status'] in ['done', 'failed']:
+                return job
+            time.sleep(0.2)
+        raise TimeoutError('Job did not finish.')
+
+    def test_jobs(self):
+        """Test submission, validation, cancellation and results of simulation and fit jobs.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            server = JobServer(directory, port=0, number_of_processes=1)
+
+            # jobs submitted before the start are queued persistently
+            simulation_id = server.submit('simulate', {'model': self.file_name, 'parameters': self.true_parameters,
+                                                       'times': self.times.tolist()})
+
+            server.start()
+            try:
+                status, response = self._request(server, 'POST', '/jobs', {
+                    'kind': 'fit',
+                    'specification': {'model': self.file_name, 'times': [self.times.tolist()],
+                                      'values': [self.values.tolist()], 'initial_parameter': [80, 1, 5],
+                                      'transformation': 'log', 'seed': 1}})
+                assert status == 201
+                fit_id = response['id']
+
+                # jobs queued behind the fit can be cancelled
+                cancelled_id = server.submit('fit', {'model': self.file_name, 'times': [], 'values': []})
+                assert self._request(server, 'DELETE', '/jobs/%d' % cancelled_id)[0] == 200
+
+                # malformed jobs are rejected
+                assert self._request(server, 'POST', '/jobs', {'kind': 'optimise', 'specification': {}})[0] == 400
+                assert self._request(server, 'POST', '/jobs', {'kind': 'fit', 'specification': {'model': 'a'}})[0] \
+                    == 400
+                assert self._request(server, 'POST', '/jobs', {
+                    'kind': 'fit', 'specification': {'model': self.file_name, 'times': 5, 'values': 5}})[0] == 400
+                for doses in [[[0, 100, 0]], [[0, 100]], 'bolus']:
+                    assert self._request(server, 'POST', '/jobs', {
+                        'kind': 'simulate',
+                        'specification': {'model': self.file_name, 'parameters': self.true_parameters,
+                                          'times': self.times.tolist(), 'doses': doses}})[0] == 400
+                assert self._request(server, 'GET', '/jobs/100')[0] == 404
+
+                simulation = self._wait(server, simulation_id)
+                assert simulation['status'] == 'done'
+                assert np.allclose(simulation['result']['values'], self.values)
+
+                fit = self._wait(server, fit_id)
+                assert fit['status'] == 'done' and fit['progress'] == 1
+                assert fit['result']['objective_score'] < 1e-3
+
+                # running and finished jobs cannot be cancelled
+                assert self._request(server, 'DELETE', '/jobs/%d' % fit_id)[0] == 409
+                status, jobs = self._request(server, 'GET', '/jobs?status=cancelled')
+                assert [job['id'] for job in jobs] == [cancelled_id]
+            finally:
+                server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from PKPD.model import model as m
+from PKPD.trial.trialSimulator import LogNormalPopulation, TrialArm, TrialSimulator
+
+
+class TestLogNormalPopulation(unittest.TestCase):
+    """Testing the methods of the LogNormalPopulation class.
+    """
+    def test_sample(self):
+        """Test whether sampled parameters follow the specified log-normal distribution.
+        """
+        population = LogNormalPopulation(typical_parameters=[0, 2, 4],
+                                         variability=[0, 0.2, 0.3],
+                                         correlation=[[1, 0, 0], [0, 1, 0.5], [0, 0.5, 1]]
+                                         )
+        parameters = population.sample(100000, np.random.default_rng(1))
+
+        assert parameters.shape == (100000, 3)
+        assert np.all(parameters[:, 0] == 0)
+
+        log_parameters = np.log(parameters[:, 1:])
+        assert np.allclose(np.mean(log_parameters, axis=0), np.log([2, 4]), atol=0.01)
+        assert np.allclose(np.std(log_parameters, axis=0), [0.2, 0.3], atol=0.01)
+        assert abs(np.corrcoef(log_parameters.T)[0, 1] - 0.5) < 0.01
+
+    def test_invalid_variability(self):
+        """Test whether invalid variabilities are rejected.
+        """
+        with self.assertRaises(ValueError):
+            LogNormalPopulation(typical_parameters=[0, 2, 4], variability=[0, -0.2, 0.3])
+
+
+class TestTrialSimulator(unittest.TestCase):
+    """Testing the methods of the TrialSimulator class.
+    """
+    # Test case: 1-compartment model with two dosing arms
+    file_name = 'PKPD/modelRepository/1_bolus_linear.mmt'
+    sampling_times = np.linspace(1, 24, 6)
+    arms = [TrialArm('low', number_of_subjects=5, sampling_times=sampling_times, dose_times=[0], dose_amounts=[10]),
+            TrialArm('high', number_of_subjects=4, sampling_times=sampling_times, dose_times=[0, 12],
+                     dose_amounts=[20, 20])
+            ]
+
+    def test_run(self):
+        """Test whether the trial is written in the data layout of the GUI and agrees with the model without
+        variability and residual error.
+        """
+        population = LogNormalPopulation(typical_parameters=[0, 2, 4], variability=[0, 0, 0])
+        trial = TrialSimulator(self.file_name, population, self.arms)
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'trial.csv')
+            parameter_file_path = os.path.join(directory, 'parameters.csv')
+            trial.run(file_path, parameter_file_path, chunk_size=2, seed=1)
+            data = pd.read_csv(file_path, na_values=['.'])
+            parameters = pd.read_csv(parameter_file_path)
+
+        assert list(data.columns) == ['ID', 'time', 'central_compartment.drug_concentration', 'dose']
+        assert len(data) == 5 * (6 + 1) + 4 * (6 + 2)
+        assert np.array_equal(np.unique(data['ID']), np.arange(1, 10))
+        assert list(parameters['arm']) == ['low'] * 5 + ['high'] * 4
+
+        # compare observations of the last subject with the model
+        model = m.SingleOutputModel(self.file_name)
+        model.simulation.set_protocol(self.arms[1].get_protocol())
+        expected_result = model.simulate([0, 2, 4], self.sampling_times)
+        subject_data = data[(data['ID'] == 9) & data['dose'].isna()]
+
+        assert np.allclose(subject_data['central_compartment.drug_concentration'], expected_result)
+        assert np.array_equal(data[data['ID'] == 9]['dose'].dropna(), [20, 20])
+
+    def test_run_parallel(self):
+        """Test whether a trial simulated across processes coincides with the trial simulated in one process.
+        """
+        population = LogNormalPopulation(typical_parameters=[0, 2, 4], variability=[0, 0.3, 0.2])
+        trial = TrialSimulator(self.file_name, population, self.arms, additive_error=0.01, proportional_error=0.1)
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, 'trial.csv')
+            trial.run(file_path, chunk_size=2, seed=2)
+            data = pd.read_csv(file_path, na_values=['.'])
+
+            trial.run(file_path, number_of_processes=2, chunk_size=2, seed=2)
+            parallel_data = pd.read_csv(file_path, na_values=['.'])
+
+        assert data.equals(parallel_data)